@@ -0,0 +1,9 @@
+"""Scale benchmarks of user management ('python -m benchmarks').
+
+'user add', 'user delete', 'user pause', 'config reconcile' and 'status' are
+run through the real CLI and pkg code against generated installations of
+10, 100, 1k (and, with --sizes, 10k) users. Docker is replaced by an
+in-memory fake (fake_docker.py), so what is measured is the CLI's own cost:
+wall time, files read and written, and the docker processes it would
+spawn. Results are compared with baselines.json; --update rewrites it.
+"""
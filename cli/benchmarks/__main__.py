@@ -0,0 +1,79 @@
+"""python -m benchmarks: run the scale benchmarks and compare with baselines.json."""
+
+import sys
+import click
+from . import suite
+
+DEFAULT_SIZES = "10,100,1000"
+
+
+def _sizes(_ctx, _param, value):
+    """Parse --sizes "10,100" into [10, 100]."""
+    try:
+        sizes = [int(size) for size in value.split(",") if size.strip()]
+    except ValueError as exc:
+        raise click.BadParameter("comma-separated user counts, e.g. 10,100") from exc
+    if not sizes or min(sizes) < 1:
+        raise click.BadParameter("comma-separated user counts, e.g. 10,100")
+    return sizes
+
+
+def _echo_row(size, name, metrics, problems):
+    """One result line, with its regressions (if any)."""
+    line = (
+        f"{size:>6}  {name:<10} {metrics['seconds']:>9.3f}s "
+        f"{metrics['files_read']:>8} {metrics['files_written']:>8} {metrics['docker_calls']:>7}"
+    )
+    click.echo(line + (f"  REGRESSED: {'; '.join(problems)}" if problems else ""))
+
+
+@click.command()
+@click.option(
+    "--sizes",
+    default=DEFAULT_SIZES,
+    show_default=True,
+    callback=_sizes,
+    help=f"Registry sizes to benchmark (any of {', '.join(map(str, suite.SIZES))}, or others).",
+)
+@click.option(
+    "--scenario",
+    "scenarios",
+    multiple=True,
+    type=click.Choice([name for name, _ in suite.scenarios()]),
+    help="Only report these scenarios (repeatable; all still run).",
+)
+@click.option("--update", is_flag=True, help="Store the results as the new baselines.")
+@click.option(
+    "--tolerance",
+    type=float,
+    default=0.5,
+    show_default=True,
+    help="Allowed wall-time slowdown over the baseline (0.5 = 50%).",
+)
+def main(sizes, scenarios, update, tolerance):
+    """Benchmark user management at each registry size against a fake Docker.
+
+    Exits non-zero when a file or docker call count grows, or wall time
+    grows by more than --tolerance, over benchmarks/baselines.json.
+    """
+    baselines = suite.load_baselines()
+    regressed = False
+    click.echo("  SIZE  SCENARIO        TIME    READS   WRITES  DOCKER")
+    for size in sizes:
+        results = suite.run_size(size, only=set(scenarios) or None)
+        for name, metrics in results.items():
+            baseline = baselines.get(str(size), {}).get(name)
+            problems = suite.compare(metrics, baseline, tolerance) if baseline else []
+            regressed = regressed or bool(problems)
+            _echo_row(size, name, metrics, problems)
+        if update:
+            baselines.setdefault(str(size), {}).update(results)
+    if update:
+        suite.save_baselines(baselines)
+        click.echo(f"Baselines written to {suite.BASELINES}")
+    elif regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,196 @@
+"""An in-memory Docker daemon standing in for python-on-whales and the docker CLI.
+
+FakeDocker keeps the containers of every compose project it is asked to run
+and answers the DockerClient calls the pkg modules make -- compose
+ps/up/stop/start/pause/unpause/rm/down, container.list, image.exists/pull
+and system.info -- plus the 'docker compose -f <file> up -d|rm --stop
+--force <users>' processes users_compose.run_command_for_containers starts.
+patched() points deploy/images/capacity/template_layer/reconcile_watch's
+DockerClient and users_compose's subprocess.run at it.
+
+Each client call is recorded with docker_calls.record as the docker process
+it would have spawned (users_compose records its own), so a
+docker_calls.recording() around a command counts its docker round trips.
+"""
+
+import os
+import subprocess
+from contextlib import ExitStack, contextmanager
+from itertools import count
+from types import SimpleNamespace
+from unittest.mock import patch
+from src.pkg import docker_calls
+
+COMPOSE_SERVICE_LABEL = "com.docker.compose.service"
+
+# The modules that build their own DockerClient.
+CLIENT_MODULES = ("deploy", "images", "capacity", "template_layer", "reconcile_watch")
+
+
+def _project(compose_file):
+    """The key of the compose project of *compose_file*."""
+    return os.path.normpath(os.path.abspath(str(compose_file)))
+
+
+def _names(services):
+    """A list of service names from python-on-whales' str/list/None argument."""
+    if services is None:
+        return None
+    return [services] if isinstance(services, str) else list(services)
+
+
+class FakeDocker:
+    """The containers of every compose project, keyed by service name."""
+
+    def __init__(self):
+        self.containers = {}
+        self._ids = count(1)
+
+    def client(self, compose_files=None, **_options):
+        """A DockerClient stand-in bound to *compose_files* (if any)."""
+        project = _project(compose_files[0]) if compose_files else None
+        return SimpleNamespace(
+            compose=FakeCompose(self, project),
+            container=SimpleNamespace(list=self._container_list),
+            image=SimpleNamespace(exists=self._image_exists, pull=self._image_pull),
+            system=SimpleNamespace(info=self._system_info),
+        )
+
+    def container(self, project, service):
+        """The container of *service*, created in *project* if it has none."""
+        if service not in self.containers:
+            self.containers[service] = SimpleNamespace(
+                id=f"{next(self._ids):064x}",
+                name=f"dtaas-cli-{service}",
+                project=project,
+                config=SimpleNamespace(labels={COMPOSE_SERVICE_LABEL: service}),
+                state=SimpleNamespace(status="created", paused=False, health=None),
+                host_config=SimpleNamespace(nano_cpus=0, memory=0, pids_limit=0),
+            )
+        return self.containers[service]
+
+    def in_project(self, project, services=None):
+        """The containers of *project*, or just those of *services*."""
+        wanted = None if services is None else set(services)
+        return [
+            container
+            for name, container in self.containers.items()
+            if container.project == project and (wanted is None or name in wanted)
+        ]
+
+    def set_status(self, containers, status):
+        """Move *containers* to *status* ("paused" also sets state.paused)."""
+        for container in containers:
+            container.state.status = status
+            container.state.paused = status == "paused"
+
+    def _container_list(self):
+        docker_calls.record(["docker", "container", "ls"], 0.0, 0)
+        return [c for c in self.containers.values() if c.state.status == "running"]
+
+    @staticmethod
+    def _image_exists(image):
+        docker_calls.record(["docker", "image", "inspect", image], 0.0, 0)
+        return True
+
+    @staticmethod
+    def _image_pull(image, quiet=False):
+        del quiet
+        docker_calls.record(["docker", "image", "pull", image], 0.0, 0)
+        return SimpleNamespace(repo_digests=[f"{image}@sha256:{'0' * 64}"], id=image)
+
+    @staticmethod
+    def _system_info():
+        docker_calls.record(["docker", "system", "info"], 0.0, 0)
+        return SimpleNamespace(n_cpu=64, mem_total=256 * 1024**3, driver="overlay2")
+
+    def run(self, argv, **_kwargs):
+        """subprocess.run stand-in for 'docker ... compose -f F [-p P] <verb> <users>'."""
+        args = [str(arg) for arg in argv]
+        compose = args.index("compose")
+        project, rest = None, args[compose + 1:]
+        while rest and rest[0] in ("-f", "-p"):
+            if rest[0] == "-f":
+                project = _project(rest[1])
+            rest = rest[2:]
+        verb, names = rest[0], [arg for arg in rest[1:] if not arg.startswith("-")]
+        if verb == "up":
+            self.set_status([self.container(project, name) for name in names], "running")
+        elif verb == "rm":
+            for name in names:
+                self.containers.pop(name, None)
+        return subprocess.CompletedProcess(args, 0)
+
+    @contextmanager
+    def patched(self):
+        """Route the CLI's Docker clients and docker processes to this fake."""
+        with ExitStack() as stack:
+            for module in CLIENT_MODULES:
+                stack.enter_context(patch(f"src.pkg.{module}.DockerClient", self.client))
+            stack.enter_context(patch("src.pkg.users_compose.subprocess.run", self.run))
+            yield self
+
+
+class FakeCompose:
+    """client.compose of one compose project."""
+
+    def __init__(self, docker, project):
+        self.docker = docker
+        self.project = project
+
+    def _record(self, verb, services=None):
+        docker_calls.record(["docker", "compose", verb, *(services or [])], 0.0, 0)
+
+    def ps(self, services=None, all=False):  # pylint: disable=redefined-builtin
+        """The project's containers; stopped ones only with all=True."""
+        names = _names(services)
+        self._record("ps", names)
+        containers = self.docker.in_project(self.project, names)
+        if all:
+            return containers
+        return [c for c in containers if c.state.status in ("running", "paused")]
+
+    def up(self, services=None, **_options):
+        """Create and start *services* (None: every container of the project)."""
+        names = _names(services)
+        self._record("up", names)
+        if names is None:
+            containers = self.docker.in_project(self.project)
+        else:
+            containers = [self.docker.container(self.project, name) for name in names]
+        self.docker.set_status(containers, "running")
+
+    def _move(self, verb, services, status):
+        names = _names(services)
+        self._record(verb, names)
+        self.docker.set_status(self.docker.in_project(self.project, names), status)
+
+    def stop(self, services=None, **_options):
+        """Stop *services*."""
+        self._move("stop", services, "exited")
+
+    def start(self, services=None, **_options):
+        """Start *services*."""
+        self._move("start", services, "running")
+
+    def pause(self, services=None):
+        """Pause *services*."""
+        self._move("pause", services, "paused")
+
+    def unpause(self, services=None):
+        """Unpause *services*."""
+        self._move("unpause", services, "running")
+
+    def _remove(self, verb, services):
+        names = _names(services)
+        self._record(verb, names)
+        for container in self.docker.in_project(self.project, names):
+            self.docker.containers.pop(container.config.labels[COMPOSE_SERVICE_LABEL])
+
+    def rm(self, services=None, **_options):
+        """Remove *services*."""
+        self._remove("rm", services)
+
+    def down(self, **_options):
+        """Remove every container of the project."""
+        self._remove("down", None)
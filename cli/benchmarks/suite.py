@@ -0,0 +1,212 @@
+"""The scale benchmarks: user management commands against N-user installations.
+
+For each size, run_size() generates an installation (generate-project files,
+the insecure-server deployment, a users.csv of N users) in a temp directory
+and runs these 'dtaas' commands through click, in order, against a
+FakeDocker:
+
+    add_file   admin user add --file users.csv   (registers all N users)
+    add        admin user add <one more user>
+    pause      admin user pause <first user>
+    status     admin status --json
+    reconcile  admin config reconcile
+    delete     admin user delete <the added user>
+
+Each command is one measurement: its wall time, the files it opened for
+reading and for writing (plus /proc/self/io's rchar/wchar where available)
+and the docker processes it would have spawned, per docker command.
+"""
+
+import builtins
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import patch
+import tomlkit
+from click.testing import CliRunner
+from src.cmd import dtaas
+from src.pkg import docker_calls, utils
+from src.pkg import project as projectPkg
+from .fake_docker import FakeDocker
+
+SIZES = (10, 100, 1000, 10000)
+BASELINES = Path(__file__).parent / "baselines.json"
+NEW_USER = "benchuser"
+SERVER = "dtaas.example.org"
+
+# Metrics that only change when the code does; wall time is compared with a
+# tolerance instead.
+COUNTED = ("files_read", "files_written", "docker_calls")
+
+
+def username(index):
+    """The name of the generated user *index*."""
+    return f"user{index:05d}"
+
+
+def scenarios():
+    """[(name, dtaas argv)] in the order they run."""
+    return [
+        ("add_file", ["admin", "user", "add", "--file", "users.csv"]),
+        ("add", ["admin", "user", "add", NEW_USER, "--email", f"{NEW_USER}@example.org"]),
+        ("pause", ["admin", "user", "pause", username(0)]),
+        ("status", ["admin", "status", "--json"]),
+        ("reconcile", ["admin", "config", "reconcile"]),
+        ("delete", ["admin", "user", "delete", NEW_USER]),
+    ]
+
+
+def write_users_csv(path, size):
+    """A users.csv of *size* users."""
+    lines = ["username,email,groups,load_balance"]
+    lines += [f"{username(i)},{username(i)}@example.org,additional,true" for i in range(size)]
+    Path(path).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def make_installation(root, size):
+    """Generate an insecure-server installation in *root* with a users.csv
+    of *size* users; dtaas.toml serves SERVER from *root* without TLS."""
+    projectPkg.generate_project(str(root))
+    projectPkg.generate_deploy_project("insecure-server", str(root))
+    toml = Path(root) / "dtaas.toml"
+    config = tomlkit.parse(toml.read_text(encoding="utf-8"))
+    config["common"]["server-dns"] = SERVER
+    config["common"]["path"] = str(root)
+    config["common"]["security"]["tls"] = False
+    toml.write_text(tomlkit.dumps(config), encoding="utf-8")
+    write_users_csv(Path(root) / "users.csv", size)
+
+
+class _FileCounter:
+    """Files opened for reading and for writing through open()/io.open()."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.read = 0
+        self.written = 0
+
+    def wrap(self, original):
+        """An open() that counts what it opens."""
+
+        def counted(file, *args, **kwargs):
+            mode = args[0] if args else kwargs.get("mode", "r")
+            with self.lock:
+                if any(flag in mode for flag in "wax+"):
+                    self.written += 1
+                else:
+                    self.read += 1
+            return original(file, *args, **kwargs)
+
+        return counted
+
+    @contextmanager
+    def counting(self):
+        """Count the files opened in the enclosed block."""
+        with patch.object(builtins, "open", self.wrap(builtins.open)), patch.object(
+            io, "open", self.wrap(io.open)
+        ):
+            yield self
+
+
+def _proc_io():
+    """(rchar, wchar) of this process from /proc/self/io, or None."""
+    try:
+        with open("/proc/self/io", encoding="ascii") as handle:
+            fields = dict(line.split(": ") for line in handle.read().splitlines())
+    except OSError:
+        return None
+    return int(fields["rchar"]), int(fields["wchar"])
+
+
+@contextmanager
+def measure():
+    """Measure the enclosed block; yields the metrics dict, filled on exit."""
+    metrics = {}
+    counter = _FileCounter()
+    before = _proc_io()
+    started = time.perf_counter()
+    with docker_calls.recording() as recorder, counter.counting():
+        try:
+            yield metrics
+        finally:
+            metrics["seconds"] = round(time.perf_counter() - started, 4)
+            metrics["files_read"] = counter.read
+            metrics["files_written"] = counter.written
+            after = _proc_io()
+            if before and after:
+                metrics["bytes_read"] = after[0] - before[0]
+                metrics["bytes_written"] = after[1] - before[1]
+            metrics["docker_calls"] = recorder.count()
+            metrics["docker_commands"] = {
+                command: int(row["calls"]) for command, row in recorder.summary().items()
+            }
+
+
+@contextmanager
+def _working_directory(path):
+    """Run the enclosed block from *path*."""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def run_size(size, only=None):
+    """{scenario: metrics} for a fresh installation of *size* users.
+
+    *only* limits the measurements reported (every scenario still runs, as
+    each builds on the one before). Raises RuntimeError when a command fails.
+    """
+    runner = CliRunner()
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="dtaas-bench-") as root, _working_directory(
+        root
+    ), FakeDocker().patched():
+        make_installation(Path(root).resolve(), size)
+        for name, argv in scenarios():
+            with measure() as metrics:
+                result = runner.invoke(dtaas, argv)
+            if result.exit_code != 0:
+                raise RuntimeError(
+                    f"{size} users, {name}: 'dtaas {' '.join(argv)}' failed:\n{result.output}"
+                )
+            if only is None or name in only:
+                results[name] = metrics
+    return results
+
+
+def load_baselines(path=BASELINES):
+    """{size: {scenario: metrics}} from the baselines file ({} if absent)."""
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(baselines, path=BASELINES):
+    """Write *baselines* (temp file + os.replace)."""
+    utils.write_json(baselines, path)
+
+
+def compare(current, baseline, tolerance):
+    """The regressions of *current* metrics against *baseline* as messages.
+
+    Counted metrics regress on any increase; wall time when it exceeds the
+    baseline by more than *tolerance* (0.5 = 50%).
+    """
+    problems = []
+    for metric in COUNTED:
+        if metric in baseline and current[metric] > baseline[metric]:
+            problems.append(f"{metric} {baseline[metric]} -> {current[metric]}")
+    seconds = baseline.get("seconds")
+    if seconds and current["seconds"] > seconds * (1 + tolerance):
+        problems.append(f"seconds {seconds:.3f} -> {current['seconds']:.3f}")
+    return problems
@@ -0,0 +1,5 @@
+"""'python -m src': the dtaas CLI, as fleet mode runs it per installation."""
+
+from .cmd import dtaas
+
+dtaas()  # pylint: disable=no-value-for-parameter
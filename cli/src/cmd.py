@@ -1,8 +1,11 @@
 """This file defines all cli entrypoints for DTaaS"""
 
+import sys
 import click
 from python_on_whales.exceptions import DockerException
 from .pkg import project as projectPkg
+from .pkg import trace as tracePkg
+from .pkg import docker_calls as dockerCallsPkg
 from .pkg import deploy as deployPkg
 from .pkg import config_validate as configValidatePkg
 from .pkg.project import DEPLOY_TYPES
@@ -15,22 +18,64 @@ from .cmd_utils import (
     UpdateOptions,
     confirm_remove_user_files,
     run_reconcile,
+    run_reconcile_watch,
     run_uninstall,
     run_update,
 )
 from .cmd_user import (
     add as user_add,
     delete as user_delete,
+    list_users as user_list,
     pause as user_pause,
     resume as user_resume,
     stop as user_stop,
 )
+from .cmd_user_usage import (
+    hibernate as user_hibernate,
+    resize as user_resize,
+    suggest_limits as user_suggest_limits,
+    wake as user_wake,
+    warm_pool as user_warm_pool,
+)
+from .cmd_user_snapshot import restore as user_restore, snapshot as user_snapshot
 from .cmd_lifecycle import add_lifecycle_commands
+from .cmd_fleet import fleet
+from .cmd_capacity import capacity
+from .cmd_history import HistoryGroup, history
+from .cmd_scheduler import scheduler
+
+
+def _command_path(group, ctx, args):
+    """'dtaas <subcommand> ...' named by the command words of *args* (options skipped)."""
+    names, command = ["dtaas"], group
+    for arg in args:
+        if arg.startswith("-"):
+            continue
+        if not isinstance(command, click.Group):
+            break
+        command = command.get_command(ctx, arg)
+        if command is None:
+            break
+        names.append(arg)
+    return " ".join(names)
 
 
 ### Groups
 @click.group()
-def dtaas():
+@click.option(
+    "--trace",
+    is_flag=True,
+    help="Write timed phases of this command to .dtaas.trace.json "
+    "(Chrome trace format; or set DTAAS_TRACE=1 or DTAAS_TRACE=<file>).",
+)
+@click.option(
+    "--docker-calls",
+    is_flag=True,
+    help="Print how many docker processes this command spawned and their time "
+    "per docker command (or set DTAAS_DOCKER_CALLS=1).",
+)
+@click.pass_context
+def dtaas(ctx, trace, docker_calls):
     """Provision, configure, and manage Digital Twin as a Service environments.
 
     \b
@@ -43,7 +88,12 @@ def dtaas():
 
     Full documentation: https://pypi.org/project/dtaas
     """
-    return
+    path = tracePkg.trace_path(trace)
+    if path:
+        name = _command_path(ctx.command, ctx, sys.argv[1:])
+        ctx.with_resource(tracePkg.session(name, path))
+    if dockerCallsPkg.enabled(docker_calls):
+        ctx.with_resource(dockerCallsPkg.session())
 
 
 @dtaas.command(name="generate-project")
@@ -70,7 +120,7 @@ def generate_project(output_dir, force):
     click.echo("Project files generated successfully")
 
 
-@dtaas.group()
+@dtaas.group(cls=HistoryGroup)
 def admin():
     """Commands to install, update, and manage a DTaaS deployment.
 
@@ -153,7 +203,26 @@ def config_validate(output_dir):
     is_flag=True,
     help="Reprovision missing/drifted registry users after reporting.",
 )
-def config_reconcile(output_dir, fix):
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running, reporting drift as Docker events and registry changes occur.",
+)
+@click.option(
+    "--debounce",
+    type=click.FloatRange(min=0),
+    default=5.0,
+    show_default=True,
+    help="With --watch --fix, seconds without new drift before fixing.",
+)
+@click.option(
+    "--min-interval",
+    type=click.FloatRange(min=0),
+    default=30.0,
+    show_default=True,
+    help="With --watch --fix, minimum seconds between two fix runs.",
+)
+def config_reconcile(output_dir, fix, watch, **timing):
     """Report drift between the user registry and what is actually provisioned.
 
     Compares dtaas.users.registry.json (desired) against the live
@@ -165,18 +234,29 @@ def config_reconcile(output_dir, fix):
     state does not match its registry desired_status (paused/stopped/running).
 
     Without --fix this is read-only. With --fix, missing and drifted users are
-    reprovisioned and every provisioned user is paused/stopped/started to match
-    its desired_status (equivalent to running 'dtaas admin user add', so it
-    operates on the current directory regardless of --output-dir). 'unexpected'
+    reprovisioned (just those users, as 'dtaas admin user add' would add them,
+    so it operates on the current directory regardless of --output-dir) and
+    the users with desired-status drift are paused/stopped/started to match. 'unexpected'
     services (running but not registered) are never touched by --fix -- remove
     those deliberately with 'dtaas admin user delete'.
 
+    With --watch it keeps running: the registry, compose services and live
+    container states are held in memory, Docker events and registry/compose
+    file changes update them, and only the affected users' drift is
+    recomputed and reported. With --watch --fix, drifted users are fixed in
+    batches once no new drift appeared for --debounce seconds, at most once
+    every --min-interval seconds.
+
     \b
     Examples:
       dtaas admin config reconcile           # report drift (read-only)
       dtaas admin config reconcile --fix     # reprovision + enforce status
+      dtaas admin config reconcile --watch --fix
     """
     try:
+        if watch:
+            run_reconcile_watch(output_dir, fix, timing["debounce"], timing["min_interval"])
+            return
         run_reconcile(output_dir, fix)
     except (OSError, ValueError, DockerException) as exc:
         raise click.ClickException(str(exc)) from exc
@@ -236,11 +316,24 @@ def user():
 #### user group commands (defined in cmd_user.py to keep this file short)
 user.add_command(user_add)
 user.add_command(user_delete)
+user.add_command(user_list)
 user.add_command(user_pause)
 user.add_command(user_stop)
 user.add_command(user_resume)
+user.add_command(user_hibernate)
+user.add_command(user_wake)
+user.add_command(user_resize)
+user.add_command(user_suggest_limits)
+user.add_command(user_warm_pool)
+user.add_command(user_snapshot)
+user.add_command(user_restore)
 #### lifecycle commands status/stop/pause/resume (defined in cmd_lifecycle.py)
 add_lifecycle_commands(admin)
+#### fleet group: the same commands across installations (cmd_fleet.py)
+admin.add_command(fleet)
+admin.add_command(capacity)
+admin.add_command(history)
+admin.add_command(scheduler)
 
 
 @admin.command(name="install")
@@ -0,0 +1,107 @@
+"""The 'capacity' admin command: how many more workspaces each host can take.
+
+Defined here, like cmd_lifecycle.py's commands, to keep cmd.py within a
+reasonable line count; cmd.py wires it onto the 'admin' group via
+Group.add_command.
+"""
+
+import json
+import math
+import click
+from python_on_whales.exceptions import DockerException
+from .pkg import capacity as capacityPkg
+from .pkg import config as configPkg
+from .cmd_lifecycle import json_option, size_text
+
+
+def _value(result):
+    """The value of a Config getter's (value, err), or ClickException on err."""
+    value, err = result
+    if err is not None:
+        raise click.ClickException(str(err))
+    return value
+
+
+def _settings():
+    """(per-workspace demand, Docker endpoints to plan) from dtaas.toml."""
+    try:
+        config_obj = configPkg.Config()
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc)) from exc
+    resources = _value(config_obj.get_resource_limits())
+    set_limits = _value(config_obj.get_set_limits())
+    hosts = _value(config_obj.get_hosts())
+    try:
+        demand = capacityPkg.workspace_demand(resources, set_limits)
+    except ValueError as exc:
+        raise click.ClickException(str(exc)) from exc
+    endpoints = [""] + [str(host.get("endpoint", "")) for host in hosts]
+    return demand, list(dict.fromkeys(endpoints))
+
+
+def _record(plan, demand):
+    """A JSON-friendly record of one host's plan (None: unbounded)."""
+    fits = plan.fits(demand)
+    record = {"host": plan.endpoint or "local", "fits": None if fits == math.inf else fits}
+    for index, name in enumerate(capacityPkg.DIMENSIONS):
+        total = plan.total[index]
+        record[name] = {
+            "total": None if total == math.inf else total,
+            "reserved": plan.reserved[index],
+        }
+    return record
+
+
+def _cell(record, name):
+    """'free/total' for one dimension of a record."""
+    total, reserved = record[name]["total"], record[name]["reserved"]
+    if total is None:
+        return "-"
+    show = size_text if name == "mem" else lambda v: f"{v:g}"
+    return f"{show(max(total - reserved, 0))}/{show(total)}"
+
+
+def _echo_plans(records, demand):
+    """Print the plans as an aligned table under the per-workspace demand."""
+    cpus, mem, pids = demand
+    click.echo(f"Per workspace: {cpus:g} cpus, {size_text(mem)} memory, {pids} pids")
+    table = [("HOST", "CPUS free/total", "MEM free/total", "PIDS free/total", "FITS")]
+    table += [
+        (
+            r["host"],
+            *(_cell(r, name) for name in capacityPkg.DIMENSIONS),
+            "unbounded" if r["fits"] is None else str(r["fits"]),
+        )
+        for r in records
+    ]
+    widths = [max(len(row[i]) for row in table) for i in range(len(table[0]))]
+    for row in table:
+        click.echo("  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)))
+
+
+@click.command(name="capacity")
+@json_option
+def capacity(as_json):
+    """Show how many more workspaces each Docker host can take.
+
+    \b
+    Examples:
+      dtaas admin capacity
+      dtaas admin capacity --json
+
+    Compares each host's CPUs, memory and pid space (the local host's from
+    /proc, a [[common.users.hosts]] endpoint's from 'docker info') with the
+    limits of its running containers, and divides what is left by the
+    [common.resources] limits of one workspace. 'user add' and 'config
+    reconcile --fix' run the same check ([common.users] capacity_policy).
+    """
+    demand, endpoints = _settings()
+    try:
+        records = [_record(capacityPkg.plan(e), demand) for e in endpoints]
+    except (OSError, DockerException) as exc:
+        raise click.ClickException(f"Error while reading host capacity: {exc}") from exc
+    if as_json:
+        summary = {"demand": dict(zip(capacityPkg.DIMENSIONS, demand)), "hosts": records}
+        click.echo(json.dumps(summary, indent=2))
+    else:
+        _echo_plans(records, demand)
@@ -0,0 +1,117 @@
+"""The 'fleet' subcommands: status, reconcile, update-certs and validate run
+across every installation listed in a fleet manifest (see pkg/fleet.py).
+
+Defined here, like cmd_lifecycle.py's commands, to keep cmd.py within a
+reasonable line count; cmd.py wires the 'fleet' group onto 'admin' via
+Group.add_command.
+"""
+
+import json
+import click
+from .pkg import fleet as fleetPkg
+from .pkg.constants import FLEET_JOBS, FLEET_MANIFEST
+from .cmd_lifecycle import json_option, status_rows_text
+
+
+def _fleet_options(command):
+    """Add the --manifest and --jobs options every fleet command takes."""
+    command = click.option(
+        "--jobs",
+        type=click.IntRange(min=1),
+        default=FLEET_JOBS,
+        show_default=True,
+        help="How many installations to handle at once.",
+    )(command)
+    return click.option(
+        "--manifest",
+        type=click.Path(exists=True, dir_okay=False),
+        default=FLEET_MANIFEST,
+        show_default=True,
+        help="Fleet manifest listing the installations.",
+    )(command)
+
+
+def _run(manifest, jobs, args):
+    """Run 'dtaas <args>' across the manifest's installations; return the Outcomes."""
+    installations, err = fleetPkg.load_manifest(manifest)
+    if err is not None:
+        raise click.ClickException(str(err))
+    return fleetPkg.run(installations, args, jobs)
+
+
+def _fail_on(failed):
+    """Exit non-zero naming the installations the command failed on."""
+    if failed:
+        raise click.ClickException(f"Failed on: {', '.join(failed)}")
+
+
+def _report(outcomes):
+    """Echo every installation's output under its name, then a summary."""
+    for outcome in outcomes:
+        mark = "ok" if outcome.ok else f"FAILED (exit {outcome.returncode})"
+        click.echo(f"== {outcome.installation.name}: {mark}")
+        for line in (outcome.stdout + outcome.stderr).strip().splitlines():
+            click.echo(f"   {line}")
+    failed = [o.installation.name for o in outcomes if not o.ok]
+    click.echo(f"{len(outcomes) - len(failed)}/{len(outcomes)} installation(s) succeeded")
+    _fail_on(failed)
+
+
+@click.group()
+def fleet():
+    """Run admin commands across several DTaaS installations at once.
+
+    \b
+    The installations are listed in a fleet manifest (dtaas.fleet.toml):
+      [[installations]]
+      name = "lab-a"
+      path = "/opt/dtaas-lab-a"
+      context = "lab-a"      # optional docker context
+
+    Each installation is handled in its own process in its own directory,
+    --jobs at a time, and the results are merged into one report. A fleet
+    command exits non-zero when it failed on any installation.
+    """
+    return
+
+
+@fleet.command(name="status")
+@_fleet_options
+@json_option
+def status(manifest, jobs, as_json):
+    """Report per-service state of every installation in one table."""
+    rows, errors = fleetPkg.merge_status(_run(manifest, jobs, ["admin", "status", "--json"]))
+    if as_json:
+        click.echo(json.dumps({"rows": rows, "errors": errors}, indent=2))
+    elif rows:
+        click.echo(status_rows_text(rows))
+    for name, error in errors.items():
+        click.echo(f"{name}: {error}", err=True)
+    _fail_on(list(errors))
+
+
+@fleet.command(name="reconcile")
+@_fleet_options
+@click.option(
+    "--fix",
+    is_flag=True,
+    help="Reprovision missing/drifted users and enforce desired status.",
+)
+def reconcile(manifest, jobs, fix):
+    """Run 'config reconcile' (optionally --fix) on every installation."""
+    args = ["admin", "config", "reconcile"] + (["--fix"] if fix else [])
+    _report(_run(manifest, jobs, args))
+
+
+@fleet.command(name="update-certs")
+@_fleet_options
+def update_certs(manifest, jobs):
+    """Run 'update --certs' on every installation."""
+    _report(_run(manifest, jobs, ["admin", "update", "--certs"]))
+
+
+@fleet.command(name="validate")
+@_fleet_options
+def validate(manifest, jobs):
+    """Run 'config validate' on every installation."""
+    _report(_run(manifest, jobs, ["admin", "config", "validate"]))
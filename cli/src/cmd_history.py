@@ -0,0 +1,142 @@
+"""The 'history' admin command and the 'admin' group class that records it.
+
+Every command run through HistoryGroup (the 'admin' group) is appended to
+.dtaas.history.jsonl (see pkg/history.py); 'dtaas admin history' reads it
+back. Defined here, like cmd_lifecycle.py's commands, to keep cmd.py within
+a reasonable line count.
+"""
+
+import json
+import click
+from .pkg import history as historyPkg
+from .pkg.constants import HISTORY_FILE
+from .cmd_lifecycle import json_option
+
+_ARGS = "dtaas.history.args"
+
+
+def split_command(group, ctx, args):
+    """(command words, remaining args) of *args* given to *group*: the
+    subcommand names up to the first option or argument, and the rest."""
+    words, rest, command = [], [], group
+    for arg in args:
+        sub = None
+        if not rest and isinstance(command, click.Group) and not arg.startswith("-"):
+            sub = command.get_command(ctx, arg)
+        if sub is None:
+            rest.append(arg)
+            continue
+        words.append(arg)
+        command = sub
+    return words, rest
+
+
+class HistoryGroup(click.Group):
+    """A click Group that records each command run through it in the history."""
+
+    def parse_args(self, ctx, args):
+        ctx.meta[_ARGS] = list(args)
+        return super().parse_args(ctx, args)
+
+    def invoke(self, ctx):
+        words, rest = split_command(self, ctx, ctx.meta.get(_ARGS, []))
+        path = historyPkg.history_path()
+        if not words or words[0] == "history" or path is None:
+            return super().invoke(ctx)
+        with historyPkg.recording(" ".join([ctx.info_name, *words]), rest, path):
+            return super().invoke(ctx)
+
+
+def _since(_ctx, _param, value):
+    """Parse --since into a UTC datetime."""
+    if value is None:
+        return None
+    try:
+        return historyPkg.parse_since(value)
+    except ValueError as exc:
+        raise click.BadParameter("use e.g. 30m, 12h, 7d, 2w or 2026-10-01") from exc
+
+
+def _echo_table(table):
+    """Print rows of cells as aligned columns."""
+    widths = [max(len(row[i]) for row in table) for i in range(len(table[0]))]
+    for row in table:
+        click.echo("  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)).rstrip())
+
+
+def _echo_entries(entries):
+    """Print entries as an aligned table, one per line."""
+    table = [("STARTED", "COMMAND", "OUTCOME", "SECONDS", "DOCKER", "USERS")]
+    for entry in entries:
+        users = entry.get("users", [])
+        table.append(
+            (
+                entry["started"],
+                " ".join([entry["command"], *entry.get("args", [])]),
+                entry.get("outcome", "?"),
+                f"{entry.get('seconds', 0):.1f}",
+                str(entry.get("docker_calls", 0)),
+                ",".join(users[:3]) + (f" (+{len(users) - 3})" if len(users) > 3 else ""),
+            )
+        )
+    _echo_table(table)
+
+
+def _echo_summary(rows):
+    """Print per-command duration percentiles as an aligned table."""
+    table = [("COMMAND", "RUNS", "FAILED", "P50", "P90", "P99", "MAX")]
+    for command, row in rows.items():
+        seconds = (f"{row[key]:.1f}" for key in ("p50", "p90", "p99", "max"))
+        table.append((command, str(row["runs"]), str(row["failed"]), *seconds))
+    _echo_table(table)
+
+
+@click.command(name="history")
+@click.option("--command", help="Only commands starting with this, e.g. 'user add'.")
+@click.option("--since", callback=_since, help="Only commands started since: 7d, 12h, a date.")
+@click.option("--outcome", type=click.Choice(historyPkg.OUTCOMES), help="Only this outcome.")
+@click.option("--user", help="Only commands that affected this user.")
+@click.option(
+    "--slowest", type=click.IntRange(min=1), help="Show the N slowest commands instead."
+)
+@click.option(
+    "--limit",
+    type=click.IntRange(min=1),
+    default=20,
+    show_default=True,
+    help="Show at most this many (most recent) commands.",
+)
+@click.option("--summary", is_flag=True, help="Show run counts and p50/p90/p99 times per command.")
+@json_option
+def history(slowest, limit, summary, as_json, **filters):
+    """Show the 'dtaas admin' commands run from this directory.
+
+    \b
+    Examples:
+      dtaas admin history
+      dtaas admin history --command "user add" --since 7d
+      dtaas admin history --user alice --outcome failed
+      dtaas admin history --slowest 5
+      dtaas admin history --summary --since 30d
+
+    Each command is appended to .dtaas.history.jsonl (or DTAAS_HISTORY=<file>;
+    DTAAS_HISTORY=0 turns recording off) when it ends, with its arguments,
+    outcome, duration, the users it changed and the docker processes it
+    spawned.
+    """
+    path = historyPkg.history_path() or HISTORY_FILE
+    entries = historyPkg.select(historyPkg.load_history(path), **filters)
+    if summary:
+        rows = historyPkg.summary(entries)
+        if as_json:
+            click.echo(json.dumps(rows, indent=2))
+        else:
+            _echo_summary(rows)
+        return
+    entries = historyPkg.slowest(entries, slowest) if slowest else entries[-limit:]
+    if as_json:
+        click.echo(json.dumps(entries, indent=2))
+    elif entries:
+        _echo_entries(entries)
+    else:
+        click.echo("No recorded commands match.")
@@ -17,17 +17,40 @@ from .pkg import lifecycle as lifecyclePkg
 from .pkg import deploy as deployPkg
 from .cmd_utils import NO_INSTALLATION_MESSAGE
 
-_STATUS_HEADERS = ("PROJECT", "SERVICE", "STATE", "HEALTH")
+_STATUS_HEADERS = ("PROJECT", "SERVICE", "STATE", "HEALTH", "DISK")
 
 
-def _status_rows_text(rows):
-    """Render status records as aligned columns (header plus one line each)."""
-    table: list[tuple[str, str, str, str]] = [_STATUS_HEADERS]
+def size_text(size):
+    """A byte count as a short human-readable size ('-' when unknown)."""
+    if size is None:
+        return "-"
+    for unit in ("B", "K", "M", "G"):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}T"
+
+
+def status_rows_text(rows):
+    """Render status records as aligned columns (header plus one line each).
+
+    Records from several installations ('admin fleet status') carry an
+    'installation' key, shown as a leading INSTALLATION column.
+    """
+    fleet = any("installation" in row for row in rows)
+    table = [(("INSTALLATION",) if fleet else ()) + _STATUS_HEADERS]
     table.extend(
-        (row["project"], row["service"], row["state"], row["health"] or "-")
+        ((row.get("installation", "-"),) if fleet else ())
+        + (
+            row["project"],
+            row["service"],
+            row["state"],
+            row["health"] or "-",
+            size_text(row.get("disk_bytes")),
+        )
         for row in rows
     )
-    widths = [max(len(line[i]) for line in table) for i in range(len(_STATUS_HEADERS))]
+    widths = [max(len(line[i]) for line in table) for i in range(len(table[0]))]
     return "\n".join(
         "  ".join(cell.ljust(widths[i]) for i, cell in enumerate(line))
         for line in table
@@ -39,7 +62,7 @@ def _echo_status(rows, as_json):
     if as_json:
         click.echo(json.dumps(rows, indent=2))
     elif rows:
-        click.echo(_status_rows_text(rows))
+        click.echo(status_rows_text(rows))
     else:
         click.echo("No services found.")
 
@@ -67,21 +90,25 @@ _output_dir_option = click.option(
     help="Installation directory containing the generated deployment.",
 )
 
-
-@click.command(name="status")
-@_output_dir_option
-@click.option(
+json_option = click.option(
     "--json",
     "as_json",
     is_flag=True,
     help="Emit machine-readable JSON instead of a human-readable table.",
 )
+
+
+@click.command(name="status")
+@_output_dir_option
+@json_option
 def status(output_dir, as_json):
     """Report per-service state for the deployment and user workloads.
 
     Each service is reported as running/paused/exited/restarting, or 'not
-    created' when it is defined but has no container yet. Always exits 0 when
-    it can read the deployment; pass --json for automation.
+    created' when it is defined but has no container yet. User services also
+    show the disk space of their files/<user> workspace (DISK), measured
+    incrementally against a cache. Always exits 0 when it can read the
+    deployment; pass --json for automation.
     """
     try:
         rows = lifecyclePkg.collect_status(output_dir)
@@ -0,0 +1,142 @@
+"""The 'scheduler' admin commands: run and status of the time-based
+pause/stop/resume schedules in [[common.users.schedules]] (see
+pkg/scheduler.py).
+
+Defined here, like cmd_lifecycle.py's commands, to keep cmd.py within a
+reasonable line count; cmd.py wires the 'scheduler' group onto 'admin' via
+Group.add_command.
+"""
+
+import time
+from datetime import datetime
+import click
+from python_on_whales.exceptions import DockerException
+from .pkg import config as configPkg
+from .pkg import scheduler as schedulerPkg
+from .pkg.constants import SCHEDULE_BATCH, SCHEDULE_INTERVAL, SCHEDULER_STATE
+from .pkg.locks import LockTimeout
+
+
+def _schedules():
+    """The parsed schedules of dtaas.toml; ClickException if there are none
+    or they are invalid."""
+    try:
+        tables, err = configPkg.Config().get_schedules()
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc)) from exc
+    if err is not None:
+        raise click.ClickException(str(err))
+    schedules, errors = schedulerPkg.parse_schedules(tables)
+    if errors:
+        raise click.ClickException("; ".join(errors))
+    if not schedules:
+        raise click.ClickException(
+            "No schedules: add [[common.users.schedules]] tables to dtaas.toml."
+        )
+    return schedules
+
+
+def _echo_applied(applied, dry_run):
+    """One line per schedule that came due."""
+    for name, action, when, users in applied:
+        at = when.strftime("%Y-%m-%d %H:%M")
+        if not users:
+            click.echo(f"{name}: {action} due at {at}, no users to {action}")
+        elif dry_run:
+            click.echo(f"{name}: would {action} {', '.join(users)} (due at {at})")
+        else:
+            click.echo(f"{name}: {action} {', '.join(users)} (due at {at})")
+
+
+def _run_once(batch_size, dry_run):
+    """One scheduler tick with the current dtaas.toml schedules."""
+    applied = schedulerPkg.tick(_schedules(), batch_size=batch_size, dry_run=dry_run)
+    _echo_applied(applied, dry_run)
+
+
+@click.group()
+def scheduler():
+    """Pause, stop and resume users' workspaces on a timetable.
+
+    Schedules are [[common.users.schedules]] tables in dtaas.toml: a name,
+    the user groups they cover and cron times for pause, stop and resume.
+    """
+
+
+@scheduler.command(name="run")
+@click.option("--once", is_flag=True, help="Apply what is due now and exit (e.g. from cron).")
+@click.option(
+    "--interval",
+    type=click.IntRange(min=1),
+    default=SCHEDULE_INTERVAL,
+    show_default=True,
+    help="Seconds between checks of the schedules.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=SCHEDULE_BATCH,
+    show_default=True,
+    help="Users per pause/stop/resume call.",
+)
+@click.option("--dry-run", is_flag=True, help="Report what is due without acting (implies --once).")
+def run(once, interval, batch_size, dry_run):
+    """Apply the schedules as their times come, until interrupted.
+
+    \b
+    Examples:
+      dtaas admin scheduler run
+      dtaas admin scheduler run --dry-run
+      * * * * * cd /opt/dtaas && dtaas admin scheduler run --once   # crontab
+
+    Each check applies the latest pause, stop or resume time of each
+    schedule that passed since the previous check, so the users' registry
+    desired_status follows the timetable. Resume only wakes users the
+    scheduler suspended. dtaas.toml is re-read on every check, and a failed
+    check is reported and retried at the next one.
+    """
+    if once or dry_run:
+        try:
+            _run_once(batch_size, dry_run)
+        except (DockerException, LockTimeout) as exc:
+            raise click.ClickException(f"Error while applying schedules: {exc}") from exc
+        return
+    click.echo("Applying schedules (Ctrl+C to stop)...")
+    try:
+        while True:
+            try:
+                _run_once(batch_size, dry_run)
+            except (click.ClickException, DockerException, LockTimeout) as exc:
+                message = exc.format_message() if isinstance(exc, click.ClickException) else exc
+                click.echo(f"Error while applying schedules: {message}", err=True)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        click.echo("Stopped the scheduler.")
+
+
+@scheduler.command(name="status")
+def status():
+    """Show each schedule's next pause/stop/resume and what it suspended."""
+    schedules = _schedules()
+    state = schedulerPkg.load_scheduler_state(SCHEDULER_STATE)
+    now = datetime.now()
+    table = [("SCHEDULE", "GROUPS", "NEXT", "AT", "SUSPENDED")]
+    for schedule in schedules:
+        upcoming = schedulerPkg.upcoming(schedule, now)
+        action, when = upcoming[0] if upcoming else ("-", None)
+        owned = sum(1 for owner in state["suspended"].values() if owner == schedule.name)
+        table.append(
+            (
+                schedule.name,
+                ",".join(schedule.groups) or "(all)",
+                action,
+                when.strftime("%Y-%m-%d %H:%M") if when else "-",
+                str(owned),
+            )
+        )
+    widths = [max(len(row[i]) for row in table) for i in range(len(table[0]))]
+    for row in table:
+        click.echo("  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)).rstrip())
+    last = state["last_run"]
+    ran = datetime.fromtimestamp(last).strftime("%Y-%m-%d %H:%M") if last else "never"
+    click.echo(f"Last run: {ran}")
@@ -1,4 +1,4 @@
-"""The 'user' subcommands: add, delete, pause, stop, and resume DTaaS users.
+"""The 'user' subcommands: add, delete, list, pause, stop, and resume DTaaS users.
 
 Defined here as standalone commands (rather than under cmd.py's 'user' group
 decorator) purely to keep cmd.py within a reasonable line count; they are
@@ -9,18 +9,28 @@ see cmd_user_utils.reject_starting_users. Starting users are suspended/resumed
 as part of the whole installation via 'dtaas admin pause'/'stop'/'resume'.
 """
 
+import json
 import click
+from .pkg import startup_timing as startupTimingPkg
 from .pkg import users as userPkg
 from .pkg import users_lifecycle as usersLifecyclePkg
+from .pkg.constants import DESIRED_STATUSES, IMPORT_CHUNK_SIZE
+from .pkg.locks import LockTimeout
+from .pkg.user_import import ChunkError
+from .pkg.user_index import UserIndex
+from .cmd_lifecycle import json_option
 from .cmd_utils import run_user_command
 from .cmd_user_utils import (
     UserAddInput,
+    check_add_input,
+    echo_timings,
+    group_option,
     reject_starting_users,
     resolve_usernames,
     stage_users_for_add,
+    stream_users_file,
 )
 
-
 @click.command()
 @click.argument("username", required=False)
 @click.option(
@@ -42,21 +52,52 @@ from .cmd_user_utils import (
     default=True,
     help="Mark USERNAME for load balancing (default: enabled).",
 )
-def add(**kwargs):
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=IMPORT_CHUNK_SIZE,
+    show_default=True,
+    help="With --file, validate and provision this many users per checkpoint.",
+)
+@click.option(
+    "--timings",
+    "wait",
+    is_flag=True,
+    help="Wait until the new workspaces are up and report per-phase startup times.",
+)
+@click.option(
+    "--probe",
+    metavar="URL",
+    help="Also wait until URL/<username> is routed, e.g. https://localhost (implies --timings).",
+)
+def add(wait, probe, **kwargs):
     """Add users to a running DTaaS instance.
 
     \b
     Examples:
       dtaas admin user add alice --email alice@example.org
       dtaas admin user add --file users.csv
+      dtaas admin user add --file users.csv --timings --probe https://localhost
 
     Merges the specified user(s) into dtaas.users.registry.json and starts
     only those users; already-provisioned users are left untouched. A USERNAME
     or --file is required (not both). Requires a running deployment (run
     'dtaas admin install' first). To (re)provision every registry user, use
     'dtaas admin config reconcile --fix'.
+
+    --file is streamed in --chunk-size chunks, each registered and started
+    before the next is read, with a checkpoint in .dtaas.import.json: if the
+    import fails, fix the cause and re-run the same command to resume from
+    the last completed chunk.
+
+    How long each phase of starting a workspace takes (registry write,
+    template render, workspace copy, compose up) is kept in
+    .dtaas.state.json. --timings also waits for each new container to run
+    and pass its healthcheck (and, with --probe, for its route to answer),
+    then prints the p50/p90/p99 of every phase.
     """
     user_input = UserAddInput(**kwargs)
+    timings = startupTimingPkg.Timings(wait=wait or bool(probe), probe=probe)
 
     def _stage_then_add(config_obj):
         """Stage the registry only once dtaas.toml has loaded successfully.
@@ -64,12 +105,36 @@ def add(**kwargs):
         Only the newly-added users are started, so adding one user does not
         recreate every other registry user's container.
         """
-        added = stage_users_for_add(user_input)
-        return userPkg.add_users(config_obj, start_only=added)
+        check_add_input(user_input)
+        if user_input.csv_file:
+            return _import_then_add(config_obj, user_input, timings)
+        added = stage_users_for_add(user_input, timings)
+        return userPkg.add_users(config_obj, start_only=added, timings=timings)
 
     run_user_command(
         _stage_then_add, "Users added successfully", "Error while adding users"
     )
+    if timings.wait:
+        echo_timings(timings)
+
+
+def _import_then_add(config_obj, user_input, timings=None):
+    """Stream a --file import, provisioning each chunk as soon as it is staged.
+
+    Returns the first chunk's provisioning error (the journal keeps the
+    import resumable from that chunk), or None once every chunk is done.
+    """
+
+    def _provision(names):
+        err = userPkg.add_users(config_obj, start_only=names, timings=timings)
+        if err is not None:
+            raise ChunkError(str(err)) from err
+
+    try:
+        stream_users_file(user_input, _provision, timings)
+    except ChunkError as exc:
+        return exc
+    return None
 
 
 @click.command()
@@ -86,19 +151,21 @@ def add(**kwargs):
     is_flag=True,
     help="Show which users would be removed without deleting anything.",
 )
-def delete(usernames, csv_file, dry_run):
+@group_option
+def delete(usernames, csv_file, dry_run, groups):
     """Remove users from a running DTaaS instance.
 
     \b
     Examples:
       dtaas admin user delete alice bob
       dtaas admin user delete --file users.csv
+      dtaas admin user delete --group trial --dry-run
       dtaas admin user delete alice --dry-run
 
     Deprovisions each user and removes them from dtaas.users.registry.json.
     Use --dry-run to preview removals without making any changes.
     """
-    resolved = resolve_usernames(usernames, csv_file, verb="delete")
+    resolved = resolve_usernames(usernames, csv_file, verb="delete", groups=groups)
     err = userPkg.delete_users(resolved, dry_run=dry_run)
     if err is not None:
         raise click.ClickException(f"Error while deleting users: {err}")
@@ -128,7 +195,7 @@ def _report_lifecycle_result(outcome, verb_past):
         click.echo(f"{', '.join(acted)} {verb_past} successfully")
 
 
-def _lifecycle_command(usernames, csv_file, verb):
+def _lifecycle_command(usernames, csv_file, verb, groups=()):
     """Resolve/validate the target usernames for *verb*, run it, and report.
 
     Shared by pause/stop/resume: reject_starting_users runs before any compose
@@ -137,11 +204,15 @@ def _lifecycle_command(usernames, csv_file, verb):
     at call time (not stored at import time) so tests can patch
     usersLifecyclePkg.<verb>_users directly.
     """
-    resolved = resolve_usernames(usernames, csv_file, verb=verb)
+    resolved = resolve_usernames(usernames, csv_file, verb=verb, groups=groups)
     reject_starting_users(resolved, verb)
     attr_name, verb_past = _LIFECYCLE_VERBS[verb]
     action = getattr(usersLifecyclePkg, attr_name)
-    _report_lifecycle_result(action(resolved), verb_past)
+    try:
+        outcome = action(resolved)
+    except LockTimeout as exc:
+        raise click.ClickException(str(exc)) from exc
+    _report_lifecycle_result(outcome, verb_past)
 
 
 # (effect sentence, desired_status literal actually written to the registry --
@@ -186,7 +257,8 @@ def _lifecycle_help(verb):
             f"{verb.capitalize()} specific additional users' containers.",
             "\b\nExamples:\n"
             f"  dtaas admin user {verb} alice bob\n"
-            f"  dtaas admin user {verb} --file users.csv",
+            f"  dtaas admin user {verb} --file users.csv\n"
+            f"  dtaas admin user {verb} --group gpu",
             f"{effect} {durability} {reverse}".strip(),
         )
         if part
@@ -206,8 +278,9 @@ def _make_lifecycle_command(verb):
         type=click.Path(exists=True, dir_okay=False),
         help="Bulk-target users listed in a CSV file (only the username column is used).",
     )
-    def _command(usernames, csv_file):
-        _lifecycle_command(usernames, csv_file, verb)
+    @group_option
+    def _command(usernames, csv_file, groups):
+        _lifecycle_command(usernames, csv_file, verb, groups)
 
     return _command
 
@@ -215,3 +288,63 @@ def _make_lifecycle_command(verb):
 pause = _make_lifecycle_command("pause")
 stop = _make_lifecycle_command("stop")
 resume = _make_lifecycle_command("resume")
+
+
+def _echo_user_rows(rows):
+    """Print registry users as an aligned table."""
+    table = [("USER", "EMAIL", "GROUPS", "STATUS", "PROVISIONED", "HOST")]
+    for row in rows:
+        table.append(
+            (
+                row["username"],
+                row["email"],
+                ",".join(row["groups"]),
+                row["desired_status"],
+                "yes" if row["provisioned"] else "no",
+                row["host"] or "-",
+            )
+        )
+    widths = [max(len(row[i]) for row in table) for i in range(len(table[0]))]
+    for row in table:
+        click.echo("  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)).rstrip())
+
+
+@click.command(name="list")
+@click.option(
+    "--group", "groups", multiple=True, help="Only users tagged with this group (repeatable)."
+)
+@click.option(
+    "--status",
+    type=click.Choice(sorted(DESIRED_STATUSES)),
+    help="Only users with this desired status.",
+)
+@click.option(
+    "--provisioned/--not-provisioned",
+    default=None,
+    help="Only users that have (or do not have) a compose service.",
+)
+@json_option
+def list_users(groups, status, provisioned, as_json):
+    """List the additional users in dtaas.users.registry.json.
+
+    \b
+    Examples:
+      dtaas admin user list
+      dtaas admin user list --group gpu --status paused
+      dtaas admin user list --not-provisioned --json
+
+    STATUS is the user's desired status, as set by 'user pause'/'stop'/
+    'resume'; PROVISIONED tells whether 'user add' has given them a compose
+    service. Starting users live in dtaas.toml and are not listed.
+    """
+    try:
+        index = UserIndex.load()
+    except Exception as exc:  # utils.import_yaml's wrapped parse error
+        raise click.ClickException(f"Error reading the user registry: {exc}") from exc
+    rows = [index.row(name) for name in index.select(groups, status, provisioned)]
+    if as_json:
+        click.echo(json.dumps(rows, indent=2))
+    elif rows:
+        _echo_user_rows(rows)
+    else:
+        click.echo("No registered users match.")
@@ -0,0 +1,100 @@
+"""The workspace snapshot 'user' subcommands: snapshot, restore.
+
+Defined here, like cmd_user_usage.py's capacity commands, to keep cmd.py
+within a reasonable line count; cmd.py wires them onto the 'user' group via
+Group.add_command.
+"""
+
+import click
+from python_on_whales.exceptions import DockerException
+from .pkg import config as configPkg
+from .pkg import snapshots as snapshotsPkg
+from .pkg import users_lifecycle as usersLifecyclePkg
+
+
+def _files_dir():
+    """files/ of the installation dtaas.toml describes ([common] path)."""
+    try:
+        path, err = configPkg.Config().get_path()
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc)) from exc
+    if err is not None:
+        raise click.ClickException(str(err))
+    return f"{path}/files"
+
+
+def _echo_snapshots(manifests):
+    """List snapshots: id, users, files, and how many were copied vs linked."""
+    if not manifests:
+        click.echo("No snapshots.")
+    for manifest in manifests:
+        users = manifest["users"].values()
+        files = sum(u["files"] for u in users)
+        copied = sum(u["copied"] for u in users)
+        size = sum(u["bytes"] for u in users) / (1 << 20)
+        click.echo(
+            f"{manifest['id']}  {len(manifest['users'])} user(s)  {files} file(s)  "
+            f"{size:.1f} MiB  ({copied} copied, {files - copied} linked)"
+        )
+
+
+@click.command()
+@click.argument("usernames", nargs=-1, required=False)
+@click.option("--list", "list_", is_flag=True, help="List the snapshots instead.")
+@click.option(
+    "--prune",
+    "keep",
+    type=click.IntRange(min=0),
+    help="Delete all but the newest KEEP snapshots instead.",
+)
+def snapshot(usernames, list_, keep):
+    """Snapshot user workspaces (files/<user>) for a later 'user restore'.
+
+    \b
+    Examples:
+      dtaas admin user snapshot                 # every workspace
+      dtaas admin user snapshot alice bob
+      dtaas admin user snapshot --list
+      dtaas admin user snapshot --prune 7
+
+    Snapshots are incremental: files unchanged since the user's previous
+    snapshot are hardlinked to it and only the changes are copied, so taking
+    one before a reprovision, image upgrade or uninstall is cheap. They live
+    in files/.snapshots, which 'uninstall --remove-user-files' keeps.
+    """
+    files_dir = _files_dir()
+    try:
+        if list_:
+            _echo_snapshots(snapshotsPkg.list_snapshots(files_dir))
+        elif keep is not None:
+            pruned = snapshotsPkg.prune(files_dir, keep)
+            click.echo(f"Pruned {len(pruned)} snapshot(s).")
+        else:
+            manifest = snapshotsPkg.create(files_dir, list(usernames) or None)
+            _echo_snapshots([manifest])
+    except (OSError, ValueError) as exc:
+        raise click.ClickException(f"Error while snapshotting: {exc}") from exc
+
+
+@click.command()
+@click.argument("snapshot_id")
+@click.argument("usernames", nargs=-1, required=False)
+def restore(snapshot_id, usernames):
+    """Put user workspaces back as they were in a snapshot.
+
+    \b
+    Examples:
+      dtaas admin user restore 20261019T101500Z           # every user in it
+      dtaas admin user restore 20261019T101500Z alice
+
+    The current workspace contents are discarded (deleted in the
+    background) and the users' running containers are restarted so they see
+    the restored files.
+    """
+    files_dir = _files_dir()
+    try:
+        restored = snapshotsPkg.restore(files_dir, snapshot_id, list(usernames) or None)
+        usersLifecyclePkg.restart_running(restored)
+    except (OSError, ValueError, DockerException) as exc:
+        raise click.ClickException(f"Error while restoring: {exc}") from exc
+    click.echo(f"{', '.join(restored)} restored from {snapshot_id}")
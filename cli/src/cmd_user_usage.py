@@ -0,0 +1,281 @@
+"""The capacity 'user' subcommands: hibernate, wake, resize, suggest-limits,
+warm-pool.
+
+Defined here, like cmd_user.py's add/delete/pause/stop/resume, to keep cmd.py
+within a reasonable line count; cmd.py wires them onto the 'user' group via
+Group.add_command.
+"""
+
+import click
+from python_on_whales.exceptions import DockerException
+from .pkg import config as configPkg
+from .pkg import hibernate as hibernatePkg
+from .pkg import registry as registryPkg
+from .pkg import resources as resourcesPkg
+from .pkg import warm_pool as warmPoolPkg
+from .pkg.locks import LockTimeout
+from .pkg.validators import is_size
+from .cmd_user_utils import csv_file_option, group_option, resolve_usernames
+
+
+def _load_config():
+    """A fresh Config, mapping a missing/invalid dtaas.toml to ClickException."""
+    try:
+        return configPkg.Config()
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc)) from exc
+
+
+def _idle_policy(idle_minutes, cpu_percent):
+    """[common.users]'s idle policy with any command-line overrides applied.
+
+    Raises ClickException when dtaas.toml cannot be read or hibernation is
+    disabled (idle_minutes 0 and no --idle-minutes).
+    """
+    policy, err = _load_config().get_idle_policy()
+    if err is not None:
+        raise click.ClickException(str(err))
+    overrides = {"minutes": idle_minutes, "cpu_percent": cpu_percent}
+    policy.update({k: v for k, v in overrides.items() if v is not None})
+    if not policy["minutes"]:
+        raise click.ClickException(
+            "Idle hibernation is disabled: set [common.users] idle_minutes in "
+            "dtaas.toml or pass --idle-minutes."
+        )
+    return policy
+
+
+@click.command()
+@click.option(
+    "--idle-minutes",
+    type=click.IntRange(min=1),
+    help="Pause workspaces idle this long (default: [common.users] idle_minutes).",
+)
+@click.option(
+    "--cpu-percent",
+    type=click.FloatRange(min=0),
+    help="CPU usage below which a workspace counts as idle "
+    "(default: [common.users] idle_cpu_percent, else 1.0).",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Report idle workspaces without pausing them.",
+)
+def hibernate(idle_minutes, cpu_percent, dry_run):
+    """Pause additional users whose workspaces have gone idle.
+
+    \b
+    Examples:
+      dtaas admin user hibernate
+      */5 * * * * cd /opt/dtaas && dtaas admin user hibernate   # crontab
+
+    Run periodically: each run samples CPU and network counters of every
+    running registry user with one 'docker stats' call per host, and pauses
+    those with low CPU and no network traffic for --idle-minutes. They are
+    recorded as 'paused' in dtaas.users.registry.json like 'user pause';
+    bring them back with 'user wake'.
+    """
+    policy = _idle_policy(idle_minutes, cpu_percent)
+    try:
+        idle = hibernatePkg.hibernate(policy, dry_run=dry_run)
+    except (DockerException, LockTimeout) as exc:
+        raise click.ClickException(f"Error while hibernating users: {exc}") from exc
+    if not idle:
+        click.echo("No idle workspaces found.")
+    elif dry_run:
+        click.echo(f"Would hibernate: {', '.join(idle)}")
+    else:
+        click.echo(f"{', '.join(idle)} hibernated successfully")
+
+
+@click.command()
+@click.argument("usernames", nargs=-1, required=False)
+def wake(usernames):
+    """Resume workspaces paused by 'user hibernate'.
+
+    \b
+    Examples:
+      dtaas admin user wake            # every hibernated user
+      dtaas admin user wake alice
+
+    Only users hibernated for being idle are resumed; users paused or stopped
+    with 'user pause'/'stop' stay as they are.
+    """
+    try:
+        woken = hibernatePkg.wake(list(usernames) or None)
+    except (DockerException, LockTimeout) as exc:
+        raise click.ClickException(f"Error while waking users: {exc}") from exc
+    if woken:
+        click.echo(f"{', '.join(woken)} resumed successfully")
+    else:
+        click.echo("No hibernated users to wake.")
+
+
+def _default_limits():
+    """[common.resources], or ClickException when limits are disabled/missing."""
+    config_obj = _load_config()
+    set_limits, err = config_obj.get_set_limits()
+    if err is None and not set_limits:
+        err = "resource limits are disabled ([common.resources] set_limits = false)"
+    defaults = None
+    if err is None:
+        defaults, err = config_obj.get_resource_limits()
+    if err is not None:
+        raise click.ClickException(f"Cannot resize users: {err}")
+    return defaults
+
+
+def _requested_limits(options, reset):
+    """{field: value} to record from the --cpus/--mem-limit/--pids-limit options.
+
+    With *reset* every override is cleared (None) instead.
+    """
+    if reset:
+        return dict.fromkeys(resourcesPkg.LIVE_FIELDS)
+    if options["mem_limit"] is not None and not is_size(options["mem_limit"]):
+        raise click.ClickException("--mem-limit must include a unit, e.g. '8G'")
+    return {field: value for field, value in options.items() if value is not None}
+
+
+def _record_limits(usernames, csv_file, groups, limits):
+    """Store *limits* for the users or each of *groups*; return the users to
+    resize. The users are resolved like 'user pause'/'stop'/'resume' do."""
+    targets = resolve_usernames(usernames, csv_file, "resize", groups)
+    if groups:
+        for group in groups:
+            registryPkg.set_group_resources(group, limits)
+        return targets
+    if limits:
+        registryPkg.set_user_resources(targets, limits)
+    known = registryPkg.load_registry()
+    for name in targets:
+        if name not in known:
+            click.echo(f"'{name}' is not a registered user, skipping")
+    return [name for name in targets if name in known]
+
+
+@click.command()
+@click.argument("usernames", nargs=-1, required=False)
+@csv_file_option("Resize users listed in a CSV file (only the username column is used).")
+@group_option
+@click.option("--cpus", type=click.FloatRange(min=0, min_open=True), help="CPU cores.")
+@click.option("--mem-limit", help="Memory limit with unit, e.g. '8G'.")
+@click.option("--pids-limit", type=click.IntRange(min=1), help="Maximum processes.")
+@click.option("--reset", is_flag=True, help="Drop the overrides, back to the defaults.")
+def resize(usernames, csv_file, groups, reset, **options):
+    """Change additional users' resource limits without recreating containers.
+
+    \b
+    Examples:
+      dtaas admin user resize alice --cpus 4 --mem-limit 16G
+      dtaas admin user resize --group gpu --group ml --cpus 8
+      dtaas admin user resize --file heavy.csv --mem-limit 16G
+      dtaas admin user resize alice --reset
+      dtaas admin user resize alice bob      # re-apply after editing dtaas.toml
+
+    Records the overrides in dtaas.users.registry.json (per user, or per
+    group for each --group) on top of [common.resources], rewrites the users'
+    compose services, and applies the limits to the running containers with
+    'docker update', so their sessions keep running.
+    """
+    defaults = _default_limits()
+    limits = _requested_limits(options, reset)
+    targets = _record_limits(usernames, csv_file, groups, limits)
+    try:
+        resized, not_provisioned = resourcesPkg.resize_users(targets, defaults)
+    except (DockerException, LockTimeout) as exc:
+        raise click.ClickException(f"Error while resizing users: {exc}") from exc
+    for name in not_provisioned:
+        click.echo(f"'{name}' is not currently provisioned, skipping")
+    if resized:
+        click.echo(f"{', '.join(resized)} resized successfully")
+
+
+def _suggestion_lines(suggestions, pct):
+    """Render limit suggestions as aligned text lines."""
+    header = ("USER", "SAMPLES", f"CPU% p{pct}", f"MEM p{pct}", "CPUS", "MEM_LIMIT")
+    table = [header] + [
+        (
+            name,
+            str(s["samples"]),
+            f"{s['cpu_percent']:.1f}",
+            f"{s['mem_bytes'] / (1 << 20):.0f}m",
+            str(s["cpus"]),
+            s["mem_limit"],
+        )
+        for name, s in sorted(suggestions.items())
+    ]
+    widths = [max(len(row[i]) for row in table) for i in range(len(header))]
+    return ["  ".join(c.ljust(widths[i]) for i, c in enumerate(row)) for row in table]
+
+
+@click.command(name="suggest-limits")
+@click.argument("usernames", nargs=-1, required=False)
+@click.option(
+    "--percentile",
+    "pct",
+    type=click.IntRange(1, 100),
+    default=95,
+    show_default=True,
+    help="Usage percentile to size the limits for.",
+)
+def suggest_limits(usernames, pct):
+    """Suggest resource limits from observed usage.
+
+    \b
+    Examples:
+      dtaas admin user suggest-limits
+      dtaas admin user suggest-limits alice --percentile 99
+
+    Takes a fresh usage sample, adds it to the history that 'user hibernate'
+    also records (.dtaas.usage.json), and suggests cpus/mem_limit from the
+    chosen percentile plus 25% headroom. Apply one with 'user resize'.
+    """
+    try:
+        suggestions = resourcesPkg.suggest_limits(list(usernames) or None, pct)
+    except DockerException as exc:
+        raise click.ClickException(f"Error while sampling usage: {exc}") from exc
+    if not suggestions:
+        click.echo("No usage recorded yet for these users.")
+        return
+    for line in _suggestion_lines(suggestions, pct):
+        click.echo(line)
+
+
+def _pool_settings(size):
+    """(files dir, pool size) from dtaas.toml, *size* overriding warm_pool."""
+    config_obj = _load_config()
+    path, err = config_obj.get_path()
+    configured, pool_err = config_obj.get_warm_pool()
+    err = err or pool_err
+    if err is not None:
+        raise click.ClickException(str(err))
+    return f"{path}/files", configured if size is None else size
+
+
+@click.command(name="warm-pool")
+@click.option(
+    "--size",
+    type=click.IntRange(min=0),
+    help="Slots to keep ready (default: [common.users] warm_pool).",
+)
+def warm_pool(size):
+    """Fill the warm pool of pre-copied workspace directories now.
+
+    \b
+    Examples:
+      dtaas admin user warm-pool
+      dtaas admin user warm-pool --size 50     # before a semester starts
+
+    'user add' claims a ready copy of files/template for each new user
+    instead of copying it, and refills the pool in the background; run this
+    ahead of a large import to have the whole pool ready.
+    """
+    files_dir, pool_size = _pool_settings(size)
+    try:
+        created = warmPoolPkg.fill(files_dir, pool_size)
+    except OSError as exc:
+        raise click.ClickException(f"Error while filling the warm pool: {exc}") from exc
+    ready = len(warmPoolPkg.slots(files_dir))
+    click.echo(f"Warm pool ready: {ready} slot(s) ({created} created).")
@@ -6,12 +6,31 @@ mirroring the cmd_deploy_utils.py split for the deployment-generation
 helpers.
 """
 
+import time
 from dataclasses import dataclass
 import click
 from .pkg import config as configPkg
 from .pkg import registry as registryPkg
+from .pkg import startup_timing as startupTimingPkg
+from .pkg import user_import as userImportPkg
+from .pkg.user_index import UserIndex
+from .pkg.constants import IMPORT_CHUNK_SIZE
 from .pkg.users_utils import validate_usernames
 
+group_option = click.option(
+    "--group",
+    "groups",
+    multiple=True,
+    help="Target every registered user tagged with this group (repeatable).",
+)
+
+
+def csv_file_option(help_text):
+    """A --file/-f option naming an existing users CSV, passed as csv_file."""
+    return click.option(
+        "--file", "-f", "csv_file", type=click.Path(exists=True, dir_okay=False), help=help_text
+    )
+
 
 def _starting_usernames():
     """The [[users]] usernames from dtaas.toml, or [] when unavailable."""
@@ -42,6 +61,7 @@ class UserAddInput:
     email: str | None
     groups: tuple
     load_balance: bool
+    chunk_size: int = IMPORT_CHUNK_SIZE
 
 
 def _users_from_args(user_input):
@@ -71,55 +91,116 @@ def _users_to_add(user_input):
     return {}
 
 
-def _register_users(new_users):
+def register_users(new_users, reserved=None, retry=(), timings=None):
     """Validate and register new users, warning about skipped duplicates.
 
-    Returns the usernames actually added (excluding skipped duplicates).
+    *reserved* defaults to dtaas.toml's starting usernames; a chunked import
+    passes them in once rather than re-reading dtaas.toml per chunk. Returns
+    the usernames to start: those actually added plus any skipped names in
+    *retry* (users a resumed import registered but never started). The time
+    taken is recorded as their "registry" phase in *timings*, if given.
     """
+    started = time.monotonic()
     try:
         validate_usernames(new_users)
     except ValueError as exc:
         raise click.ClickException(str(exc)) from exc
-    added, skipped = registryPkg.register_new_users(new_users, _starting_usernames())
+    if reserved is None:
+        reserved = _starting_usernames()
+    added, skipped = registryPkg.register_new_users(new_users, reserved)
     for name in skipped:
-        click.echo(f"'{name}' already exists, skipping")
-    return added
+        if name not in retry:
+            click.echo(f"'{name}' already exists, skipping")
+    if timings is not None:
+        timings.record("registry", added, time.monotonic() - started)
+    return added + [name for name in skipped if name in retry]
 
 
-def stage_users_for_add(user_input):
+def check_add_input(user_input):
+    """Raise ClickException unless exactly one of USERNAME / --file is given."""
+    if user_input.username and user_input.csv_file:
+        raise click.ClickException("Pass either a USERNAME or --file, not both.")
+    if not user_input.username and not user_input.csv_file:
+        raise click.ClickException(
+            "Provide a USERNAME (e.g. 'dtaas admin user add alice --email "
+            "a@x.io') or --file <users.csv> to add users."
+        )
+
+
+def stage_users_for_add(user_input, timings=None):
     """Merge CLI/CSV users into the registry before provisioning.
 
     Rejects malformed usernames and, with a warning, skips any already in
     dtaas.toml's starting list or the registry. Raises ClickException on bad
     or missing input: a USERNAME or --file is required, and not both. Returns
     the usernames actually added, so only those are started (not the whole
-    registry).
+    registry). 'user add --file' streams the CSV in chunks instead (see
+    cmd_user.add); this whole-file path remains for single-user adds.
     """
-    if user_input.username and user_input.csv_file:
-        raise click.ClickException("Pass either a USERNAME or --file, not both.")
-    if not user_input.username and not user_input.csv_file:
+    check_add_input(user_input)
+    return register_users(_users_to_add(user_input), timings=timings)
+
+
+def stream_users_file(user_input, provision, timings=None):
+    """Validate, register and provision a --file import chunk by chunk.
+
+    Each chunk of at most user_input.chunk_size rows is registered and then
+    handed to *provision(usernames)*, which raises user_import.ChunkError to
+    abort; that error propagates unchanged so the caller can report it as a
+    provisioning failure. A malformed file raises ClickException. Re-running
+    after a failure resumes from the last completed chunk.
+    """
+    reserved = _starting_usernames()
+
+    def _handle_chunk(chunk, retry):
+        provision(register_users(chunk, reserved, retry, timings))
+        click.echo(f"Imported {len(chunk)} user(s) from '{user_input.csv_file}'")
+
+    try:
+        resumed = userImportPkg.import_users(
+            user_input.csv_file, _handle_chunk, user_input.chunk_size
+        )
+    except (OSError, KeyError, ValueError) as exc:
+        raise click.ClickException(f"Error importing users file: {exc}") from exc
+    if resumed:
+        click.echo(f"Resumed after {resumed} chunk(s) completed by an earlier run")
+
+
+def _group_members(groups, verb):
+    """The registry users tagged with any of *groups*; ClickException if none."""
+    try:
+        members = UserIndex.load().select(groups=groups)
+    except Exception as exc:  # utils.import_yaml's wrapped parse error
+        raise click.ClickException(f"Error reading the user registry: {exc}") from exc
+    if not members:
         raise click.ClickException(
-            "Provide a USERNAME (e.g. 'dtaas admin user add alice --email "
-            "a@x.io') or --file <users.csv> to add users."
+            f"No registered users in group(s) {', '.join(groups)} to {verb}."
         )
-    return _register_users(_users_to_add(user_input))
+    return members
 
 
-def resolve_usernames(usernames, csv_file, verb="delete"):
-    """Resolve the usernames to act on from positional USERNAMES or --file/-f.
+def resolve_usernames(usernames, csv_file, verb="delete", groups=()):
+    """Resolve the usernames to act on from positional USERNAMES, --file/-f
+    or --group.
 
     Only the username column of the CSV is used; email/groups/load_balance are
-    ignored. Raises ClickException if both or neither are given. Shared by
-    'user delete'/'pause'/'stop'/'resume'; *verb* only affects the error text.
+    ignored. --group selects every registry user tagged with any of *groups*.
+    Raises ClickException if more than one of them or none is given. Shared by
+    'user delete'/'pause'/'stop'/'resume'/'resize'; *verb* only affects the
+    error text.
     """
     if usernames and csv_file:
         raise click.ClickException("Pass either USERNAMES or --file, not both.")
+    if groups and (usernames or csv_file):
+        raise click.ClickException("Pass --group on its own, without USERNAMES or --file.")
     if csv_file:
         return list(_read_users_csv(csv_file))
+    if groups:
+        return _group_members(groups, verb)
     if usernames:
         return list(usernames)
     raise click.ClickException(
-        f"Provide one or more USERNAMES or --file <users.csv> to {verb} users."
+        f"Provide one or more USERNAMES, --file <users.csv> or --group <group> to {verb} users."
     )
 
 
@@ -137,3 +218,19 @@ def reject_starting_users(usernames, verb):
             f"Cannot {verb} starting user(s) {', '.join(hits)}: manage the whole "
             "installation with 'dtaas admin pause'/'stop'/'resume' instead."
         )
+
+
+def echo_timings(timings):
+    """Print the startup timings of a 'user add' run as per-phase percentiles."""
+    rows = startupTimingPkg.summary(timings.phases)
+    if not rows:
+        click.echo("No startup timings recorded")
+        return
+    table = [("PHASE", "USERS", "P50", "P90", "P99", "MAX")]
+    table += [
+        (phase, str(row["users"]), *(f"{row[k]:.2f}s" for k in ("p50", "p90", "p99", "max")))
+        for phase, row in rows.items()
+    ]
+    widths = [max(len(row[i]) for row in table) for i in range(len(table[0]))]
+    for row in table:
+        click.echo("  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)).rstrip())
@@ -6,6 +6,7 @@ cmd_user_utils.py for the user-input resolution/validation shared by
 cmd_user.py's 'user add'/'delete'/'pause'/'stop'/'resume' command bodies.
 """
 
+import time
 from dataclasses import dataclass
 from pathlib import Path
 import click
@@ -14,13 +15,15 @@ from .pkg import config as configPkg
 from .pkg import registry as registryPkg
 from .pkg import state as statePkg
 from .pkg import deploy as deployPkg
+from .pkg import shards as shardsPkg
 from .pkg import users as userPkg
 from .pkg import users_lifecycle as usersLifecyclePkg
+from .pkg import reconcile_watch as reconcileWatchPkg
 from .pkg.constants import COMPOSE_USERS_YML, REGISTRY_FILE, STATE_FILE
 from .pkg import config_update as configUpdatePkg
 from .pkg import cert_update as certUpdatePkg
-from .pkg import utils as utilsPkg
 from .pkg.cert_validate import CertValidationError
+from .pkg.locks import LockTimeout
 
 NO_INSTALLATION_MESSAGE = "There is no existing DTaaS / Workspace installation"
 
@@ -102,11 +105,11 @@ def _echo_reconcile(report, status_drift):
     _echo_status_drift(status_drift)
 
 
-def _reprovision_missing():
-    """Reprovision missing/drifted registry users (equivalent to 'user add')."""
+def _reprovision(usernames, success_msg):
+    """Reprovision just *usernames* (see users.reprovision_users)."""
     run_user_command(
-        userPkg.add_users,
-        "Reprovisioned missing/drifted users.",
+        lambda config_obj: userPkg.reprovision_users(config_obj, usernames),
+        success_msg,
         "Error while fixing drift",
     )
 
@@ -114,12 +117,22 @@ def _reprovision_missing():
 def _fix_reconcile(report, status_drift):
     """Reprovision missing/drifted users, then enforce each user's desired_status."""
     if report["missing"] or report["drifted"]:
-        _reprovision_missing()
+        _reprovision(report["missing"] + report["drifted"], "Reprovisioned missing/drifted users.")
     if status_drift:
-        usersLifecyclePkg.enforce_desired_status()
+        usersLifecyclePkg.enforce_desired_status([name for name, _, _ in status_drift])
         click.echo("Enforced desired status on drifted users.")
 
 
+def _users_services(output_dir):
+    """The live user services across compose.users.yml and any shards."""
+    try:
+        compose = shardsPkg.load_users_compose(output_dir)
+    except Exception as exc:  # utils.import_yaml's wrapped parse error
+        raise click.ClickException(f"Error reading {COMPOSE_USERS_YML}: {exc}") from exc
+    services = compose.get("services", {})
+    return services if isinstance(services, dict) else {}
+
+
 def run_reconcile(output_dir, fix=False):
     """Report drift between dtaas.users.registry.json (desired) and what is
     actually running, then optionally fix it.
@@ -132,10 +145,7 @@ def run_reconcile(output_dir, fix=False):
     """
     registry_users = registryPkg.load_registry(str(Path(output_dir) / REGISTRY_FILE))
     state = statePkg.load_state(str(Path(output_dir) / STATE_FILE))
-    compose, err = utilsPkg.import_yaml(str(Path(output_dir) / COMPOSE_USERS_YML))
-    if err is not None:
-        raise click.ClickException(f"Error reading {COMPOSE_USERS_YML}: {err}")
-    services = compose.get("services", {}) if isinstance(compose, dict) else {}
+    services = _users_services(output_dir)
     report = statePkg.find_drift(registry_users, state, services)
     status_drift = usersLifecyclePkg.desired_status_drift()
     _echo_reconcile(report, status_drift)
@@ -143,6 +153,51 @@ def run_reconcile(output_dir, fix=False):
         _fix_reconcile(report, status_drift)
 
 
+_WATCH_LABELS = {
+    **dict(_RECONCILE_LABELS),
+    "status": "container state differs from its desired_status",
+}
+
+
+def _echo_watched_drift(name, issues):
+    """Print one user's changed drift (or its return to sync) with a timestamp."""
+    stamp = time.strftime("%H:%M:%S")
+    if not issues:
+        click.echo(f"[{stamp}] {name}: in sync")
+    for kind in issues:
+        click.echo(f"[{stamp}] {name}: {_WATCH_LABELS[kind]}")
+
+
+def _fix_watched(drift):
+    """Reprovision the watched users that are missing/drifted and enforce
+    the desired_status of the rest. A failure is reported and retried by the
+    watcher rather than ending it."""
+    reprovision = [n for n, issues in drift.items() if set(issues) & {"missing", "drifted"}]
+    status = [n for n in drift if n not in reprovision]
+    try:
+        if reprovision:
+            _reprovision(reprovision, f"Reprovisioned {', '.join(reprovision)}.")
+        if status:
+            usersLifecyclePkg.enforce_desired_status(status)
+            click.echo(f"Enforced desired status on {', '.join(status)}.")
+    except (click.ClickException, DockerException, LockTimeout) as exc:
+        click.echo(f"Fix failed, will retry: {exc}")
+
+
+def run_reconcile_watch(output_dir, fix, debounce, min_interval):
+    """Report drift continuously from Docker events and registry/compose
+    changes (see reconcile_watch.py), fixing it when *fix* is set, until
+    interrupted."""
+    model = reconcileWatchPkg.Model(output_dir)
+    fixer = reconcileWatchPkg.Fixer(_fix_watched, debounce, min_interval) if fix else None
+    watcher = reconcileWatchPkg.Watcher(model, _echo_watched_drift, fixer)
+    click.echo("Watching for drift (Ctrl+C to stop)...")
+    try:
+        watcher.run(reconcileWatchPkg.start_event_streams(output_dir))
+    except KeyboardInterrupt:
+        click.echo("Stopped watching.")
+
+
 def run_config_update(output_dir, dry_run):
     """Re-apply dtaas.toml config to the installed deployment and report changes."""
     try:
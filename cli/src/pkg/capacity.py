@@ -0,0 +1,149 @@
+"""Host capacity planning: how many more workspaces fit on a Docker host.
+
+Every workspace gets the [common.resources] cpus/mem_limit/pids_limit (plus
+any registry overrides). Docker enforces them as caps, not reservations, so
+a host whose running containers' caps add up to more than it has is
+overcommitted, and it is the kernel's OOM killer that picks who goes. plan()
+compares what a host has with the limits of the containers running on it:
+
+- the local daemon's host is read from /proc (cpuinfo, meminfo and
+  sys/kernel/pid_max); a remote endpoint's from 'docker info' (NCPU and
+  MemTotal; its pid space is not reported and counts as unbounded);
+- every running (or paused) container reserves its NanoCpus, Memory and
+  PidsLimit; a container without a limit reserves nothing on that
+  dimension.
+
+'user add' and 'config reconcile --fix' check the workspaces they are
+about to start against the plan of the endpoint each lands on
+([common.users] capacity_policy: "warn", the default, prints a warning and
+carries on; "refuse" fails before anything is started; "off" skips the
+check). 'dtaas admin capacity' prints the plans.
+"""
+
+import math
+from dataclasses import dataclass
+from pathlib import Path
+import click
+from python_on_whales import DockerClient
+from python_on_whales.exceptions import DockerException
+from . import shards
+from .placement import parse_size
+
+# The (cpus, memory bytes, pids) dimensions of a host, a reservation or a
+# workspace's demand.
+DIMENSIONS = ("cpus", "mem", "pids")
+
+
+def workspace_demand(resources, set_limits):
+    """(cpus, bytes, pids) one workspace with *resources* limits may use."""
+    if not set_limits:
+        return (0.0, 0, 0)
+    resources = resources or {}
+    return (
+        float(resources.get("cpus", 0)),
+        parse_size(resources.get("mem_limit", "0b")),
+        int(resources.get("pids_limit", 0)),
+    )
+
+
+def _proc_totals(proc):
+    """(cpus, bytes, pids) of the local host, read from /proc."""
+    root = Path(proc)
+    cpuinfo = (root / "cpuinfo").read_text(encoding="utf-8").splitlines()
+    cpus = sum(1 for line in cpuinfo if line.startswith("processor"))
+    mem = 0
+    for line in (root / "meminfo").read_text(encoding="utf-8").splitlines():
+        if line.startswith("MemTotal:"):
+            mem = int(line.split()[1]) * 1024  # reported in kB
+    pids = int((root / "sys" / "kernel" / "pid_max").read_text(encoding="utf-8"))
+    return (float(cpus), mem, pids)
+
+
+def _info_totals(client):
+    """(cpus, bytes, pids) of a remote Docker host, from 'docker info'."""
+    info = client.system.info()
+    return (float(info.n_cpu or 0), int(info.mem_total or 0), math.inf)
+
+
+def _reserved(client):
+    """(cpus, bytes, pids) the limits of *client*'s running containers add up to."""
+    cpus, mem, pids = 0.0, 0, 0
+    for container in client.container.list():
+        config = container.host_config
+        cpus += (config.nano_cpus or 0) / 1e9
+        mem += config.memory or 0
+        pids += max(config.pids_limit or 0, 0)  # 0/-1: unlimited
+    return (cpus, mem, pids)
+
+
+@dataclass
+class Plan:
+    """What one Docker host has and what its running containers reserve."""
+
+    endpoint: str
+    total: tuple
+    reserved: tuple
+
+    @property
+    def free(self):
+        """(cpus, bytes, pids) not yet reserved."""
+        return tuple(max(t - r, 0) for t, r in zip(self.total, self.reserved))
+
+    def fits(self, demand):
+        """How many more workspaces of *demand* fit (math.inf: unbounded)."""
+        counts = [math.floor(f / d) for f, d in zip(self.free, demand) if d and math.isfinite(f)]
+        return min(counts, default=math.inf)
+
+    def shortfall(self, demands):
+        """The dimensions on which starting all *demands* would exceed the host."""
+        needed = [sum(d[i] for d in demands) for i in range(len(DIMENSIONS))]
+        return [name for name, n, f in zip(DIMENSIONS, needed, self.free) if n > f]
+
+
+def plan(endpoint="", proc="/proc"):
+    """The Plan of the Docker host behind *endpoint* ("" = the local daemon).
+
+    Raises OSError when /proc cannot be read, DockerException when the
+    daemon cannot be reached.
+    """
+    client = DockerClient(**shards.docker_options(endpoint))
+    totals = _proc_totals(proc) if not endpoint else _info_totals(client)
+    return Plan(endpoint, totals, _reserved(client))
+
+
+def _host(endpoint):
+    """A Docker endpoint as shown to the admin."""
+    return endpoint or "the local host"
+
+
+def check(requests, policy):
+    """Check workspaces about to start against their hosts' capacity.
+
+    *requests* is {endpoint: [demand of each workspace starting there]}.
+    Under the "warn" policy a warning is printed for each host that would be
+    overcommitted; under "refuse" ValueError is raised instead. A host whose
+    capacity cannot be read is reported and skipped.
+    """
+    if policy == "off":
+        return
+    problems = []
+    for endpoint, demands in requests.items():
+        if not any(any(d) for d in demands):
+            continue
+        try:
+            short = plan(endpoint).shortfall(demands)
+        except (OSError, DockerException) as exc:
+            click.echo(f"Warning: capacity of {_host(endpoint)} unknown: {exc}")
+            continue
+        if short:
+            problems.append(
+                f"{len(demands)} new workspace(s) exceed the free "
+                f"{'/'.join(short)} of {_host(endpoint)}"
+            )
+    if problems and policy == "refuse":
+        raise ValueError(
+            "Not enough host capacity: " + "; ".join(problems) + ". See "
+            "'dtaas admin capacity', or set [common.users] capacity_policy = \"warn\"."
+        )
+    for problem in problems:
+        click.echo(f"Warning: {problem}; see 'dtaas admin capacity'")
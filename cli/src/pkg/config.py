@@ -1,9 +1,11 @@
 """This file supports the DTaaS config class"""
 
 from . import utils
+from .constants import CAPACITY_POLICIES, IDLE_CPU_PERCENT, ROUTING_MODES, TEMPLATE_LAYERS
+from .validators import is_non_negative_number
 
 
-class Config:
+class Config:  # pylint: disable=too-many-public-methods
     """The Config class for DTaaS"""
 
     def __init__(self):
@@ -122,6 +124,102 @@ class Config:
             return True, Exception("Config file error: resources section is not a dict")
         return bool(resources.get("set_limits", True)), None
 
+    def get_users_options(self):
+        """Gets the optional [common.users] provisioning table ({} when absent)."""
+        conf_common, err = self.get_common()
+        if err is not None or not isinstance(conf_common, dict):
+            return {}, err
+        options = conf_common.get("users", {})
+        if not isinstance(options, dict):
+            return {}, Exception("Config file error: users section is not a dict")
+        return options, None
+
+    def _get_users_count(self, key):
+        """Gets a [common.users] integer option that defaults to 0 (off)."""
+        options, err = self.get_users_options()
+        if err is not None:
+            return 0, err
+        value = options.get(key, 0)
+        if isinstance(value, bool) or not isinstance(value, int):
+            return 0, Exception(f"Config file error: {key} must be an integer")
+        return max(value, 0), None
+
+    def get_shard_size(self):
+        """Gets [common.users] shard_size: users per compose project (0 = one file)."""
+        return self._get_users_count("shard_size")
+
+    def get_warm_pool(self):
+        """Gets [common.users] warm_pool: pre-copied workspace dirs to keep (0 = off)."""
+        return self._get_users_count("warm_pool")
+
+    def _get_users_choice(self, key, choices):
+        """Gets a [common.users] option that is one of *choices* (default: the first)."""
+        options, err = self.get_users_options()
+        value = options.get(key, choices[0])
+        if err is None and value not in choices:
+            return choices[0], Exception(
+                f"Config file error: {key} must be one of {', '.join(choices)}"
+            )
+        return value, err
+
+    def get_template_layer(self):
+        """Gets [common.users] template_layer: how new workspaces share
+        files/template ("copy", the default, "overlay" or "hardlink")."""
+        return self._get_users_choice("template_layer", TEMPLATE_LAYERS)
+
+    def get_capacity_policy(self):
+        """Gets [common.users] capacity_policy: what 'user add' does when new
+        workspaces overcommit their host ("warn", the default, "refuse", "off")."""
+        return self._get_users_choice("capacity_policy", CAPACITY_POLICIES)
+
+    def get_routing(self):
+        """Gets [common.users] routing: how Traefik routes user workspaces
+        ("labels", the default, or "file", see routes.py)."""
+        return self._get_users_choice("routing", ROUTING_MODES)
+
+    def get_idle_policy(self):
+        """Gets the [common.users] idle hibernation policy.
+
+        Returns {"minutes": idle_minutes, "cpu_percent": idle_cpu_percent};
+        idle_minutes defaults to 0 (hibernation disabled).
+        """
+        options, err = self.get_users_options()
+        policy = {
+            "minutes": options.get("idle_minutes", 0),
+            "cpu_percent": options.get("idle_cpu_percent", IDLE_CPU_PERCENT),
+        }
+        if err is None and not all(map(is_non_negative_number, policy.values())):
+            err = Exception(
+                "Config file error: idle_minutes/idle_cpu_percent must be numbers >= 0"
+            )
+        return policy, err
+
+    def get_schedules(self):
+        """Gets the [[common.users.schedules]] tables ([] = no schedules)."""
+        options, err = self.get_users_options()
+        if err is not None:
+            return [], err
+        schedules = options.get("schedules", [])
+        if not isinstance(schedules, list):
+            return [], Exception(
+                "Config file error: schedules must be an array of tables "
+                "([[common.users.schedules]])"
+            )
+        return schedules, None
+
+    def get_hosts(self):
+        """Gets the [[common.users.hosts]] Docker endpoints ([] = local daemon only)."""
+        options, err = self.get_users_options()
+        if err is not None:
+            return [], err
+        hosts = options.get("hosts", [])
+        if not isinstance(hosts, list) or not all(isinstance(h, dict) for h in hosts):
+            return [], Exception(
+                "Config file error: hosts must be an array of tables "
+                "([[common.users.hosts]])"
+            )
+        return hosts, None
+
     def get_tls(self):
         """Gets the TLS flag from config.common.security"""
         conf_common, err = self.get_common()
@@ -7,12 +7,17 @@ validators.py for the generic, DTaaS-agnostic predicates each check builds on.
 """
 
 from . import utils
+from .constants import CAPACITY_POLICIES, ROUTING_MODES, TEMPLATE_LAYERS
+from .scheduler import parse_schedules
+from .trace import spanned
 from .validators import (
     get_nested,
     is_email,
     is_existing_dir,
     is_host,
     is_int,
+    is_non_negative_int,
+    is_non_negative_number,
     is_number,
     is_size,
     is_string_list,
@@ -69,6 +74,79 @@ def _check_resources(data):
     return errors
 
 
+# Optional [[common.users.hosts]] fields checked when present: (key, predicate, label).
+_OPTIONAL_HOST_FIELDS = (
+    ("endpoint", lambda v: isinstance(v, str), "must be a string"),
+    ("cpus", is_number, "must be a positive number of CPU cores"),
+    ("mem", is_size, "must include a unit, e.g. '64G'"),
+)
+
+
+def _host_record_errors(host):
+    """Validate one [[common.users.hosts]] record: required name, optional fields."""
+    if not isinstance(host, dict):
+        return ["common.users.hosts: each entry must be a table"]
+    name = host.get("name")
+    if not is_username(name):
+        return ["common.users.hosts: each entry requires a valid 'name'"]
+    errors = []
+    for field, predicate, label in _OPTIONAL_HOST_FIELDS:
+        message = f"common.users.hosts.{name}.{field} {label}"
+        errors += optional(host, (field,), (predicate, message))
+    return errors
+
+
+def _check_hosts(data):
+    """[[common.users.hosts]], when present, must be uniquely-named host records."""
+    hosts = get_nested(data, "common", "users", "hosts")
+    if hosts is None:
+        return []
+    if not isinstance(hosts, list):
+        return ["common.users.hosts must be an array of tables ([[common.users.hosts]])"]
+    names = [h.get("name") for h in hosts if isinstance(h, dict)]
+    dupes = sorted({str(n) for n in names if names.count(n) > 1})
+    errors = [f"common.users.hosts: duplicate name '{n}'" for n in dupes]
+    for host in hosts:
+        errors += _host_record_errors(host)
+    return errors
+
+
+# Optional [common.users] scalar options checked when present: (key, predicate, label).
+_USER_OPTION_FIELDS = (
+    ("shard_size", is_non_negative_int, "a non-negative integer"),
+    ("warm_pool", is_non_negative_int, "a non-negative integer"),
+    ("idle_minutes", is_non_negative_int, "a non-negative integer"),
+    ("idle_cpu_percent", is_non_negative_number, "a non-negative number"),
+    ("template_layer", lambda v: v in TEMPLATE_LAYERS, "one of " + ", ".join(TEMPLATE_LAYERS)),
+    (
+        "capacity_policy",
+        lambda v: v in CAPACITY_POLICIES,
+        "one of " + ", ".join(CAPACITY_POLICIES),
+    ),
+    ("routing", lambda v: v in ROUTING_MODES, "one of " + ", ".join(ROUTING_MODES)),
+)
+
+
+def _check_schedules(data):
+    """[[common.users.schedules]], when present, must be named tables with
+    valid cron times (see scheduler.py)."""
+    schedules = get_nested(data, "common", "users", "schedules")
+    if schedules is None:
+        return []
+    if not isinstance(schedules, list):
+        return ["common.users.schedules must be an array of tables ([[common.users.schedules]])"]
+    return parse_schedules(schedules)[1]
+
+
+def _check_user_provisioning(data):
+    """Optional [common.users] provisioning options (sharding, hosts, ...)."""
+    errors = []
+    for field, predicate, label in _USER_OPTION_FIELDS:
+        message = f"common.users.{field} must be {label}"
+        errors += optional(data, ("common", "users", field), (predicate, message))
+    return errors + _check_hosts(data) + _check_schedules(data)
+
+
 def _duplicate_username_errors(users):
     """Every username across [[users]] must be unique."""
     names = [
@@ -185,10 +263,12 @@ _CHECKS = (
     _check_path,
     _check_certs_src,
     _check_resources,
+    _check_user_provisioning,
     _check_users,
 )
 
 
+@spanned("collect errors", "validate")
 def collect_errors(data, deploy_type=None):
     """Run every check against *data* and return the combined list of problems.
 
@@ -3,13 +3,93 @@ import re
 # For users.py / deploy.py
 COMPOSE_USERS_YML = "compose.users.yml"
 
+# For shards.py: the {username: shard} index of the sharded users layout.
+SHARD_INDEX = ".dtaas.shards.json"
+
 # For registry.py
 REGISTRY_FILE = "dtaas.users.registry.json"
 DESIRED_STATUSES = frozenset({"running", "paused", "stopped"})
 
+# For user_import.py: the checkpoint journal of a chunked 'user add --file'.
+IMPORT_JOURNAL = ".dtaas.import.json"
+IMPORT_CHUNK_SIZE = 100
+
 # For state.py
 STATE_FILE = ".dtaas.state.json"
 
+# For hibernate.py: idle tracking of additional users' workspaces.
+IDLE_STATE = ".dtaas.idle.json"
+IDLE_CPU_PERCENT = 1.0
+
+# For scheduler.py: what 'admin scheduler run' has done, how many users each
+# users_lifecycle call acts on, how often it wakes up, and how far back a
+# (re)started scheduler looks for a pause/stop/resume it missed.
+SCHEDULER_STATE = ".dtaas.scheduler.json"
+SCHEDULE_ACTIONS = ("pause", "stop", "resume")
+SCHEDULE_BATCH = 50
+SCHEDULE_INTERVAL = 60
+SCHEDULE_CATCH_UP_HOURS = 24
+
+# For usage.py / resources.py: recent usage samples kept per user (a day of
+# 5-minute samples) and the headroom added to observed percentiles.
+USAGE_HISTORY = ".dtaas.usage.json"
+USAGE_HISTORY_SIZE = 288
+SUGGEST_HEADROOM = 1.25
+
+# For images.py: workspace image digests pulled per Docker endpoint.
+IMAGE_CACHE = ".dtaas.images.json"
+
+# For reconcile_watch.py: how often 'config reconcile --watch' checks the
+# registry/state/compose files for changes (and waits for Docker events).
+WATCH_POLL_SECONDS = 1.0
+
+# For user_files.py: parallel walkers purging files/.trash.
+PURGE_WORKERS = 8
+
+# For snapshots.py: workspaces snapshotted/restored in parallel.
+SNAPSHOT_WORKERS = 8
+
+# For disk_usage.py: cached per-directory workspace usage, measured in
+# parallel by 'dtaas admin status'.
+DISK_USAGE_CACHE = ".dtaas.disk_usage.json"
+USAGE_WORKERS = 8
+
+# For fleet.py: the default fleet manifest and installations run at once.
+FLEET_MANIFEST = "dtaas.fleet.toml"
+FLEET_JOBS = 4
+
+# For capacity.py: what 'user add' does when new workspaces overcommit a host.
+CAPACITY_POLICIES = ("warn", "refuse", "off")
+
+# For template_layer.py: how new workspaces share files/template.
+TEMPLATE_LAYERS = ("copy", "overlay", "hardlink")
+
+# For routes.py: how user workspaces are routed by Traefik, the dynamic-config
+# directory/file of "file" routing and the port workspaces serve on.
+ROUTING_MODES = ("labels", "file")
+ROUTES_DIR = "config/dynamic"
+ROUTES_FILE = "config/dynamic/users.yml"
+WORKSPACE_PORT = 8080
+
+# For startup_timing.py: how long 'user add --timings' waits for new
+# workspaces to come up, and how often it checks on them.
+STARTUP_TIMEOUT = 300
+STARTUP_POLL_SECONDS = 1.0
+
+# For trace.py: the Chrome trace file 'dtaas --trace' writes by default.
+TRACE_FILE = ".dtaas.trace.json"
+
+# For history.py: the operation history every 'dtaas admin' command appends to.
+HISTORY_FILE = ".dtaas.history.jsonl"
+
+# For locks.py: where the lock files of concurrent 'dtaas admin' commands
+# live, how many users a command locks one by one (more lock every user),
+# how long a command waits for a lock and how often it checks.
+LOCK_DIR = ".dtaas.locks"
+LOCK_MAX_USERS = 256
+LOCK_TIMEOUT = 600
+LOCK_POLL_SECONDS = 0.1
+
 # For utils.py
 LOCALHOST_SERVER = "localhost"
 
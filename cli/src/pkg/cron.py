@@ -0,0 +1,123 @@
+"""Five-field cron expressions for [[common.users.schedules]] (see scheduler.py).
+
+    minute hour day-of-month month day-of-week
+    "0 20 * * 1-5"      20:00 Monday to Friday
+    "30 7 * * mon-fri"  07:30 on weekdays
+    "*/15 8-18 * * *"   every 15 minutes from 08:00 to 18:45
+
+Each field is '*', a number, a range 'a-b', a step '*/n' or 'a-b/n', or a
+comma-separated list of those. Days of the week run 0-7 (0 and 7 are
+Sunday) or sun-sat, months 1-12 or jan-dec. As in cron, when both day
+fields are restricted a time matches if either does. Times are the host's
+local time.
+"""
+
+from dataclasses import dataclass
+from datetime import timedelta
+
+_FIELDS = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7),
+)
+_NAMES = {
+    "month": ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"],
+    "weekday": ["sun", "mon", "tue", "wed", "thu", "fri", "sat"],
+}
+
+
+@dataclass(frozen=True)
+class Cron:
+    """A parsed cron expression: the values each field matches."""
+
+    minute: frozenset
+    hour: frozenset
+    day: frozenset
+    month: frozenset
+    weekday: frozenset
+    day_restricted: bool
+    weekday_restricted: bool
+
+    def matches(self, when):
+        """Whether the datetime *when* (to the minute) is one of its times."""
+        if when.minute not in self.minute or when.hour not in self.hour:
+            return False
+        if when.month not in self.month:
+            return False
+        day = when.day in self.day
+        weekday = when.isoweekday() % 7 in self.weekday
+        if self.day_restricted and self.weekday_restricted:
+            return day or weekday
+        return day and weekday
+
+    def last_before(self, now, since):
+        """The latest matching minute in (since, now], or None.
+
+        Walks back minute by minute, so callers bound how far back *since* is.
+        """
+        when = now.replace(second=0, microsecond=0)
+        while when > since:
+            if self.matches(when):
+                return when
+            when -= timedelta(minutes=1)
+        return None
+
+    def next_after(self, now, until):
+        """The first matching minute in (now, until], or None."""
+        when = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        while when <= until:
+            if self.matches(when):
+                return when
+            when += timedelta(minutes=1)
+        return None
+
+
+def _value(text, field):
+    """One number or name of *field*; ValueError when it is neither."""
+    names = _NAMES.get(field, [])
+    if text.lower() in names:
+        return names.index(text.lower()) + (1 if field == "month" else 0)
+    if not text.isdigit():
+        raise ValueError(f"{field} '{text}' is not a number or name")
+    return int(text)
+
+
+def _part(part, field, low, high):
+    """The values of one comma-separated part of a field."""
+    spec, slash, step = part.partition("/")
+    if slash and not step.isdigit():
+        raise ValueError(f"{field} step '{step}' is not a number")
+    step = int(step) if slash else 1
+    if spec == "*":
+        first, last = low, high
+    else:
+        bounds = [_value(text, field) for text in spec.split("-")]
+        if len(bounds) > 2:
+            raise ValueError(f"{field} '{part}' is not a value or range")
+        first = bounds[0]
+        last = bounds[-1] if len(bounds) == 2 else (high if step > 1 else first)
+    if step < 1 or not low <= first <= last <= high:
+        raise ValueError(f"{field} '{part}' is outside {low}-{high}")
+    return set(range(first, last + 1, step))
+
+
+def parse_cron(expression):
+    """Parse a five-field cron *expression* into a Cron; ValueError if invalid."""
+    fields = str(expression).split()
+    if len(fields) != len(_FIELDS):
+        raise ValueError(f"'{expression}' must have 5 fields: minute hour day month weekday")
+    values = {}
+    for text, (field, low, high) in zip(fields, _FIELDS):
+        try:
+            parts = (_part(part, field, low, high) for part in text.split(","))
+            values[field] = frozenset().union(*parts)
+        except ValueError as exc:
+            raise ValueError(f"invalid cron expression '{expression}': {exc}") from exc
+    values["weekday"] = frozenset(day % 7 for day in values["weekday"])
+    return Cron(
+        **values,
+        day_restricted=not fields[2].startswith("*"),
+        weekday_restricted=not fields[4].startswith("*"),
+    )
@@ -1,10 +1,11 @@
 """Handlers for the 'dtaas admin install and uninstall' commands."""
 
 from pathlib import Path
-import yaml
 from python_on_whales import DockerClient
 from python_on_whales.utils import ValidPath
+from . import shards, utils
 from .constants import COMPOSE_USERS_YML
+from .trace import spanned
 from .user_files import delete_user_files
 
 COMPOSE_FILE = "docker-compose.yml"
@@ -39,6 +40,41 @@ def _users_client(directory):
     return DockerClient(compose_files=[str(users_compose)])
 
 
+def _shard_client(directory, shard):
+    """A DockerClient for one users compose shard, or None if its file is absent.
+
+    The LEGACY shard is compose.users.yml itself (see _users_client); every
+    numbered shard is a separate, explicitly named compose project, talking to
+    the Docker endpoint it was placed on (see placement.py).
+    """
+    if shard == shards.LEGACY:
+        return _users_client(directory)
+    path = shards.shard_file(shard, directory)
+    if not path.is_file():
+        return None
+    return DockerClient(
+        compose_files=[str(path)],
+        compose_project_name=shards.project_name(shard),
+        **shards.docker_options(shards.shard_endpoint(shard, directory)),
+    )
+
+
+def users_clients(directory, usernames=None):
+    """[(client, usernames)] for the users compose projects to talk to.
+
+    With *usernames*, only the shards holding those users are returned, each
+    paired with its share of them; with None, every shard on disk is returned
+    paired with None (meaning "the whole project"). Unsharded installations
+    get at most the one compose.users.yml client, as before.
+    """
+    if usernames is None:
+        groups = {shard: None for shard in shards.shards(directory)}
+    else:
+        groups = shards.group_by_shard(usernames, directory)
+    pairs = ((_shard_client(directory, shard), names) for shard, names in groups.items())
+    return [(client, names) for client, names in pairs if client is not None]
+
+
 def _toml_present(directory):
     """True if dtaas.toml exists in *directory* or the current directory."""
     return (Path(directory) / "dtaas.toml").is_file() or Path("dtaas.toml").is_file()
@@ -68,6 +104,7 @@ def _require_deployment(directory):
         )
 
 
+@spanned("compose up", "docker")
 def install(directory="."):
     """Bring the generated deployment up with 'docker compose up -d'.
 
@@ -81,15 +118,15 @@ def install(directory="."):
 def _down_user_containers(directory):
     """Tear down containers added via 'dtaas admin user add', if any exist.
 
-    These live in compose.users.yml as a separate project, so the main
-    'compose down' would otherwise leave them running and hold the shared
-    network open.
+    These live in compose.users.yml (or its shards) as separate projects, so
+    the main 'compose down' would otherwise leave them running and hold the
+    shared network open.
     """
-    client = _users_client(directory)
-    if client is not None:
+    for client, _ in users_clients(directory):
         client.compose.down(remove_orphans=True)
 
 
+@spanned("compose down", "docker")
 def uninstall(directory=".", remove_user_files=False):
     """Tear the deployment down with 'docker compose down'.
 
@@ -118,10 +155,10 @@ def installation_present(directory):
         return False
     if _client(directory).compose.ps(all=True):
         return True
-    client = _users_client(directory)
-    return client is not None and bool(client.compose.ps(all=True))
+    return any(client.compose.ps(all=True) for client, _ in users_clients(directory))
 
 
+@spanned("compose up {service}", "docker")
 def restart_service(directory, service):
     """Recreate one compose service so it picks up new certificates or config.
 
@@ -132,6 +169,7 @@ def restart_service(directory, service):
     _client(directory).compose.up(services=[service], force_recreate=True, detach=True)
 
 
+@spanned("compose up --force-recreate", "docker")
 def restart_all(directory):
     """Recreate every compose service so they pick up new configuration.
 
@@ -142,6 +180,7 @@ def restart_all(directory):
     _client(directory).compose.up(force_recreate=True, detach=True)
 
 
+@spanned("compose stop {service}", "docker")
 def stop_service(directory, service):
     """Stop one compose service so its files can be safely replaced.
 
@@ -169,6 +208,6 @@ def compose_services(directory):
     Raises OSError when the compose file is missing.
     """
     require_compose_file(directory)
-    data = yaml.safe_load((Path(directory) / COMPOSE_FILE).read_text(encoding="utf-8"))
+    data = utils.read_yaml(Path(directory) / COMPOSE_FILE)
     services = data.get("services", {}) if isinstance(data, dict) else {}
     return set(services)
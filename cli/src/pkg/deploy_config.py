@@ -4,6 +4,7 @@ import re
 from pathlib import Path
 from ._deploy_data import _DEPLOY_FILES, _SECRET_PLACEHOLDERS
 from .constants import USER_PSEUDO_KEY_RE
+from .trace import spanned
 
 
 def _set_env_value(text, key, value):
@@ -177,6 +178,7 @@ def _collect_apply_errors(dest_dir, specs):
     return errors
 
 
+@spanned("apply config", "render")
 def apply_config(dest_dir, specs):
     """Apply substitution specs to config files under dest_dir.
 
@@ -187,6 +189,7 @@ def apply_config(dest_dir, specs):
         raise OSError("\n".join(errors))
 
 
+@spanned("diff config", "render")
 def diff_specs(dest_dir, specs):
     """Return the relative paths whose content *specs* would change.
 
@@ -0,0 +1,118 @@
+"""Cached, incremental disk usage of user workspaces (files/<user>).
+
+'dtaas admin status' reports how much space each user's workspace takes. A
+full 'du' reads the inode of every file of every user; instead, the totals
+of each directory are cached in .dtaas.disk_usage.json, keyed by the
+directory's mtime:
+
+    {"alice": {"mtime": 1761000000000000000, "files": 8192,
+               "dirs": {"notebooks": {"mtime": ..., "files": ..., "dirs": {}}}}}
+
+'files' is the space (allocated blocks, as du counts it) of the directory's
+own entries other than subdirectories. A directory whose mtime is unchanged
+has had no entry added, removed or renamed, so its cached 'files' total and
+subdirectory names are reused and only its subdirectories are stat-ed; only
+changed directories are listed again. Users are measured in parallel threads.
+
+A file rewritten in place (appended to, not saved through a rename) leaves
+its directory's mtime alone, so its new size is picked up once something
+else in that directory changes. A file hardlinked into several workspaces
+(template_layer = "hardlink") is counted in each of them.
+"""
+
+import json
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from . import utils
+from .constants import DISK_USAGE_CACHE, USAGE_WORKERS
+from .user_files import is_generated_user_dir
+
+
+def load_cache(path=DISK_USAGE_CACHE):
+    """Return {user: directory node}; empty when absent or unreadable."""
+    file = Path(path)
+    if not file.is_file():
+        return {}
+    try:
+        data = json.loads(file.read_text(encoding="utf-8"))
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _write_cache(cache, path):
+    """Atomically persist the usage cache (temp file + os.replace)."""
+    utils.write_json(cache, path, indent=None)
+
+
+def _allocated(info):
+    """Bytes allocated to a file (st_blocks is in 512-byte units)."""
+    return getattr(info, "st_blocks", 0) * 512 or info.st_size
+
+
+def _scan(path, mtime):
+    """List *path* afresh: its node, with subdirectory nodes still unscanned."""
+    files, dirs = 0, {}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            info = entry.stat(follow_symlinks=False)
+            if stat.S_ISDIR(info.st_mode):
+                dirs[entry.name] = None
+            else:
+                files += _allocated(info)
+    return {"mtime": mtime, "files": files, "dirs": dirs}
+
+
+def _measure_dir(path, cached):
+    """The up-to-date node of directory *path*, reusing *cached* where its
+    mtime is unchanged."""
+    info = os.stat(path, follow_symlinks=False)
+    if cached and cached.get("mtime") == info.st_mtime_ns:
+        node = {**cached, "dirs": dict(cached.get("dirs") or {})}
+    else:
+        node = _scan(path, info.st_mtime_ns)
+        previous = (cached or {}).get("dirs") or {}
+        node["dirs"] = {name: previous.get(name) for name in node["dirs"]}
+    for name, child in node["dirs"].items():
+        try:
+            node["dirs"][name] = _measure_dir(os.path.join(path, name), child)
+        except FileNotFoundError:
+            node["dirs"][name] = None  # removed meanwhile; rescanned next time
+    node["dirs"] = {name: child for name, child in node["dirs"].items() if child}
+    node["total"] = _allocated(info) + node["files"]
+    node["total"] += sum(child["total"] for child in node["dirs"].values())
+    return node
+
+
+def _measure_user(files_dir, name, cached):
+    """*name*'s workspace node, or None when it cannot be read."""
+    try:
+        return _measure_dir(os.path.join(files_dir, name), cached)
+    except PermissionError:
+        return None
+
+
+def measure(files_dir, usernames, cache_path=DISK_USAGE_CACHE, workers=USAGE_WORKERS):
+    """{user: bytes used by files/<user>} for *usernames* whose workspace can
+    be read, updating the cache at *cache_path*.
+
+    Cache entries of users whose workspace is gone are dropped. Writing the
+    cache is best-effort: 'status' run from a read-only directory still gets
+    the sizes, it just measures from scratch next time.
+    """
+    if not Path(files_dir).is_dir():
+        return {}
+    cache = load_cache(cache_path)
+    present = {p.name for p in Path(files_dir).iterdir() if is_generated_user_dir(p)}
+    names = [name for name in usernames if name in present]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        nodes = executor.map(lambda n: _measure_user(files_dir, n, cache.get(n)), names)
+        measured = {name: node for name, node in zip(names, nodes) if node}
+    kept = {name: node for name, node in cache.items() if name in present}
+    try:
+        _write_cache({**kept, **measured}, cache_path)
+    except OSError:
+        pass
+    return {name: node["total"] for name, node in measured.items()}
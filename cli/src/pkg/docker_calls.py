@@ -0,0 +1,243 @@
+"""Recorder of the docker CLI processes a command spawns ('dtaas --docker-calls').
+
+Every Docker operation of the CLI forks a docker process: python-on-whales
+runs 'docker ...' through python_on_whales.utils.run (or, for streamed
+output, stream_stdout_and_stderr), and users_compose starts and removes
+user containers with 'docker compose ...' through subprocess.run. Inside
+recording() those entry points are wrapped, and each process is kept as a
+Call -- its argv, wall time, exit code and captured output size:
+
+    with docker_calls.recording() as recorder:
+        users.add_users(config)
+    recorder.count("compose up")   # docker processes spawned per command
+
+'dtaas --docker-calls' (or DTAAS_DOCKER_CALLS=1) records the whole command
+and prints the per-command summary to stderr when it ends. Tests use the
+same recorder to pin the number of docker round trips of an operation.
+Outside recording() nothing is wrapped and record() does nothing.
+"""
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+import click
+from python_on_whales import utils as whales_utils
+from python_on_whales.exceptions import DockerException
+
+DOCKER_CALLS_ENV = "DTAAS_DOCKER_CALLS"
+
+# docker management commands whose subcommand names the call ('compose up').
+_GROUPS = frozenset(
+    {"buildx", "compose", "container", "context", "image", "network", "system", "volume"}
+)
+
+
+@dataclass
+class Call:
+    """One docker process: argv, wall time, exit code and output bytes."""
+
+    argv: list
+    seconds: float
+    exit_code: int
+    output_bytes: int = 0
+
+    @property
+    def command(self):
+        """The docker command run, e.g. 'compose up' or 'ps'."""
+        return command_name(self.argv)
+
+
+def command_name(argv):
+    """'compose up' for 'docker --context c compose -f f.yml up -d alice'.
+
+    Options are skipped together with a separate value ('--file f.yml'), so
+    the words left are the command and, for a management command such as
+    compose, its subcommand.
+    """
+    words, skip = [], False
+    for arg in (str(arg) for arg in argv[1:]):
+        if arg.startswith("-"):
+            skip = "=" not in arg
+            continue
+        if skip:
+            skip = False
+            continue
+        words.append(arg)
+        if words[0] not in _GROUPS or len(words) == 2:
+            break
+    return " ".join(words) or "docker"
+
+
+class Recorder:
+    """The docker processes spawned while it was recording."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = []
+
+    def add(self, call):
+        """Keep one finished Call."""
+        with self.lock:
+            self.calls.append(call)
+
+    def count(self, command=None):
+        """Processes spawned, in total or for one *command* ('compose up')."""
+        return sum(1 for call in self.calls if command in (None, call.command))
+
+    def summary(self):
+        """{command: {"calls", "seconds", "failed", "output_bytes"}}, slowest first."""
+        rows = {}
+        for call in self.calls:
+            row = rows.setdefault(
+                call.command, {"calls": 0, "seconds": 0.0, "failed": 0, "output_bytes": 0}
+            )
+            row["calls"] += 1
+            row["seconds"] += call.seconds
+            row["failed"] += call.exit_code != 0
+            row["output_bytes"] += call.output_bytes
+        return dict(sorted(rows.items(), key=lambda item: -item[1]["seconds"]))
+
+
+_ACTIVE = []
+_ORIGINALS = {}
+
+
+def record(argv, seconds, exit_code, output_bytes=0):
+    """Add a docker process to every active recorder (a no-op when none is)."""
+    if not _ACTIVE:
+        return
+    call = Call([str(arg) for arg in argv], seconds, exit_code, output_bytes)
+    for recorder in list(_ACTIVE):
+        recorder.add(call)
+
+
+def _size(output):
+    """Bytes of python-on-whales' decoded output: a str or (stdout, stderr)."""
+    if isinstance(output, tuple):
+        return sum(_size(part) for part in output)
+    return len(output.encode()) if isinstance(output, str) else 0
+
+
+def _recorded_run(run):
+    """Wrap python_on_whales.utils.run so each docker process is recorded."""
+
+    def wrapper(args, *rest, **kwargs):
+        start = time.perf_counter()
+        try:
+            output = run(args, *rest, **kwargs)
+        except DockerException as exc:
+            size = _size((exc.stdout or "", exc.stderr or ""))
+            record(args, time.perf_counter() - start, exc.return_code, size)
+            raise
+        record(args, time.perf_counter() - start, 0, _size(output))
+        return output
+
+    return wrapper
+
+
+def _recorded_stream(stream):
+    """Wrap python_on_whales.utils.stream_stdout_and_stderr likewise."""
+
+    def wrapper(full_cmd, *rest, **kwargs):
+        start, size = time.perf_counter(), 0
+        try:
+            for source, line in stream(full_cmd, *rest, **kwargs):
+                size += len(line)
+                yield source, line
+        except DockerException as exc:
+            record(full_cmd, time.perf_counter() - start, exc.return_code, size)
+            raise
+        record(full_cmd, time.perf_counter() - start, 0, size)
+
+    return wrapper
+
+
+def _whales_modules():
+    """The loaded python-on-whales modules (components import run by name)."""
+    return [
+        module
+        for name, module in list(sys.modules.items())
+        if module is not None and name.split(".")[0] == "python_on_whales"
+    ]
+
+
+def _install():
+    """Point every python-on-whales reference to run/stream at a wrapper."""
+    wrappers = {
+        "run": (whales_utils.run, _recorded_run(whales_utils.run)),
+        "stream_stdout_and_stderr": (
+            whales_utils.stream_stdout_and_stderr,
+            _recorded_stream(whales_utils.stream_stdout_and_stderr),
+        ),
+    }
+    for module in _whales_modules():
+        for attr, (original, wrapper) in wrappers.items():
+            if getattr(module, attr, None) is original:
+                _ORIGINALS[(module, attr)] = original
+                setattr(module, attr, wrapper)
+
+
+def _uninstall():
+    """Restore the python-on-whales functions _install() replaced."""
+    for (module, attr), original in _ORIGINALS.items():
+        setattr(module, attr, original)
+    _ORIGINALS.clear()
+
+
+@contextmanager
+def recording():
+    """Record the docker processes spawned in the enclosed block; yields the Recorder."""
+    recorder = Recorder()
+    if not _ACTIVE:
+        _install()
+    _ACTIVE.append(recorder)
+    try:
+        yield recorder
+    finally:
+        _ACTIVE.remove(recorder)
+        if not _ACTIVE:
+            _uninstall()
+
+
+def enabled(flag=False, environ=None):
+    """Whether to record ('--docker-calls', or DTAAS_DOCKER_CALLS=1/true/yes)."""
+    value = (os.environ if environ is None else environ).get(DOCKER_CALLS_ENV, "")
+    return flag or value.lower() in ("1", "true", "yes")
+
+
+def summary_lines(recorder):
+    """The per-command summary of *recorder* as table lines."""
+    rows = recorder.summary()
+    seconds = sum(row["seconds"] for row in rows.values())
+    lines = [f"docker processes: {recorder.count()} in {seconds:.2f}s"]
+    if not rows:
+        return lines
+    table = [("COMMAND", "CALLS", "TIME", "FAILED", "OUTPUT")]
+    table += [
+        (
+            command,
+            str(row["calls"]),
+            f"{row['seconds']:.2f}s",
+            str(row["failed"]),
+            f"{row['output_bytes']}B",
+        )
+        for command, row in rows.items()
+    ]
+    widths = [max(len(row[i]) for row in table) for i in range(len(table[0]))]
+    for row in table:
+        lines.append("  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)).rstrip())
+    return lines
+
+
+@contextmanager
+def session():
+    """Record the enclosed command, then print its summary to stderr."""
+    with recording() as recorder:
+        try:
+            yield recorder
+        finally:
+            for line in summary_lines(recorder):
+                click.echo(line, err=True)
@@ -0,0 +1,152 @@
+"""Fleet mode: run one CLI command across several DTaaS installations.
+
+A fleet manifest (dtaas.fleet.toml by default) lists the installations, each
+an installation directory holding its own dtaas.toml, plus optionally the
+docker context its Docker daemon is reached through:
+
+    [[installations]]
+    name = "lab-a"
+    path = "/opt/dtaas-lab-a"
+
+    [[installations]]
+    name = "lab-b"
+    path = "/srv/dtaas"
+    context = "lab-b"        # exported as DOCKER_CONTEXT
+
+Each installation is handled by its own 'python -m src ...' process,
+run in the installation directory: the CLI reads dtaas.toml, the registry and
+the compose files relative to its working directory, so installations cannot
+share one process. At most *jobs* run at a time; their outcomes are
+collected in manifest order for a single merged report.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from . import utils
+from .constants import FLEET_JOBS, FLEET_MANIFEST
+
+
+@dataclass(frozen=True)
+class Installation:
+    """One fleet member: a name, its directory and its docker context."""
+
+    name: str
+    path: str
+    context: str = ""
+
+
+@dataclass(frozen=True)
+class Outcome:
+    """What running a command against one installation produced."""
+
+    installation: Installation
+    returncode: int
+    stdout: str
+    stderr: str
+
+    @property
+    def ok(self):
+        """True when the command exited 0."""
+        return self.returncode == 0
+
+
+def _entry_errors(index, entry, names):
+    """Problems with the *index*-th [[installations]] entry."""
+    where = f"installations[{index}]"
+    if not isinstance(entry, dict):
+        return [f"{where} must be a table"]
+    errors = []
+    name, path = entry.get("name"), entry.get("path")
+    if not isinstance(name, str) or not name:
+        errors.append(f"{where}.name must be a non-empty string")
+    elif name in names:
+        errors.append(f"{where}: duplicate name '{name}'")
+    if not isinstance(path, str) or not Path(path).is_dir():
+        errors.append(f"{where}.path must be an existing directory")
+    if not isinstance(entry.get("context", ""), str):
+        errors.append(f"{where}.context must be a string")
+    return errors
+
+
+def _resolved(entry, base):
+    """*entry* with a relative path resolved against *base*."""
+    if isinstance(entry, dict) and isinstance(entry.get("path"), str):
+        return {**entry, "path": str(base / entry["path"])}
+    return entry
+
+
+def load_manifest(path=FLEET_MANIFEST):
+    """Read the fleet manifest; return (list of Installation, error if any).
+
+    Relative installation paths are resolved against the manifest's
+    directory.
+    """
+    data, err = utils.import_toml(path)
+    if err is not None:
+        return [], err
+    base = Path(path).resolve().parent
+    entries = [_resolved(entry, base) for entry in data.get("installations", [])]
+    errors, names = [], set()
+    for index, entry in enumerate(entries):
+        errors += _entry_errors(index, entry, names)
+        names.add(entry.get("name") if isinstance(entry, dict) else None)
+    if not entries:
+        errors.append("no [[installations]] listed")
+    if errors:
+        return [], Exception(f"Invalid fleet manifest '{path}':\n- " + "\n- ".join(errors))
+    return [Installation(e["name"], e["path"], e.get("context", "")) for e in entries], None
+
+
+# The directory holding the 'src' package, so the child processes import this
+# same CLI whatever their working directory.
+_IMPORT_ROOT = str(Path(__file__).resolve().parents[2])
+
+
+def run_one(installation, args):
+    """Run 'dtaas <args>' in *installation*'s directory; return its Outcome."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [_IMPORT_ROOT, env.get("PYTHONPATH")]))
+    if installation.context:
+        env["DOCKER_CONTEXT"] = installation.context
+    result = subprocess.run(
+        [sys.executable, "-m", "src", *args],
+        cwd=installation.path,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return Outcome(installation, result.returncode, result.stdout, result.stderr)
+
+
+def run(installations, args, jobs=FLEET_JOBS):
+    """Run 'dtaas <args>' against every installation, *jobs* at a time.
+
+    Returns the Outcomes in the order of *installations*.
+    """
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+        return list(executor.map(lambda i: run_one(i, args), installations))
+
+
+def merge_status(outcomes):
+    """Merge 'admin status --json' outcomes: (rows, {name: error}).
+
+    Every row gains an 'installation' key naming where it came from.
+    """
+    rows, errors = [], {}
+    for outcome in outcomes:
+        name = outcome.installation.name
+        try:
+            records = json.loads(outcome.stdout) if outcome.ok else None
+        except ValueError:
+            records = None
+        if records is None:
+            errors[name] = (outcome.stderr or outcome.stdout).strip() or "no output"
+            continue
+        rows += [{"installation": name, **record} for record in records]
+    return rows, errors
@@ -0,0 +1,120 @@
+"""Idle auto-hibernation of additional users' workspaces.
+
+'dtaas admin user hibernate' is meant to run periodically (e.g. from cron).
+Each run takes one usage sample of every running registry user (usage.py,
+which also keeps it for resources.py's limit suggestions) and compares it
+with the previous run's, tracked in .dtaas.idle.json:
+
+    {"users": {"alice": {"net": 18231, "idle_since": 1761000000.0}},
+     "hibernated": ["bob"]}
+
+A workspace is quiet when its CPU is below the threshold and its network
+counters have not moved since the last sample; 'idle_since' records when it
+was first seen quiet and is cleared as soon as it is not. Users quiet for at
+least the idle threshold are paused through users_lifecycle.pause_users, so
+their registry desired_status becomes 'paused' exactly as for a manual
+'user pause', and are listed under 'hibernated'. wake() (the resume hook,
+'dtaas admin user wake') resumes hibernated users only, never ones an admin
+paused or stopped on purpose.
+"""
+
+import json
+import time
+from pathlib import Path
+from . import usage, users_lifecycle, utils
+from .constants import IDLE_STATE
+from .registry import load_registry
+
+
+def load_idle_state(path=IDLE_STATE):
+    """Return the idle tracking state ({"users": {}, "hibernated": []} when absent)."""
+    file = Path(path)
+    data = json.loads(file.read_text(encoding="utf-8")) if file.is_file() else {}
+    data = data if isinstance(data, dict) else {}
+    users = data.get("users")
+    hibernated = data.get("hibernated")
+    return {
+        "users": users if isinstance(users, dict) else {},
+        "hibernated": hibernated if isinstance(hibernated, list) else [],
+    }
+
+
+def _write_idle_state(state, path):
+    """Atomically persist the idle tracking state (temp file + os.replace)."""
+    utils.write_json(state, path)
+
+
+def _status(details):
+    """A registry entry's desired_status (default 'running')."""
+    return details.get("desired_status", "running") if isinstance(details, dict) else None
+
+
+def _observe(previous, current, cpu_percent, now):
+    """The new tracking entry for one user from its previous entry and sample."""
+    quiet = current["cpu"] <= cpu_percent and previous.get("net") == current["net"]
+    since = (previous.get("idle_since") or now) if quiet else None
+    return {"net": current["net"], "idle_since": since}
+
+
+def _track(state, policy, now):
+    """Sample every running registry user and update *state*'s tracking.
+
+    Hibernated users that were since resumed (or deleted) by other means are
+    dropped from 'hibernated'. Returns the users quiet for policy["minutes"].
+    """
+    registry = load_registry()
+    running = [name for name, details in registry.items() if _status(details) == "running"]
+    samples = usage.sample(running)
+    usage.record(samples, now)
+    previous = state["users"]
+    state["users"] = {
+        name: _observe(previous.get(name, {}), current, policy["cpu_percent"], now)
+        for name, current in samples.items()
+    }
+    state["hibernated"] = [
+        name for name in state["hibernated"] if _status(registry.get(name)) == "paused"
+    ]
+    return _idle_users(state["users"], policy["minutes"] * 60, now)
+
+
+def _idle_users(tracked, limit, now):
+    """Users of *tracked* quiet for at least *limit* seconds, sorted."""
+    return sorted(
+        name
+        for name, entry in tracked.items()
+        if entry["idle_since"] is not None and now - entry["idle_since"] >= limit
+    )
+
+
+def hibernate(policy, dry_run=False, now=None, path=IDLE_STATE):
+    """Pause the users idle for at least policy["minutes"]; return their names.
+
+    *policy* is Config.get_idle_policy()'s {"minutes", "cpu_percent"}. With
+    *dry_run* the idle users are only reported (the new sample is still
+    recorded). Raises DockerException if sampling or pausing fails.
+    """
+    state = load_idle_state(path)
+    idle = _track(state, policy, time.time() if now is None else now)
+    if idle and not dry_run:
+        acted, _, _ = users_lifecycle.pause_users(idle)
+        state["hibernated"] = sorted(set(state["hibernated"]) | set(acted))
+        for name in acted:
+            state["users"].pop(name, None)
+    _write_idle_state(state, path)
+    return idle
+
+
+def wake(usernames=None, path=IDLE_STATE):
+    """Resume hibernated users (all of them, or those of *usernames*).
+
+    Users that were not paused by hibernate() are ignored. Returns the names
+    resumed. Raises DockerException if resuming fails.
+    """
+    state = load_idle_state(path)
+    hibernated = state["hibernated"]
+    targets = [n for n in hibernated if usernames is None or n in usernames]
+    if targets:
+        users_lifecycle.resume_users(targets)
+        state["hibernated"] = [n for n in hibernated if n not in targets]
+        _write_idle_state(state, path)
+    return targets
@@ -0,0 +1,183 @@
+"""The operation history of an installation, .dtaas.history.jsonl ('dtaas admin history').
+
+Every 'dtaas admin' command run from the installation directory appends one
+JSON line when it ends:
+
+    {"started": "2026-10-19T09:12:03+00:00", "command": "admin config reconcile",
+     "args": ["--fix"], "outcome": "ok", "exit_code": 0, "error": null,
+     "seconds": 41.2, "users": ["alice"], "docker_calls": 7,
+     "docker_commands": {"compose up": 1, "compose ps": 6}}
+
+outcome is "ok", "failed" (a non-zero exit or an error) or "aborted"
+(Ctrl-C). users are the users the command provisioned, deleted, paused,
+stopped or resumed, as reported with affect() by users.py and
+users_lifecycle.py. docker_calls counts the docker processes spawned (see
+docker_calls.py). Lines are only ever appended, one write each, so
+concurrent commands never interleave within a line; unreadable lines are
+skipped when reading. 'admin history' itself is not recorded.
+DTAAS_HISTORY=<file> records to another file, DTAAS_HISTORY=0 not at all.
+"""
+
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import click
+from . import docker_calls
+from .constants import HISTORY_FILE
+from .resources import percentile
+
+HISTORY_ENV = "DTAAS_HISTORY"
+OUTCOMES = ("ok", "failed", "aborted")
+
+_SINCE_RE = re.compile(r"^(\d+)([mhdw])$")
+_SINCE_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+# The entry of the command running in this process, if it is recorded.
+_CURRENT = []
+
+
+def affect(usernames):
+    """Note *usernames* as affected by the command being recorded (if any)."""
+    if _CURRENT:
+        users = _CURRENT[-1]["users"]
+        users.extend(name for name in usernames if name not in users)
+
+
+def history_path(environ=None):
+    """The history file to record to and read (DTAAS_HISTORY), or None when
+    recording is turned off."""
+    value = (os.environ if environ is None else environ).get(HISTORY_ENV, "")
+    if value.lower() in ("0", "false", "no"):
+        return None
+    return HISTORY_FILE if value.lower() in ("", "1", "true", "yes") else value
+
+
+def _outcome(exc):
+    """(outcome, exit code, error message) of a command that raised *exc*."""
+    if exc is None:
+        return "ok", 0, None
+    if isinstance(exc, click.exceptions.Exit):
+        return ("ok" if exc.exit_code == 0 else "failed"), exc.exit_code, None
+    if isinstance(exc, click.ClickException):
+        return "failed", exc.exit_code, exc.format_message()
+    if isinstance(exc, (click.Abort, KeyboardInterrupt)):
+        return "aborted", 1, None
+    if isinstance(exc, SystemExit):
+        code = exc.code if isinstance(exc.code, int) else 1
+        return ("ok" if code == 0 else "failed"), code, None
+    return "failed", 1, str(exc) or type(exc).__name__
+
+
+def append(entry, path=HISTORY_FILE):
+    """Append *entry* as one line (a single write to an O_APPEND file)."""
+    line = json.dumps(entry, sort_keys=True) + "\n"
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(line)
+
+
+@contextmanager
+def recording(command, args, path=HISTORY_FILE):
+    """Record the enclosed command *command* (e.g. "admin user add") run
+    with *args*; the entry is appended to *path* however it ends."""
+    entry = {
+        "started": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "command": command,
+        "args": list(args),
+        "users": [],
+    }
+    _CURRENT.append(entry)
+    start = time.perf_counter()
+    error = None
+    try:
+        with docker_calls.recording() as recorder:
+            try:
+                yield entry
+            finally:
+                entry["docker_calls"] = recorder.count()
+                entry["docker_commands"] = {
+                    name: row["calls"] for name, row in recorder.summary().items()
+                }
+    except BaseException as exc:  # recorded, then re-raised unchanged
+        error = exc
+        raise
+    finally:
+        _CURRENT.remove(entry)
+        entry["seconds"] = round(time.perf_counter() - start, 3)
+        entry["outcome"], entry["exit_code"], entry["error"] = _outcome(error)
+        try:
+            append(entry, path)
+        except OSError as exc:
+            click.echo(f"Warning: command not added to '{path}': {exc}", err=True)
+
+
+def load_history(path=HISTORY_FILE):
+    """Every recorded entry, oldest first ([] when there is no history)."""
+    if not os.path.isfile(path):
+        return []
+    entries = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by a crash mid-write
+            if isinstance(entry, dict) and "command" in entry:
+                entries.append(entry)
+    return entries
+
+
+def parse_since(value, now=None):
+    """The UTC datetime *value* ("30m", "12h", "7d", "2w" ago, or an ISO
+    date/time) stands for. Raises ValueError on anything else."""
+    match = _SINCE_RE.match(value.strip())
+    if match:
+        delta = timedelta(**{_SINCE_UNITS[match.group(2)]: int(match.group(1))})
+        return (now or datetime.now(timezone.utc)) - delta
+    parsed = datetime.fromisoformat(value.strip())
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def select(entries, command=None, since=None, outcome=None, user=None):
+    """The entries of commands starting with *command* ("user add"; the
+    leading "admin" is optional), started at or after *since*, with
+    *outcome*, that affected *user*."""
+    if command:
+        command = command if command.startswith("admin") else f"admin {command}"
+    selected = []
+    for entry in entries:
+        if command and not (entry["command"] + " ").startswith(command.strip() + " "):
+            continue
+        if since and datetime.fromisoformat(entry["started"]) < since:
+            continue
+        if outcome and entry.get("outcome") != outcome:
+            continue
+        if user and user not in entry.get("users", []):
+            continue
+        selected.append(entry)
+    return selected
+
+
+def slowest(entries, count):
+    """The *count* longest-running entries, slowest first."""
+    return sorted(entries, key=lambda entry: -entry.get("seconds", 0))[:count]
+
+
+def summary(entries):
+    """{command: {"runs", "failed", "p50", "p90", "p99", "max"}} of the
+    durations of *entries*, by command, most runs first."""
+    durations = {}
+    for entry in entries:
+        durations.setdefault(entry["command"], []).append(entry)
+    rows = {}
+    for command, runs in sorted(durations.items(), key=lambda item: -len(item[1])):
+        seconds = [run.get("seconds", 0) for run in runs]
+        rows[command] = {
+            "runs": len(runs),
+            "failed": sum(1 for run in runs if run.get("outcome") != "ok"),
+            **{f"p{pct}": percentile(seconds, pct) for pct in (50, 90, 99)},
+            "max": max(seconds),
+        }
+    return rows
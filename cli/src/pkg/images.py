@@ -0,0 +1,136 @@
+"""Pre-pull of workspace images before 'user add' starts containers.
+
+'docker compose up -d' pulls a missing image inline, so on a fresh Docker
+host the first new user's start waits for the whole download. Instead,
+users._provision_users renders the new users' compose services first, hands
+the images they reference (image_targets) to prepull, and creates their
+workspace files while the pulls run in background threads; by the time
+compose starts the containers the images are already present.
+
+A pulled image's digest is cached per Docker endpoint in .dtaas.images.json:
+
+    {"": {"ghcr.io/into-cps-association/workspace:latest":
+          {"digest": "ghcr.io/...@sha256:...", "pulled": 1761000000.0}}}
+
+A later add only asks the host whether it still has that digest (a local
+'docker image inspect') and skips the registry round trip when it does. The
+pull policy is the one compose itself uses ("missing"), so a moved tag is
+only picked up by an explicit 'docker pull' (or deleting the cache entry).
+"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import click
+from python_on_whales import DockerClient
+from python_on_whales.exceptions import DockerException
+from . import locks, shards, utils
+from .constants import IMAGE_CACHE
+from .trace import span
+
+
+def load_cache(path=IMAGE_CACHE):
+    """Return {endpoint: {image: {"digest", "pulled"}}}; empty when absent."""
+    file = Path(path)
+    if not file.is_file():
+        return {}
+    data = json.loads(file.read_text(encoding="utf-8"))
+    return data if isinstance(data, dict) else {}
+
+
+def _write_cache(pulled, path):
+    """Merge the *pulled* entries into the digest cache and persist it
+    atomically (temp file + os.replace), re-reading it under
+    locks.files_lock() so another command's pulls are kept."""
+    with locks.files_lock(Path(path).parent):
+        cache = load_cache(path)
+        for endpoint, entries in pulled.items():
+            cache.setdefault(endpoint, {}).update(entries)
+        utils.write_json(cache, path)
+
+
+def image_targets(services, usernames):
+    """{endpoint: sorted images} referenced by *usernames*' rendered services."""
+    targets = {}
+    for shard, names in shards.group_by_shard(usernames).items():
+        endpoint = shards.shard_endpoint(shard)
+        images = targets.setdefault(endpoint, set())
+        images.update(services[n]["image"] for n in names if services.get(n, {}).get("image"))
+    return {endpoint: sorted(images) for endpoint, images in targets.items() if images}
+
+
+def _cached_present(client, entry):
+    """True when the host still has the digest the cache recorded."""
+    return bool(entry) and client.image.exists(entry["digest"])
+
+
+def _pull_one(endpoint, image, entry):
+    """Make sure *endpoint* has *image*; return its cache entry and pull time.
+
+    The pull time is None when the cached digest was already present.
+    """
+    client = DockerClient(**shards.docker_options(endpoint))
+    if _cached_present(client, entry):
+        return entry, None
+    started = time.monotonic()
+    with span(f"pull {image}", "docker", endpoint=endpoint or "local"):
+        pulled = client.image.pull(image, quiet=True)
+    elapsed = time.monotonic() - started
+    digests = pulled.repo_digests or [pulled.id]
+    return {"digest": digests[0], "pulled": time.time()}, elapsed
+
+
+def _report(endpoint, image, outcome):
+    """Echo one pull's outcome (progress for the admin)."""
+    host = endpoint or "local"
+    if isinstance(outcome, Exception):
+        click.echo(f"Pre-pull of {image} on {host} failed, compose will retry: {outcome}")
+    elif outcome[1] is None:
+        click.echo(f"{image} on {host}: cached digest present, pull skipped")
+    else:
+        click.echo(f"{image} on {host}: pulled in {outcome[1]:.1f}s")
+
+
+class Prepull:
+    """Background pulls of *targets* ({endpoint: [images]}), one thread each.
+
+    Start with start(), do other work, then finish() to wait, report and
+    update the digest cache. A failed pull is only reported: compose pulls
+    (and fails properly) on its own when the image is still missing.
+    """
+
+    def __init__(self, targets, path=IMAGE_CACHE):
+        self.targets = targets
+        self.path = path
+        self.cache = load_cache(path)
+        self._executor = None
+        self._futures = {}
+
+    def start(self):
+        """Submit every pull; returns immediately."""
+        jobs = [(e, i) for e, images in self.targets.items() for i in images]
+        if not jobs:
+            return self
+        self._executor = ThreadPoolExecutor(max_workers=len(jobs))
+        for endpoint, image in jobs:
+            entry = self.cache.get(endpoint, {}).get(image)
+            future = self._executor.submit(_pull_one, endpoint, image, entry)
+            self._futures[(endpoint, image)] = future
+        return self
+
+    def finish(self):
+        """Wait for the pulls, report each, and record the digests pulled."""
+        if self._executor is None:
+            return
+        pulled = {}
+        for (endpoint, image), future in self._futures.items():
+            try:
+                outcome = future.result()
+            except DockerException as exc:
+                outcome = exc
+            _report(endpoint, image, outcome)
+            if not isinstance(outcome, Exception):
+                pulled.setdefault(endpoint, {})[image] = outcome[0]
+        self._executor.shutdown()
+        _write_cache(pulled, self.path)
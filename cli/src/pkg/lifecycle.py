@@ -6,7 +6,8 @@ removing it (which is what uninstall does):
 
 - collect_status: per-service state for the main deployment and any
   user-added workloads (compose.users.yml). Docker's 'exited' is reported as
-  'stopped' to match the 'stop' verb.
+  'stopped' to match the 'stop' verb; user services also report the disk
+  space of their files/<user> workspace (see disk_usage.py).
 - stop / start: terminate every container in place ('docker compose stop')
   and bring the stopped containers back ('docker compose start').
 - pause / unpause: freeze and thaw running containers ('docker compose
@@ -26,7 +27,10 @@ it repeats a harmless no-op against whichever project already changed and
 retries the one that failed.
 """
 
-from . import deploy
+from pathlib import Path
+from . import deploy, disk_usage
+from .constants import DISK_USAGE_CACHE
+from .trace import spanned
 
 COMPOSE_SERVICE_LABEL = "com.docker.compose.service"
 DEPLOYMENT_PROJECT = "deployment"
@@ -66,6 +70,7 @@ def _row(project, container):
         "service": _service_name(container),
         "state": _state_name(container),
         "health": _health_name(container),
+        "disk_bytes": None,
     }
 
 
@@ -82,6 +87,7 @@ def _absent_rows(defined, present):
             "service": name,
             "state": "not created",
             "health": None,
+            "disk_bytes": None,
         }
         for name in sorted(defined - present)
     ]
@@ -89,10 +95,24 @@ def _absent_rows(defined, present):
 
 def _user_rows(directory):
     """Status records for user-added workloads, or [] when none exist."""
-    client = deploy._users_client(directory)
-    if client is None:
-        return []
-    return _client_rows(USERS_PROJECT, client)
+    rows = []
+    for client, _ in deploy.users_clients(directory):
+        rows += _client_rows(USERS_PROJECT, client)
+    return rows
+
+
+def _add_disk_usage(rows, directory):
+    """Fill in disk_bytes of the user rows from their files/<user> workspace."""
+    users = [row for row in rows if row["project"] == USERS_PROJECT]
+    if not users:
+        return
+    usage = disk_usage.measure(
+        Path(directory) / "files",
+        [row["service"] for row in users],
+        Path(directory) / DISK_USAGE_CACHE,
+    )
+    for row in users:
+        row["disk_bytes"] = usage.get(row["service"])
 
 
 def collect_status(directory="."):
@@ -100,25 +120,27 @@ def collect_status(directory="."):
 
     Every service defined in docker-compose.yml is reported: running ones from
     their live container, and defined-but-uncreated ones as 'not created'.
-    Raises OSError when the deployment has not been generated, or
-    DockerException if the docker CLI itself fails.
+    disk_bytes is the size of a user service's workspace (None for the
+    deployment's services and unreadable workspaces). Raises OSError when
+    the deployment has not been generated, or DockerException if the docker
+    CLI itself fails.
     """
     deploy.require_compose_file(directory)
     rows = _client_rows(DEPLOYMENT_PROJECT, deploy._client(directory))
     present = {row["service"] for row in rows}
     rows += _absent_rows(deploy.compose_services(directory), present)
-    return rows + _user_rows(directory)
+    rows += _user_rows(directory)
+    _add_disk_usage(rows, directory)
+    return rows
 
 
 def _clients(directory):
-    """The deployment client plus the user-workloads client when present."""
-    clients = [deploy._client(directory)]
-    users = deploy._users_client(directory)
-    if users is not None:
-        clients.append(users)
-    return clients
+    """The deployment client plus every user-workloads (shard) client present."""
+    users = [client for client, _ in deploy.users_clients(directory)]
+    return [deploy._client(directory)] + users
 
 
+@spanned("compose stop", "docker")
 def stop(directory="."):
     """Stop every container in place without removing it ('compose stop').
 
@@ -130,6 +152,7 @@ def stop(directory="."):
         client.compose.stop()
 
 
+@spanned("compose start", "docker")
 def start(directory="."):
     """Start every stopped container in place ('compose start').
 
@@ -141,6 +164,7 @@ def start(directory="."):
         client.compose.start()
 
 
+@spanned("compose pause", "docker")
 def pause(directory="."):
     """Freeze every running container in place ('compose pause').
 
@@ -152,6 +176,7 @@ def pause(directory="."):
         client.compose.pause()
 
 
+@spanned("compose unpause", "docker")
 def unpause(directory="."):
     """Resume every paused container ('compose unpause').
 
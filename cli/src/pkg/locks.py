@@ -0,0 +1,198 @@
+"""Locks that let 'dtaas admin' commands on different users run at once.
+
+Every command that provisions, deprovisions, pauses, stops or resumes users
+holds a lock per user for as long as it works on them, so two commands on
+disjoint users (say, 'user add --file' for two cohorts) run side by side,
+while a second command on a user already being changed waits for the first:
+
+    with locks.user_locks(["alice", "bob"]):
+        ...   # load the registry/compose, render, 'compose up'
+
+The files every such command shares -- the registry, the users compose
+files and shard index, .dtaas.state.json, config/conf.server and the routes
+file -- are only ever read-modified-written inside short files_lock()
+sections, so one command's write never drops another's:
+
+    with locks.files_lock():
+        ...   # re-read the file, merge this command's users, write it
+
+Locks are flock(2) locks on files in .dtaas.locks/ beside those files, so
+they are released when a command exits, however it exits. Windows has no
+flock: there msvcrt.locking() byte locks are used, which are exclusive only,
+so commands on users take turns rather than run at once (and where neither
+is available the locks only order the threads of one command). Per-user locks
+come with a shared hold on an "all users" lock; a command on more than
+LOCK_MAX_USERS users takes that lock exclusively instead, rather than
+keeping a file open per user, and so does a command on the whole registry
+(say, 'config reconcile --fix'), before it reads who is in it. User locks
+are taken in sorted order and before files_lock(), which is never held
+while waiting for a user lock, so commands cannot deadlock. All are
+reentrant within a process: a section nested in another section of the same
+thread does not wait for itself (and keeps the outer section's shared or
+exclusive hold). Waiting longer than LOCK_TIMEOUT seconds raises
+LockTimeout.
+"""
+
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from .constants import (
+    LOCK_DIR,
+    LOCK_MAX_USERS,
+    LOCK_POLL_SECONDS,
+    LOCK_TIMEOUT,
+    USERNAME_RE,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+_FILES = "files"
+_ALL_USERS = "users"
+
+
+class LockTimeout(RuntimeError):
+    """Another dtaas command held a lock for longer than we waited."""
+
+
+class _Lock:
+    """One lock file, held by at most one thread of this process at a time."""
+
+    def __init__(self, path):
+        self.path = path
+        self.thread_lock = threading.RLock()
+        self.depth = 0
+        self.handle = None
+
+    def _holder(self):
+        """The pid recorded by the process holding the lock, or '?'."""
+        try:
+            return Path(self.path).read_text(encoding="utf-8").strip() or "?"
+        except OSError:
+            return "?"
+
+    def _flock(self, handle, shared, deadline, what):
+        """Take the (*shared* or exclusive) lock on *handle*, polling until
+        *deadline*."""
+        while True:
+            try:
+                _try_lock(handle, shared)
+                return
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise LockTimeout(
+                        f"{what} is locked by another dtaas command (pid "
+                        f"{self._holder()}); try again once it has finished"
+                    ) from None
+                time.sleep(LOCK_POLL_SECONDS)
+
+    def acquire(self, timeout, what, shared=False):
+        """Take the lock (exclusive, or *shared*), waiting up to *timeout*
+        seconds; LockTimeout if not."""
+        deadline = time.monotonic() + timeout
+        if not self.thread_lock.acquire(timeout=timeout):  # pylint: disable=consider-using-with
+            raise LockTimeout(f"{what} is locked by another thread of this command")
+        if self.depth == 0:
+            try:
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                # Held open past this call, until release().
+                handle = open(  # pylint: disable=consider-using-with
+                    self.path, "a+", encoding="utf-8"
+                )
+                try:
+                    self._flock(handle, shared, deadline, what)
+                except BaseException:
+                    handle.close()
+                    raise
+            except BaseException:
+                self.thread_lock.release()
+                raise
+            if not shared:
+                handle.truncate(0)
+                handle.write(f"{os.getpid()}\n")
+                handle.flush()
+            self.handle = handle
+        self.depth += 1
+
+    def release(self):
+        """Release one acquire(); the flock goes with the outermost one."""
+        self.depth -= 1
+        if self.depth == 0:
+            _unlock(self.handle)
+            self.handle.close()
+            self.handle = None
+        self.thread_lock.release()
+
+
+def _try_lock(handle, shared):
+    """Lock *handle* without waiting; OSError if another process holds it."""
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+    elif msvcrt is not None:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+
+
+def _unlock(handle):
+    """Release the lock _try_lock() took on *handle*."""
+    if fcntl is not None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    elif msvcrt is not None:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+_LOCKS = {}
+_LOCKS_GUARD = threading.Lock()
+
+
+def _lock(name, directory):
+    """The process-wide _Lock for lock file *name* of *directory*."""
+    path = os.path.abspath(os.path.join(directory, LOCK_DIR, f"{name}.lock"))
+    with _LOCKS_GUARD:
+        return _LOCKS.setdefault(path, _Lock(path))
+
+
+@contextmanager
+def _held(lock, timeout, what, shared=False):
+    """Hold *lock* for the duration of the with block."""
+    lock.acquire(timeout, what, shared)
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+@contextmanager
+def user_locks(usernames, directory=".", timeout=LOCK_TIMEOUT):
+    """Hold the lock of every user in *usernames* (taken in sorted order).
+
+    More than LOCK_MAX_USERS users, or *usernames* None (whoever is in the
+    registry, read only once the lock is held), are locked all at once by
+    holding the "all users" lock exclusively. Names that are not valid
+    usernames cannot belong to a user, so they are not locked (nor turned
+    into lock file names).
+    """
+    names = sorted({name for name in usernames or () if USERNAME_RE.match(name)})
+    everyone = _lock(_ALL_USERS, directory)
+    with ExitStack() as stack:
+        if usernames is None or len(names) > LOCK_MAX_USERS:
+            stack.enter_context(_held(everyone, timeout, "Every user"))
+        elif names:
+            stack.enter_context(_held(everyone, timeout, "Every user", shared=True))
+            for name in names:
+                stack.enter_context(_held(_lock(f"user.{name}", directory), timeout, f"'{name}'"))
+        yield
+
+
+def files_lock(directory=".", timeout=LOCK_TIMEOUT):
+    """Hold the lock of the shared files in *directory*: keep the section short."""
+    return _held(_lock(_FILES, directory), timeout, "The registry and compose files")
@@ -0,0 +1,159 @@
+"""Placement of user workspaces across several Docker hosts.
+
+[[common.users.hosts]] in dtaas.toml lists the Docker endpoints additional
+users' workspaces may run on, with the capacity each one offers:
+
+    [[common.users.hosts]]
+    name     = "node2"
+    endpoint = "ssh://admin@node2.example.com"   # DOCKER_HOST URL or context
+    cpus     = 32
+    mem      = "128G"
+
+Without any hosts every workspace runs on the local daemon, as before. With
+hosts, each user provisioned for the first time is placed once and for all:
+a user whose load_balance flag is true is bin-packed (best fit) onto the host
+with the least spare capacity that still fits its workspace's limits
+([common.resources] unless the user has its own), so hosts fill up one
+after another and larger gaps stay free; a user with load_balance false is
+pinned to the first listed host. The chosen host's name is recorded as the user's 'host' in the
+registry (registry.set_hosts) and the user gets a compose shard on that
+host's endpoint (shards.assign_shards), through which every later lifecycle
+and status call is routed.
+
+Capacity is what the host offers to DTaaS workspaces, not what it has:
+omitted cpus/mem are unbounded. Without limits (set_limits = false) a
+workspace reserves nothing, so users are spread by count instead. Remote
+hosts must see the same [common].path (the workspaces bind-mount it) and be
+reachable from Traefik, e.g. over an attachable overlay network.
+"""
+
+import math
+from dataclasses import dataclass
+from .constants import SIZE_RE
+
+_UNITS = {"": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30, "t": 1 << 40}
+
+
+def parse_size(text):
+    """Bytes in a Docker size such as '4G', '512m' or '1.5gb' (binary units)."""
+    text = str(text).strip()
+    match = SIZE_RE.match(text)
+    if not match:
+        raise ValueError(f"Invalid size '{text}': expected e.g. '4G' or '512m'")
+    unit = match.group(2).lower().rstrip("b").rstrip("i")
+    return int(float(text[: match.start(2)]) * _UNITS[unit])
+
+
+def user_demand(resources, set_limits):
+    """(cpus, bytes) one workspace reserves on its host."""
+    if not set_limits:
+        return (0.0, 0)
+    resources = resources or {}
+    return (float(resources.get("cpus", 0)), parse_size(resources.get("mem_limit", "0b")))
+
+
+def _capacity(host):
+    """(cpus, bytes) *host* offers; an omitted dimension is unbounded."""
+    cpus = float(host["cpus"]) if "cpus" in host else math.inf
+    mem = parse_size(host["mem"]) if "mem" in host else math.inf
+    return (cpus, mem)
+
+
+@dataclass
+class _Load:
+    """What the workspaces already placed on one host reserve."""
+
+    capacity: tuple
+    cpus: float = 0.0
+    mem: int = 0
+    users: int = 0
+
+    def add(self, demand):
+        """Reserve *demand* for one more workspace."""
+        self.cpus += demand[0]
+        self.mem += demand[1]
+        self.users += 1
+
+    def fits(self, demand):
+        """True if one more workspace of *demand* stays within capacity."""
+        used = (self.cpus + demand[0], self.mem + demand[1])
+        return all(u <= cap for u, cap in zip(used, self.capacity))
+
+    def best_fit_key(self, demand):
+        """Sort key: least spare capacity after placing *demand*, then fewest users."""
+        used = (self.cpus + demand[0], self.mem + demand[1])
+        spare = [
+            (cap - u) / cap
+            for u, cap in zip(used, self.capacity)
+            if math.isfinite(cap) and cap > 0
+        ]
+        return (min(spare, default=1.0), self.users)
+
+
+def _host_of(details):
+    """The host name recorded for a registry entry, or None."""
+    return details.get("host") if isinstance(details, dict) else None
+
+
+@dataclass
+class _Cluster:
+    """The configured hosts (in dtaas.toml order) and their current loads."""
+
+    loads: dict
+    demand: tuple
+    demands: dict
+
+    def demand_of(self, username):
+        """(cpus, bytes) *username*'s workspace reserves."""
+        return self.demands.get(username, self.demand)
+
+    def choose(self, username, load_balance):
+        """Name of the host for *username*'s new workspace; reserves its
+        demand there."""
+        demand = self.demand_of(username)
+        name = next(iter(self.loads))
+        if load_balance:
+            fitting = [n for n, load in self.loads.items() if load.fits(demand)]
+            if not fitting:
+                raise ValueError("No Docker host has capacity left for another user")
+            name = min(fitting, key=lambda n: self.loads[n].best_fit_key(demand))
+        self.loads[name].add(demand)
+        return name
+
+
+def _cluster(users_section, hosts, demand, demands):
+    """A _Cluster charged with every registry user already placed on a host."""
+    cluster = _Cluster({host["name"]: _Load(_capacity(host)) for host in hosts}, demand, demands)
+    for name, details in users_section.items():
+        if _host_of(details) in cluster.loads:
+            cluster.loads[_host_of(details)].add(cluster.demand_of(name))
+    return cluster
+
+
+def place_users(usernames, users_section, hosts, demand, demands=None):
+    """Return {username: host name} for *usernames* (registry users).
+
+    Every workspace reserves *demand* (see user_demand) unless *demands*
+    ({username: demand}) gives the user its own, e.g. for limit overrides.
+    A user whose registry entry already names a configured host keeps it;
+    every other user is placed as described in the module docstring. Nothing
+    is persisted here. Raises ValueError when *hosts* is empty or no host has
+    room for a load-balanced user.
+    """
+    if not hosts:
+        raise ValueError("No [[common.users.hosts]] configured to place users on")
+    cluster = _cluster(users_section, hosts, demand, demands or {})
+    placed = {}
+    for name in usernames:
+        details = users_section.get(name) or {}
+        current = _host_of(details)
+        if current not in cluster.loads:
+            current = cluster.choose(name, bool(details.get("load_balance", False)))
+        placed[name] = current
+    return placed
+
+
+def endpoints(placements, hosts):
+    """{username: Docker endpoint} for *placements* ("" = the local daemon)."""
+    by_name = {host["name"]: str(host.get("endpoint", "")) for host in hosts}
+    return {name: by_name[host] for name, host in placements.items()}
@@ -6,6 +6,9 @@ from pathlib import Path
 
 import click
 
+from .template_layer import LINK_STORE_DIR
+from .trace import spanned
+
 TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
 DEPLOY_TEMPLATES_DIR = TEMPLATES_DIR / "deploy"
 
@@ -68,6 +71,7 @@ def _try_copy_template(template_name, dest_dir, force):
     return None
 
 
+@spanned("generate project", "fs")
 def generate_project(dest_dir=".", force=False):
     """Copy project template files and initialize workspace structure."""
     _validate_project_inputs(dest_dir)
@@ -201,6 +205,7 @@ def _copy_example_files(dest_dir, force=False):
         raise OSError("\n".join(errors))
 
 
+@spanned("create user dirs", "fs")
 def create_user_dirs(dest_dir, usernames):
     """Create files/<username>/ by copying files/template/ for each username.
 
@@ -216,8 +221,13 @@ def create_user_dirs(dest_dir, usernames):
             shutil.copytree(template, user_dir)
 
 
+@spanned("set files permissions", "fs")
 def set_files_permissions(dest_dir):
-    """Set ownership to 1000:100 and grant read/write/execute on files/."""
+    """Set ownership to 1000:100 and grant read/write/execute on files/.
+
+    The recursive chown/chmod also reaches the template files hardlink
+    workspaces share (see template_layer.py), so those are sealed again.
+    """
     files_dir = Path(dest_dir) / "files"
     if not files_dir.is_dir():
         return
@@ -230,6 +240,13 @@ def set_files_permissions(dest_dir):
             ["sudo", "chmod", "-R", "u+rwX,go+rwX", str(files_dir)],
             check=True,
         )
+        store = files_dir / LINK_STORE_DIR
+        if store.is_dir():
+            subprocess.run(
+                ["sudo", "find", str(store), "-type", "f", "-exec", "chown", "0:0", "{}", "+"]
+                + ["-exec", "chmod", "a-w", "{}", "+"],
+                check=True,
+            )
     except (FileNotFoundError, subprocess.CalledProcessError):
         pass
 
@@ -239,6 +256,7 @@ def _has_template_files(src):
     return any(p.is_file() and p.name != ".gitkeep" for p in src.rglob("*"))
 
 
+@spanned("copy {deploy_type} templates", "fs")
 def generate_deploy_project(deploy_type, dest_dir=".", force=False):
     """Copy a deploy template directory tree to the destination."""
     src = DEPLOY_TEMPLATES_DIR / deploy_type
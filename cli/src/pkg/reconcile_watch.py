@@ -0,0 +1,275 @@
+"""Continuous, event-driven drift detection for 'config reconcile --watch'.
+
+A one-shot 'config reconcile' loads the registry, the state cache and every
+user's live container state and compares them all. The watcher loads them
+once into a Model and then keeps it current from two sources:
+
+- Docker container events of user services ('docker events', one stream per
+  Docker endpoint in use, read by background threads), which update the
+  affected user's live state directly from the event's action;
+- the registry, state cache and users compose files, whose mtimes are
+  polled every WATCH_POLL_SECONDS; a changed file is reloaded and only the
+  users whose entry changed are affected.
+
+Drift is then recomputed just for the affected users, with the same rules
+as the one-shot reconcile (state.find_drift and
+users_lifecycle.status_mismatch), and reported when it changes. With a
+Fixer, drifted users are collected and fixed in one batch once events have
+been quiet for *debounce* seconds, and at most once every *min_interval*
+seconds. Events of other compose containers on the same hosts (traefik,
+the auth service, ...) are kept out of the drift: only names in the
+registry or the users compose services are users. Endpoints first used
+after the watcher started (a host added to [[common.users.hosts]]) are
+picked up on its next start.
+"""
+
+import queue
+import threading
+import time
+from pathlib import Path
+from python_on_whales import DockerClient
+from python_on_whales.exceptions import DockerException
+from . import shards, users_lifecycle
+from .constants import REGISTRY_FILE, SHARD_INDEX, STATE_FILE, WATCH_POLL_SECONDS
+from .lifecycle import COMPOSE_SERVICE_LABEL
+from .registry import load_registry
+from .state import find_drift, load_state
+
+# Container event actions and the live state they leave the container in
+# (None: the container is gone). Other actions (exec, health) are ignored.
+_ACTION_STATES = {
+    "start": "running",
+    "unpause": "running",
+    "pause": "paused",
+    "die": "stopped",
+    "stop": "stopped",
+    "destroy": None,
+}
+
+RESYNC = "resync"
+
+# Drift a fix can repair: 'unexpected' services are never touched, as with
+# 'config reconcile --fix'.
+FIXABLE = ("missing", "drifted", "status")
+
+
+def _fixable(model, name):
+    """*name*'s drift that a fix can repair. A service missing from the
+    registry has no desired_status to enforce, so its status is left alone
+    like the rest of an 'unexpected' service."""
+    issues = [kind for kind in model.drift(name) if kind in FIXABLE]
+    if name not in model.registry:
+        issues = [kind for kind in issues if kind != "status"]
+    return issues
+
+
+def _changed(old, new):
+    """Keys whose value differs between two {username: entry} mappings."""
+    return {key for key in set(old) | set(new) if old.get(key) != new.get(key)}
+
+
+def _hashes(state):
+    """{username: config_hash} of a state cache: every write_state refreshes
+    provisioned_at, which must not make every user look affected."""
+    return {name: (entry or {}).get("config_hash") for name, entry in state.items()}
+
+
+class Model:
+    """In-memory registry, state cache, compose services and live states."""
+
+    def __init__(self, directory="."):
+        self.directory = Path(directory)
+        self.registry = self.state = self.services = {}
+        self.mtimes = {}
+        self.refresh()
+        self.live = users_lifecycle.live_states(self.services, directory)
+
+    def _watched(self):
+        """{path: mtime_ns} of the files the model is loaded from."""
+        paths = [REGISTRY_FILE, STATE_FILE, SHARD_INDEX]
+        files = [self.directory / p for p in paths]
+        files += sorted(self.directory.glob("compose.users*.yml"))
+        return {str(f): f.stat().st_mtime_ns for f in files if f.is_file()}
+
+    def refresh(self):
+        """Reload the files if any changed; return the users whose entry changed."""
+        mtimes = self._watched()
+        if mtimes == self.mtimes:
+            return set()
+        self.mtimes = mtimes
+        registry = load_registry(str(self.directory / REGISTRY_FILE))
+        state = load_state(str(self.directory / STATE_FILE))
+        services = shards.load_users_compose(self.directory).get("services") or {}
+        affected = _changed(self.registry, registry)
+        affected |= _changed(_hashes(self.state), _hashes(state))
+        affected |= _changed(self.services, services)
+        self.registry, self.state, self.services = registry, state, services
+        return affected
+
+    def is_user(self, name):
+        """Whether *name* is a registry user or a users compose service."""
+        return name in self.registry or name in self.services
+
+    def apply_event(self, service, action):
+        """Record a container event; return the affected users (none for a
+        container that is not a user's).
+
+        A RESYNC event (an event stream reconnected, so events may have been
+        missed) re-reads every user's live state.
+        """
+        if action == RESYNC:
+            self.live = users_lifecycle.live_states(self.services, self.directory)
+            return set(self.live) | set(self.registry)
+        if action not in _ACTION_STATES:
+            return set()
+        live = _ACTION_STATES[action]
+        if live is None:
+            self.live.pop(service, None)
+        else:
+            self.live[service] = live
+        return {service} if self.is_user(service) else set()
+
+    def drift(self, name):
+        """*name*'s drift: the find_drift categories it falls in ('missing',
+        'unexpected', 'drifted') plus 'status' when its live state differs
+        from its desired_status. [] when it is in sync, or not a user."""
+        if not self.is_user(name):
+            return []
+        registry = {name: self.registry[name]} if name in self.registry else {}
+        services = {name: self.services[name]} if name in self.services else {}
+        report = find_drift(registry, self.state, services)
+        issues = [kind for kind, names in report.items() if names]
+        if users_lifecycle.status_mismatch(name, registry.get(name), self.live):
+            issues.append("status")
+        return issues
+
+
+class Fixer:
+    """Debounced, rate-limited batches of fixes for drifted users.
+
+    *fix* is called with {username: fixable issues}; it is run once no
+    drift was reported for *debounce* seconds, and at most every
+    *min_interval* seconds. Users still drifting after a fix are retried at
+    that rate until they are in sync.
+    """
+
+    def __init__(self, fix, debounce, min_interval):
+        self.fix = fix
+        self.debounce = debounce
+        self.min_interval = min_interval
+        self.pending = set()
+        self.last_change = self.last_fix = float("-inf")
+
+    def note(self, names, now):
+        """Queue *names* for fixing, restarting the debounce window."""
+        self.pending |= set(names)
+        self.last_change = now
+
+    def run(self, model, now):
+        """Fix the pending users that still drift, if the fix is due."""
+        quiet = now - self.last_change >= self.debounce
+        if not self.pending or not quiet or now - self.last_fix < self.min_interval:
+            return
+        drift = {}
+        for name in sorted(self.pending):
+            issues = _fixable(model, name)
+            if issues:
+                drift[name] = issues
+        self.pending = set(drift)
+        if drift:
+            self.last_fix = now
+            self.fix(drift)
+
+
+def _endpoints(directory):
+    """The distinct Docker endpoints the users compose shards run on."""
+    return sorted({shards.shard_endpoint(s, directory) for s in shards.shards(directory)})
+
+
+def _forward(client, events):
+    """Put (service, action) for each user-container event of *client*."""
+    filters = {"type": "container", "label": COMPOSE_SERVICE_LABEL}
+    for event in client.system.events(filters=filters):
+        attributes = (event.actor.attributes or {}) if event.actor else {}
+        service = attributes.get(COMPOSE_SERVICE_LABEL)
+        if service:
+            events.put((service, event.action))
+
+
+def _stream_events(endpoint, events):
+    """Forward one endpoint's events to *events*, reconnecting on failure.
+
+    Runs in a daemon thread. After a dropped stream a RESYNC is queued, since
+    events may have been missed while disconnected.
+    """
+    client = DockerClient(**shards.docker_options(endpoint))
+    while True:
+        try:
+            _forward(client, events)
+        except DockerException:
+            pass
+        time.sleep(WATCH_POLL_SECONDS)
+        events.put((None, RESYNC))
+
+
+def start_event_streams(directory="."):
+    """Start one daemon thread per endpoint; return the queue they feed."""
+    events = queue.Queue()
+    for endpoint in _endpoints(directory):
+        threading.Thread(target=_stream_events, args=(endpoint, events), daemon=True).start()
+    return events
+
+
+def _drain(model, events):
+    """Apply the queued events (waiting up to one poll for the first)."""
+    affected = set()
+    try:
+        event = events.get(timeout=WATCH_POLL_SECONDS)
+        while True:
+            affected |= model.apply_event(*event)
+            event = events.get_nowait()
+    except queue.Empty:
+        return affected
+
+
+class Watcher:
+    """Keeps a Model current and reports each user's drift when it changes.
+
+    *report* is called with (username, issues); issues [] means the user is
+    back in sync. The initial drift of every user is reported first.
+    """
+
+    def __init__(self, model, report, fixer=None):
+        self.model = model
+        self.report = report
+        self.fixer = fixer
+        self.reported = {}
+        self._update(set(model.registry) | set(model.services))
+
+    def _update(self, names):
+        """Recompute drift for *names* and report/queue what changed."""
+        changed = []
+        for name in sorted(names):
+            issues = self.model.drift(name)
+            if issues != self.reported.get(name, []):
+                self.report(name, issues)
+                changed.append(name)
+            self.reported[name] = issues
+        drifting = [name for name in changed if self.reported[name]]
+        if self.fixer and drifting:
+            self.fixer.note(drifting, time.monotonic())
+
+    def step(self, events):
+        """One iteration: apply events, reload changed files, maybe fix."""
+        affected = _drain(self.model, events)
+        affected |= self.model.refresh()
+        if affected:
+            self._update(affected)
+        if self.fixer:
+            self.fixer.run(self.model, time.monotonic())
+
+    def run(self, events, stop=None):
+        """Step until *stop* (a threading.Event) is set, or forever."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            self.step(events)
@@ -7,7 +7,7 @@ deployment settings (server, path, resources, TLS) also come from dtaas.toml.
 
 Shape:
     {"users": {"alice": {"email": ..., "groups": [...], "load_balance": bool,
-                          "desired_status": "running"}}}
+                          "desired_status": "running", "host": "node1"}}}
 
 'desired_status' ('running'/'paused'/'stopped', default 'running' when absent
 for registries written before this field existed) records the outcome of the
@@ -15,13 +15,33 @@ last 'dtaas admin user pause'/'stop'/'resume' for that user; see
 set_desired_status(). It is intentionally separate from the email/groups/
 load_balance fields 'user add' writes: those describe the user, this
 describes whether the CLI should currently be running their container.
+
+'resources' holds optional per-user limit overrides (cpus/mem_limit/
+pids_limit) and the top-level "groups" key the same per group:
+
+    {"groups": {"gpu": {"resources": {"cpus": 8, "mem_limit": "32G"}}}}
+
+See set_user_resources()/set_group_resources() and resources.py.
+
+'host' is only present when [[common.users.hosts]] is configured: the name
+of the Docker host the user's workspace was placed on (see placement.py and
+set_hosts()).
+
+'workspace' is only present for a workspace sharing files/template instead
+of holding a copy of it: "overlay" or "hardlink" (see template_layer.py and
+set_workspaces()).
+
+Every change re-reads and rewrites the store inside locks.files_lock(), so
+'dtaas admin' commands running at once (see locks.py) never lose each
+other's changes.
 """
 
 import csv
 import json
-import os
 from pathlib import Path
+from . import locks, utils
 from .constants import DESIRED_STATUSES, REGISTRY_FILE
+from .trace import spanned
 
 
 def load_registry(path=REGISTRY_FILE):
@@ -34,19 +54,34 @@ def load_registry(path=REGISTRY_FILE):
     return users if isinstance(users, dict) else {}
 
 
-def _write_registry(users, path):
+def load_groups(path=REGISTRY_FILE):
+    """Return the registry's per-group settings ({group: {...}}); empty when absent."""
+    file = Path(path)
+    if not file.is_file():
+        return {}
+    data = json.loads(file.read_text(encoding="utf-8"))
+    groups = data.get("groups") if isinstance(data, dict) else None
+    return groups if isinstance(groups, dict) else {}
+
+
+def _directory(path):
+    """The installation directory holding the registry at *path* (see locks.py)."""
+    return Path(path).parent
+
+
+@spanned("write registry", "fs")
+def _write_registry(users, path, groups=None):
     """Atomically persist the user store to *path* (temp file + os.replace).
 
-    The temp file is flushed and fsync'd before the rename so a crash or power
+    The per-group settings are kept as they are unless *groups* is given. The
+    temp file is flushed and fsync'd before the rename so a crash or power
     loss cannot leave a truncated registry behind.
     """
-    text = json.dumps({"users": users}, indent=2) + "\n"
-    tmp = f"{path}.tmp"
-    with open(tmp, "w", encoding="utf-8") as handle:
-        handle.write(text)
-        handle.flush()
-        os.fsync(handle.fileno())
-    os.replace(tmp, path)
+    document = {"users": users}
+    groups = load_groups(path) if groups is None else groups
+    if groups:
+        document["groups"] = groups
+    utils.write_json(document, path, sort_keys=False)
 
 
 def _partition_new(new_users, known):
@@ -67,19 +102,21 @@ def register_new_users(new_users, reserved, path=REGISTRY_FILE):
     registry are skipped rather than overwritten, so a user can never end up in
     both files. Returns (added_names, skipped_names).
     """
-    users = load_registry(path)
-    known = set(users) | set(reserved)
-    added, skipped = _partition_new(new_users, known)
-    users.update(added)
-    _write_registry(users, path)
+    with locks.files_lock(_directory(path)):
+        users = load_registry(path)
+        known = set(users) | set(reserved)
+        added, skipped = _partition_new(new_users, known)
+        users.update(added)
+        _write_registry(users, path)
     return list(added), skipped
 
 
 def remove_from_registry(usernames, path=REGISTRY_FILE):
     """Drop *usernames* from the store and persist it; returns the removed names."""
-    users = load_registry(path)
-    removed = [name for name in usernames if users.pop(name, None) is not None]
-    _write_registry(users, path)
+    with locks.files_lock(_directory(path)):
+        users = load_registry(path)
+        removed = [name for name in usernames if users.pop(name, None) is not None]
+        _write_registry(users, path)
     return removed
 
 
@@ -97,14 +134,85 @@ def set_desired_status(usernames, status, path=REGISTRY_FILE):
         raise ValueError(
             f"Invalid desired_status '{status}': expected one of {sorted(DESIRED_STATUSES)}"
         )
-    users = load_registry(path)
-    updated = [name for name in usernames if name in users]
-    for name in updated:
-        users[name]["desired_status"] = status
-    _write_registry(users, path)
+    with locks.files_lock(_directory(path)):
+        users = load_registry(path)
+        updated = [name for name in usernames if name in users]
+        for name in updated:
+            users[name]["desired_status"] = status
+        _write_registry(users, path)
+    return updated
+
+
+def _set_field(values, field, path):
+    """Set *field* to values[name] for each registry user in *values*.
+
+    Like set_desired_status, only usernames already in the registry are
+    updated and the other fields are left untouched. Returns the usernames
+    actually updated.
+    """
+    with locks.files_lock(_directory(path)):
+        users = load_registry(path)
+        updated = [name for name in values if name in users]
+        for name in updated:
+            users[name][field] = values[name]
+        _write_registry(users, path)
+    return updated
+
+
+def set_hosts(placements, path=REGISTRY_FILE):
+    """Record the Docker host each user was placed on ({username: host name});
+    returns the usernames updated."""
+    return _set_field(placements, "host", path)
+
+
+def set_workspaces(layers, path=REGISTRY_FILE):
+    """Record the template layer each user's workspace was created with
+    ({username: "overlay"/"hardlink"}); returns the usernames updated."""
+    return _set_field(layers, "workspace", path)
+
+
+def _merge_resources(current, limits):
+    """*current* resource overrides updated with *limits*; None values drop a field."""
+    merged = {**(current or {}), **limits}
+    return {field: value for field, value in merged.items() if value is not None}
+
+
+def set_user_resources(usernames, limits, path=REGISTRY_FILE):
+    """Record per-user resource-limit overrides ({field: value}, None = unset).
+
+    Stored as the user's 'resources' (dropped again once empty); only
+    usernames already in the registry are updated. Returns those usernames.
+    """
+    with locks.files_lock(_directory(path)):
+        users = load_registry(path)
+        updated = [name for name in usernames if name in users]
+        for name in updated:
+            resources = _merge_resources(users[name].get("resources"), limits)
+            users[name]["resources"] = resources
+            if not resources:
+                del users[name]["resources"]
+        _write_registry(users, path)
     return updated
 
 
+def set_group_resources(group, limits, path=REGISTRY_FILE):
+    """Record resource-limit overrides for every member of *group*.
+
+    Stored under the registry's top-level "groups" so they also apply to
+    users added to the group later. Returns the group's registry members.
+    """
+    with locks.files_lock(_directory(path)):
+        groups = load_groups(path)
+        settings = groups.setdefault(group, {})
+        settings["resources"] = _merge_resources(settings.get("resources"), limits)
+        if not settings["resources"]:
+            del settings["resources"]
+        groups = {name: value for name, value in groups.items() if value}
+        users = load_registry(path)
+        _write_registry(users, path, groups)
+    return [name for name, details in users.items() if group in details.get("groups", [])]
+
+
 def _parse_load_balance(value):
     """Parse a true/false load_balance cell; reject other non-empty values.
 
@@ -135,17 +243,27 @@ def _parse_csv_row(row):
     return row["username"].strip(), details
 
 
-def read_csv_users(csv_path):
-    """Return {username: details} parsed from a users CSV file.
+def iter_csv_users(csv_path):
+    """Yield (username, details) for each row of a users CSV file, streaming.
 
-    Raises ValueError if the same username appears in more than one row, so a
-    duplicate can never silently overwrite an earlier row's details.
+    Only the usernames seen so far are kept in memory (to reject duplicates),
+    so very large imports do not hold every row's details at once. Raises
+    ValueError if the same username appears in more than one row.
     """
-    users = {}
+    seen = set()
     with open(csv_path, newline="", encoding="utf-8") as handle:
         for row in csv.DictReader(handle):
             username, details = _parse_csv_row(row)
-            if username in users:
+            if username in seen:
                 raise ValueError(f"Duplicate username '{username}' in {csv_path}")
-            users[username] = details
-    return users
+            seen.add(username)
+            yield username, details
+
+
+def read_csv_users(csv_path):
+    """Return {username: details} parsed from a users CSV file.
+
+    Raises ValueError if the same username appears in more than one row, so a
+    duplicate can never silently overwrite an earlier row's details.
+    """
+    return dict(iter_csv_users(csv_path))
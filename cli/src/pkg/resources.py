@@ -0,0 +1,131 @@
+"""Per-user and per-group resource limits, applied to live containers.
+
+A user's effective limits are the [common.resources] defaults, overlaid with
+the registry's overrides for each of the user's groups (in the order the
+groups are listed) and finally the user's own overrides; see
+registry.set_user_resources/set_group_resources. Only the limits Docker can
+change on a running container are overridable: cpus, mem_limit, pids_limit.
+
+resize_users rewrites the targets' compose services (so config_hash and a
+later recreate agree with the new limits) and then applies the limits in
+place with 'docker update', without recreating the container or ending the
+user's session, holding the users' locks (see locks.py). users.py passes
+overrides() to get_compose_config, so a later 'user add' or 'config
+reconcile --fix' keeps them too.
+
+suggest_limits turns the usage history usage.record keeps into suggested
+cpus/mem_limit values: an observed percentile plus SUGGEST_HEADROOM.
+"""
+
+import math
+import time
+from . import deploy, locks, shards, usage
+from .constants import SUGGEST_HEADROOM
+from .lifecycle import COMPOSE_SERVICE_LABEL
+from .placement import parse_size
+from .registry import load_groups, load_registry
+from .state import write_state
+from .users_compose import resource_fields
+
+LIVE_FIELDS = ("cpus", "mem_limit", "pids_limit")
+
+
+def user_overrides(details, groups):
+    """The limit overrides that apply to one registry user ({} when none)."""
+    details = details if isinstance(details, dict) else {}
+    limits = {}
+    for group in details.get("groups", []):
+        limits.update(groups.get(group, {}).get("resources", {}))
+    limits.update(details.get("resources", {}))
+    return {field: limits[field] for field in LIVE_FIELDS if field in limits}
+
+
+def overrides(users_section, groups=None):
+    """{username: overrides} for the registry users that have any."""
+    groups = load_groups() if groups is None else groups
+    result = {name: user_overrides(d, groups) for name, d in users_section.items()}
+    return {name: limits for name, limits in result.items() if limits}
+
+
+def _update_container(client, container, limits):
+    """Apply *limits* to one running container with 'docker update'.
+
+    The swap limit moves with the memory limit (Docker's default of twice
+    the memory), since 'docker update' rejects a memory limit above the
+    current swap limit.
+    """
+    memory = parse_size(limits["mem_limit"])
+    client.container.update(
+        container,
+        cpus=float(limits["cpus"]),
+        memory=memory,
+        memory_swap=2 * memory,
+        pids_limit=int(limits["pids_limit"]),
+    )
+
+
+def _update_live(targets, effective):
+    """'docker update' every live container of *targets* to its limits."""
+    for client, names in deploy.users_clients(".", targets):
+        for container in client.compose.ps(services=names):
+            labels = container.config.labels or {}
+            name = labels.get(COMPOSE_SERVICE_LABEL, container.name)
+            if name in effective:
+                _update_container(client, container, effective[name])
+
+
+def resize_users(usernames, defaults):
+    """Apply each provisioned user's effective limits in place.
+
+    *defaults* is [common.resources]. Returns (resized, not_provisioned)
+    usernames. Raises on a template error, or DockerException if 'docker
+    update' fails.
+    """
+    with locks.user_locks(usernames):
+        compose = shards.load_users_compose()
+        services = compose.get("services", {})
+        registry, groups = load_registry(), load_groups()
+        targets = [name for name in usernames if name in services]
+        effective = {
+            name: {**defaults, **user_overrides(registry.get(name), groups)}
+            for name in targets
+        }
+        for name in targets:
+            services[name].update(resource_fields(effective[name]))
+        if targets:
+            with locks.files_lock():
+                merged = shards.update_users_compose(compose, targets)
+                write_state(merged.get("services", {}))
+            _update_live(targets, effective)
+    return targets, [name for name in usernames if name not in services]
+
+
+def percentile(values, pct):
+    """The nearest-rank *pct* percentile of a non-empty list of numbers."""
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def _suggestion(series, pct):
+    """Suggested limits for one user's [[time, cpu, mem], ...] history."""
+    cpu = percentile([point[1] for point in series], pct)
+    mem = percentile([point[2] for point in series], pct)
+    return {
+        "samples": len(series),
+        "cpu_percent": cpu,
+        "mem_bytes": mem,
+        "cpus": max(math.ceil(cpu / 100 * SUGGEST_HEADROOM * 10) / 10, 0.1),
+        "mem_limit": f"{max(math.ceil(mem * SUGGEST_HEADROOM / (1 << 20)), 64)}m",
+    }
+
+
+def suggest_limits(usernames=None, pct=95):
+    """Take a fresh usage sample, then suggest limits from the recorded history.
+
+    Returns {username: suggestion} for the users (None = all) with any
+    history. Raises DockerException if sampling fails.
+    """
+    history = usage.record(usage.sample(usernames), time.time())
+    names = load_registry() if usernames is None else usernames
+    return {name: _suggestion(history[name], pct) for name in names if history.get(name)}
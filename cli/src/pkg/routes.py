@@ -0,0 +1,179 @@
+"""Traefik file-provider routing for user workspaces ([common.users] routing).
+
+By default ("labels") every workspace container carries the Traefik router
+labels of users.server(.secure).yml, so Traefik's docker provider rebuilds
+its router table each time any user container is started, stopped, paused
+or resumed. With routing = "file" the labels are left out and every user's
+router and service are written to one dynamic-config file instead,
+config/dynamic/users.yml, which Traefik's file provider reads:
+
+    http:
+      routers:
+        alice:
+          rule: Host(`example.org`) && PathPrefix(`/alice`)
+          entryPoints: [web-secure]
+          middlewares: [traefik-forward-auth@docker]
+          service: alice
+          tls: {}
+      services:
+        alice:
+          loadBalancer:
+            servers:
+              - url: http://dtaas-cli-alice:8080
+
+The file lists every user in the users compose file(s), paused or not, so
+container lifecycle events leave Traefik's configuration alone. Routes go
+to the container name on the users network, so users placed on other Docker
+hosts ([[common.users.hosts]], reachable from Traefik over a shared network)
+are routed as well, which Traefik's docker provider, watching only its own
+host, cannot do. It is rewritten once per 'user add', 'user delete' or
+'config reconcile --fix' -- not per user -- through a temp file and
+os.replace, and only when its contents change. 'user add' and 'user delete'
+add or drop just their own users' routes inside locks.files_lock(), so
+commands on other users running at the same time keep theirs. The tls section of
+config/tls.yml, if any, is carried in the same file.
+
+Traefik must read the config/dynamic directory (a directory, not the file:
+a bind-mounted file would keep showing the replaced copy):
+
+    command:
+      - "--providers.file.directory=/etc/traefik/dynamic"
+      - "--providers.file.watch=true"
+    volumes:
+      - "./config/dynamic:/etc/traefik/dynamic"
+
+check_traefik() refuses to switch to "file" routing until it does.
+"""
+
+import os
+from pathlib import Path
+from . import locks, shards, utils
+from .constants import ROUTES_DIR, ROUTES_FILE, WORKSPACE_PORT
+
+_HEADER = "# Generated by dtaas from the user registry; do not edit.\n"
+
+
+def strip_labels(service):
+    """Drop *service*'s Traefik labels (its route lives in the routes file)."""
+    labels = [label for label in service.get("labels", []) if not label.startswith("traefik.")]
+    if labels:
+        service["labels"] = labels
+    else:
+        service.pop("labels", None)
+    return service
+
+
+def user_route(username, server, tls):
+    """(router, service) of *username*'s workspace at https?://server/username."""
+    router = {
+        "rule": f"Host(`{server}`) && PathPrefix(`/{username}`)",
+        "entryPoints": ["web-secure" if tls else "web"],
+        "middlewares": ["traefik-forward-auth@docker"],
+        "service": username,
+    }
+    if tls:
+        router["tls"] = {}
+    service = {
+        "loadBalancer": {
+            "servers": [{"url": f"http://dtaas-cli-{username}:{WORKSPACE_PORT}"}]
+        }
+    }
+    return router, service
+
+
+def _tls_section(path):
+    """The tls section of *path*/config/tls.yml, or None."""
+    tls_file = Path(path) / "config" / "tls.yml"
+    if not tls_file.is_file():
+        return None
+    data = utils.read_yaml(tls_file) or {}
+    return data.get("tls") if isinstance(data, dict) else None
+
+
+def build_routes(usernames, config):
+    """The dynamic-config mapping routing every user in *usernames*."""
+    routers, services = {}, {}
+    for name in sorted(usernames):
+        routers[name], services[name] = user_route(name, config["server"], config.get("tls"))
+    routes = {"http": {"routers": routers, "services": services}} if routers else {}
+    tls = _tls_section(config["path"])
+    if tls:
+        routes["tls"] = tls
+    return routes
+
+
+def _write(routes, path):
+    """Atomically replace the routes file at *path* (utils.write_yaml) when
+    *routes* differ from what it holds; returns True if it was written."""
+    text = _HEADER + utils.dump_yaml_text(routes, sort_keys=True)
+    file = Path(path)
+    if file.is_file() and file.read_text(encoding="utf-8") == text:
+        return False
+    file.parent.mkdir(parents=True, exist_ok=True)
+    utils.write_yaml(text, path)
+    return True
+
+
+def write_routes(usernames, config, path=ROUTES_FILE):
+    """Route every user in *usernames* through the routes file."""
+    return _write(build_routes(usernames, config), path)
+
+
+def _routed(path):
+    """The usernames the routes file at *path* routes (none when absent)."""
+    file = Path(path)
+    routes = (utils.read_yaml(file) or {}) if file.is_file() else {}
+    return set(routes.get("http", {}).get("routers", {}))
+
+
+def add_routes(usernames, config, path=ROUTES_FILE):
+    """Route *usernames* as well as every user the routes file already routes
+    or the users compose files hold, both re-read under locks.files_lock()."""
+    with locks.files_lock():
+        services = shards.load_users_compose().get("services") or {}
+        return write_routes(_routed(path) | set(services) | set(usernames), config, path)
+
+
+def remove_routes(usernames, path=ROUTES_FILE):
+    """Drop *usernames*' routers and services from an existing routes file."""
+    with locks.files_lock():
+        file = Path(path)
+        if not file.is_file():
+            return False
+        routes = utils.read_yaml(file) or {}
+        http = routes.get("http", {})
+        for section in ("routers", "services"):
+            for name in usernames:
+                http.get(section, {}).pop(name, None)
+        if not http.get("routers"):
+            routes.pop("http", None)
+        return _write(routes, path)
+
+
+def discard_routes(path=ROUTES_FILE):
+    """Remove the routes file, so users routed by labels are not routed twice."""
+    Path(path).unlink(missing_ok=True)
+
+
+def _mounts_routes(volume):
+    """Whether a compose volume entry bind-mounts the routes directory."""
+    source = volume.get("source", "") if isinstance(volume, dict) else volume.split(":")[0]
+    return os.path.normpath(source).endswith(os.path.normpath(ROUTES_DIR))
+
+
+def check_traefik(compose_file):
+    """Raise ValueError unless *compose_file*'s traefik service mounts the
+    routes directory (a missing compose file is not checked)."""
+    file = Path(compose_file)
+    if not file.is_file():
+        return
+    data = utils.read_yaml(file) or {}
+    traefik = (data.get("services") or {}).get("traefik") or {}
+    if any(_mounts_routes(volume) for volume in traefik.get("volumes", [])):
+        return
+    raise ValueError(
+        f"routing = \"file\" needs Traefik to read '{ROUTES_DIR}': add the "
+        f"volume \"./{ROUTES_DIR}:/etc/traefik/dynamic\" and "
+        "\"--providers.file.directory=/etc/traefik/dynamic\" to the traefik "
+        f"service in '{file.name}'"
+    )
@@ -0,0 +1,231 @@
+"""Time-based pause/stop/resume of additional users' workspaces.
+
+Schedules are [[common.users.schedules]] tables in dtaas.toml, each a name,
+the user groups it covers (none = every registry user) and cron times (see
+cron.py) for any of pause, stop and resume:
+
+    [[common.users.schedules]]
+    name = "nights"
+    groups = ["students"]
+    pause = "0 20 * * 1-5"
+    stop = "0 20 * * 5"
+    resume = "0 7 * * 1-5"
+
+'dtaas admin scheduler run' calls tick() every minute. For each schedule,
+the latest of its times that passed since the previous tick is applied to
+the schedule's users through users_lifecycle, SCHEDULE_BATCH users per call,
+so their registry desired_status changes exactly as for a manual 'user
+pause'/'stop'/'resume'. What the scheduler suspended is kept in
+.dtaas.scheduler.json:
+
+    {"last_run": 1761000000.0, "suspended": {"alice": "nights"}}
+
+pause acts on running users only; stop on running users and those the
+scheduler suspended; resume only on users the scheduler suspended. A user
+an admin (or 'user hibernate') paused or stopped is left alone, and one
+resumed or deleted by other means is dropped from 'suspended'. Schedules
+due in the same tick act in dtaas.toml order. A scheduler that was not
+running catches up on the latest time it missed, up to
+SCHEDULE_CATCH_UP_HOURS back.
+"""
+
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from . import users_lifecycle, utils
+from .constants import (
+    SCHEDULE_ACTIONS,
+    SCHEDULE_BATCH,
+    SCHEDULE_CATCH_UP_HOURS,
+    SCHEDULER_STATE,
+)
+from .cron import parse_cron
+from .user_index import UserIndex
+from .validators import is_string_list
+
+
+@dataclass(frozen=True)
+class Schedule:
+    """One [[common.users.schedules]] table: its groups and {action: Cron}."""
+
+    name: str
+    groups: tuple = ()
+    actions: dict = field(default_factory=dict)
+
+    def due(self, since, now):
+        """(action, time) of the latest of its times in (since, now], or None.
+
+        Of two actions due the same minute, the later in SCHEDULE_ACTIONS wins.
+        """
+        fired = [
+            (when, SCHEDULE_ACTIONS.index(action), action)
+            for action, cron in self.actions.items()
+            if (when := cron.last_before(now, since)) is not None
+        ]
+        if not fired:
+            return None
+        when, _, action = max(fired)
+        return action, when
+
+
+def _parse_schedule(table, label):
+    """(Schedule or None, [problem]) of one schedule table."""
+    if not isinstance(table, dict):
+        return None, [f"{label} must be a table"]
+    name = table.get("name")
+    if not isinstance(name, str) or not name:
+        return None, [f"{label} requires a 'name'"]
+    label = f"common.users.schedules.{name}"
+    errors = []
+    groups = table.get("groups", [])
+    if not is_string_list(groups):
+        errors.append(f"{label}.groups must be a list of strings")
+    actions = {}
+    for action in SCHEDULE_ACTIONS:
+        if action in table:
+            try:
+                actions[action] = parse_cron(table[action])
+            except ValueError as exc:
+                errors.append(f"{label}.{action}: {exc}")
+    if not any(action in table for action in SCHEDULE_ACTIONS):
+        errors.append(f"{label} needs at least one of {', '.join(SCHEDULE_ACTIONS)}")
+    return Schedule(name, tuple(groups) if is_string_list(groups) else (), actions), errors
+
+
+def parse_schedules(tables):
+    """([Schedule], [problem]) from the [[common.users.schedules]] tables;
+    no schedules when there is any problem."""
+    schedules, errors = [], []
+    for index, table in enumerate(tables):
+        schedule, problems = _parse_schedule(table, f"common.users.schedules[{index}]")
+        errors += problems
+        if schedule is not None:
+            if any(s.name == schedule.name for s in schedules):
+                errors.append(f"common.users.schedules: duplicate name '{schedule.name}'")
+            schedules.append(schedule)
+    return ([] if errors else schedules), errors
+
+
+def load_scheduler_state(path=SCHEDULER_STATE):
+    """The scheduler's state ({"last_run": None, "suspended": {}} when absent)."""
+    file = Path(path)
+    data = json.loads(file.read_text(encoding="utf-8")) if file.is_file() else {}
+    data = data if isinstance(data, dict) else {}
+    last_run = data.get("last_run")
+    suspended = data.get("suspended")
+    return {
+        "last_run": last_run if isinstance(last_run, (int, float)) else None,
+        "suspended": suspended if isinstance(suspended, dict) else {},
+    }
+
+
+def _write_scheduler_state(state, path):
+    """Atomically persist the scheduler's state (temp file + os.replace)."""
+    utils.write_json(state, path)
+
+
+def _targets(action, schedule, index, suspended):
+    """The users of *schedule* that *action* should act on."""
+    groups = schedule.groups
+    if action == "pause":
+        return index.select(groups, status="running")
+    ours = [name for name in index.select(groups) if name in suspended]
+    if action == "stop":
+        running = index.select(groups, status="running")
+        paused = set(index.select(groups, status="paused"))
+        return sorted(set(running) | {name for name in ours if name in paused})
+    return ours
+
+
+def _claim(action, names, schedule, suspended):
+    """Record in *suspended* that *schedule* suspended (or resumed) *names*."""
+    for name in names:
+        if action == "resume":
+            suspended.pop(name, None)
+        else:
+            suspended[name] = schedule
+
+
+def _apply(action, names, schedule, suspended, batch_size):
+    """Run users_lifecycle's *action* on *names*, *batch_size* at a time;
+    return the users acted on.
+
+    Each batch is recorded in *suspended* as soon as it is done, so a later
+    batch failing does not lose the earlier ones.
+    """
+    act = getattr(users_lifecycle, f"{action}_users")
+    acted = []
+    for start in range(0, len(names), batch_size):
+        done, _, _ = act(names[start : start + batch_size])
+        _claim(action, done, schedule, suspended)
+        acted += done
+    return acted
+
+
+def _since(last_run, now):
+    """The start of the window a tick at *now* looks back over."""
+    earliest = now - timedelta(hours=SCHEDULE_CATCH_UP_HOURS)
+    if last_run is None:
+        return earliest
+    return max(datetime.fromtimestamp(last_run), earliest)
+
+
+def _due(schedules, last_run, now):
+    """(schedule, action, due time) of each of *schedules* due in the window
+    of a tick at the timestamp *now*."""
+    now = datetime.fromtimestamp(now)
+    since = _since(last_run, now)
+    for schedule in schedules:
+        due = schedule.due(since, now)
+        if due is not None:
+            yield schedule, *due
+
+
+def _still_suspended(suspended, index):
+    """The *suspended* users that are still paused or stopped; users resumed
+    or deleted by other means are no longer the scheduler's."""
+    return {
+        name: owner
+        for name, owner in suspended.items()
+        if index.users.get(name, {}).get("desired_status", "running") != "running"
+    }
+
+
+def tick(schedules, now=None, batch_size=SCHEDULE_BATCH, dry_run=False, path=SCHEDULER_STATE):
+    """Apply every schedule due since the previous tick.
+
+    Returns [(schedule name, action, due time, users)], the users being
+    those acted on (or, with *dry_run*, that would be; nothing is changed
+    or recorded then). Raises DockerException if a lifecycle call fails, or
+    locks.LockTimeout if its users stay locked by another command; the
+    batches done before it are still recorded, and as the previous tick is
+    kept as the last run, the next tick retries what remains.
+    """
+    state = load_scheduler_state(path)
+    now = time.time() if now is None else now
+    index = UserIndex.load()
+    suspended = _still_suspended(state["suspended"], index)
+    applied, completed = [], False
+    try:
+        for schedule, action, when in _due(schedules, state["last_run"], now):
+            names = _targets(action, schedule, index, suspended)
+            if names and not dry_run:
+                names = _apply(action, names, schedule.name, suspended, batch_size)
+                index = UserIndex.load()
+            applied.append((schedule.name, action, when, names))
+        completed = True
+    finally:
+        if not dry_run:
+            state = {"last_run": now if completed else state["last_run"], "suspended": suspended}
+            _write_scheduler_state(state, path)
+    return applied
+
+
+def upcoming(schedule, now, days=8):
+    """[(action, time)] of the next time of each of *schedule*'s actions
+    within *days*, soonest first."""
+    until = now + timedelta(days=days)
+    times = ((action, cron.next_after(now, until)) for action, cron in schedule.actions.items())
+    return sorted(((a, w) for a, w in times if w is not None), key=lambda item: item[1])
@@ -0,0 +1,299 @@
+"""Optional sharded layout for the user-added compose projects.
+
+By default every additional user is a service in a single compose.users.yml,
+so every 'docker compose' call parses and reconciles the whole file. With
+[common.users] shard_size = N in dtaas.toml, newly provisioned users are
+instead placed in compose.users.<shard>.yml files holding at most N users
+each, every one its own compose project (dtaas-users-<shard>); shard_size = 1
+gives one project per user.
+
+The CLI-owned shard index, .dtaas.shards.json, maps each sharded user to its
+shard so lifecycle, state and reconcile code only talk to the shards that hold
+the target users:
+
+    {"users": {"alice": "0001", "bob": "0001", "carol": "0002"}}
+
+A user absent from the index lives in the unsharded compose.users.yml (the
+LEGACY shard): that is the whole layout when sharding is off, and where users
+provisioned before sharding was enabled stay. Users are never moved between
+shards once placed, so turning sharding on (or changing N) only affects users
+added afterwards.
+
+When users are placed on other Docker hosts (see placement.py), each shard
+also records the endpoint its project runs on; a shard only ever holds users
+of one endpoint, and users on a remote endpoint always get a numbered shard:
+
+    {"users": {"dave": "0003"}, "endpoints": {"0003": "ssh://node2"}}
+
+LEGACY, and any shard without an endpoint, runs on the local Docker daemon.
+
+Commands working on different users may run at once (see locks.py): the
+index is updated, and the compose files are rewritten by update_users_compose,
+inside locks.files_lock(), each merging only its own users into what is on
+disk.
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from . import locks, utils
+from .constants import COMPOSE_USERS_YML, SHARD_INDEX
+
+# Shard key of the unsharded compose.users.yml.
+LEGACY = ""
+
+# Top-level compose keys whose entries are per user (split across shards);
+# 'volumes' holds overlay workspace volumes, see template_layer.py.
+PER_USER_KEYS = ("services", "volumes")
+
+
+def _load(directory):
+    """The whole shard index file as {"users": {...}, "endpoints": {...}}."""
+    file = Path(directory) / SHARD_INDEX
+    data = json.loads(file.read_text(encoding="utf-8")) if file.is_file() else {}
+    data = data if isinstance(data, dict) else {}
+    return {
+        key: data[key] if isinstance(data.get(key), dict) else {}
+        for key in ("users", "endpoints")
+    }
+
+
+def load_index(directory="."):
+    """Return the {username: shard} mapping; empty when nothing is sharded."""
+    return _load(directory)["users"]
+
+
+def _write(data, directory):
+    """Atomically persist the shard index (temp file + os.replace)."""
+    utils.write_json(data, Path(directory) / SHARD_INDEX)
+
+
+def shard_endpoint(shard, directory="."):
+    """The Docker endpoint *shard* runs on ("" = the local daemon)."""
+    return _load(directory)["endpoints"].get(shard, "")
+
+
+def docker_options(endpoint):
+    """DockerClient keyword arguments addressing *endpoint*.
+
+    A URL (ssh://, tcp://, unix://) is a DOCKER_HOST; any other non-empty
+    value names a 'docker context'; "" is the local default daemon.
+    """
+    if not endpoint:
+        return {}
+    return {"host": endpoint} if "://" in endpoint else {"context": endpoint}
+
+
+def shard_file(shard, directory="."):
+    """Path of the compose file holding *shard*'s services."""
+    if shard == LEGACY:
+        return Path(directory) / COMPOSE_USERS_YML
+    return Path(directory) / f"compose.users.{shard}.yml"
+
+
+def project_name(shard):
+    """Compose project name for *shard* (None: compose's default, as before)."""
+    return None if shard == LEGACY else f"dtaas-users-{shard}"
+
+
+def shards(directory="."):
+    """LEGACY followed by every numbered shard with a compose file on disk.
+
+    LEGACY is always listed; callers already treat a missing compose.users.yml
+    as empty (utils.import_yaml) or absent (deploy._users_client).
+    """
+    numbered = sorted(set(load_index(directory).values()))
+    return [LEGACY] + [s for s in numbered if shard_file(s, directory).is_file()]
+
+
+def group_by_shard(usernames, directory="."):
+    """{shard: [usernames]} for *usernames*, preserving their order."""
+    index = load_index(directory)
+    groups = {}
+    for name in usernames:
+        groups.setdefault(index.get(name, LEGACY), []).append(name)
+    return groups
+
+
+def _shard_sizes(index):
+    """{shard: number of users} for every shard in *index*."""
+    sizes = {}
+    for shard in index.values():
+        sizes[shard] = sizes.get(shard, 0) + 1
+    return sizes
+
+
+def _next_shard(sizes):
+    """Name for a brand-new shard: one past the highest numbered shard."""
+    numbers = [int(shard) for shard in sizes if shard.isdigit()]
+    return f"{max(numbers, default=0) + 1:04d}"
+
+
+@dataclass
+class _Placer:
+    """Shard placement state for one assign_shards call."""
+
+    sizes: dict
+    endpoints: dict
+    shard_size: int
+
+    def _has_room(self, shard, endpoint):
+        """True if *shard* runs on *endpoint* and is below shard_size."""
+        full = 0 < self.shard_size <= self.sizes[shard]
+        return self.endpoints.get(shard, "") == endpoint and not full
+
+    def place(self, endpoint):
+        """The shard for one new user on *endpoint*, or LEGACY when unsharded.
+
+        The newest shard on that endpoint with room is reused, else a new one
+        is opened. A remote endpoint is sharded even with shard_size 0 (one
+        unbounded shard per endpoint), since LEGACY always runs locally.
+        """
+        if self.shard_size < 1 and not endpoint:
+            return LEGACY
+        open_shards = sorted(s for s in self.sizes if self._has_room(s, endpoint))
+        shard = open_shards[-1] if open_shards else _next_shard(self.sizes)
+        self.sizes[shard] = self.sizes.get(shard, 0) + 1
+        if endpoint:
+            self.endpoints[shard] = endpoint
+        return shard
+
+
+def assign_shards(usernames, shard_size, directory=".", endpoints=None):
+    """Place each not-yet-indexed user of *usernames* into a shard.
+
+    Only call this with users that have no compose service yet: users already
+    provisioned (in any shard, including LEGACY) keep their placement. A
+    *shard_size* of 0 disables sharding, leaving new local users in LEGACY.
+    *endpoints* maps users placed on another Docker host to its endpoint (see
+    placement.py). Returns the {username: shard} placements made.
+    """
+    with locks.files_lock(directory):
+        data = _load(directory)
+        index, endpoints = data["users"], endpoints or {}
+        placer = _Placer(_shard_sizes(index), data["endpoints"], shard_size)
+        placed = {}
+        for name in (n for n in usernames if n not in index):
+            placed[name] = placer.place(endpoints.get(name, ""))
+        placed = {name: shard for name, shard in placed.items() if shard != LEGACY}
+        if placed:
+            index.update(placed)
+            _write(data, directory)
+    return placed
+
+
+def unassign(usernames, directory="."):
+    """Drop *usernames* from the shard index (after they were deprovisioned)."""
+    with locks.files_lock(directory):
+        data = _load(directory)
+        index = data["users"]
+        removed = [name for name in usernames if index.pop(name, None) is not None]
+        if removed:
+            live = set(index.values())
+            data["endpoints"] = {s: e for s, e in data["endpoints"].items() if s in live}
+            _write(data, directory)
+    return removed
+
+
+def _load_shard(shard, directory):
+    """The compose dict stored in *shard*'s file ({} when absent)."""
+    compose, err = utils.import_yaml(str(shard_file(shard, directory)))
+    utils.check_error(err)
+    return compose if isinstance(compose, dict) else {}
+
+
+def load_users_compose(directory="."):
+    """The logical users compose dict: shared keys plus every shard's services.
+
+    Callers see the same {'version', 'services', 'networks'} shape a single
+    compose.users.yml used to have, whatever the on-disk layout.
+    """
+    merged = {}
+    per_user = {key: {} for key in PER_USER_KEYS}
+    for shard in shards(directory):
+        compose = _load_shard(shard, directory)
+        for key, value in compose.items():
+            if key not in PER_USER_KEYS:
+                merged.setdefault(key, value)
+        for key, entries in per_user.items():
+            entries.update(compose.get(key) or {})
+    if merged or per_user["services"]:
+        merged["services"] = per_user["services"]
+    if per_user["volumes"]:
+        merged["volumes"] = per_user["volumes"]
+    return merged
+
+
+def _shard_compose(compose, names):
+    """The compose dict for one shard: shared keys plus just *names*' entries.
+
+    'services' and 'volumes' are keyed by username (PER_USER_KEYS); every
+    other top-level key (version, networks, ...; see
+    users_compose.setup_compose_structure) is shared by all shards.
+    """
+    result = {key: value for key, value in compose.items() if key not in PER_USER_KEYS}
+    for key in PER_USER_KEYS:
+        entries = compose.get(key) or {}
+        kept = {name: entries[name] for name in names if name in entries}
+        if kept or key == "services":
+            result[key] = kept
+    return result
+
+
+def _services_by_shard(compose, directory):
+    """{shard: [service names]} for the services currently in *compose*."""
+    groups = group_by_shard(list(compose.get("services") or {}), directory)
+    groups.setdefault(LEGACY, [])
+    return groups
+
+
+def write_users_compose(compose, directory=".", only=None):
+    """Write the logical users compose dict back to its shard files.
+
+    *only* limits the rewrite to the shards that hold those usernames (None
+    rewrites every shard); pass the users just added or removed so untouched
+    shards are never re-serialised. compose.users.yml is always created (even
+    empty) as before; a numbered shard left with no services is removed.
+    """
+    groups = _services_by_shard(compose, directory)
+    targets = set(groups) if only is None else set(group_by_shard(only, directory))
+    if not shard_file(LEGACY, directory).is_file():
+        targets.add(LEGACY)
+    for shard in sorted(targets):
+        names = groups.get(shard, [])
+        path = shard_file(shard, directory)
+        if names or shard == LEGACY:
+            err = utils.export_yaml(_shard_compose(compose, names), str(path))
+            utils.check_error(err)
+        else:
+            path.unlink(missing_ok=True)
+
+
+def update_users_compose(compose, usernames, directory="."):
+    """Write *usernames*' entries of *compose* over the users compose files.
+
+    The files are re-read under locks.files_lock(), so a command provisioning
+    or removing other users at the same time keeps its changes: each of
+    *usernames* gets its services/volumes entries from *compose*, or loses
+    them when *compose* has none, and every other user stays as on disk.
+    Only the shards holding *usernames* are rewritten. Returns the merged
+    compose dict.
+    """
+    with locks.files_lock(directory):
+        merged = load_users_compose(directory)
+        for key, value in compose.items():
+            if key not in PER_USER_KEYS:
+                merged.setdefault(key, value)
+        for key in PER_USER_KEYS:
+            entries = dict(merged.get(key) or {})
+            for name in usernames:
+                if name in (compose.get(key) or {}):
+                    entries[name] = compose[key][name]
+                else:
+                    entries.pop(name, None)
+            if entries or key == "services":
+                merged[key] = entries
+            else:
+                merged.pop(key, None)
+        write_users_compose(merged, directory, only=usernames)
+    return merged
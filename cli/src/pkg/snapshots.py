@@ -0,0 +1,280 @@
+"""Incremental, hardlink-based snapshots of user workspaces (files/<user>).
+
+'dtaas admin user snapshot' copies the workspaces into
+files/.snapshots/<id>/<user>/, where <id> is the UTC creation time. A file
+whose size, mtime and inode are unchanged since the user's previous snapshot
+(the newest one holding them) is hardlinked to that snapshot's copy; only new
+or changed files are copied, so a snapshot costs roughly the size of the
+delta. Snapshot files are never
+linked to the live workspace itself, so a workspace editing a file in place
+cannot change a snapshot. Users are snapshotted in parallel threads.
+
+Each snapshot is built under a temporary name and renamed into place once
+complete, with two files beside the user trees:
+
+- manifest.json: {"id", "created", "users": {user: {"files", "bytes",
+  "copied", "linked"}}}, all that listing and pruning read;
+- index.json: {user: {relative path: [size, mtime_ns, inode]}} of the live
+  files at snapshot time, which the next snapshot compares against.
+
+Pruning a snapshot only drops its own links: a file still linked from a
+newer snapshot stays. Restoring copies a user's tree back (again not linked)
+and swaps it in for files/<user>, whose old contents are discarded through
+user_files.discard.
+"""
+
+import json
+import os
+import shutil
+import stat
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from . import user_files
+from .constants import SNAPSHOT_WORKERS
+
+SNAPSHOT_DIR = ".snapshots"
+MANIFEST = "manifest.json"
+INDEX = "index.json"
+
+
+def _root(files_dir):
+    """files/.snapshots, created if needed."""
+    root = Path(files_dir) / SNAPSHOT_DIR
+    root.mkdir(exist_ok=True)
+    return root
+
+
+def _complete(root):
+    """Directories of the complete snapshots in *root*, oldest first."""
+    if not root.is_dir():
+        return []
+    return sorted(
+        path.parent for path in root.glob(f"*/{MANIFEST}") if not path.parent.name.startswith(".")
+    )
+
+
+def list_snapshots(files_dir):
+    """The manifests of every complete snapshot, oldest first."""
+    return [
+        json.loads((path / MANIFEST).read_text(encoding="utf-8"))
+        for path in _complete(Path(files_dir) / SNAPSHOT_DIR)
+    ]
+
+
+def workspace_users(files_dir):
+    """The users with a workspace directory in files/, sorted.
+
+    Dot-entries (the warm pool, restores in progress) are never workspaces:
+    a username cannot start with a dot.
+    """
+    return sorted(
+        child.name
+        for child in Path(files_dir).iterdir()
+        if not child.name.startswith(".") and user_files.is_generated_user_dir(child)
+    )
+
+
+def _walk(root):
+    """Yield (relative path, os.DirEntry) for everything below *root*,
+    parents before their children, never following symlinks."""
+    stack = [""]
+    while stack:
+        relative = stack.pop()
+        with os.scandir(os.path.join(root, relative)) as entries:
+            for entry in entries:
+                path = os.path.join(relative, entry.name)
+                yield path, entry
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(path)
+
+
+def _keep_owner(path, info):
+    """Give *path* the owner of the file it was copied from (best-effort)."""
+    try:
+        os.chown(path, info.st_uid, info.st_gid, follow_symlinks=False)
+    except PermissionError:
+        pass
+
+
+def _copy_entry(entry, dst):
+    """Copy one directory, symlink or regular file entry to *dst*, keeping
+    its owner; special files (sockets, fifos, devices) are skipped."""
+    info = entry.stat(follow_symlinks=False)
+    if stat.S_ISDIR(info.st_mode):
+        os.mkdir(dst)
+        shutil.copystat(entry.path, dst, follow_symlinks=False)
+    elif stat.S_ISLNK(info.st_mode):
+        os.symlink(os.readlink(entry.path), dst)
+    elif stat.S_ISREG(info.st_mode):
+        shutil.copy2(entry.path, dst, follow_symlinks=False)
+    else:
+        return
+    _keep_owner(dst, info)
+
+
+class _UserSnapshot:  # pylint: disable=too-few-public-methods
+    """Snapshot one user's workspace, linking against their previous snapshot.
+
+    *previous* is (their tree in the previous snapshot or None, its index).
+    """
+
+    def __init__(self, source, target, previous):
+        self.source, self.target = source, target
+        self.previous_dir, self.previous_index = previous
+        self.index = {}
+        self.summary = {"files": 0, "bytes": 0, "copied": 0, "linked": 0}
+
+    def _link(self, relative, info):
+        """Hardlink *relative* to the previous snapshot's copy if unchanged."""
+        key = [info.st_size, info.st_mtime_ns, info.st_ino]
+        if self.previous_dir is None or self.previous_index.get(relative) != key:
+            return False
+        try:
+            os.link(self.previous_dir / relative, self.target / relative)
+        except (FileNotFoundError, PermissionError):
+            return False  # pruned meanwhile, or a kernel refusing the link
+        return True
+
+    def _add(self, relative, entry):
+        """Snapshot one entry of the workspace."""
+        info = entry.stat(follow_symlinks=False)
+        if stat.S_ISREG(info.st_mode):
+            self.index[relative] = [info.st_size, info.st_mtime_ns, info.st_ino]
+            self.summary["files"] += 1
+            self.summary["bytes"] += info.st_size
+            if self._link(relative, info):
+                self.summary["linked"] += 1
+                return
+            self.summary["copied"] += 1
+        _copy_entry(entry, self.target / relative)
+
+    def run(self):
+        """Copy/link the whole workspace; return (index, summary)."""
+        self.target.mkdir()
+        shutil.copystat(self.source, self.target)
+        _keep_owner(self.target, self.source.stat())
+        for relative, entry in _walk(self.source):
+            self._add(relative, entry)
+        return self.index, self.summary
+
+
+def _bases(root, names):
+    """{user: (their tree, their index)} in the newest snapshot holding them.
+
+    A user first snapshotted now gets (None, {}), i.e. a full copy.
+    """
+    bases, indexes = {}, {}
+    for snapshot in reversed(_complete(root)):
+        held = json.loads((snapshot / MANIFEST).read_text(encoding="utf-8"))["users"]
+        for name in [n for n in names if n in held and n not in bases]:
+            if snapshot not in indexes:
+                indexes[snapshot] = json.loads((snapshot / INDEX).read_text(encoding="utf-8"))
+            bases[name] = (snapshot / name, indexes[snapshot].get(name, {}))
+    return {name: bases.get(name, (None, {})) for name in names}
+
+
+def _new_id(root):
+    """A snapshot id from the current UTC time, unique within *root*."""
+    base = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    snapshot_id, counter = base, 1
+    while (root / snapshot_id).exists():
+        counter += 1
+        snapshot_id = f"{base}-{counter}"
+    return snapshot_id
+
+
+def _write_json(path, data):
+    """Write *data* as JSON to *path*."""
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def _snapshot_users(files_dir, building, bases, workers):
+    """Snapshot every user of *bases* into *building*, in parallel threads.
+
+    Returns {user: (index, summary)}.
+    """
+    jobs = [_UserSnapshot(files_dir / name, building / name, base) for name, base in bases.items()]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(bases, executor.map(_UserSnapshot.run, jobs)))
+
+
+def create(files_dir, usernames=None, workers=SNAPSHOT_WORKERS):
+    """Snapshot *usernames*' workspaces (None = every workspace); return the
+    manifest. Raises ValueError for a user without a workspace."""
+    files_dir = Path(files_dir)
+    available = workspace_users(files_dir)
+    names = available if usernames is None else list(usernames)
+    missing = [name for name in names if name not in available]
+    if missing:
+        raise ValueError(f"No workspace in '{files_dir}' for: {', '.join(missing)}")
+    root = _root(files_dir)
+    building = root / f".building-{uuid.uuid4().hex}"
+    building.mkdir()
+    try:
+        results = _snapshot_users(files_dir, building, _bases(root, names), workers)
+    except OSError:
+        user_files.discard(files_dir, [building])
+        raise
+    manifest = {
+        "id": _new_id(root),
+        "created": datetime.now(timezone.utc).isoformat(),
+        "users": {name: summary for name, (_, summary) in results.items()},
+    }
+    _write_json(building / INDEX, {name: index for name, (index, _) in results.items()})
+    _write_json(building / MANIFEST, manifest)
+    building.rename(root / manifest["id"])
+    return manifest
+
+
+def _snapshot_dir(files_dir, snapshot_id):
+    """The directory of a complete snapshot; ValueError if there is none."""
+    path = Path(files_dir) / SNAPSHOT_DIR / snapshot_id
+    if os.sep in snapshot_id or not (path / MANIFEST).is_file():
+        raise ValueError(f"No snapshot '{snapshot_id}'")
+    return path
+
+
+def _restore_user(files_dir, snapshot, name):
+    """Copy *name*'s tree out of *snapshot* next to files/<name>; return it."""
+    staged = Path(files_dir) / f".restore-{name}-{uuid.uuid4().hex}"
+    source = snapshot / name
+    staged.mkdir()
+    shutil.copystat(source, staged)
+    _keep_owner(staged, source.stat())
+    for relative, entry in _walk(source):
+        _copy_entry(entry, staged / relative)
+    return staged
+
+
+def restore(files_dir, snapshot_id, usernames=None, workers=SNAPSHOT_WORKERS):
+    """Put *usernames*' workspaces (None = all in the snapshot) back as they
+    were in *snapshot_id*; return the users restored.
+
+    Raises ValueError for an unknown snapshot or a user it does not hold.
+    """
+    snapshot = _snapshot_dir(files_dir, snapshot_id)
+    held = json.loads((snapshot / MANIFEST).read_text(encoding="utf-8"))["users"]
+    names = sorted(held) if usernames is None else list(usernames)
+    missing = [name for name in names if name not in held]
+    if missing:
+        raise ValueError(f"Snapshot '{snapshot_id}' has no workspace for: {', '.join(missing)}")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        staged = list(executor.map(lambda n: _restore_user(files_dir, snapshot, n), names))
+    current = [Path(files_dir) / name for name in names if (Path(files_dir) / name).exists()]
+    if current:
+        user_files.discard(files_dir, current)
+    for name, path in zip(names, staged):
+        path.rename(Path(files_dir) / name)
+    return names
+
+
+def prune(files_dir, keep):
+    """Discard all but the newest *keep* snapshots; return the ids removed."""
+    manifests = list_snapshots(files_dir)
+    doomed = [m["id"] for m in manifests[: max(len(manifests) - keep, 0)]]
+    if doomed:
+        root = Path(files_dir) / SNAPSHOT_DIR
+        user_files.discard(files_dir, [root / snapshot_id for snapshot_id in doomed])
+    return doomed
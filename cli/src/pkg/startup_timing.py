@@ -0,0 +1,196 @@
+"""Startup latency of new workspaces: how long 'user add' takes per phase.
+
+Each user started by 'user add' (or 'config reconcile --fix') gets the
+seconds spent in each phase of bringing up their workspace:
+
+- registry:   writing them into dtaas.users.registry.json;
+- render:     rendering their compose service from the templates;
+- workspace:  creating files/<user> (template copy, warm pool or layer);
+- compose_up: writing the compose file(s) and 'docker compose up -d',
+              including waiting for images still being pulled;
+- running:    from 'compose up' returning until the container is running;
+- healthy:    from then until its healthcheck passes (containers without a
+              healthcheck skip this phase);
+- reachable:  from then until /<user> answers through Traefik (only with a
+              local probe URL).
+
+Phases covering several users (all but the last three) are timed once for
+the whole batch and recorded for each user in it: that is the wall time the
+user waited. The last three are only measured when asked for ('user add
+--timings'), since they mean polling Docker until every new workspace is
+up. The timings are kept under 'startup' in each user's .dtaas.state.json
+entry (see state.record_startup) and summarised as percentiles per phase.
+"""
+
+import ssl
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+import click
+from python_on_whales.exceptions import DockerException
+from . import deploy
+from .constants import STARTUP_POLL_SECONDS, STARTUP_TIMEOUT
+from .resources import percentile
+
+PHASES = (
+    "registry",
+    "render",
+    "workspace",
+    "compose_up",
+    "running",
+    "healthy",
+    "reachable",
+)
+
+# Traefik's answers when no router matches or the backend is not up yet.
+_UNROUTED = (404, 502, 503, 504)
+
+
+class Timings:
+    """Seconds per phase, per user, of one provisioning run.
+
+    *wait* asks for the running/healthy/reachable phases to be measured too;
+    *probe* is the base URL (e.g. https://localhost) /<user> is probed under.
+    """
+
+    def __init__(self, wait=False, probe=""):
+        self.wait = wait
+        self.probe = probe or ""
+        self.phases = {}
+
+    def record(self, phase, usernames, seconds):
+        """Record that *phase* took *seconds* for each of *usernames*."""
+        for name in usernames:
+            self.phases.setdefault(name, {})[phase] = round(seconds, 3)
+
+    @contextmanager
+    def phase(self, phase, usernames):
+        """Time the enclosed block as *phase* of *usernames* (if it succeeds)."""
+        started = time.monotonic()
+        yield
+        self.record(phase, usernames, time.monotonic() - started)
+
+
+def _observe(usernames):
+    """{user: (container status, health status or None)} for *usernames*'
+    containers; empty while Docker cannot be reached."""
+    observed = {}
+    try:
+        for client, names in deploy.users_clients(".", usernames):
+            for container in client.compose.ps(services=names):
+                labels = container.config.labels or {}
+                service = labels.get("com.docker.compose.service", container.name)
+                health = container.state.health
+                observed[service] = (
+                    container.state.status,
+                    health.status if health is not None else None,
+                )
+    except DockerException:
+        return {}
+    return observed
+
+
+def _no_redirect():
+    """A urllib opener that reports redirects instead of following them (a
+    forward-auth redirect to the login page already proves the route)."""
+
+    class _Handler(urllib.request.HTTPRedirectHandler):
+        def redirect_request(self, *_args, **_kwargs):
+            return None
+
+    # The probe only checks that Traefik routes /<user>; a self-signed
+    # localhost certificate must not fail it.
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return urllib.request.build_opener(
+        _Handler, urllib.request.HTTPSHandler(context=context)
+    )
+
+
+def reachable(probe, username, timeout=2.0):
+    """True when GET <probe>/<username> gets an answer that is not Traefik's
+    "no route"/"backend down"."""
+    url = f"{probe.rstrip('/')}/{username}"
+    try:
+        with _no_redirect().open(url, timeout=timeout):
+            return True
+    except urllib.error.HTTPError as exc:
+        return exc.code not in _UNROUTED
+    except (urllib.error.URLError, OSError):
+        return False
+
+
+def _completed(name, phase, state, probe):
+    """Whether *name* has completed *phase*, given its observed *state*."""
+    if phase == "reachable":
+        return reachable(probe, name)
+    if state is None:
+        return False
+    status, health = state
+    return status == "running" if phase == "running" else health == "healthy"
+
+
+def _phase_after(phase, health, probe):
+    """The phase to wait on after *phase*, or None when the user is done.
+
+    A container without a healthcheck skips "healthy", and "reachable" is
+    only waited on with a probe URL.
+    """
+    if phase == "running" and health is not None:
+        return "healthy"
+    if phase in ("running", "healthy") and probe:
+        return "reachable"
+    return None
+
+
+def wait_until_ready(timings, usernames, timeout=STARTUP_TIMEOUT, interval=STARTUP_POLL_SECONDS):
+    """Poll *usernames*' containers until each is running, healthy and (with
+    a probe) reachable, recording those phases in *timings*.
+
+    Users not ready within *timeout* seconds are reported and keep only the
+    phases they completed.
+    """
+    last = dict.fromkeys(usernames, time.monotonic())
+    pending = dict.fromkeys(usernames, "running")
+    deadline = time.monotonic() + timeout
+    while pending:
+        observed = _observe(list(pending))
+        for name, phase in list(pending.items()):
+            state = observed.get(name)
+            if not _completed(name, phase, state, timings.probe):
+                continue
+            now = time.monotonic()
+            timings.record(phase, [name], now - last[name])
+            last[name] = now
+            pending[name] = _phase_after(phase, state[1] if state else None, timings.probe)
+            if pending[name] is None:
+                del pending[name]
+        if not pending or time.monotonic() >= deadline:
+            break
+        time.sleep(interval)
+    for name, phase in pending.items():
+        click.echo(f"Warning: '{name}' not {phase} after {timeout:g}s")
+
+
+def summary(phases, pcts=(50, 90, 99)):
+    """{phase: {"users", "p50", "p90", "p99", "max"}} over per-user *phases*.
+
+    A 'total' row sums each user's recorded phases. Phases nobody has a
+    timing for are left out.
+    """
+    rows = {}
+    totals = [sum(timings.values()) for timings in phases.values() if timings]
+    for phase in PHASES + ("total",):
+        if phase == "total":
+            values = totals
+        else:
+            values = [t[phase] for t in phases.values() if phase in t]
+        if values:
+            rows[phase] = {
+                "users": len(values),
+                **{f"p{pct}": percentile(values, pct) for pct in pcts},
+                "max": max(values),
+            }
+    return rows
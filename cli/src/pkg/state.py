@@ -6,7 +6,9 @@ add'/'delete' changes the running set. Each write fully replaces the file's
 contents with the current set of provisioned services: it is a point-in-time
 snapshot, not an append-only log, so it only ever reflects the most recent
 add/delete. The config hash lets a later run detect which users' running
-config has changed since they were provisioned.
+config has changed since they were provisioned. The one thing carried over
+from the previous snapshot is each user's 'startup' timings (see
+startup_timing.py), recorded when the user was started.
 
 dtaas.users.registry.json remains the source of truth for who *should* be
 provisioned; this cache only records what the CLI last observed. See
@@ -17,9 +19,9 @@ import hashlib
 import json
 from datetime import datetime, timezone
 from pathlib import Path
-from python_on_whales import DockerClient
 from python_on_whales.exceptions import DockerException
-from .constants import COMPOSE_USERS_YML, STATE_FILE
+from . import deploy, locks
+from .constants import STATE_FILE
 
 
 def config_hash(service):
@@ -29,13 +31,18 @@ def config_hash(service):
 
 
 def _service_facts():
-    """Best-effort {service: (container_id, status)} for compose.users.yml.
+    """Best-effort {service: (container_id, status)} for compose.users.yml
+    and any compose shards (see shards.py).
 
     Returns an empty mapping when Docker is unreachable; the state cache then
     records config hashes without live container facts.
     """
     try:
-        containers = DockerClient(compose_files=[COMPOSE_USERS_YML]).compose.ps()
+        containers = [
+            container
+            for client, _ in deploy.users_clients(".")
+            for container in client.compose.ps()
+        ]
     except DockerException:
         return {}
     facts = {}
@@ -46,8 +53,16 @@ def _service_facts():
     return facts
 
 
-def build_state(services, facts):
-    """Build the {username: runtime facts} mapping for provisioned services."""
+def _startup(entry):
+    """The 'startup' timings of a state cache entry, if any."""
+    return entry.get("startup") if isinstance(entry, dict) else None
+
+
+def build_state(services, facts, previous=None):
+    """Build the {username: runtime facts} mapping for provisioned services.
+
+    A user's 'startup' timings in *previous* (the last snapshot) are kept.
+    """
     now = datetime.now(timezone.utc).isoformat()
     state = {}
     for username, service in services.items():
@@ -58,13 +73,45 @@ def build_state(services, facts):
             "provisioned_at": now,
             "config_hash": config_hash(service),
         }
+        startup = _startup((previous or {}).get(username))
+        if startup:
+            state[username]["startup"] = startup
     return state
 
 
+def _write(state, path):
+    """Write *state* to the cache file at *path*."""
+    Path(path).write_text(json.dumps(state, indent=2) + "\n", encoding="utf-8")
+
+
 def write_state(services, path=STATE_FILE):
     """Write .dtaas.state.json for the currently provisioned services."""
-    state = build_state(services, _service_facts())
-    Path(path).write_text(json.dumps(state, indent=2) + "\n", encoding="utf-8")
+    facts = _service_facts()
+    with locks.files_lock(Path(path).parent):
+        try:
+            previous = load_state(path)
+        except ValueError:
+            previous = {}  # a corrupt cache is simply replaced
+        state = build_state(services, facts, previous)
+        _write(state, path)
+    return state
+
+
+def record_startup(phases, path=STATE_FILE):
+    """Store each user's {phase: seconds} startup timings in the state cache,
+    replacing those of an earlier start. Users without an entry are skipped,
+    and the file is left alone when there is nothing to store (or it is
+    corrupt: the next write_state replaces it)."""
+    with locks.files_lock(Path(path).parent):
+        try:
+            state = load_state(path)
+        except ValueError:
+            state = {}
+        recorded = {n: t for n, t in phases.items() if t and isinstance(state.get(n), dict)}
+        for username, timings in recorded.items():
+            state[username]["startup"] = timings
+        if recorded:
+            _write(state, path)
     return state
 
 
@@ -0,0 +1,234 @@
+"""Shared template layer for user workspaces ([common.users] template_layer).
+
+By default ("copy") every new user gets a full copy of files/template, so a
+hundred users hold a hundred copies of the same files. The other two modes
+share the template between workspaces instead:
+
+- "overlay": /workspace is an overlayfs Docker volume with files/template as
+  its read-only lower layer and files/<user> as the user's upper layer, so a
+  file is only copied into files/<user> once the user changes it (overlayfs
+  copy-up). The volume is declared per user in the users compose file (see
+  overlay_volume) and needs a Docker host whose kernel mounts overlayfs,
+  taken to be one whose storage driver is overlay2; users placed on any
+  other host fall back to "hardlink". 'compose rm' leaves named volumes
+  behind, so 'user delete' removes the volume (see remove_overlay_volumes).
+- "hardlink": files/<user> is a tree of directories owned by the workspace
+  user whose files are hardlinks into files/.template-links, a copy of
+  files/template's files sealed against the workspace user (chowned to
+  root where possible, write bits dropped), so unchanged files share their
+  blocks. A file is only linked once its seal is verified, so no workspace
+  can change a shared file in place: saving it replaces the link with the
+  user's own copy, and an in-place write is refused. Files that cannot be
+  sealed are copied instead. A template file edited since it was last
+  sealed is sealed anew for the next workspace; existing links keep the
+  old version.
+
+The layer a workspace was created with is recorded as the user's
+'workspace' in the registry and kept for that user, since switching would
+change what their files/<user> holds. Users without one (every user
+provisioned with "copy") are full copies. Changing files/template while
+overlay workspaces are running is not supported by overlayfs: stop them
+first.
+"""
+
+import os
+import shutil
+import stat
+from pathlib import Path
+from python_on_whales import DockerClient
+from python_on_whales.exceptions import DockerException
+from . import shards
+
+OVERLAY_WORK_DIR = ".overlay-work"
+COMPOSE_VOLUME_LABEL = "com.docker.compose.volume"
+LINK_STORE_DIR = ".template-links"
+_WORKSPACE_UID = 1000
+
+
+def _chown_workspace(path):
+    """chown *path* to the workspace user 1000:100 (best-effort)."""
+    try:
+        shutil.chown(path, user=1000, group=100)
+    except (AttributeError, PermissionError):
+        # Skip os.chown in tests to avoid PermissionError
+        pass
+
+
+def overlay_supported(endpoint):
+    """True when *endpoint*'s Docker daemon uses an overlay storage driver."""
+    try:
+        info = DockerClient(**shards.docker_options(endpoint)).system.info()
+    except DockerException:
+        return False
+    return str(info.driver or "").startswith("overlay")
+
+
+def choose_layers(usernames, mode):
+    """{user: layer} for new *usernames*, already assigned to compose shards.
+
+    "overlay" is only used on the endpoints that support it (checked once per
+    endpoint) and becomes "hardlink" elsewhere.
+    """
+    if mode != "overlay":
+        return dict.fromkeys(usernames, mode)
+    supported, layers = {}, {}
+    for shard, names in shards.group_by_shard(usernames).items():
+        endpoint = shards.shard_endpoint(shard)
+        if endpoint not in supported:
+            supported[endpoint] = overlay_supported(endpoint)
+        layers.update(dict.fromkeys(names, "overlay" if supported[endpoint] else "hardlink"))
+    return layers
+
+
+def recorded_layers(users_section):
+    """{user: layer} recorded in the registry; users without one are "copy"."""
+    return {
+        name: details.get("workspace", "copy") if isinstance(details, dict) else "copy"
+        for name, details in (users_section or {}).items()
+    }
+
+
+def overlay_volume(path, username):
+    """The compose volume mounting *username*'s overlay workspace."""
+    files = f"{path}/files"
+    options = (
+        f"lowerdir={files}/template,upperdir={files}/{username},"
+        f"workdir={files}/{OVERLAY_WORK_DIR}/{username}"
+    )
+    return {
+        "driver": "local",
+        "driver_opts": {"type": "overlay", "device": "overlay", "o": options},
+    }
+
+
+def use_overlay(service, path, username):
+    """Mount *username*'s overlay volume (named after them) at /workspace in
+    place of the files/<user> bind mount."""
+    bind = f"{path}/files/{username}:/workspace"
+    service["volumes"] = [
+        f"{username}:/workspace" if volume == bind else volume
+        for volume in service.get("volumes", [])
+    ]
+    return service
+
+
+def _is_overlay_of(volume, username):
+    """Whether Docker *volume* is *username*'s overlay workspace volume."""
+    if (volume.labels or {}).get(COMPOSE_VOLUME_LABEL) != username:
+        return False
+    options = (volume.options or {}).get("o", "")
+    parts = dict(part.split("=", 1) for part in options.split(",") if "=" in part)
+    return parts.get("upperdir", "").endswith(f"/files/{username}")
+
+
+def remove_overlay_volumes(usernames):
+    """Remove the overlay volumes of *usernames*, whose containers are gone.
+
+    Best-effort: a volume left behind holds no data (that is in
+    files/<user>) and is recreated by a later 'user add' of the same name.
+    """
+    for shard, names in shards.group_by_shard(usernames).items():
+        client = DockerClient(**shards.docker_options(shards.shard_endpoint(shard)))
+        try:
+            volumes = [
+                volume
+                for volume in client.volume.list(filters=[("label", COMPOSE_VOLUME_LABEL)])
+                if any(_is_overlay_of(volume, name) for name in names)
+            ]
+            if volumes:
+                client.volume.remove(volumes)
+        except DockerException:
+            pass
+
+
+def set_compose_volume(compose, username, config):
+    """Declare *username*'s overlay volume in *compose*, or drop a stale one."""
+    volumes = compose.setdefault("volumes", {})
+    if config.get("layers", {}).get(username) == "overlay":
+        volumes[username] = overlay_volume(config["path"], username)
+    else:
+        volumes.pop(username, None)
+    if not volumes:
+        del compose["volumes"]
+
+
+def _sealed(path):
+    """True when the workspace user can neither write *path* nor chmod it."""
+    info = os.lstat(path)
+    return info.st_uid != _WORKSPACE_UID and not info.st_mode & 0o222
+
+
+def _seal(path):
+    """chown *path* to root (best-effort) and drop its write bits."""
+    try:
+        os.chown(path, 0, 0)
+    except (AttributeError, PermissionError):
+        pass
+    os.chmod(path, stat.S_IMODE(os.lstat(path).st_mode) & ~0o222)
+
+
+def _stored(source, store):
+    """The sealed copy *store* of template file *source*, made (again) when
+    missing or older than *source*; None when it cannot be sealed."""
+    try:
+        info = source.stat()
+        current = store.stat() if store.exists() else None
+        if current is None or (current.st_size, current.st_mtime_ns) != (
+            info.st_size,
+            info.st_mtime_ns,
+        ):
+            store.parent.mkdir(parents=True, exist_ok=True)
+            tmp = store.with_name(f"{store.name}.{os.getpid()}.tmp")
+            shutil.copy2(source, tmp)
+            _seal(tmp)
+            os.replace(tmp, store)
+        elif not _sealed(store):
+            _seal(store)
+        return store if _sealed(store) else None
+    except OSError:
+        return None
+
+
+def _link_entry(source, target, store):
+    """Mirror one template entry: a directory is created (owned by the
+    workspace user), a symlink recreated, a file hardlinked to its sealed
+    copy in *store* (or copied when it cannot be sealed)."""
+    if source.is_symlink():
+        os.symlink(os.readlink(source), target)
+    elif source.is_dir():
+        target.mkdir(exist_ok=True)
+        _chown_workspace(target)
+    elif (shared := _stored(source, store)) is not None:
+        os.link(shared, target, follow_symlinks=False)
+    else:
+        shutil.copy2(source, target)
+        _chown_workspace(target)
+
+
+def link_template(files_dir, dest):
+    """Build *dest* as a tree of hardlinks to the sealed copies of
+    files/template's files."""
+    template = Path(files_dir) / "template"
+    store = Path(files_dir) / LINK_STORE_DIR
+    Path(dest).mkdir(exist_ok=True)
+    _chown_workspace(dest)
+    for root, dirs, files in os.walk(template):
+        relative = os.path.relpath(root, template)
+        target = Path(dest) / relative
+        for name in sorted(dirs) + sorted(files):
+            _link_entry(Path(root) / name, target / name, store / relative / name)
+
+
+def prepare_workspace(files_dir, username, layer):
+    """Create *username*'s workspace for a shared *layer* ("overlay"/"hardlink").
+
+    An existing files/<user> is left as it is; an overlay workspace also
+    gets its (empty) overlayfs work directory.
+    """
+    dest = Path(files_dir) / username
+    if layer == "hardlink" and not dest.exists():
+        link_template(files_dir, dest)
+    elif layer == "overlay":
+        dest.mkdir(exist_ok=True)
+        _chown_workspace(dest)
+        (Path(files_dir) / OVERLAY_WORK_DIR / username).mkdir(parents=True, exist_ok=True)
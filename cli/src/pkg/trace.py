@@ -0,0 +1,154 @@
+"""Per-invocation phase tracing of the dtaas CLI ('dtaas --trace').
+
+Timed spans are context managers placed around the CLI's phases -- loading
+dtaas.toml, validating it, rendering templates, reading and writing YAML,
+each docker call and the file-system work:
+
+    with trace.span("compose up", "docker"):
+        client.compose.up(detach=True)
+
+A function that is one phase as a whole is decorated instead, its
+arguments filling the span name:
+
+    @trace.spanned("compose up {service}", "docker")
+    def restart_service(directory, service): ...
+
+Spans nest by time, per thread. Every span adds its duration to a running
+total for its category whether or not tracing is on (one perf_counter call
+at each end), so the summary costs next to nothing. With 'dtaas --trace'
+or DTAAS_TRACE set ("1" for the default .dtaas.trace.json, anything else is
+the file name), the spans themselves are recorded too, and when the command
+ends they are written to the trace file in the Chrome trace-event format,
+which chrome://tracing and https://ui.perfetto.dev open directly:
+
+    {"traceEvents": [{"name": "compose up", "cat": "docker", "ph": "X",
+                      "ts": 1520.3, "dur": 930211.0, "pid": 4242, "tid": 1}],
+     "displayTimeUnit": "ms",
+     "otherData": {"summary": "dtaas admin install: 0.95s | docker 0.93s (1) | ..."}}
+
+The summary line (total and per-category time and count) is also printed
+to stderr. Each traced run replaces the trace file.
+"""
+
+import functools
+import inspect
+import os
+import threading
+import time
+from contextlib import contextmanager
+import click
+from . import utils
+from .constants import TRACE_FILE
+
+TRACE_ENV = "DTAAS_TRACE"
+
+
+class _Tracer:  # pylint: disable=too-few-public-methods
+    """The spans of this process: category totals always, events when on."""
+
+    def __init__(self):
+        self.origin = time.perf_counter_ns()
+        self.lock = threading.Lock()
+        self.totals = {}
+        self.events = None
+        self.threads = {}
+
+    def record(self, name, category, start, duration, args):
+        """Add one finished span."""
+        with self.lock:
+            count, total = self.totals.get(category, (0, 0))
+            self.totals[category] = (count + 1, total + duration)
+            if self.events is None:
+                return
+            tid = self.threads.setdefault(threading.get_ident(), len(self.threads) + 1)
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start - self.origin) / 1000,
+                "dur": duration / 1000,
+                "pid": os.getpid(),
+                "tid": tid,
+            }
+            if args:
+                event["args"] = {key: str(value) for key, value in args.items()}
+            self.events.append(event)
+
+
+_TRACER = _Tracer()
+
+
+@contextmanager
+def span(name, category="dtaas", **args):
+    """Time the enclosed block as one span; *args* are shown with it."""
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        _TRACER.record(name, category, start, time.perf_counter_ns() - start, args)
+
+
+def spanned(name, category="dtaas"):
+    """Decorator timing each call of a function as one span.
+
+    *name* is formatted with the call's arguments by parameter name, so
+    "copy {deploy_type} templates" names the span after the deploy type.
+    """
+
+    def decorate(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def traced(*args, **kwargs):
+            call = signature.bind(*args, **kwargs)
+            call.apply_defaults()
+            with span(name.format(**call.arguments), category):
+                return func(*args, **kwargs)
+
+        return traced
+
+    return decorate
+
+
+def trace_path(flag=False, environ=None):
+    """The trace file to write ('--trace' or DTAAS_TRACE), or None."""
+    value = (os.environ if environ is None else environ).get(TRACE_ENV, "")
+    if value and value.lower() not in ("0", "false", "no"):
+        return TRACE_FILE if value.lower() in ("1", "true", "yes") else value
+    return TRACE_FILE if flag else None
+
+
+def summary_line(name, elapsed_ns, totals):
+    """'<name>: <total>s | <category> <s>s (<count>) | ...', slowest first."""
+    parts = [f"{name}: {elapsed_ns / 1e9:.2f}s"]
+    for category, (count, total) in sorted(totals.items(), key=lambda item: -item[1][1]):
+        parts.append(f"{category} {total / 1e9:.2f}s ({count})")
+    return " | ".join(parts)
+
+
+def _write(events, summary, path):
+    """Atomically write the Chrome trace file (temp file + os.replace)."""
+    data = {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"summary": summary}}
+    utils.write_json(data, path, indent=None, sort_keys=False)
+
+
+@contextmanager
+def session(name, path):
+    """Trace the enclosed command as the root span *name*, then write the
+    trace file at *path* and print the summary line to stderr."""
+    with _TRACER.lock:
+        _TRACER.events, _TRACER.totals = [], {}
+    start = time.perf_counter_ns()
+    try:
+        with span(name, "command"):
+            yield
+    finally:
+        with _TRACER.lock:
+            events, _TRACER.events = _TRACER.events, None
+            totals = {c: t for c, t in _TRACER.totals.items() if c != "command"}
+        summary = summary_line(name, time.perf_counter_ns() - start, totals)
+        try:
+            _write(events, summary, path)
+        except OSError as exc:
+            summary += f" (trace not written: {exc})"
+        click.echo(summary, err=True)
@@ -0,0 +1,82 @@
+"""Low-overhead resource usage samples of additional users' containers.
+
+One 'docker stats --no-stream' call per Docker host covers every running
+target container at once, rather than one call (or one open stats stream)
+per workspace; deploy.users_clients decides which hosts and compose shards
+hold the targets. Used by the idle detector (hibernate.py) and the limit
+suggestions (resources.py).
+
+A sample is {service: {"cpu": percent, "mem": bytes, "net": bytes}}, where
+"net" is the container's cumulative received plus sent traffic: comparing two
+samples tells whether anything talked to the workspace in between.
+
+record() keeps the last USAGE_HISTORY_SIZE (time, cpu, mem) points per user
+in .dtaas.usage.json, so percentiles can be taken over a day or so of
+periodic samples:
+
+    {"alice": [[1761000000.0, 3.5, 524288000], ...]}
+"""
+
+import json
+from pathlib import Path
+from . import deploy, utils
+from .constants import USAGE_HISTORY, USAGE_HISTORY_SIZE
+from .lifecycle import COMPOSE_SERVICE_LABEL
+
+
+def _running(client, names):
+    """{container name: service} for the running containers of *names*."""
+    running = {}
+    for container in client.compose.ps(services=names):
+        if container.state.running and not container.state.paused:
+            labels = container.config.labels or {}
+            running[container.name] = labels.get(COMPOSE_SERVICE_LABEL, container.name)
+    return running
+
+
+def _stats(client, running):
+    """One 'docker stats' call for every container in *running*."""
+    if not running:
+        return {}
+    return {
+        running[stats.container_name]: {
+            "cpu": stats.cpu_percentage,
+            "mem": stats.memory_used,
+            "net": stats.net_upload + stats.net_download,
+        }
+        for stats in client.container.stats(list(running))
+        if stats.container_name in running
+    }
+
+
+def sample(usernames=None, directory="."):
+    """Return the current usage of every running container of *usernames*.
+
+    None samples every user-added service. Paused and stopped containers are
+    left out: they use no CPU and cannot receive traffic. Raises
+    DockerException if the docker CLI fails.
+    """
+    samples = {}
+    for client, names in deploy.users_clients(directory, usernames):
+        samples.update(_stats(client, _running(client, names)))
+    return samples
+
+
+def load_history(path=USAGE_HISTORY):
+    """Return {user: [[time, cpu, mem], ...]}; empty when nothing was recorded."""
+    file = Path(path)
+    if not file.is_file():
+        return {}
+    data = json.loads(file.read_text(encoding="utf-8"))
+    return data if isinstance(data, dict) else {}
+
+
+def record(samples, now, path=USAGE_HISTORY):
+    """Append *samples* taken at *now* to the history, keeping the newest points."""
+    history = load_history(path)
+    for name, current in samples.items():
+        series = history.setdefault(name, [])
+        series.append([now, current["cpu"], current["mem"]])
+        del series[:-USAGE_HISTORY_SIZE]
+    utils.write_json(history, path, indent=None, sort_keys=False)
+    return history
@@ -4,17 +4,37 @@ Split out of deploy.py (which drives docker compose) because this concern is
 pure local filesystem work: deleting the generated per-user workspace
 directories and the CLI-owned registry/state files, while keeping the
 deployment-provided scaffolding so a later install can repopulate user dirs.
+
+Deleting large workspaces takes long, so the user directories are not
+deleted in the foreground: each is renamed into a fresh batch directory
+under files/.trash (one os.rename each, on the same filesystem), and a
+detached 'python -m src.pkg.user_files' purges the trash with parallel
+os.scandir walkers. A purge that was interrupted leaves its remaining
+batches in files/.trash, and the next --remove-user-files purges them too.
+Entries a purge cannot delete (say, permission denied on files written by
+the workspace's UID) are skipped, so the rest is still deleted, and listed
+in files/.trash-errors.log; the next --remove-user-files reports them.
 """
 
-import shutil
+import os
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from .constants import REGISTRY_FILE, STATE_FILE
+from . import utils
+from .constants import PURGE_WORKERS, REGISTRY_FILE, STATE_FILE
+from .trace import spanned
 
 USER_FILES_DIR = "files"
 # files/ entries provided by the deployment template (shared workspace and the
 # per-user skeleton), as opposed to generated per-user directories. These are
 # kept by --remove-user-files so a later install can repopulate user dirs.
 SCAFFOLDING_ENTRIES = frozenset({"common", "template"})
+TRASH_DIR = ".trash"
+PURGE_LOG = ".trash-errors.log"
+# files/ entries the CLI keeps for itself: the trash being purged and the
+# workspace snapshots (see snapshots.py), which must survive an uninstall.
+RESERVED_ENTRIES = frozenset({TRASH_DIR, ".snapshots"})
 
 
 def _check_within_base(files_dir, base):
@@ -39,31 +59,158 @@ def _user_files_dir(directory):
     return files_dir
 
 
-def _is_generated_user_dir(child):
+def is_generated_user_dir(child):
     """True if *child* is a generated per-user directory safe to delete.
 
-    Excludes the 'common' and 'template' scaffolding, any non-directory entry,
-    and symlinks (which could point outside the installation).
+    Excludes the 'common' and 'template' scaffolding, the CLI's reserved
+    entries, any non-directory entry, and symlinks (which could point outside
+    the installation).
     """
-    if child.name in SCAFFOLDING_ENTRIES:
+    if child.name in SCAFFOLDING_ENTRIES | RESERVED_ENTRIES:
         return False
     return child.is_dir() and not child.is_symlink()
 
 
+def _trash(files_dir):
+    """The files/.trash directory, created if needed.
+
+    Raises OSError if it is a symlink or resolves outside *files_dir*, the
+    same guard _check_within_base applies to files/ itself.
+    """
+    trash = files_dir / TRASH_DIR
+    if trash.is_symlink() or (trash.exists() and not trash.resolve().is_relative_to(files_dir)):
+        raise OSError(f"Refusing to use '{trash}': it is a symlink or escapes '{files_dir}'.")
+    trash.mkdir(exist_ok=True)
+    return trash
+
+
 def _remove_user_dirs(files_dir):
-    """Delete generated per-user directories, keeping template scaffolding.
+    """Move generated per-user directories to the trash, keeping scaffolding.
 
-    Returns the names removed. The shared 'common' workspace and the per-user
-    'template' skeleton are preserved so a subsequent install can recreate the
-    user directories from them.
+    Returns the names removed from files/. The shared 'common' workspace and
+    the per-user 'template' skeleton are preserved so a subsequent install
+    can recreate the user directories from them. The moved directories are
+    deleted later by purge_trash.
+    """
+    children = [child for child in files_dir.iterdir() if is_generated_user_dir(child)]
+    if children:
+        _move_to_trash(files_dir, children)
+    return [child.name for child in children]
+
+
+def _move_to_trash(files_dir, paths):
+    """Rename *paths* (inside *files_dir*) into a new trash batch."""
+    batch = _trash(files_dir) / uuid.uuid4().hex
+    batch.mkdir()
+    for path in paths:
+        Path(path).rename(batch / Path(path).name)
+
+
+def discard(files_dir, paths):
+    """Move *paths* out of the way at once and delete them in the background.
+
+    *paths* must live on the same filesystem as *files_dir* (e.g. inside it);
+    used for replaced workspaces and pruned snapshots.
+    """
+    files_dir = Path(files_dir).resolve()
+    _move_to_trash(files_dir, paths)
+    _purge_in_background(files_dir)
+
+
+def _attempt(remove, path, failures):
+    """Run *remove(path)*, tolerating a path a concurrent purge already took;
+    any other OSError is added to *failures* instead of raised."""
+    try:
+        remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as exc:
+        failures.append(f"{path}: {exc.strerror or exc}")
+
+
+def _scan_into(directory, stack, failures):
+    """Unlink *directory*'s non-directory entries; push its subdirectories.
+
+    Symlinks are unlinked, never followed, so a link cannot lead the purge
+    outside the trash.
     """
-    removed = []
-    for child in files_dir.iterdir():
-        if not _is_generated_user_dir(child):
-            continue
-        shutil.rmtree(child)
-        removed.append(child.name)
-    return removed
+
+    def scan(path):
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, False))
+                else:
+                    _attempt(os.unlink, entry.path, failures)
+
+    _attempt(scan, directory, failures)
+
+
+def remove_tree(path):
+    """Delete *path* and everything below it, depth-first with os.scandir.
+
+    Returns the entries that could not be deleted, as "path: reason".
+    """
+    failures = []
+    stack = [(str(path), False)]
+    while stack:
+        directory, emptied = stack.pop()
+        if emptied:
+            _attempt(os.rmdir, directory, failures)
+        else:
+            stack.append((directory, True))
+            _scan_into(directory, stack, failures)
+    return failures
+
+
+def purge_trash(files_dir, workers=PURGE_WORKERS):
+    """Delete everything in files/.trash, one tree per worker thread.
+
+    Returns the number of top-level directories purged. Stray files (or
+    symlinks) directly in the trash are unlinked. What cannot be deleted is
+    left in the trash and listed in files/.trash-errors.log (removed when a purge
+    deletes everything).
+    """
+    files_dir = Path(files_dir).resolve()
+    trash = _trash(files_dir)
+    batches, failures = [], []
+    for entry in trash.iterdir():
+        if entry.is_dir() and not entry.is_symlink():
+            batches.append(entry)
+        else:
+            _attempt(os.unlink, entry, failures)
+    trees = [tree for batch in batches for tree in batch.iterdir()]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for tree_failures in executor.map(remove_tree, trees):
+            failures += tree_failures
+    for batch in batches:
+        failures += remove_tree(batch)
+    log = files_dir / PURGE_LOG
+    if failures:
+        log.write_text("\n".join(failures) + "\n", encoding="utf-8")
+    else:
+        log.unlink(missing_ok=True)
+    return len(trees)
+
+
+def _leftover_note(files_dir):
+    """A note on what an earlier purge could not delete, or None."""
+    trash = files_dir / TRASH_DIR
+    if not (files_dir / PURGE_LOG).is_file() or not trash.is_dir() or trash.is_symlink():
+        return None
+    if not any(trash.iterdir()):
+        return None
+    return (
+        f"Note: an earlier purge could not delete everything in '{trash}' "
+        f"(see '{files_dir / PURGE_LOG}'); remove what is left there by hand."
+    )
+
+
+def _purge_in_background(files_dir):
+    """Start a detached purge of files/.trash, if there is anything in it."""
+    trash = files_dir / TRASH_DIR
+    if trash.is_dir() and not trash.is_symlink() and any(trash.iterdir()):
+        utils.run_detached("src.pkg.user_files", files_dir)
 
 
 def _remove_registry_files(directory):
@@ -82,20 +229,34 @@ def _remove_registry_files(directory):
     return removed
 
 
+@spanned("delete user files", "fs")
 def delete_user_files(directory):
     """Delete per-user workspace directories plus the registry/state files.
 
     The deployment-provided scaffolding (files/common and files/template) is
     kept so 'dtaas admin install' can repopulate the per-user directories, but
     dtaas.users.registry.json and .dtaas.state.json are removed so a reinstall
-    starts from a clean additional-user list. Returns a status message.
+    starts from a clean additional-user list. The user directories leave
+    files/ at once and are purged in the background, together with anything
+    an interrupted earlier purge left. Returns a status message, which notes
+    anything an earlier purge failed to delete.
     """
     files_dir = _user_files_dir(directory)
-    removed = _remove_user_dirs(files_dir) if files_dir is not None else []
+    removed, leftover = [], None
+    if files_dir is not None:
+        leftover = _leftover_note(files_dir)
+        removed = _remove_user_dirs(files_dir)
+        _purge_in_background(files_dir)
     parts = []
     if removed:
-        parts.append(f"user files at '{files_dir}'")
+        parts.append(f"user files at '{files_dir}' (deleting in the background)")
     parts.extend(f"'{name}'" for name in _remove_registry_files(directory))
     if not parts:
-        return f"No '{USER_FILES_DIR}' directory or registry files found; nothing to remove."
-    return f"Removed {', '.join(parts)}."
+        message = f"No '{USER_FILES_DIR}' directory or registry files found; nothing to remove."
+    else:
+        message = f"Removed {', '.join(parts)}."
+    return f"{message}\n{leftover}" if leftover else message
+
+
+if __name__ == "__main__":
+    purge_trash(sys.argv[1])
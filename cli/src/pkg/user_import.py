@@ -0,0 +1,169 @@
+"""Streaming, chunked and resumable 'dtaas admin user add --file' imports.
+
+A users CSV is read row by row (registry.iter_csv_users) and handed to the
+caller in fixed-size chunks, so memory stays flat however many students are
+imported. Each chunk is validated, registered and provisioned before the next
+one is read, and a small checkpoint journal (.dtaas.import.json) records how
+far the import got: a crash halfway leaves the registry matching the running
+containers up to the last completed chunk, and re-running the same command
+resumes from there instead of starting over.
+
+Shape (one checkpoint per CSV file, so imports of different files can run
+at the same time; see locks.py):
+    {"imports": {"/abs/users.csv": {
+        "source": "/abs/users.csv", "fingerprint": "sha256:...",
+        "chunk_size": 100, "completed": 3, "pending": ["dave", ...]}}}
+
+A journal holding a single checkpoint at the top level, as written before
+imports could run at once, is read as the checkpoint of its source.
+
+'completed' counts the chunks fully provisioned; 'pending' holds the usernames
+of the chunk that was in flight when the journal was last written. A resumed
+run retries that chunk, passing the pending names to the chunk handler so a
+user who was registered but never started is started rather than skipped as
+"already exists". The journal only resumes the same file (same fingerprint)
+with the same chunk size; anything else starts a fresh import, which is still
+safe because register_new_users skips users already in the registry.
+"""
+
+import hashlib
+import itertools
+import json
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from . import locks, utils
+from .constants import IMPORT_CHUNK_SIZE, IMPORT_JOURNAL
+from .registry import iter_csv_users
+
+_FINGERPRINT_BLOCK = 1 << 16
+
+
+class ChunkError(Exception):
+    """Raised by a chunk handler to abort the import at the current chunk."""
+
+
+def file_fingerprint(csv_path):
+    """Return a sha256 over *csv_path*'s bytes, read in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(csv_path, "rb") as handle:
+        for block in iter(lambda: handle.read(_FINGERPRINT_BLOCK), b""):
+            digest.update(block)
+    return "sha256:" + digest.hexdigest()
+
+
+def _load_imports(path):
+    """{source: checkpoint} of every import the journal at *path* holds."""
+    file = Path(path)
+    data = json.loads(file.read_text(encoding="utf-8")) if file.is_file() else {}
+    if not isinstance(data, dict):
+        return {}
+    if "source" in data:
+        return {data["source"]: data}
+    imports = data.get("imports")
+    if not isinstance(imports, dict):
+        return {}
+    return {source: entry for source, entry in imports.items() if isinstance(entry, dict)}
+
+
+def load_journal(csv_path, path=IMPORT_JOURNAL):
+    """Return the checkpoint of *csv_path*'s import, or {} when there is none
+    to resume."""
+    return _load_imports(path).get(str(Path(csv_path).resolve()), {})
+
+
+def _write_journal(journal, path, done=False):
+    """Store *journal* as its source's checkpoint (dropped when *done*),
+    keeping other imports' checkpoints. Persisted atomically (temp file +
+    os.replace) like the registry, and the file is removed once empty."""
+    with locks.files_lock(Path(path).parent):
+        imports = _load_imports(path)
+        imports.pop(journal["source"], None)
+        if not done:
+            imports[journal["source"]] = journal
+        if not imports:
+            Path(path).unlink(missing_ok=True)
+            return
+        utils.write_json({"imports": imports}, path, sort_keys=False)
+
+
+def _new_journal(csv_path, chunk_size):
+    """The journal for a fresh import of *csv_path* (nothing completed yet)."""
+    return {
+        "source": str(Path(csv_path).resolve()),
+        "fingerprint": file_fingerprint(csv_path),
+        "chunk_size": chunk_size,
+        "completed": 0,
+        "pending": [],
+    }
+
+
+def _resumable(previous, journal):
+    """True if *previous* checkpoints the same file and chunking as *journal*."""
+    return all(
+        previous.get(key) == journal[key]
+        for key in ("source", "fingerprint", "chunk_size")
+    )
+
+
+def start_journal(csv_path, chunk_size, path=IMPORT_JOURNAL):
+    """Return the journal to run *csv_path* with: resumed when possible, else fresh."""
+    journal = _new_journal(csv_path, chunk_size)
+    previous = load_journal(csv_path, path)
+    if _resumable(previous, journal):
+        journal["completed"] = int(previous.get("completed", 0))
+        journal["pending"] = list(previous.get("pending", []))
+    return journal
+
+
+def iter_chunks(rows, chunk_size):
+    """Yield successive dicts of at most *chunk_size* (username, details) rows."""
+    iterator = iter(rows)
+    while chunk := dict(itertools.islice(iterator, chunk_size)):
+        yield chunk
+
+
+@dataclass
+class _ImportRun:
+    """One import in progress: its journal, where it lives, and the handler."""
+
+    journal: dict
+    path: str
+    handle_chunk: Callable
+
+    def run_chunk(self, index, chunk):
+        """Checkpoint chunk *index* as in flight, hand it over, then mark it done."""
+        journal = self.journal
+        resumed = journal["pending"] if index == journal["completed"] else []
+        journal["pending"] = list(chunk)
+        _write_journal(journal, self.path)
+        self.handle_chunk(chunk, [name for name in resumed if name in chunk])
+        journal["completed"] = index + 1
+        journal["pending"] = []
+        _write_journal(journal, self.path)
+
+
+def import_users(
+    csv_path, handle_chunk, chunk_size=IMPORT_CHUNK_SIZE, path=IMPORT_JOURNAL
+):
+    """Stream *csv_path* through *handle_chunk* in chunks, checkpointing each one.
+
+    *handle_chunk(chunk, retry)* receives a {username: details} chunk plus the
+    usernames of that chunk a previous, interrupted run left in flight; it
+    raises (typically ChunkError) to abort. Chunks a previous run already completed are read
+    (for duplicate detection) but not handed over again. Its checkpoint
+    is removed once every chunk has completed, and kept on failure so the next
+    run resumes at the failed chunk. Returns the number of chunks skipped as
+    already completed. Raises ValueError for a non-positive *chunk_size* or a
+    malformed/duplicate row.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"Invalid chunk size {chunk_size}: must be at least 1")
+    run = _ImportRun(start_journal(csv_path, chunk_size, path), path, handle_chunk)
+    resumed_from = run.journal["completed"]
+    chunks = iter_chunks(iter_csv_users(csv_path), chunk_size)
+    for index, chunk in enumerate(chunks):
+        if index >= resumed_from:
+            run.run_chunk(index, chunk)
+    _write_journal(run.journal, path, done=True)
+    return resumed_from
@@ -0,0 +1,66 @@
+"""Queries over the registry's users ('dtaas admin user list', '--group').
+
+UserIndex reads dtaas.users.registry.json and the users compose files once
+and indexes the additional users by group tag, desired_status and
+provisioning state (whether a compose service is defined for them), so a
+query such as "the paused users of group gpu" is a set intersection rather
+than a scan of every registry entry:
+
+    index = UserIndex.load()
+    index.select(groups=["gpu"], status="paused")   # ['alice', 'bob']
+
+Starting users live in dtaas.toml, not the registry, and are never listed.
+"""
+
+from pathlib import Path
+from . import shards
+from .constants import REGISTRY_FILE
+from .registry import load_registry
+
+
+class UserIndex:
+    """The registry's users, indexed by group, desired_status and provisioning."""
+
+    def __init__(self, users, provisioned=()):
+        self.users = users
+        self.by_group = {}
+        self.by_status = {}
+        self.provisioned = set(provisioned) & set(users)
+        for name, details in users.items():
+            for group in details.get("groups", []):
+                self.by_group.setdefault(group, set()).add(name)
+            status = details.get("desired_status", "running")
+            self.by_status.setdefault(status, set()).add(name)
+
+    @classmethod
+    def load(cls, directory="."):
+        """Index the registry users of *directory* against its compose services."""
+        services = shards.load_users_compose(directory).get("services") or {}
+        registry = load_registry(Path(directory) / REGISTRY_FILE)
+        return cls(registry, services if isinstance(services, dict) else {})
+
+    def select(self, groups=(), status=None, provisioned=None):
+        """Sorted usernames in any of *groups* (all when empty) with desired
+        *status* (any when None), provisioned or not (either when None)."""
+        names = set(self.users)
+        if groups:
+            names &= set().union(*(self.by_group.get(group, set()) for group in groups))
+        if status is not None:
+            names &= self.by_status.get(status, set())
+        if provisioned is True:
+            names &= self.provisioned
+        elif provisioned is False:
+            names -= self.provisioned
+        return sorted(names)
+
+    def row(self, name):
+        """A JSON-friendly summary of one registry user."""
+        details = self.users[name]
+        return {
+            "username": name,
+            "email": details.get("email", ""),
+            "groups": list(details.get("groups", [])),
+            "desired_status": details.get("desired_status", "running"),
+            "provisioned": name in self.provisioned,
+            "host": details.get("host", ""),
+        }
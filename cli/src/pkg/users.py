@@ -1,14 +1,30 @@
 """The 'user add'/'user delete' CLI command handlers.
 
 Loads registry/deploy config, then drives the compose/container plumbing in
-users_compose.py to provision or deprovision the requested users.
+users_compose.py to provision or deprovision the requested users. Both hold
+the locks of the users they work on (see locks.py) from loading the registry
+and compose files to their last write, so commands on other users can run
+at the same time.
 """
 
-from dataclasses import dataclass
-from . import utils
-from .constants import COMPOSE_USERS_YML
-from .registry import load_registry, remove_from_registry
-from .state import write_state
+from dataclasses import dataclass, field
+from pathlib import Path
+from . import (
+    capacity,
+    history,
+    images,
+    locks,
+    placement,
+    resources,
+    routes,
+    shards,
+    startup_timing,
+    template_layer,
+    utils,
+)
+from .deploy import COMPOSE_FILE
+from .registry import load_registry, remove_from_registry, set_hosts, set_workspaces
+from .state import record_startup, write_state
 from .users_compose import (
     add_users_to_compose,
     create_user_files,
@@ -34,18 +50,27 @@ def _get_registry_users():
 
 
 def _get_deploy_config(config_obj):
-    """Retrieve deployment settings (server, path, resources, TLS) from dtaas.toml."""
-    server, err = config_obj.get_server_dns()
-    utils.check_error(err)
-    path, err = config_obj.get_path()
-    utils.check_error(err)
-    resources, err = config_obj.get_resource_limits()
-    utils.check_error(err)
-    tls, err = config_obj.get_tls()
-    utils.check_error(err)
-    set_limits, err = config_obj.get_set_limits()
-    utils.check_error(err)
-    return server, path, resources, tls, set_limits
+    """Retrieve deployment settings (server, path, resources, TLS, sharding,
+    hosts, warm pool, template layer, capacity policy, routing) from dtaas.toml,
+    keyed as get_compose_config expects."""
+    getters = {
+        "server": config_obj.get_server_dns,
+        "path": config_obj.get_path,
+        "resources": config_obj.get_resource_limits,
+        "tls": config_obj.get_tls,
+        "set_limits": config_obj.get_set_limits,
+        "shard_size": config_obj.get_shard_size,
+        "hosts": config_obj.get_hosts,
+        "warm_pool": config_obj.get_warm_pool,
+        "template_layer": config_obj.get_template_layer,
+        "capacity_policy": config_obj.get_capacity_policy,
+        "routing": config_obj.get_routing,
+    }
+    config = {}
+    for key, getter in getters.items():
+        config[key], err = getter()
+        utils.check_error(err)
+    return config
 
 
 @dataclass
@@ -56,30 +81,30 @@ class _AddContext:
     user_list: list
     users_section: dict
     config: dict
+    timings: startup_timing.Timings = field(default_factory=startup_timing.Timings)
 
 
-def _load_add_context(config_obj):
+def _load_add_context(config_obj, only=None, timings=None):
     """Load compose, registry users, and deploy config for provisioning.
 
-    Returns an _AddContext, or None when the registry is empty (nothing to
-    provision). Raises on any other error.
+    *only* restricts the users to provision to those registry users (None =
+    every registry user); every other service stays as loaded. Returns an
+    _AddContext, or None when there is nothing to provision. Raises on any
+    other error. *timings* collects the startup timings of the users started
+    (see startup_timing.py).
     """
-    compose, err = utils.import_yaml(COMPOSE_USERS_YML)
-    utils.check_error(err)
-    compose = compose or {}
+    compose = shards.load_users_compose()
     user_list, users_section = _get_registry_users()
+    if only is not None:
+        user_list = [name for name in user_list if name in only]
     if not user_list:
         return None
     validate_usernames(user_list)
-    server, path, resources, tls, set_limits = _get_deploy_config(config_obj)
-    config = {
-        "server": server,
-        "path": path,
-        "resources": resources,
-        "tls": tls,
-        "set_limits": set_limits,
-    }
-    return _AddContext(compose, user_list, users_section, config)
+    config = _get_deploy_config(config_obj)
+    config["overrides"] = resources.overrides(users_section)
+    return _AddContext(
+        compose, user_list, users_section, config, timings or startup_timing.Timings()
+    )
 
 
 def _authorise_user(username, users_section):
@@ -122,6 +147,71 @@ def _resolve_start_only(start_only, skip_start):
     return [name for name in start_only if name not in skip_start]
 
 
+def _place_new_users(ctx, new_users):
+    """Choose a Docker host (see placement.py) and a compose shard for users
+    with no compose service yet; the chosen hosts are recorded in the registry.
+    Users with limit overrides are placed (and counted) with their own limits.
+    """
+    hosts = ctx.config.get("hosts") or []
+    endpoints = {}
+    if hosts and new_users:
+        defaults, set_limits = ctx.config["resources"], ctx.config["set_limits"]
+        demand = placement.user_demand(defaults, set_limits)
+        demands = {
+            name: placement.user_demand({**defaults, **limits}, set_limits)
+            for name, limits in ctx.config["overrides"].items()
+        }
+        placed = placement.place_users(
+            new_users, ctx.users_section, hosts, demand, demands
+        )
+        set_hosts(placed)
+        endpoints = placement.endpoints(placed, hosts)
+    shards.assign_shards(
+        new_users, ctx.config.get("shard_size", 0), endpoints=endpoints
+    )
+
+
+def _check_capacity(ctx, starting):
+    """Check the users about to start against their Docker host's capacity
+    (see capacity.py); raises ValueError under capacity_policy "refuse"."""
+    requests = {}
+    for shard, names in shards.group_by_shard(starting).items():
+        demands = requests.setdefault(shards.shard_endpoint(shard), [])
+        for name in names:
+            limits = {**ctx.config["resources"], **ctx.config["overrides"].get(name, {})}
+            demands.append(capacity.workspace_demand(limits, ctx.config["set_limits"]))
+    capacity.check(requests, ctx.config.get("capacity_policy", "warn"))
+
+
+def _workspace_layers(ctx, new_users):
+    """{user: template layer} (see template_layer.py) for every user to
+    provision: new users get [common.users] template_layer (where their
+    Docker host supports it), the rest keep the one recorded in the registry.
+    Shared layers chosen for new users are recorded.
+    """
+    layers = template_layer.recorded_layers(ctx.users_section)
+    chosen = template_layer.choose_layers(new_users, ctx.config.get("template_layer", "copy"))
+    shared = {name: layer for name, layer in chosen.items() if layer != "copy"}
+    if shared:
+        set_workspaces(shared)
+    return {**layers, **chosen}
+
+
+def _route_users(ctx, start_only):
+    """Route every provisioned user through the Traefik routes file under
+    routing = "file" (see routes.py); under "labels", drop a stale one.
+
+    When provisioning every user (*start_only* None) the file is rewritten;
+    otherwise the users provisioned are added to it (see routes.add_routes).
+    """
+    if ctx.config.get("routing") != "file":
+        routes.discard_routes()
+    elif start_only is None:
+        routes.write_routes(list(ctx.compose["services"]), ctx.config)
+    else:
+        routes.add_routes(ctx.user_list, ctx.config)
+
+
 def _provision_users(ctx, start_only=None):
     """Create workspace files, compose entries, and forward-auth rules.
 
@@ -131,35 +221,90 @@ def _provision_users(ctx, start_only=None):
     written to compose (so the file stays complete), but only *start_only*
     users are started -- None starts all, a list starts just those. A user
     paused or stopped via 'dtaas admin user pause'/'stop' is never started --
-    see _skip_start_users.
+    see _skip_start_users. Users not provisioned yet are first placed on a
+    Docker host and into a compose shard (see _place_new_users), checked
+    against that host's capacity (see _check_capacity), and given their
+    workspace's template layer (see _workspace_layers), and the images
+    of those about to start are pulled while their workspace files are
+    created (see images.py). Under routing = "file" their Traefik routes are
+    written before they start (see _route_users). How long each phase takes
+    the users started is recorded in the state cache (see _record_startup).
     """
-    create_user_files(ctx.user_list, ctx.config["path"] + "/files")
-    err = add_users_to_compose(ctx.user_list, ctx.compose, ctx.config)
-    utils.check_error(err)
-    for username in ctx.user_list:
-        _authorise_user(username, ctx.users_section)
+    provisioned = set(ctx.compose.get("services", {}))
+    new_users = [n for n in ctx.user_list if n not in provisioned]
     skip_start = _skip_start_users(ctx.users_section)
-    finalize_compose(
-        ctx.compose, skip_start, _resolve_start_only(start_only, skip_start)
-    )
+    starting = [n for n in new_users if n not in skip_start]
+    _place_new_users(ctx, new_users)
+    _check_capacity(ctx, starting)
+    if ctx.config.get("routing") == "file":
+        routes.check_traefik(Path(ctx.config["path"]) / COMPOSE_FILE)
+    ctx.config["layers"] = _workspace_layers(ctx, new_users)
+    started = _resolve_start_only(start_only, skip_start)
+    timed = starting if started is None else started
+    with ctx.timings.phase("render", timed):
+        err = add_users_to_compose(ctx.user_list, ctx.compose, ctx.config)
+        utils.check_error(err)
+    prepull = images.Prepull(images.image_targets(ctx.compose["services"], starting))
+    prepull.start()
+    files_dir = ctx.config["path"] + "/files"
+    with ctx.timings.phase("workspace", timed):
+        create_user_files(
+            ctx.user_list, files_dir, ctx.config.get("warm_pool", 0), ctx.config["layers"]
+        )
+    with ctx.timings.phase("compose_up", timed):
+        prepull.finish()
+        with locks.files_lock():
+            for username in ctx.user_list:
+                _authorise_user(username, ctx.users_section)
+        _route_users(ctx, start_only)
+        finalize_compose(ctx.compose, skip_start, started, written=ctx.user_list)
+    history.affect(new_users + (started or []))
+    _record_startup(ctx.timings, timed)
+
+
+def _record_startup(timings, usernames):
+    """Wait for *usernames* to come up when asked to ('user add --timings'),
+    then store their startup timings in the state cache."""
+    if timings.wait and usernames:
+        startup_timing.wait_until_ready(timings, usernames)
+    record_startup({name: timings.phases.get(name, {}) for name in usernames})
+
+
+def _run_provisioning(config_obj, start_only, only, timings=None):
+    """Provision the registry users selected by *only* (None = every
+    registry user), holding their locks throughout; return any error."""
+    try:
+        with locks.user_locks(only):
+            owned = list(load_registry()) if only is None else list(only)
+            ctx = _load_add_context(config_obj, owned, timings)
+            if ctx is None:
+                return None  # nothing to provision
+            setup_compose_structure(ctx.compose)
+            _provision_users(ctx, start_only)
+    except Exception as e:
+        return e
+    return None
 
 
-def add_users(config_obj, start_only=None):
+def add_users(config_obj, start_only=None, timings=None):
     """add cli command handler.
 
-    *start_only* restricts which users' containers are started (None = all
-    provisioned users; a list = just those). The registry is always fully
-    written to compose regardless, so the file stays complete.
+    *start_only* restricts the users provisioned and started to those (None
+    = every registry user; a list = just those), so 'user add' commands for
+    different users can run at once. *timings* (a startup_timing.Timings)
+    collects how long starting them took.
     """
-    try:
-        ctx = _load_add_context(config_obj)
-        if ctx is None:
-            return None  # empty registry: nothing to provision
-        setup_compose_structure(ctx.compose)
-        _provision_users(ctx, start_only)
-    except Exception as e:
-        return e
-    return None
+    return _run_provisioning(config_obj, start_only, start_only, timings)
+
+
+def reprovision_users(config_obj, usernames):
+    """Reprovision just *usernames* (the 'config reconcile --fix' repair).
+
+    Only those registry users get workspace files, a re-rendered compose
+    service, a forward-auth rule and a 'compose up'; every other service is
+    left as it is, so repairing one user costs the same as adding one.
+    """
+    return _run_provisioning(config_obj, list(usernames), list(usernames))
 
 
 def _delete_context(usernames):
@@ -168,10 +313,7 @@ def _delete_context(usernames):
     Raises on validation/import failure or a missing compose file.
     """
     validate_usernames(usernames)
-    compose, err = utils.import_yaml(COMPOSE_USERS_YML)
-    utils.check_error(err)
-    if compose is None:
-        raise ValueError("Failed to load compose configuration")
+    compose = shards.load_users_compose()
     services = compose.get("services")
     existing_services = services if isinstance(services, dict) else {}
     existing, missing = categorize_users(list(usernames), existing_services)
@@ -181,16 +323,23 @@ def _delete_context(usernames):
 
 def _remove_users(compose, existing, usernames):
     """Stop containers, rewrite compose, clear auth rules, and update state."""
+    overlays = [name for name in existing if name in (compose.get("volumes") or {})]
     if existing:
         err = stop_user_containers(existing)
         utils.check_error(err)
+    if overlays:
+        template_layer.remove_overlay_volumes(overlays)
     remove_users_from_compose(compose, existing)
-    err = utils.export_yaml(compose, COMPOSE_USERS_YML)
-    utils.check_error(err)
-    for username in usernames:
-        remove_conf_server_entry(username)
+    with locks.files_lock():
+        merged = shards.update_users_compose(compose, existing)
+        write_state(merged.get("services", {}))
+    shards.unassign(existing)
+    with locks.files_lock():
+        for username in usernames:
+            remove_conf_server_entry(username)
+    routes.remove_routes(existing)
     remove_from_registry(usernames)
-    write_state(compose.get("services", {}))
+    history.affect(usernames)
 
 
 def delete_users(usernames, dry_run=False):
@@ -198,11 +347,13 @@ def delete_users(usernames, dry_run=False):
     the CLI-owned user registry. With dry_run, report what would happen and make
     no changes."""
     try:
-        compose, existing = _delete_context(usernames)
-        if dry_run:
-            report_delete_preview(existing, usernames)
-        else:
-            _remove_users(compose, existing, usernames)
+        validate_usernames(usernames)
+        with locks.user_locks(usernames):
+            compose, existing = _delete_context(usernames)
+            if dry_run:
+                report_delete_preview(existing, usernames)
+            else:
+                _remove_users(compose, existing, usernames)
     except Exception as e:
         return e
     return None
@@ -6,11 +6,12 @@ or drives 'docker compose' for a set of user containers. See users.py for the
 """
 
 import subprocess
-import shutil
+import time
 from pathlib import Path
-from . import utils
-from .constants import COMPOSE_USERS_YML, LOCALHOST_SERVER
+from . import docker_calls, locks, routes, shards, template_layer, utils, warm_pool
+from .constants import LOCALHOST_SERVER
 from .state import write_state
+from .trace import span, spanned
 from .users_utils import build_base_mapping, resource_mapping
 
 
@@ -44,29 +45,42 @@ def _load_template(server, tls):
     return template, None
 
 
-def _apply_resource_limits(service, config):
-    """Merge substituted resource limits into the service dict when enabled.
+def resource_fields(resources):
+    """The compose service fields users.resources.yml yields for *resources*.
 
-    When set_limits is false the service is returned unchanged so the container
-    runs without CPU/memory/process caps. Raises on a template load or
-    substitution error.
+    Raises on a template load or substitution error.
     """
-    if not config.get("set_limits", True):
-        return service
     template, err = utils.import_yaml("users.resources.yml")
     utils.check_error(err)
-    resources, err = utils.replace_all(template, resource_mapping(config["resources"]))
+    fields, err = utils.replace_all(template, resource_mapping(resources))
     utils.check_error(err)
-    service.update(resources)
+    return fields
+
+
+def _apply_resource_limits(service, config, username):
+    """Merge substituted resource limits into the service dict when enabled.
+
+    The [common.resources] defaults are overlaid with *username*'s registry
+    overrides, if any (config['overrides'], see resources.py). When set_limits
+    is false the service is returned unchanged so the container runs without
+    CPU/memory/process caps. Raises on a template load or substitution error.
+    """
+    if not config.get("set_limits", True):
+        return service
+    overrides = config.get("overrides", {}).get(username, {})
+    service.update(resource_fields({**config["resources"], **overrides}))
     return service
 
 
+@spanned("render {username}", "render")
 def get_compose_config(username, config):
     """Makes and returns the config for the user
 
     Args:
         username: Username for the config
-        config: Dict with 'server', 'path', 'resources', 'tls', 'set_limits' keys
+        config: Dict with 'server', 'path', 'resources', 'tls', 'set_limits'
+            keys, plus the optional 'overrides', 'layers' (see
+            template_layer.py) and 'routing' (see routes.py)
 
     Returns:
         Tuple of (user config dict, error if any)
@@ -77,7 +91,11 @@ def get_compose_config(username, config):
         mapping = build_base_mapping(username, config)
         result, err = utils.replace_all(template, mapping)
         utils.check_error(err)
-        result = _apply_resource_limits(result, config)
+        result = _apply_resource_limits(result, config, username)
+        if config.get("layers", {}).get(username) == "overlay":
+            template_layer.use_overlay(result, config["path"], username)
+        if config.get("routing") == "file":
+            routes.strip_labels(result)
     except Exception as e:
         return None, e
     return result, None
@@ -85,21 +103,29 @@ def get_compose_config(username, config):
 
 def _create_one_user_dir(username, file_path):
     """Copy the template into username's workspace dir and chown it (best-effort)."""
-    user_dir = Path(file_path) / username
-    shutil.copytree(Path(file_path) / "template", user_dir, dirs_exist_ok=True)
-    try:
-        shutil.chown(user_dir, user=1000, group=100)
-        for item in user_dir.rglob("*"):
-            shutil.chown(item, user=1000, group=100)
-    except (AttributeError, PermissionError):
-        # Skip os.chown in tests to avoid PermissionError
-        pass
+    warm_pool.copy_template(file_path, Path(file_path) / username)
+
 
+@spanned("create user files", "fs")
+def create_user_files(users, file_path, pool_size=0, layers=None):
+    """Creates all the users' workspace directories.
 
-def create_user_files(users, file_path):
-    """Creates all the users' workspace directories"""
+    *layers* maps users to a shared template layer ("overlay"/"hardlink",
+    see template_layer.py); everyone else gets a copy of the template. With
+    a warm pool (*pool_size* > 0, see warm_pool.py) a copied user without a
+    directory yet claims a pre-copied one, and a pool short of *pool_size*
+    slots is refilled in the background afterwards.
+    """
+    pooled = bool(pool_size) and warm_pool.refresh(file_path)
     for username in users:
-        _create_one_user_dir(username, file_path)
+        layer = (layers or {}).get(username, "copy")
+        new = not (Path(file_path) / username).exists()
+        if layer != "copy":
+            template_layer.prepare_workspace(file_path, username, layer)
+        elif not (pooled and new and warm_pool.claim(username, file_path)):
+            _create_one_user_dir(username, file_path)
+    if pool_size and len(warm_pool.slots(file_path)) < pool_size:
+        warm_pool.refill_in_background(file_path, pool_size)
     return None
 
 
@@ -109,19 +135,49 @@ def add_users_to_compose(users, compose, config):
         users: List of usernames
         compose: Compose dict to update
         config: Dict with 'server', 'path', 'resources' keys
+
+    An overlay workspace's volume is declared in compose's top-level
+    'volumes', keyed by username (see template_layer.set_compose_volume).
     """
     for username in users:
         user_conf, err = get_compose_config(username, config)
         if err is not None:
             return err
         compose["services"][username] = user_conf
+        template_layer.set_compose_volume(compose, username, config)
+    return None
+
+
+def _compose_argv(shard):
+    """The 'docker compose' argv prefix addressing *shard*'s compose project.
+
+    A shard placed on another Docker host gets the matching global --host or
+    --context flag (see shards.docker_options).
+    """
+    argv = ["docker"]
+    for option, value in shards.docker_options(shards.shard_endpoint(shard)).items():
+        argv += [f"--{option}", value]
+    argv += ["compose", "-f", str(shards.shard_file(shard))]
+    project = shards.project_name(shard)
+    return argv + ["-p", project] if project else argv
+
+
+def _run_per_shard(verb, users):
+    """Run 'docker compose <verb> <users>' once per shard holding *users*.
+
+    Only the shards that actually hold a target are invoked, so acting on a
+    few users never makes compose parse every other shard's file.
+    """
+    for shard, names in shards.group_by_shard(users).items():
+        err = run_command_for_containers(_compose_argv(shard) + verb, names)
+        if err is not None:
+            return err
     return None
 
 
 def start_user_containers(users):
     """Starts all the user containers in the 'users' list"""
-    cmd = ["docker", "compose", "-f", COMPOSE_USERS_YML, "up", "-d"]
-    return run_command_for_containers(cmd, users)
+    return _run_per_shard(["up", "-d"], users)
 
 
 def stop_user_containers(users):
@@ -131,8 +187,7 @@ def stop_user_containers(users):
     whole project, so 'rm --stop --force' is used instead to target just the
     given services.
     """
-    cmd = ["docker", "compose", "-f", COMPOSE_USERS_YML, "rm", "--stop", "--force"]
-    return run_command_for_containers(cmd, users)
+    return _run_per_shard(["rm", "--stop", "--force"], users)
 
 
 def run_command_for_containers(command, containers):
@@ -142,7 +197,10 @@ def run_command_for_containers(command, containers):
     can never be interpreted as shell syntax.
     """
     argv = command + list(containers)
-    result = subprocess.run(argv, shell=False, check=False)
+    start = time.perf_counter()
+    with span(" ".join(command), "docker", containers=len(containers)):
+        result = subprocess.run(argv, shell=False, check=False)
+    docker_calls.record(argv, time.perf_counter() - start, result.returncode)
     if result.returncode != 0:
         return Exception(f"failed to run '{' '.join(argv)}' command")
     return None
@@ -158,7 +216,7 @@ def setup_compose_structure(compose):
         compose["networks"] = {"users": {"name": "dtaas-users", "external": True}}
 
 
-def finalize_compose(compose, skip_start=(), start_only=None):
+def finalize_compose(compose, skip_start=(), start_only=None, written=None):
     """Export compose, start the appropriate user containers, and record state.
 
     skip_start holds usernames whose registry desired_status is not 'running'
@@ -168,11 +226,18 @@ def finalize_compose(compose, skip_start=(), start_only=None):
     --fix' does on every run would silently undo the pause.
 
     start_only further restricts which users are started: None starts every
-    service not in skip_start ('config reconcile --fix'); a list starts only
-    those names ('user add', so adding one user never recreates the rest).
+    service not in skip_start; a list starts only those names ('user add',
+    so adding one user never recreates the rest). *written* lists the users
+    whose services are written (None: start_only, or every service when
+    that is None too); it must include users in skip_start, whose service
+    is written but who are not in start_only. Only the shards holding them
+    are rewritten (see shards.py), and only their services are merged into
+    the compose files as they are now (see shards.update_users_compose), so
+    users another command provisioned meanwhile are kept.
     """
-    err = utils.export_yaml(compose, COMPOSE_USERS_YML)
-    utils.check_error(err)
+    if written is None:
+        written = list(compose["services"]) if start_only is None else start_only
+    shards.update_users_compose(compose, written)
     users_list = [
         name
         for name in compose["services"]
@@ -183,4 +248,5 @@ def finalize_compose(compose, skip_start=(), start_only=None):
     if users_list:
         err = start_user_containers(users_list)
         utils.check_error(err)
-    write_state(compose["services"])
+    with locks.files_lock():
+        write_state(shards.load_users_compose().get("services", {}))
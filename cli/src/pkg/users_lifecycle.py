@@ -5,27 +5,33 @@ these target a subset of compose.users.yml's services by username.
 Each action scopes 'docker compose pause'/'stop'/'unpause' to the targeted
 services, records the intended state in dtaas.users.registry.json's
 'desired_status' (so 'user add'/'config reconcile --fix' won't silently
-restart them), and refreshes .dtaas.state.json. Rejecting a dtaas.toml
-starting user is the caller's job (cmd_user_utils.reject_starting_users).
+restart them), and refreshes .dtaas.state.json, holding the targeted
+users' locks throughout (see locks.py). Rejecting a dtaas.toml starting
+user is the caller's job (cmd_user_utils.reject_starting_users).
 """
 
-from . import deploy, utils
-from .constants import COMPOSE_USERS_YML
+from . import deploy, history, locks, shards
 from .registry import load_registry, set_desired_status
 from .state import write_state
+from .trace import span
 
 
 # pylint: disable=protected-access
 
 
 def _load_services():
-    """Return compose.users.yml's service definitions, or {} when absent."""
-    compose, err = utils.import_yaml(COMPOSE_USERS_YML)
-    utils.check_error(err)
-    services = (compose or {}).get("services", {})
+    """Return compose.users.yml's (and its shards') service definitions, or {}."""
+    services = shards.load_users_compose().get("services", {})
     return services if isinstance(services, dict) else {}
 
 
+def _refresh_state():
+    """Rewrite .dtaas.state.json from the compose services as they are now,
+    read under locks.files_lock() so another command's users are kept."""
+    with locks.files_lock():
+        write_state(_load_services())
+
+
 def _split_targets(usernames, services):
     """Split usernames into (provisioned, unregistered, not_provisioned).
 
@@ -48,12 +54,14 @@ def _apply(usernames, compose_action, desired_status):
     Returns (acted, unregistered, not_provisioned) usernames. Raises
     DockerException if the compose command itself fails.
     """
-    services = _load_services()
-    targets, unregistered, not_provisioned = _split_targets(usernames, services)
-    if targets:
-        compose_action(targets)
-        write_state(services)
-        set_desired_status(targets, desired_status)
+    with locks.user_locks(usernames):
+        services = _load_services()
+        targets, unregistered, not_provisioned = _split_targets(usernames, services)
+        if targets:
+            compose_action(targets)
+            _refresh_state()
+            set_desired_status(targets, desired_status)
+            history.affect(targets)
     return targets, unregistered, not_provisioned
 
 
@@ -97,15 +105,15 @@ def _pause_targets(targets):
     """Freeze only the currently-running targets ('compose pause').
 
     Already-paused (or stopped) containers are skipped, since 'compose pause'
-    errors on a container that is not running.
+    errors on a container that is not running. Each compose shard holding a
+    target gets one call (see deploy.users_clients).
     """
-    client = deploy._users_client(".")
-    if client is None:
-        return
-    states = _live_states(client, targets)
-    to_pause = [name for name in targets if states.get(name) == "running"]
-    if to_pause:
-        client.compose.pause(services=to_pause)
+    for client, names in deploy.users_clients(".", targets):
+        states = _live_states(client, names)
+        to_pause = [name for name in names if states.get(name) == "running"]
+        if to_pause:
+            with span("compose pause", "docker", services=len(to_pause)):
+                client.compose.pause(services=to_pause)
 
 
 def _stop_targets(targets):
@@ -113,13 +121,25 @@ def _stop_targets(targets):
 
     Already-stopped containers are skipped so a repeated stop is a no-op.
     """
-    client = deploy._users_client(".")
-    if client is None:
-        return
-    states = _live_states(client, targets)
-    to_stop = [name for name in targets if states.get(name) in ("running", "paused")]
-    if to_stop:
-        client.compose.stop(services=to_stop)
+    for client, names in deploy.users_clients(".", targets):
+        states = _live_states(client, names)
+        to_stop = [name for name in names if states.get(name) in ("running", "paused")]
+        if to_stop:
+            with span("compose stop", "docker", services=len(to_stop)):
+                client.compose.stop(services=to_stop)
+
+
+def _resume_shard(client, names):
+    """Unpause the paused and start the stopped *names* within one shard."""
+    states = _live_states(client, names)
+    paused = [name for name in names if states.get(name) == "paused"]
+    stopped = [name for name in names if states.get(name) == "stopped"]
+    if paused:
+        with span("compose unpause", "docker", services=len(paused)):
+            client.compose.unpause(services=paused)
+    if stopped:
+        with span("compose start", "docker", services=len(stopped)):
+            client.compose.start(services=stopped)
 
 
 def _resume_targets(targets):
@@ -129,19 +149,11 @@ def _resume_targets(targets):
     ones, so resume dispatches each target to the right verb by live state;
     an already-running target needs neither and is skipped.
     """
-    client = deploy._users_client(".")
-    if client is None:
-        return
-    states = _live_states(client, targets)
-    paused = [name for name in targets if states.get(name) == "paused"]
-    stopped = [name for name in targets if states.get(name) == "stopped"]
-    if paused:
-        client.compose.unpause(services=paused)
-    if stopped:
-        client.compose.start(services=stopped)
+    for client, names in deploy.users_clients(".", targets):
+        _resume_shard(client, names)
 
 
-def _drifted(name, details, live):
+def status_mismatch(name, details, live):
     """(name, desired, actual) if *name*'s live state differs from its
     registry desired_status, else None. None if it has no live container."""
     desired = (details or {}).get("desired_status", "running")
@@ -151,33 +163,46 @@ def _drifted(name, details, live):
     return name, desired, actual
 
 
-def desired_status_drift():
+def live_states(usernames, directory="."):
+    """{service: state} of *usernames*' live containers, one 'compose ps'
+    per compose shard holding them."""
+    live = {}
+    for client, names in deploy.users_clients(directory, list(usernames)):
+        live.update(_live_states(client, names))
+    return live
+
+
+def desired_status_drift(usernames=None):
     """List (user, desired, actual) where a provisioned user's live container
     state differs from its registry desired_status.
 
-    Users with no live container are omitted -- those are the 'missing' users
-    that 'config reconcile' handles via reprovisioning, not a state mismatch.
+    *usernames* limits the check to those registry users (None = all). Users
+    with no live container are omitted -- those are the 'missing' users that
+    'config reconcile' handles via reprovisioning, not a state mismatch.
     Returns [] when compose.users.yml is absent.
     """
-    client = deploy._users_client(".")
     registry = load_registry()
-    if client is None:
-        return []
-    live = _live_states(client, list(registry))
-    drifted = (_drifted(name, details, live) for name, details in registry.items())
+    if usernames is not None:
+        registry = {name: registry[name] for name in usernames if name in registry}
+    live = live_states(registry)
+    drifted = (status_mismatch(name, details, live) for name, details in registry.items())
     return [entry for entry in drifted if entry is not None]
 
 
-def enforce_desired_status():
-    """Pause/stop/resume provisioned users so their live state matches their
-    registry desired_status. Returns the (user, desired, actual) drift acted on.
+def enforce_desired_status(usernames=None):
+    """Pause/stop/resume provisioned users (all, or those of *usernames*) so
+    their live state matches their registry desired_status. Returns the
+    (user, desired, actual) drift acted on.
     """
-    drift = desired_status_drift()
-    _pause_targets([name for name, desired, _ in drift if desired == "paused"])
-    _stop_targets([name for name, desired, _ in drift if desired == "stopped"])
-    _resume_targets([name for name, desired, _ in drift if desired == "running"])
-    if drift:
-        write_state(_load_services())
+    with locks.user_locks(usernames):
+        owned = list(load_registry()) if usernames is None else list(usernames)
+        drift = desired_status_drift(owned)
+        _pause_targets([name for name, desired, _ in drift if desired == "paused"])
+        _stop_targets([name for name, desired, _ in drift if desired == "stopped"])
+        _resume_targets([name for name, desired, _ in drift if desired == "running"])
+        if drift:
+            _refresh_state()
+            history.affect(name for name, _, _ in drift)
     return drift
 
 
@@ -196,3 +221,17 @@ def resume_users(usernames):
     starting stopped ones ('compose unpause'/'start' as appropriate).
     """
     return _apply(usernames, _resume_targets, "running")
+
+
+def restart_running(usernames):
+    """Restart the running containers of *usernames* ('compose restart'), so
+    they remount a workspace directory that was replaced. Returns the names
+    restarted."""
+    restarted = []
+    for client, names in deploy.users_clients(".", list(usernames)):
+        states = _live_states(client, names)
+        running = [name for name in names if states.get(name) == "running"]
+        if running:
+            client.compose.restart(services=running)
+            restarted += running
+    return restarted
@@ -3,6 +3,7 @@
 import re
 import click
 from pathlib import Path
+from . import locks
 from .constants import CONF_SERVER_RULE_NUM_RE, LOCALHOST_SERVER, USERNAME_RE
 
 CONF_SERVER_PATH = Path("config") / "conf.server"
@@ -79,13 +80,14 @@ def add_conf_server_entry(username, email):
     """
     if not CONF_SERVER_PATH.is_file() or not email:
         return
-    text = CONF_SERVER_PATH.read_text(encoding="utf-8")
-    if _has_user_rule(text, username):
-        return
-    rule_num = _next_rule_num(text)
-    CONF_SERVER_PATH.write_text(
-        text + _conf_server_block(username, email, rule_num), encoding="utf-8"
-    )
+    with locks.files_lock():
+        text = CONF_SERVER_PATH.read_text(encoding="utf-8")
+        if _has_user_rule(text, username):
+            return
+        rule_num = _next_rule_num(text)
+        CONF_SERVER_PATH.write_text(
+            text + _conf_server_block(username, email, rule_num), encoding="utf-8"
+        )
 
 
 def remove_conf_server_entry(username):
@@ -95,20 +97,21 @@ def remove_conf_server_entry(username):
     """
     if not CONF_SERVER_PATH.is_file():
         return
-    text = CONF_SERVER_PATH.read_text(encoding="utf-8")
-    rule_nums = re.findall(
-        rf"rule\.onlyu(\d+)\.rule=PathPrefix\(`/{re.escape(username)}`\)", text
-    )
-    if not rule_nums:
-        return
-    for num in rule_nums:
-        block_pat = re.compile(
-            rf"\nrule\.onlyu{num}\.action=[^\n]*\n"
-            rf"rule\.onlyu{num}\.rule=[^\n]*\n"
-            rf"rule\.onlyu{num}\.whitelist=[^\n]*\n"
+    with locks.files_lock():
+        text = CONF_SERVER_PATH.read_text(encoding="utf-8")
+        rule_nums = re.findall(
+            rf"rule\.onlyu(\d+)\.rule=PathPrefix\(`/{re.escape(username)}`\)", text
         )
-        text = block_pat.sub("", text)
-    CONF_SERVER_PATH.write_text(text, encoding="utf-8")
+        if not rule_nums:
+            return
+        for num in rule_nums:
+            block_pat = re.compile(
+                rf"\nrule\.onlyu{num}\.action=[^\n]*\n"
+                rf"rule\.onlyu{num}\.rule=[^\n]*\n"
+                rf"rule\.onlyu{num}\.whitelist=[^\n]*\n"
+            )
+            text = block_pat.sub("", text)
+        CONF_SERVER_PATH.write_text(text, encoding="utf-8")
 
 
 def categorize_users(user_list, existing_services):
@@ -148,7 +151,11 @@ def report_delete_preview(existing, usernames):
 
 
 def remove_users_from_compose(compose, user_list):
-    """Remove users from compose configuration."""
+    """Remove users (and any overlay workspace volume) from compose configuration."""
     for username in user_list:
         if "services" in compose and username in compose["services"]:
             del compose["services"][username]
+        if username in (compose.get("volumes") or {}):
+            del compose["volumes"][username]
+    if "volumes" in compose and not compose["volumes"]:
+        del compose["volumes"]
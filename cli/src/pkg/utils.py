@@ -1,8 +1,15 @@
 "This file has generic helper functions and variables for dtaas cli"
 
+import copy
+import json
+import os
+import shutil
+import subprocess
+import sys
 from pathlib import Path
 import yaml
 import tomlkit
+from . import trace
 
 
 def find_toml(output_dir):
@@ -26,12 +33,79 @@ def resolve_certs_src(toml_data):
     return certs_src.strip() if isinstance(certs_src, str) else ""
 
 
+# libyaml's C loader and dumper when PyYAML was built with it, else the
+# pure-Python ones; both read and write the same YAML.
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Parsed YAML files by absolute path: ((st_ino, st_mtime_ns, st_size), document).
+_YAML_CACHE = {}
+
+
+def load_yaml_text(text):
+    """Parse YAML *text* (like yaml.safe_load)."""
+    return yaml.load(text, Loader=_YamlLoader)
+
+
+def dump_yaml_text(data, **options):
+    """Serialise *data* to YAML text (like yaml.safe_dump)."""
+    return yaml.dump(data, Dumper=_YamlDumper, **options)
+
+
+def read_yaml(filename):
+    """The parsed YAML file *filename*, from the cache while its inode, mtime
+    and size are unchanged. Returns a copy the caller may modify; raises
+    OSError/yaml.YAMLError like opening and parsing it would."""
+    key = os.path.abspath(filename)
+    stat = os.stat(filename)
+    version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    cached = _YAML_CACHE.get(key)
+    if cached is None or cached[0] != version:
+        with open(filename, "r", encoding="utf-8") as file:
+            cached = (version, load_yaml_text(file))
+        _YAML_CACHE[key] = cached
+    return copy.deepcopy(cached[1])
+
+
+def _write_atomically(text, filename):
+    """Replace *filename* with *text* (fsync'd temp file + os.replace),
+    keeping its permissions."""
+    tmp = f"{filename}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        if os.path.exists(filename):
+            shutil.copymode(filename, tmp)
+        os.replace(tmp, filename)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def write_yaml(text, filename):
+    """Atomically replace *filename* with *text* (temp file + os.replace),
+    keeping its permissions, and drop it from the read_yaml cache."""
+    try:
+        _write_atomically(text, filename)
+    finally:
+        _YAML_CACHE.pop(os.path.abspath(filename), None)
+
+
+def write_json(data, filename, indent=2, sort_keys=True):
+    """Atomically replace *filename* with *data* as JSON, like write_yaml.
+
+    *indent* None writes it on a single line, for large machine-read files.
+    """
+    _write_atomically(json.dumps(data, indent=indent, sort_keys=sort_keys) + "\n", filename)
+
+
 def import_yaml(filename):
     """This function is used to import a yaml file safely"""
-    config = {}
     try:
-        with open(filename, "r") as file:
-            config = yaml.safe_load(file)
+        with trace.span(f"load {filename}", "yaml"):
+            config = read_yaml(filename)
     except FileNotFoundError:
         return {}, None
     except Exception as err:
@@ -44,15 +118,15 @@ def import_yaml(filename):
 def export_yaml(data, filename):
     """This function is used to export to a yaml file safely"""
     try:
-        with open(filename, "w") as file:
-            yaml.safe_dump(
+        with trace.span(f"export {filename}", "yaml"):
+            text = dump_yaml_text(
                 data,
-                file,
                 sort_keys=False,
                 default_flow_style=False,
                 allow_unicode=True,
                 indent=2,
             )
+            write_yaml(text, filename)
     except Exception as err:
         return Exception(f"Error while writing yaml to file: {filename}, " + str(err))
     return None
@@ -61,7 +135,7 @@ def export_yaml(data, filename):
 def import_toml(filename):
     """This function is used to import a toml file safely"""
     try:
-        with open(filename, "r") as file:
+        with trace.span(f"load {filename}", "toml"), open(filename, "r") as file:
             config = tomlkit.load(file)
     except Exception as err:
         return None, Exception(
@@ -115,3 +189,18 @@ def check_error(err):
     """Checks if error is not None and raises it"""
     if err is not None:
         raise err
+
+
+def run_detached(module, *args):
+    """Start 'python -m <module> <args>' in its own session, without waiting.
+
+    For housekeeping a command hands off so it can return right away (e.g. a
+    warm-pool refill or a trash purge); its output is discarded.
+    """
+    subprocess.Popen(  # pylint: disable=consider-using-with
+        [sys.executable, "-m", module, *(str(arg) for arg in args)],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
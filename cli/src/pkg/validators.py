@@ -64,6 +64,11 @@ def is_int(value):
     return isinstance(value, int) and not isinstance(value, bool)
 
 
+def is_non_negative_int(value):
+    """True when *value* is an integer >= 0 (and not a bool)."""
+    return is_int(value) and value >= 0
+
+
 def is_number(value):
     """True when *value* is a positive number of cores (int or float, not bool)."""
     if isinstance(value, bool) or not isinstance(value, (int, float)):
@@ -71,6 +76,13 @@ def is_number(value):
     return value > 0
 
 
+def is_non_negative_number(value):
+    """True when *value* is a number >= 0 (int or float, not bool)."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    return value >= 0
+
+
 def is_size(value):
     """True when *value* is a byte size with a required unit, e.g. '4G' or '512m'."""
     return isinstance(value, str) and bool(SIZE_RE.match(value))
@@ -0,0 +1,127 @@
+"""Warm pool of pre-copied workspace directories for fast 'user add'.
+
+With [common.users] warm_pool = N, files/.pool/ keeps up to N ready copies
+of files/template (slot-<id> directories, already chowned). Provisioning a
+user whose files/<username> does not exist yet claims a slot with a single
+os.rename instead of copying the template, and the pool is then refilled by
+a detached background process ('python -m src.pkg.warm_pool'), so the
+'user add' that emptied it does not wait for the copies.
+
+Slots are built under a temporary name and renamed into place, and claims
+are renames too, so concurrent claimers and refills never see a half-copied
+slot or hand the same slot out twice. files/.pool/.stamp records a
+fingerprint of files/template; when the template changes, the stale slots
+are discarded rather than handed out.
+
+Only directories are pooled: a workspace container's bind mounts and compose
+labels are fixed at creation, so a pre-created container could not be
+re-bound to a user's directory or adopted by their compose service.
+"""
+
+import hashlib
+import shutil
+import sys
+import uuid
+from pathlib import Path
+from . import utils
+from .trace import spanned
+
+POOL_DIR = ".pool"
+_STAMP = ".stamp"
+
+
+def _pool(files_dir):
+    """The pool directory inside *files_dir*."""
+    return Path(files_dir) / POOL_DIR
+
+
+def template_stamp(files_dir):
+    """A fingerprint of files/template: every file's path, size and mtime."""
+    digest = hashlib.sha256()
+    template = Path(files_dir) / "template"
+    for item in sorted(template.rglob("*")):
+        info = item.lstat()
+        entry = f"{item.relative_to(template)}:{info.st_size}:{info.st_mtime_ns}\n"
+        digest.update(entry.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _current_pool(files_dir):
+    """The pool directory, emptied first if its slots predate the template."""
+    pool = _pool(files_dir)
+    stamp = template_stamp(files_dir)
+    stamp_file = pool / _STAMP
+    if pool.is_dir() and not (stamp_file.is_file() and stamp_file.read_text() == stamp):
+        shutil.rmtree(pool)
+    pool.mkdir(parents=True, exist_ok=True)
+    stamp_file.write_text(stamp)
+    return pool
+
+
+def slots(files_dir):
+    """The ready slot directories, oldest name first."""
+    pool = _pool(files_dir)
+    return sorted(pool.glob("slot-*")) if pool.is_dir() else []
+
+
+@spanned("copy template to {dest}", "fs")
+def copy_template(files_dir, dest):
+    """Copy files/template to *dest* and chown it 1000:100 (best-effort)."""
+    shutil.copytree(Path(files_dir) / "template", dest, dirs_exist_ok=True)
+    try:
+        shutil.chown(dest, user=1000, group=100)
+        for item in Path(dest).rglob("*"):
+            shutil.chown(item, user=1000, group=100)
+    except (AttributeError, PermissionError):
+        # Skip os.chown in tests to avoid PermissionError
+        pass
+
+
+def fill(files_dir, size):
+    """Top the pool up to *size* slots; return the number of slots created."""
+    if not (Path(files_dir) / "template").is_dir():
+        return 0
+    pool = _current_pool(files_dir)
+    missing = max(size - len(slots(files_dir)), 0)
+    for _ in range(missing):
+        name = uuid.uuid4().hex
+        building = pool / f".building-{name}"
+        copy_template(files_dir, building)
+        building.rename(pool / f"slot-{name}")
+    return missing
+
+
+def refresh(files_dir):
+    """Discard slots copied from an older template; False when there is no pool.
+
+    Fingerprinting walks the whole template, so callers run this once before
+    a batch of claims rather than once per claim.
+    """
+    if not _pool(files_dir).is_dir():
+        return False
+    _current_pool(files_dir)
+    return True
+
+
+def claim(username, files_dir):
+    """Move a ready slot to files/<username>; False when the pool is empty.
+
+    The caller makes sure files/<username> does not exist yet, and runs
+    refresh first so that no stale slot is handed out.
+    """
+    for slot in slots(files_dir):
+        try:
+            slot.rename(Path(files_dir) / username)
+            return True
+        except FileNotFoundError:
+            continue  # claimed by a concurrent 'user add'
+    return False
+
+
+def refill_in_background(files_dir, size):
+    """Start a detached process that tops the pool up to *size* slots."""
+    utils.run_detached("src.pkg.warm_pool", files_dir, size)
+
+
+if __name__ == "__main__":
+    fill(sys.argv[1], int(sys.argv[2]))
@@ -1,5 +1,7 @@
 """Shared test fixtures and constants."""
 
+import pytest
+
 CONF_SERVER_CONTENT = (
     "rule.libms.action=auth\n"
     "rule.libms.rule=PathPrefix(`/lib`)\n"
@@ -12,3 +14,15 @@ CONF_SERVER_CONTENT = (
     "rule.onlyu2.rule=PathPrefix(`/user2`)\n"
     "rule.onlyu2.whitelist=user2@example.com\n"
 )
+
+
+@pytest.fixture(autouse=True)
+def _history_file(tmp_path, monkeypatch):
+    """Keep the 'dtaas admin' commands tests run out of the repo's history."""
+    monkeypatch.setenv("DTAAS_HISTORY", str(tmp_path / ".dtaas.history.jsonl"))
+
+
+@pytest.fixture(autouse=True)
+def _lock_dir(tmp_path, monkeypatch):
+    """Keep the lock files of the commands tests run out of the repo."""
+    monkeypatch.setattr("src.pkg.locks.LOCK_DIR", str(tmp_path / ".dtaas.locks"))
@@ -0,0 +1,56 @@
+"""Tests for the scale benchmark suite and its fake Docker backend."""
+
+import pytest
+from benchmarks import suite
+from benchmarks.fake_docker import FakeDocker
+from src.pkg import docker_calls, lifecycle, users_lifecycle
+from src.pkg import project as projectPkg
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture(scope="module")
+def results():
+    """One benchmark run at the smallest size (which needs the deploy
+    templates that src/pkg/build.py copies into place)."""
+    if not (projectPkg.DEPLOY_TEMPLATES_DIR / "insecure-server").is_dir():
+        pytest.skip("deploy templates not built (python -m src.pkg.build)")
+    return suite.run_size(10)
+
+
+def test_run_size_measures_every_scenario(results):
+    """Every command succeeds and reports time, file and docker counts."""
+    assert list(results) == [name for name, _ in suite.scenarios()]
+    for metrics in results.values():
+        assert metrics["seconds"] >= 0
+        assert metrics["docker_calls"] == sum(metrics["docker_commands"].values())
+
+
+def test_fake_docker_runs_user_lifecycle(tmp_path, monkeypatch):
+    """Users started through 'docker compose up' can be paused and listed."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "compose.users.yml").write_text("services: {}\n", encoding="utf-8")
+    docker = FakeDocker()
+    docker.run(["docker", "compose", "-f", "compose.users.yml", "up", "-d", "alice", "bob"])
+
+    with docker.patched(), docker_calls.recording() as recorder:
+        users_lifecycle._pause_targets(["alice"])  # pylint: disable=protected-access
+        rows = lifecycle._user_rows(".")  # pylint: disable=protected-access
+
+    assert {row["service"]: row["state"] for row in rows} == {
+        "alice": "paused",
+        "bob": "running",
+    }
+    assert recorder.count("compose pause") == 1
+
+
+def test_compare_flags_count_increases_and_slowdowns():
+    """Counts regress on any increase; time only beyond the tolerance."""
+    baseline = {"seconds": 1.0, "files_read": 4, "files_written": 2, "docker_calls": 3}
+    current = {"seconds": 1.4, "files_read": 4, "files_written": 2, "docker_calls": 3}
+    assert not suite.compare(current, baseline, tolerance=0.5)
+
+    current = {**current, "seconds": 2.0, "docker_calls": 4}
+    assert suite.compare(current, baseline, tolerance=0.5) == [
+        "docker_calls 3 -> 4",
+        "seconds 1.000 -> 2.000",
+    ]
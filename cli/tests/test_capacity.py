@@ -0,0 +1,82 @@
+"""Tests for host capacity planning (capacity.py)."""
+
+import math
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+import pytest
+from src.pkg import capacity
+# pylint: disable=protected-access
+
+DEMAND = (4.0, 4 << 30, 4960)
+
+
+def _fake_proc(tmp_path, cpus=8, mem_kb=16 << 20, pid_max=4194304):
+    """A /proc stand-in with *cpus* processors and *mem_kb* of memory."""
+    (tmp_path / "sys" / "kernel").mkdir(parents=True)
+    (tmp_path / "cpuinfo").write_text(
+        "".join(f"processor\t: {n}\nmodel name\t: cpu\n\n" for n in range(cpus))
+    )
+    (tmp_path / "meminfo").write_text(f"MemTotal:       {mem_kb} kB\nMemFree: 1 kB\n")
+    (tmp_path / "sys" / "kernel" / "pid_max").write_text(f"{pid_max}\n")
+    return str(tmp_path)
+
+
+def _container(nano_cpus=0, memory=0, pids_limit=None):
+    """A running container stand-in with the given limits."""
+    config = SimpleNamespace(nano_cpus=nano_cpus, memory=memory, pids_limit=pids_limit)
+    return SimpleNamespace(host_config=config)
+
+
+def test_workspace_demand_follows_set_limits():
+    """A workspace demands its limits, or nothing when limits are disabled."""
+    resources = {"cpus": 4, "mem_limit": "4G", "pids_limit": 4960}
+    assert capacity.workspace_demand(resources, True) == DEMAND
+    assert capacity.workspace_demand(resources, False) == (0.0, 0, 0)
+
+
+def test_plan_reads_proc_and_running_limits(tmp_path):
+    """The local plan is /proc minus the running containers' limits."""
+    client = MagicMock()
+    client.container.list.return_value = [
+        _container(nano_cpus=2_000_000_000, memory=4 << 30, pids_limit=100),
+        _container(pids_limit=-1),  # no limits at all
+    ]
+    with patch("src.pkg.capacity.DockerClient", return_value=client):
+        plan = capacity.plan("", proc=_fake_proc(tmp_path))
+
+    assert plan.total == (8.0, 16 << 30, 4194304)
+    assert plan.reserved == (2.0, 4 << 30, 100)
+    assert plan.fits(DEMAND) == 1  # 6 cpus free: one 4-cpu workspace
+
+
+def test_remote_plan_uses_docker_info():
+    """A remote endpoint's size comes from 'docker info'; pids are unbounded."""
+    client = MagicMock()
+    client.system.info.return_value = SimpleNamespace(n_cpu=32, mem_total=64 << 30)
+    client.container.list.return_value = []
+    with patch("src.pkg.capacity.DockerClient", return_value=client):
+        plan = capacity.plan("ssh://node2")
+
+    assert plan.total == (32.0, 64 << 30, math.inf)
+    assert plan.fits(DEMAND) == 8
+
+
+def test_shortfall_names_the_exceeded_dimensions():
+    """Starting workspaces beyond what is free is reported per dimension."""
+    plan = capacity.Plan("", (8.0, 16 << 30, 100000), (0.0, 0, 0))
+    assert plan.shortfall([DEMAND] * 2) == []
+    assert plan.shortfall([DEMAND] * 3) == ["cpus"]
+
+
+def test_check_warns_refuses_or_skips(capsys):
+    """'warn' prints and carries on, 'refuse' raises, 'off' never looks."""
+    tight = capacity.Plan("", (4.0, 8 << 30, 100000), (0.0, 0, 0))
+    requests = {"": [DEMAND, DEMAND]}
+    with patch("src.pkg.capacity.plan", return_value=tight) as mock_plan:
+        capacity.check(requests, "warn")
+        assert "exceed the free cpus of the local host" in capsys.readouterr().out
+        with pytest.raises(ValueError, match="Not enough host capacity"):
+            capacity.check(requests, "refuse")
+        capacity.check(requests, "off")
+
+    assert mock_plan.call_count == 2
@@ -0,0 +1,44 @@
+"""Tests for the 'admin capacity' CLI command (cmd_capacity.py)."""
+
+import json
+from unittest.mock import patch
+from click.testing import CliRunner
+from src.cmd import dtaas
+from src.pkg.capacity import Plan
+
+RESOURCES = {"cpus": 4, "mem_limit": "4G", "pids_limit": 4960, "shm_size": "512m"}
+
+
+def _invoke(args, hosts=()):
+    """Run 'admin capacity' against a 16-cpu, 32G local host."""
+    plans = {
+        "": Plan("", (16.0, 32 << 30, 4194304), (4.0, 8 << 30, 0)),
+        "ssh://node2": Plan("ssh://node2", (8.0, 16 << 30, float("inf")), (0.0, 0, 0)),
+    }
+    with patch("src.cmd_capacity.configPkg.Config") as mock_cfg, patch(
+        "src.cmd_capacity.capacityPkg.plan", side_effect=plans.get
+    ):
+        mock_cfg.return_value.get_resource_limits.return_value = (RESOURCES, None)
+        mock_cfg.return_value.get_set_limits.return_value = (True, None)
+        mock_cfg.return_value.get_hosts.return_value = (list(hosts), None)
+        return CliRunner().invoke(dtaas, ["admin", "capacity", *args])
+
+
+def test_capacity_table_shows_how_many_fit():
+    """Free/total per dimension and the number of workspaces that still fit."""
+    result = _invoke([])
+
+    assert result.exit_code == 0
+    assert "Per workspace: 4 cpus, 4.0G memory, 4960 pids" in result.output
+    local = next(line for line in result.output.splitlines() if line.startswith("local"))
+    assert "12/16" in local and local.split()[-1] == "3"
+
+
+def test_capacity_json_covers_configured_hosts():
+    """--json lists the local host and every [[common.users.hosts]] endpoint."""
+    result = _invoke(["--json"], hosts=[{"name": "node2", "endpoint": "ssh://node2"}])
+
+    data = json.loads(result.output)
+    assert [host["host"] for host in data["hosts"]] == ["local", "ssh://node2"]
+    assert data["hosts"][1]["fits"] == 2
+    assert data["hosts"][1]["pids"]["total"] is None
@@ -0,0 +1,70 @@
+"""Tests for the 'admin fleet' CLI commands (cmd_fleet.py)."""
+
+import json
+from unittest.mock import patch
+import pytest
+from click.testing import CliRunner
+from src.cmd import dtaas
+from src.pkg import fleet
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    """A two-installation fleet manifest."""
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+    path = tmp_path / "dtaas.fleet.toml"
+    path.write_text(
+        '[[installations]]\nname = "a"\npath = "a"\n'
+        '[[installations]]\nname = "b"\npath = "b"\n'
+    )
+    return str(path)
+
+
+def _outcomes(*results):
+    """Outcomes for installations a, b, ... from (returncode, stdout) pairs."""
+    return [
+        fleet.Outcome(fleet.Installation(name, "."), code, out, "")
+        for name, (code, out) in zip("ab", results)
+    ]
+
+
+def test_fleet_validate_reports_each_installation(manifest):
+    """Each installation's output is shown under its name, plus a summary."""
+    outcomes = _outcomes((0, "Configuration is valid\n"), (1, "Error: bad\n"))
+    with patch("src.cmd_fleet.fleetPkg.run", return_value=outcomes) as mock_run:
+        result = CliRunner().invoke(
+            dtaas, ["admin", "fleet", "validate", "--manifest", manifest, "--jobs", "3"]
+        )
+
+    assert mock_run.call_args.args[1:] == (["admin", "config", "validate"], 3)
+    assert "== a: ok" in result.output and "== b: FAILED (exit 1)" in result.output
+    assert "1/2 installation(s) succeeded" in result.output
+    assert result.exit_code != 0 and "Failed on: b" in result.output
+
+
+def test_fleet_reconcile_forwards_fix(manifest):
+    """--fix is passed on to every installation's reconcile."""
+    with patch("src.cmd_fleet.fleetPkg.run", return_value=_outcomes((0, ""), (0, ""))) as mock_run:
+        result = CliRunner().invoke(
+            dtaas, ["admin", "fleet", "reconcile", "--manifest", manifest, "--fix"]
+        )
+
+    assert result.exit_code == 0
+    assert mock_run.call_args.args[1] == ["admin", "config", "reconcile", "--fix"]
+
+
+def test_fleet_status_merges_rows(manifest):
+    """fleet status prints one table with an INSTALLATION column."""
+    row = {"project": "users", "service": "alice", "state": "running", "health": None}
+    outcomes = _outcomes((0, json.dumps([row])), (0, "[]"))
+    with patch("src.cmd_fleet.fleetPkg.run", return_value=outcomes):
+        result = CliRunner().invoke(dtaas, ["admin", "fleet", "status", "--manifest", manifest])
+        as_json = CliRunner().invoke(
+            dtaas, ["admin", "fleet", "status", "--manifest", manifest, "--json"]
+        )
+
+    assert result.exit_code == 0
+    assert result.output.splitlines()[0].startswith("INSTALLATION")
+    assert json.loads(as_json.output) == {"rows": [{"installation": "a", **row}], "errors": {}}
@@ -0,0 +1,95 @@
+"""Tests for the 'admin history' command and the recording 'admin' group (cmd_history.py)."""
+
+import json
+import os
+from unittest.mock import patch
+import click
+from click.testing import CliRunner
+from src.cmd import dtaas
+from src.cmd_history import split_command
+from src.pkg import history as historyPkg
+
+
+def _run_capacity(args):
+    """Run a (mocked) 'admin capacity', which the admin group records."""
+    with patch("src.cmd_capacity._settings", return_value=((1.0, 1 << 30, 100), [""])), patch(
+        "src.cmd_capacity.capacityPkg.plan", side_effect=OSError("no /proc")
+    ):
+        return CliRunner().invoke(dtaas, ["admin", "capacity", *args])
+
+
+def _entry(command, args, outcome, seconds, users):
+    """A recorded entry of a command started on 2026-10-01."""
+    return {
+        "command": command,
+        "started": "2026-10-01T10:00:00+00:00",
+        "args": args,
+        "outcome": outcome,
+        "seconds": seconds,
+        "users": users,
+        "docker_calls": 1,
+    }
+
+
+def test_admin_commands_are_recorded_but_history_is_not():
+    """Each admin command adds one entry with its args and outcome."""
+    assert _run_capacity(["--json"]).exit_code == 1
+    assert CliRunner().invoke(dtaas, ["admin", "history"]).exit_code == 0
+
+    (entry,) = historyPkg.load_history(os.environ["DTAAS_HISTORY"])
+    assert entry["command"] == "admin capacity"
+    assert entry["args"] == ["--json"]
+    assert entry["outcome"] == "failed"
+    assert "no /proc" in entry["error"]
+
+
+def test_history_lists_filters_and_summarises():
+    """The table, --outcome, --slowest, --summary and --json views."""
+    path = os.environ["DTAAS_HISTORY"]
+    historyPkg.append(_entry("admin user add", ["alice"], "ok", 12.5, ["alice"]), path)
+    historyPkg.append(_entry("admin install", [], "failed", 2.0, []), path)
+    runner = CliRunner()
+
+    table = runner.invoke(dtaas, ["admin", "history"]).output.splitlines()
+    assert table[0].split() == ["STARTED", "COMMAND", "OUTCOME", "SECONDS", "DOCKER", "USERS"]
+    assert "admin user add alice" in table[1] and table[1].split()[-1] == "alice"
+
+    failed = runner.invoke(dtaas, ["admin", "history", "--outcome", "failed", "--json"])
+    assert [e["command"] for e in json.loads(failed.output)] == ["admin install"]
+
+    slowest = runner.invoke(dtaas, ["admin", "history", "--slowest", "1", "--json"])
+    assert [e["seconds"] for e in json.loads(slowest.output)] == [12.5]
+
+    summary = runner.invoke(dtaas, ["admin", "history", "--summary", "--command", "user"])
+    assert summary.output.splitlines()[1].split()[3:] == ["1", "0", "12.5", "12.5", "12.5", "12.5"]
+
+    empty = runner.invoke(dtaas, ["admin", "history", "--user", "nobody"])
+    assert empty.output == "No recorded commands match.\n"
+
+
+def test_history_rejects_bad_since():
+    """--since must be a duration like 7d or a date."""
+    result = CliRunner().invoke(dtaas, ["admin", "history", "--since", "last week"])
+    assert result.exit_code == 2 and "7d" in result.output
+
+
+def test_recording_can_be_turned_off(monkeypatch, tmp_path):
+    """DTAAS_HISTORY=0 records nothing."""
+    monkeypatch.setenv("DTAAS_HISTORY", "0")
+    monkeypatch.chdir(tmp_path)
+    _run_capacity([])
+    assert not os.listdir(tmp_path)
+
+
+def test_split_command_separates_command_words_from_args():
+    """Subcommand names stop at the first option or argument."""
+    admin = dtaas.get_command(click.Context(dtaas), "admin")
+    ctx = click.Context(admin)
+    assert split_command(admin, ctx, ["user", "add", "alice", "--email", "a@x"]) == (
+        ["user", "add"],
+        ["alice", "--email", "a@x"],
+    )
+    assert split_command(admin, ctx, ["config", "reconcile", "--fix", "status"]) == (
+        ["config", "reconcile"],
+        ["--fix", "status"],
+    )
@@ -53,6 +53,24 @@ def test_status_json_output(runner):
     assert json.loads(result.output) == _ROWS
 
 
+def test_status_table_shows_workspace_disk_usage(runner):
+    """User rows show their workspace size in the DISK column."""
+    rows = _ROWS + [
+        {
+            "project": "users",
+            "service": "alice",
+            "state": "running",
+            "health": None,
+            "disk_bytes": 3 * 1024 * 1024,
+        }
+    ]
+    with patch("src.cmd_lifecycle.lifecyclePkg.collect_status", return_value=rows):
+        result = runner.invoke(dtaas, ["admin", "status"])
+
+    assert "DISK" in result.output
+    assert "3.0M" in result.output
+
+
 def test_status_reports_no_services(runner):
     """status handles an empty result without crashing on the table renderer."""
     with patch("src.cmd_lifecycle.lifecyclePkg.collect_status", return_value=[]):
@@ -0,0 +1,82 @@
+"""Tests for the 'admin scheduler' CLI commands (cmd_scheduler.py)."""
+
+from datetime import datetime
+from unittest.mock import patch
+import pytest
+from click.testing import CliRunner
+from python_on_whales.exceptions import DockerException
+from src.cmd import dtaas
+# pylint: disable=redefined-outer-name
+
+NIGHTS = {"name": "nights", "groups": ["students"], "pause": "0 20 * * *"}
+
+
+@pytest.fixture
+def schedules():
+    """Patch Config so dtaas.toml has the given schedule tables."""
+    with patch("src.cmd_scheduler.configPkg.Config") as mock_cfg:
+        mock_cfg.return_value.get_schedules.return_value = ([NIGHTS], None)
+        yield mock_cfg.return_value.get_schedules
+
+
+def test_run_once_reports_what_was_applied(schedules):
+    """--once runs one tick and reports each due schedule."""
+    applied = [("nights", "pause", datetime(2026, 10, 19, 20), ["alice", "bob"])]
+    with patch("src.cmd_scheduler.schedulerPkg.tick", return_value=applied) as tick:
+        result = CliRunner().invoke(dtaas, ["admin", "scheduler", "run", "--once"])
+
+    assert result.exit_code == 0
+    assert result.output == "nights: pause alice, bob (due at 2026-10-19 20:00)\n"
+    assert tick.call_args.kwargs == {"batch_size": 50, "dry_run": False}
+    assert schedules.called
+
+
+@pytest.mark.usefixtures("schedules")
+def test_run_dry_run_implies_once():
+    """--dry-run reports without acting, once."""
+    applied = [("nights", "pause", datetime(2026, 10, 19, 20), ["alice"])]
+    with patch("src.cmd_scheduler.schedulerPkg.tick", return_value=applied) as tick:
+        result = CliRunner().invoke(dtaas, ["admin", "scheduler", "run", "--dry-run"])
+
+    assert "nights: would pause alice" in result.output
+    assert tick.call_args.kwargs["dry_run"] is True
+
+
+@pytest.mark.usefixtures("schedules")
+def test_run_loop_survives_failed_checks():
+    """A failed check is reported and the loop goes on until Ctrl+C."""
+    with patch(
+        "src.cmd_scheduler.schedulerPkg.tick", side_effect=DockerException(["docker"], 1)
+    ), patch("src.cmd_scheduler.time.sleep", side_effect=[None, KeyboardInterrupt]):
+        result = CliRunner().invoke(dtaas, ["admin", "scheduler", "run"])
+
+    assert result.exit_code == 0
+    assert result.stderr.count("Error while applying schedules") == 2
+    assert "Stopped the scheduler." in result.output
+
+
+def test_invalid_or_missing_schedules_are_errors(schedules):
+    """Bad schedule tables, or none at all, fail before doing anything."""
+    schedules.return_value = ([{"name": "x", "pause": "99 * * * *"}], None)
+    result = CliRunner().invoke(dtaas, ["admin", "scheduler", "run", "--once"])
+    assert result.exit_code == 1 and "common.users.schedules.x.pause" in result.output
+
+    schedules.return_value = ([], None)
+    result = CliRunner().invoke(dtaas, ["admin", "scheduler", "status"])
+    assert result.exit_code == 1 and "No schedules" in result.output
+
+
+@pytest.mark.usefixtures("schedules")
+def test_status_shows_next_time_and_suspended(tmp_path, monkeypatch):
+    """status lists each schedule's next action and the users it suspended."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".dtaas.scheduler.json").write_text(
+        '{"last_run": null, "suspended": {"alice": "nights"}}'
+    )
+    result = CliRunner().invoke(dtaas, ["admin", "scheduler", "status"])
+
+    lines = result.output.splitlines()
+    assert lines[0].split() == ["SCHEDULE", "GROUPS", "NEXT", "AT", "SUSPENDED"]
+    row = lines[1].split()
+    assert row[:3] == ["nights", "students", "pause"] and row[-1] == "1"
+    assert lines[-1] == "Last run: never"
@@ -1,9 +1,14 @@
-"""Tests for the 'user add'/'user delete' CLI commands (cmd_user.py)."""
+"""Tests for the 'user add'/'delete'/'list' and lifecycle CLI commands (cmd_user.py)."""
 
+import json
+import multiprocessing
 from unittest.mock import patch, MagicMock
 import pytest
 from click.testing import CliRunner
+from benchmarks import suite
+from benchmarks.fake_docker import FakeDocker
 from src.cmd import dtaas
+from src.pkg import docker_calls
 from src.cmd_user_utils import UserAddInput
 # pylint: disable=redefined-outer-name
 
@@ -110,19 +115,62 @@ def test_add_users_config_error_does_not_stage_registry(runner):
 
 
 def test_add_users_with_file(runner, mock_user_pkg, tmp_path):
-    """add --file stages the CSV then provisions."""
+    """add --file streams the CSV, provisioning each chunk's new users."""
     mock_user_pkg["add"].return_value = None
     csv_file = tmp_path / "users.csv"
     csv_file.write_text("username,email,groups,load_balance\nalice,a@x.io,g,true\n")
 
-    with patch("src.cmd_user.stage_users_for_add") as mock_stage:
+    with patch("src.cmd_user.stream_users_file") as mock_stream:
         result = runner.invoke(dtaas, ["admin", "user", "add", "--file", str(csv_file)])
 
     assert result.exit_code == 0
-    mock_stage.assert_called_once_with(
-        UserAddInput(None, str(csv_file), None, (), True)
+    user_input, provision, timings = mock_stream.call_args.args
+    assert user_input == UserAddInput(None, str(csv_file), None, (), True)
+    provision(["alice"])
+    mock_user_pkg["add"].assert_called_once_with(
+        mock_user_pkg["config"].return_value, start_only=["alice"], timings=timings
+    )
+
+
+def test_add_users_with_file_chunks_and_journals(
+    runner, mock_user_pkg, tmp_path, monkeypatch
+):
+    """Each --chunk-size chunk is provisioned separately and the journal is
+    removed once the whole file has been imported."""
+    monkeypatch.chdir(tmp_path)
+    mock_user_pkg["add"].return_value = None
+    csv_file = tmp_path / "users.csv"
+    csv_file.write_text(
+        "username,email,groups,load_balance\n"
+        "alice,a@x.io,g,true\nbob,b@x.io,g,true\ncarol,c@x.io,g,true\n"
     )
-    mock_user_pkg["add"].assert_called_once()
+
+    with patch("src.cmd_user_utils._starting_usernames", return_value=[]):
+        result = runner.invoke(
+            dtaas, ["admin", "user", "add", "--file", str(csv_file), "--chunk-size", "2"]
+        )
+
+    assert result.exit_code == 0, result.output
+    started = [c.kwargs["start_only"] for c in mock_user_pkg["add"].call_args_list]
+    assert started == [["alice", "bob"], ["carol"]]
+    assert not (tmp_path / ".dtaas.import.json").exists()
+
+
+def test_add_users_with_file_failure_keeps_journal(
+    runner, mock_user_pkg, tmp_path, monkeypatch
+):
+    """A provisioning failure aborts the import and keeps the checkpoint."""
+    monkeypatch.chdir(tmp_path)
+    mock_user_pkg["add"].return_value = RuntimeError("compose up failed")
+    csv_file = tmp_path / "users.csv"
+    csv_file.write_text("username,email,groups,load_balance\nalice,a@x.io,g,true\n")
+
+    with patch("src.cmd_user_utils._starting_usernames", return_value=[]):
+        result = runner.invoke(dtaas, ["admin", "user", "add", "--file", str(csv_file)])
+
+    assert result.exit_code != 0
+    assert "Error while adding users: compose up failed" in result.output
+    assert (tmp_path / ".dtaas.import.json").is_file()
 
 
 def test_add_single_user(runner, mock_user_pkg):
@@ -135,18 +183,38 @@ def test_add_single_user(runner, mock_user_pkg):
         )
 
     assert result.exit_code == 0
-    mock_stage.assert_called_once_with(UserAddInput("alice", None, "a@x.io", (), True))
-    mock_user_pkg["add"].assert_called_once()
+    user_input, timings = mock_stage.call_args.args
+    assert user_input == UserAddInput("alice", None, "a@x.io", (), True)
+    assert mock_user_pkg["add"].call_args.kwargs["timings"] is timings
+    assert "PHASE" not in result.output
+
+
+def test_add_with_timings_reports_percentiles(runner, mock_user_pkg):
+    """--timings waits for the new workspaces and prints per-phase percentiles."""
+
+    def _add(_config, start_only, timings):
+        assert timings.wait and timings.probe == "https://localhost"
+        timings.record("running", start_only, 2.0)
+
+    mock_user_pkg["add"].side_effect = _add
+    with patch("src.cmd_user.stage_users_for_add", return_value=["alice"]):
+        result = runner.invoke(
+            dtaas,
+            ["admin", "user", "add", "alice", "--timings", "--probe", "https://localhost"],
+        )
 
+    assert result.exit_code == 0, result.output
+    assert "PHASE" in result.output
+    assert "running  1      2.00s" in result.output
 
-def test_add_users_file_import_error(runner, mock_user_pkg, tmp_path):
+
+def test_add_users_file_import_error(runner, mock_user_pkg, tmp_path, monkeypatch):
     """A malformed users file surfaces as a ClickException."""
+    monkeypatch.chdir(tmp_path)
     csv_file = tmp_path / "users.csv"
-    csv_file.write_text("no-username-column\n")
+    csv_file.write_text("no-username-column\nalice\n")
 
-    with patch(
-        "src.cmd_utils.registryPkg.read_csv_users", side_effect=KeyError("username")
-    ):
+    with patch("src.cmd_user_utils._starting_usernames", return_value=[]):
         result = runner.invoke(dtaas, ["admin", "user", "add", "--file", str(csv_file)])
 
     assert result.exit_code != 0
@@ -229,3 +297,129 @@ def test_resume_requires_names_or_file(runner):
 
     assert result.exit_code != 0
     assert "Provide one or more USERNAMES" in result.output
+
+
+def _write_registry(path, users):
+    """A dtaas.users.registry.json holding *users* in *path*."""
+    (path / "dtaas.users.registry.json").write_text(json.dumps({"users": users}))
+
+
+def test_pause_group_targets_every_member(
+    runner, mock_users_lifecycle_pkg, tmp_path, monkeypatch
+):
+    """--group resolves to the group's registry users, acted on in one call."""
+    monkeypatch.chdir(tmp_path)
+    _write_registry(
+        tmp_path,
+        {"alice": {"groups": ["gpu"]}, "bob": {"groups": ["gpu"]}, "carol": {"groups": []}},
+    )
+    mock_users_lifecycle_pkg["pause"].return_value = (["alice", "bob"], [], [])
+
+    result = runner.invoke(dtaas, ["admin", "user", "pause", "--group", "gpu"])
+
+    assert result.exit_code == 0
+    mock_users_lifecycle_pkg["pause"].assert_called_once_with(["alice", "bob"])
+
+
+def test_group_rejects_empty_group_and_mixed_targets(
+    runner, mock_users_lifecycle_pkg, tmp_path, monkeypatch
+):
+    """An unknown group, or --group with USERNAMES, is rejected before acting."""
+    monkeypatch.chdir(tmp_path)
+    _write_registry(tmp_path, {"alice": {"groups": ["gpu"]}})
+
+    result = runner.invoke(dtaas, ["admin", "user", "stop", "--group", "cpu"])
+    assert result.exit_code != 0
+    assert "No registered users in group(s) cpu to stop" in result.output
+
+    result = runner.invoke(dtaas, ["admin", "user", "stop", "alice", "--group", "gpu"])
+    assert result.exit_code != 0
+    assert "Pass --group on its own" in result.output
+    mock_users_lifecycle_pkg["stop"].assert_not_called()
+
+
+def test_delete_group(runner, mock_user_pkg, tmp_path, monkeypatch):
+    """delete --group deletes the group's registry users."""
+    monkeypatch.chdir(tmp_path)
+    _write_registry(tmp_path, {"alice": {"groups": ["trial"]}, "bob": {"groups": ["gpu"]}})
+    mock_user_pkg["delete"].return_value = None
+
+    result = runner.invoke(dtaas, ["admin", "user", "delete", "--group", "trial"])
+
+    assert result.exit_code == 0
+    mock_user_pkg["delete"].assert_called_once_with(["alice"], dry_run=False)
+
+
+def test_list_filters_by_group_and_status(runner, tmp_path, monkeypatch):
+    """'user list' shows the matching registry users as a table or JSON."""
+    monkeypatch.chdir(tmp_path)
+    _write_registry(
+        tmp_path,
+        {
+            "alice": {"email": "a@x.io", "groups": ["gpu"], "desired_status": "paused"},
+            "bob": {"email": "b@x.io", "groups": ["gpu"]},
+        },
+    )
+    (tmp_path / "compose.users.yml").write_text("services:\n  alice: {}\n")
+
+    result = runner.invoke(dtaas, ["admin", "user", "list", "--group", "gpu"])
+    lines = result.output.splitlines()
+    assert lines[0].split() == ["USER", "EMAIL", "GROUPS", "STATUS", "PROVISIONED", "HOST"]
+    assert lines[1].split() == ["alice", "a@x.io", "gpu", "paused", "yes", "-"]
+    assert lines[2].split() == ["bob", "b@x.io", "gpu", "running", "no", "-"]
+
+    result = runner.invoke(dtaas, ["admin", "user", "list", "--status", "paused", "--json"])
+    assert [row["username"] for row in json.loads(result.output)] == ["alice"]
+
+    result = runner.invoke(dtaas, ["admin", "user", "list", "--group", "cpu"])
+    assert result.output == "No registered users match.\n"
+
+
+def test_pause_group_is_one_compose_call(runner, tmp_path, monkeypatch):
+    """Pausing a whole group runs one 'compose pause' for all its users."""
+    monkeypatch.chdir(tmp_path)
+    names = ["alice", "bob", "carol"]
+    _write_registry(tmp_path, {name: {"groups": ["gpu"]} for name in names})
+    services = "".join(f"  {name}: {{}}\n" for name in names)
+    (tmp_path / "compose.users.yml").write_text(f"services:\n{services}")
+    docker = FakeDocker()
+    docker.run(["docker", "compose", "-f", "compose.users.yml", "up", "-d", *names])
+
+    with docker.patched(), docker_calls.recording() as recorder:
+        result = runner.invoke(dtaas, ["admin", "user", "pause", "--group", "gpu"])
+
+    assert result.exit_code == 0, result.output
+    assert recorder.count("compose pause") == 1
+
+
+def _add_cohort(csv_file):
+    """In a child process: 'user add --file' one cohort against a fake Docker."""
+    with FakeDocker().patched():
+        result = CliRunner().invoke(dtaas, ["admin", "user", "add", "--file", csv_file])
+    assert result.exit_code == 0, result.output
+
+
+def test_adding_two_cohorts_at_once_keeps_both(tmp_path, monkeypatch):
+    """Two 'user add' commands for different users, run at the same time,
+    leave every user in the registry, the compose file and the state cache."""
+    monkeypatch.chdir(tmp_path)
+    suite.make_installation(tmp_path, 0)
+    cohorts = {"a": [f"a{i:02d}" for i in range(20)], "b": [f"b{i:02d}" for i in range(20)]}
+    for cohort, names in cohorts.items():
+        rows = "".join(f"{name},{name}@example.org,,false\n" for name in names)
+        (tmp_path / f"{cohort}.csv").write_text(f"username,email,groups,load_balance\n{rows}")
+    fork = multiprocessing.get_context("fork")
+    children = [fork.Process(target=_add_cohort, args=(f"{c}.csv",)) for c in cohorts]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join(60)
+
+    assert [child.exitcode for child in children] == [0, 0]
+    everyone = sorted(cohorts["a"] + cohorts["b"])
+    registry = json.loads((tmp_path / "dtaas.users.registry.json").read_text())
+    assert sorted(registry["users"]) == everyone
+    result = CliRunner().invoke(dtaas, ["admin", "user", "list", "--provisioned", "--json"])
+    assert [row["username"] for row in json.loads(result.output)] == everyone
+    state = json.loads((tmp_path / ".dtaas.state.json").read_text())
+    assert sorted(state) == everyone
@@ -0,0 +1,48 @@
+"""Tests for the 'user snapshot'/'user restore' CLI commands (cmd_user_snapshot.py)."""
+
+from unittest.mock import patch
+import pytest
+from click.testing import CliRunner
+from src.cmd import dtaas
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def runner(tmp_path):
+    """CLI test runner with dtaas.toml's [common] path set to *tmp_path*."""
+    (tmp_path / "files" / "alice").mkdir(parents=True)
+    (tmp_path / "files" / "alice" / "a.txt").write_text("a")
+    with patch("src.cmd_user_snapshot.configPkg.Config") as mock_cfg:
+        mock_cfg.return_value.get_path.return_value = (str(tmp_path), None)
+        yield CliRunner()
+
+
+def test_snapshot_then_list(runner):
+    """snapshot reports what it took; --list shows it again."""
+    result = runner.invoke(dtaas, ["admin", "user", "snapshot"])
+    assert result.exit_code == 0
+    assert "1 user(s)  1 file(s)" in result.output and "(1 copied, 0 linked)" in result.output
+
+    listed = runner.invoke(dtaas, ["admin", "user", "snapshot", "--list"])
+    assert listed.output.splitlines() == result.output.splitlines()
+
+
+def test_restore_restarts_running_containers(runner):
+    """restore swaps the workspace back and restarts the user's container."""
+    runner.invoke(dtaas, ["admin", "user", "snapshot"])
+    listed = runner.invoke(dtaas, ["admin", "user", "snapshot", "--list"])
+    snapshot_id = listed.output.split()[0]
+    with patch("src.cmd_user_snapshot.usersLifecyclePkg.restart_running") as mock_restart, patch(
+        "src.pkg.user_files.utils.run_detached"
+    ):
+        result = runner.invoke(dtaas, ["admin", "user", "restore", snapshot_id])
+    assert result.exit_code == 0
+    assert f"alice restored from {snapshot_id}" in result.output
+    mock_restart.assert_called_once_with(["alice"])
+
+
+def test_restore_unknown_snapshot_fails(runner):
+    """An unknown snapshot id is a clean CLI error."""
+    result = runner.invoke(dtaas, ["admin", "user", "restore", "nope"])
+    assert result.exit_code != 0
+    assert "No snapshot 'nope'" in result.output
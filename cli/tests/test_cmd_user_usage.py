@@ -0,0 +1,144 @@
+"""Tests for the 'user hibernate'/'user wake' CLI commands (cmd_user_usage.py)."""
+
+import json
+from unittest.mock import patch
+import pytest
+from click.testing import CliRunner
+from src.cmd import dtaas
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def runner():
+    """CLI test runner"""
+    return CliRunner()
+
+
+@pytest.fixture
+def mock_policy():
+    """Patch Config so [common.users] has the given idle policy."""
+    with patch("src.cmd_user_usage.configPkg.Config") as mock_cfg:
+        mock_cfg.return_value.get_idle_policy.return_value = (
+            {"minutes": 30, "cpu_percent": 1.0},
+            None,
+        )
+        yield mock_cfg
+
+
+@pytest.mark.usefixtures("mock_policy")
+def test_hibernate_applies_overrides_and_reports(runner):
+    """Command-line options override dtaas.toml's idle policy."""
+    with patch("src.cmd_user_usage.hibernatePkg.hibernate", return_value=["alice"]) as h:
+        result = runner.invoke(dtaas, ["admin", "user", "hibernate", "--idle-minutes", "5"])
+    assert result.exit_code == 0
+    assert "alice hibernated successfully" in result.output
+    h.assert_called_once_with({"minutes": 5, "cpu_percent": 1.0}, dry_run=False)
+
+
+def test_hibernate_disabled_without_idle_minutes(runner, mock_policy):
+    """idle_minutes 0 and no --idle-minutes is an error, not a silent no-op."""
+    mock_policy.return_value.get_idle_policy.return_value = (
+        {"minutes": 0, "cpu_percent": 1.0},
+        None,
+    )
+    result = runner.invoke(dtaas, ["admin", "user", "hibernate"])
+    assert result.exit_code != 0
+    assert "Idle hibernation is disabled" in result.output
+
+
+def test_wake_reports_resumed_users(runner):
+    """wake forwards the usernames (None for all) and reports who resumed."""
+    with patch("src.cmd_user_usage.hibernatePkg.wake", return_value=[]) as mock_wake:
+        result = runner.invoke(dtaas, ["admin", "user", "wake"])
+    assert result.exit_code == 0
+    assert "No hibernated users to wake." in result.output
+    mock_wake.assert_called_once_with(None)
+
+
+@pytest.fixture
+def mock_limits():
+    """Patch Config so [common.resources] limits are enabled."""
+    with patch("src.cmd_user_usage.configPkg.Config") as mock_cfg:
+        mock_cfg.return_value.get_set_limits.return_value = (True, None)
+        mock_cfg.return_value.get_resource_limits.return_value = ({"cpus": 2}, None)
+        yield mock_cfg
+
+
+@pytest.mark.usefixtures("mock_limits")
+def test_resize_records_user_override_then_applies(runner):
+    """resize stores the override for known users and resizes them live."""
+    with patch("src.cmd_user_usage.registryPkg.set_user_resources") as mock_set, patch(
+        "src.cmd_user_usage.registryPkg.load_registry", return_value={"alice": {}}
+    ), patch(
+        "src.cmd_user_usage.resourcesPkg.resize_users", return_value=(["alice"], [])
+    ) as mock_resize:
+        result = runner.invoke(
+            dtaas, ["admin", "user", "resize", "alice", "ghost", "--cpus", "4"]
+        )
+    assert result.exit_code == 0
+    mock_set.assert_called_once_with(["alice", "ghost"], {"cpus": 4.0})
+    mock_resize.assert_called_once_with(["alice"], {"cpus": 2})
+    assert "'ghost' is not a registered user, skipping" in result.output
+    assert "alice resized successfully" in result.output
+
+
+def test_resize_refuses_when_limits_disabled(runner, mock_limits):
+    """With set_limits = false there is nothing to resize."""
+    mock_limits.return_value.get_set_limits.return_value = (False, None)
+    result = runner.invoke(dtaas, ["admin", "user", "resize", "alice", "--cpus", "4"])
+    assert result.exit_code != 0
+    assert "resource limits are disabled" in result.output
+
+
+def test_resize_rejects_usernames_with_group(runner, mock_limits):
+    """USERNAMES and --group together are refused before anything is stored."""
+    with patch("src.cmd_user_usage.registryPkg.set_group_resources") as mock_set:
+        result = runner.invoke(
+            dtaas, ["admin", "user", "resize", "alice", "--group", "gpu", "--cpus", "4"]
+        )
+    assert result.exit_code != 0
+    assert "Pass --group on its own" in result.output
+    mock_set.assert_not_called()
+    assert mock_limits.called
+
+
+@pytest.mark.usefixtures("mock_limits")
+def test_resize_repeated_group_stores_each_and_resizes_members(runner, tmp_path, monkeypatch):
+    """--group is repeatable and resolves members like the lifecycle commands."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "dtaas.users.registry.json").write_text(
+        json.dumps(
+            {
+                "users": {
+                    "alice": {"groups": ["gpu"]},
+                    "bob": {"groups": ["ml"]},
+                    "carol": {"groups": []},
+                }
+            }
+        )
+    )
+    with patch("src.cmd_user_usage.registryPkg.set_group_resources") as mock_set, patch(
+        "src.cmd_user_usage.resourcesPkg.resize_users", return_value=(["alice", "bob"], [])
+    ) as mock_resize:
+        result = runner.invoke(
+            dtaas,
+            ["admin", "user", "resize", "--group", "gpu", "--group", "ml", "--cpus", "8"],
+        )
+
+    assert result.exit_code == 0, result.output
+    assert [c.args for c in mock_set.call_args_list] == [
+        ("gpu", {"cpus": 8.0}),
+        ("ml", {"cpus": 8.0}),
+    ]
+    mock_resize.assert_called_once_with(["alice", "bob"], {"cpus": 2})
+
+
+def test_warm_pool_fills_to_requested_size(runner, tmp_path):
+    """warm-pool fills files/.pool from the configured path."""
+    (tmp_path / "files" / "template").mkdir(parents=True)
+    with patch("src.cmd_user_usage.configPkg.Config") as mock_cfg:
+        mock_cfg.return_value.get_path.return_value = (str(tmp_path), None)
+        mock_cfg.return_value.get_warm_pool.return_value = (0, None)
+        result = runner.invoke(dtaas, ["admin", "user", "warm-pool", "--size", "2"])
+    assert result.exit_code == 0
+    assert "Warm pool ready: 2 slot(s) (2 created)." in result.output
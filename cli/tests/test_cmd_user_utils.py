@@ -4,6 +4,7 @@ import click
 import pytest
 from src.cmd_user_utils import (
     UserAddInput,
+    register_users,
     reject_starting_users,
     resolve_usernames,
     stage_users_for_add,
@@ -159,3 +160,17 @@ def test_reject_starting_users_tolerates_missing_config(tmp_path, monkeypatch):
     monkeypatch.chdir(tmp_path)
 
     reject_starting_users(["alice"], "stop")  # must not raise
+
+
+def test_register_users_starts_retried_duplicates(tmp_path, monkeypatch):
+    """A skipped name that a resumed import retries is still returned to start."""
+    monkeypatch.chdir(tmp_path)
+    register_users({"alice": {"email": "a@intocps.org"}}, [])
+
+    to_start = register_users(
+        {"alice": {"email": "a@intocps.org"}, "bob": {"email": "b@intocps.org"}},
+        [],
+        retry=["alice"],
+    )
+
+    assert to_start == ["bob", "alice"]
@@ -2,7 +2,7 @@
 
 import json
 from unittest.mock import MagicMock, patch
-from src.cmd_utils import run_reconcile
+from src.cmd_utils import _fix_watched, run_reconcile
 from src.pkg.state import config_hash
 
 
@@ -66,11 +66,12 @@ def test_run_reconcile_fix_reprovisions_missing(tmp_path, capsys):
     _write_registry(tmp_path, {"alice": {"email": "a@x.io"}})
 
     with patch("src.cmd_utils.configPkg.Config", return_value=MagicMock()), patch(
-        "src.cmd_utils.userPkg.add_users", return_value=None
+        "src.cmd_utils.userPkg.reprovision_users", return_value=None
     ) as mock_add:
         run_reconcile(str(tmp_path), fix=True)
 
     mock_add.assert_called_once()
+    assert mock_add.call_args.args[1] == ["alice"]
     assert "Reprovisioned" in capsys.readouterr().out
 
 
@@ -85,7 +86,7 @@ def test_run_reconcile_fix_skips_when_in_sync(tmp_path):
         "services:\n  alice:\n    image: v1\n", encoding="utf-8"
     )
 
-    with patch("src.cmd_utils.userPkg.add_users") as mock_add:
+    with patch("src.cmd_utils.userPkg.reprovision_users") as mock_add:
         run_reconcile(str(tmp_path), fix=True)
 
     mock_add.assert_not_called()
@@ -97,7 +98,7 @@ def test_run_reconcile_fix_never_touches_unexpected(tmp_path):
         "services:\n  carol:\n    image: v1\n", encoding="utf-8"
     )
 
-    with patch("src.cmd_utils.userPkg.add_users") as mock_add:
+    with patch("src.cmd_utils.userPkg.reprovision_users") as mock_add:
         run_reconcile(str(tmp_path), fix=True)
 
     mock_add.assert_not_called()
@@ -154,9 +155,22 @@ def test_run_reconcile_fix_enforces_desired_status(tmp_path, capsys):
         return_value=[("alice", "paused", "running")],
     ), patch(
         "src.cmd_utils.usersLifecyclePkg.enforce_desired_status"
-    ) as mock_enforce, patch("src.cmd_utils.userPkg.add_users") as mock_add:
+    ) as mock_enforce, patch("src.cmd_utils.userPkg.reprovision_users") as mock_add:
         run_reconcile(str(tmp_path), fix=True)
 
     mock_enforce.assert_called_once()
     mock_add.assert_not_called()  # membership in sync, so no reprovision
     assert "Enforced desired status" in capsys.readouterr().out
+
+
+def test_fix_watched_reprovisions_then_enforces_status(capsys):
+    """Missing/drifted users are reprovisioned (started alone); status-only
+    drift is enforced for just those users."""
+    with patch("src.cmd_utils._reprovision") as mock_reprovision, patch(
+        "src.cmd_utils.usersLifecyclePkg.enforce_desired_status"
+    ) as mock_enforce:
+        _fix_watched({"alice": ["missing"], "bob": ["status"]})
+
+    assert mock_reprovision.call_args.args[0] == ["alice"]
+    mock_enforce.assert_called_once_with(["bob"])
+    assert "Enforced desired status on bob." in capsys.readouterr().out
@@ -288,3 +288,103 @@ def test_get_tls_security_not_dict(mock_utils):
     assert tls is False
     assert err is not None
     assert "security section is not a dict" in str(err)
+
+
+def test_get_shard_size_defaults_to_zero():
+    """Without [common.users] every user stays in one compose.users.yml."""
+    with patch("src.pkg.config.utils.import_toml") as mock_import:
+        mock_import.return_value = ({"common": {}}, None)
+        shard_size, err = Config().get_shard_size()
+    assert err is None
+    assert shard_size == 0
+
+
+def test_get_shard_size_reads_users_section():
+    """shard_size is read from [common.users]."""
+    with patch("src.pkg.config.utils.import_toml") as mock_import:
+        mock_import.return_value = ({"common": {"users": {"shard_size": 25}}}, None)
+        shard_size, err = Config().get_shard_size()
+    assert err is None
+    assert shard_size == 25
+
+
+def test_get_shard_size_rejects_non_integer():
+    """A non-integer shard_size is reported rather than guessed at."""
+    with patch("src.pkg.config.utils.import_toml") as mock_import:
+        mock_import.return_value = ({"common": {"users": {"shard_size": "5"}}}, None)
+        _, err = Config().get_shard_size()
+    assert err is not None and "shard_size" in str(err)
+
+
+def test_get_warm_pool_reads_users_section():
+    """warm_pool defaults to 0 (no pool) and is read from [common.users]."""
+    with patch("src.pkg.config.utils.import_toml") as mock_import:
+        mock_import.return_value = ({"common": {}}, None)
+        assert Config().get_warm_pool() == (0, None)
+        mock_import.return_value = ({"common": {"users": {"warm_pool": 10}}}, None)
+        assert Config().get_warm_pool() == (10, None)
+
+
+def test_get_template_layer_defaults_to_copy():
+    """template_layer defaults to "copy"; an unknown layer is an error."""
+    with patch("src.pkg.config.utils.import_toml") as mock_import:
+        mock_import.return_value = ({"common": {}}, None)
+        assert Config().get_template_layer() == ("copy", None)
+        mock_import.return_value = ({"common": {"users": {"template_layer": "overlay"}}}, None)
+        assert Config().get_template_layer() == ("overlay", None)
+        mock_import.return_value = ({"common": {"users": {"template_layer": "zfs"}}}, None)
+        _, err = Config().get_template_layer()
+    assert err is not None and "template_layer" in str(err)
+
+
+def test_get_capacity_policy_defaults_to_warn():
+    """capacity_policy defaults to "warn" and must be a known policy."""
+    with patch("src.pkg.config.utils.import_toml") as mock_import:
+        mock_import.return_value = ({"common": {}}, None)
+        assert Config().get_capacity_policy() == ("warn", None)
+        mock_import.return_value = ({"common": {"users": {"capacity_policy": "never"}}}, None)
+        _, err = Config().get_capacity_policy()
+    assert err is not None and "capacity_policy" in str(err)
+
+
+def test_get_routing_defaults_to_labels():
+    """routing defaults to "labels" and must be a known mode."""
+    with patch("src.pkg.config.utils.import_toml") as mock_import:
+        mock_import.return_value = ({"common": {}}, None)
+        assert Config().get_routing() == ("labels", None)
+        mock_import.return_value = ({"common": {"users": {"routing": "file"}}}, None)
+        assert Config().get_routing() == ("file", None)
+        mock_import.return_value = ({"common": {"users": {"routing": "dns"}}}, None)
+        _, err = Config().get_routing()
+    assert err is not None and "routing" in str(err)
+
+
+def test_get_hosts_defaults_to_local_only(mock_utils):
+    """Without [[common.users.hosts]] every workspace runs on the local daemon."""
+    mock_utils.return_value = ({"common": {"users": {}}}, None)
+    hosts, err = config.Config().get_hosts()
+    assert err is None
+    assert hosts == []
+
+
+def test_get_hosts_rejects_non_table_entries(mock_utils):
+    """hosts must be an array of tables."""
+    mock_utils.return_value = ({"common": {"users": {"hosts": ["node2"]}}}, None)
+    hosts, err = config.Config().get_hosts()
+    assert hosts == []
+    assert err is not None and "[[common.users.hosts]]" in str(err)
+
+
+def test_get_idle_policy_defaults_to_disabled(mock_utils):
+    """Without idle_minutes hibernation is off, with a 1% CPU threshold."""
+    mock_utils.return_value = ({"common": {}}, None)
+    policy, err = config.Config().get_idle_policy()
+    assert err is None
+    assert policy == {"minutes": 0, "cpu_percent": 1.0}
+
+
+def test_get_idle_policy_rejects_negative_values(mock_utils):
+    """Negative idle settings are reported."""
+    mock_utils.return_value = ({"common": {"users": {"idle_minutes": -5}}}, None)
+    _, err = config.Config().get_idle_policy()
+    assert err is not None and "idle_minutes" in str(err)
@@ -366,3 +366,82 @@ def test_validate_config_flags_placeholder_path(tmp_path):
     generate_config(str(tmp_path))
     errors = validate_config(str(tmp_path))
     assert any(e.startswith("common.path") for e in errors)
+
+
+def test_shard_size_must_be_non_negative_integer(base):
+    """common.users.shard_size is optional but must be an integer >= 0."""
+    message = "common.users.shard_size must be a non-negative integer"
+    assert message in collect_errors(with_common(base, users={"shard_size": -1}))
+    assert message in collect_errors(with_common(base, users={"shard_size": "4"}))
+    assert collect_errors(with_common(base, users={"shard_size": 4})) == []
+
+
+def test_warm_pool_must_be_non_negative_integer(base):
+    """common.users.warm_pool is optional but must be an integer >= 0."""
+    message = "common.users.warm_pool must be a non-negative integer"
+    assert message in collect_errors(with_common(base, users={"warm_pool": -2}))
+    assert collect_errors(with_common(base, users={"warm_pool": 20})) == []
+
+
+def test_template_layer_must_be_known(base):
+    """common.users.template_layer is optional but must name a known layer."""
+    errors = collect_errors(with_common(base, users={"template_layer": "zfs"}))
+    assert "common.users.template_layer must be one of copy, overlay, hardlink" in errors
+    assert collect_errors(with_common(base, users={"template_layer": "hardlink"})) == []
+
+
+def test_capacity_policy_must_be_known(base):
+    """common.users.capacity_policy is optional but must name a known policy."""
+    errors = collect_errors(with_common(base, users={"capacity_policy": "never"}))
+    assert "common.users.capacity_policy must be one of warn, refuse, off" in errors
+    assert collect_errors(with_common(base, users={"capacity_policy": "refuse"})) == []
+
+
+def test_routing_must_be_known(base):
+    """common.users.routing is optional but must name a known mode."""
+    errors = collect_errors(with_common(base, users={"routing": "dns"}))
+    assert "common.users.routing must be one of labels, file" in errors
+    assert collect_errors(with_common(base, users={"routing": "file"})) == []
+
+
+def test_hosts_records_are_validated(base):
+    """[[common.users.hosts]] need unique names and well-formed capacities."""
+    hosts = [
+        {"name": "node2", "endpoint": "ssh://node2", "cpus": 8, "mem": "32G"},
+        {"name": "node2", "cpus": 0, "mem": "32"},
+        {"endpoint": "node3"},
+    ]
+    errors = collect_errors(with_common(base, users={"hosts": hosts}))
+    assert "common.users.hosts: duplicate name 'node2'" in errors
+    assert "common.users.hosts.node2.cpus must be a positive number of CPU cores" in errors
+    assert "common.users.hosts.node2.mem must include a unit, e.g. '64G'" in errors
+    assert "common.users.hosts: each entry requires a valid 'name'" in errors
+    assert len(errors) == 4
+
+
+def test_idle_options_are_validated(base):
+    """idle_minutes must be an integer >= 0 and idle_cpu_percent a number >= 0."""
+    errors = collect_errors(
+        with_common(base, users={"idle_minutes": 1.5, "idle_cpu_percent": -1})
+    )
+    assert "common.users.idle_minutes must be a non-negative integer" in errors
+    assert "common.users.idle_cpu_percent must be a non-negative number" in errors
+    assert not collect_errors(
+        with_common(base, users={"idle_minutes": 0, "idle_cpu_percent": 0})
+    )
+
+
+def test_schedules_validated(base):
+    """[[common.users.schedules]] need names and valid cron times."""
+    data = copy.deepcopy(base)
+    data["common"]["users"] = {"schedules": [{"name": "nights", "pause": "0 20 * * *"}]}
+    assert collect_errors(data) == []
+
+    data["common"]["users"]["schedules"].append({"name": "weekends", "stop": "0 20 * * sat-"})
+    errors = collect_errors(data)
+    assert len(errors) == 1 and errors[0].startswith("common.users.schedules.weekends.stop")
+
+    data["common"]["users"]["schedules"] = {"name": "nights"}
+    assert collect_errors(data) == [
+        "common.users.schedules must be an array of tables ([[common.users.schedules]])"
+    ]
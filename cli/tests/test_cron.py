@@ -0,0 +1,46 @@
+"""Tests for the cron expressions of lifecycle schedules (cron.py)."""
+
+from datetime import datetime
+import pytest
+from src.pkg.cron import parse_cron
+
+# 2026-10-19 is a Monday.
+MONDAY_2000 = datetime(2026, 10, 19, 20, 0)
+
+
+def test_matches_ranges_steps_lists_and_names():
+    """Every field form: *, n, a-b, */n, a-b/n, lists and names."""
+    weekdays = parse_cron("0 20 * * mon-fri")
+    assert weekdays.matches(MONDAY_2000)
+    assert not weekdays.matches(MONDAY_2000.replace(minute=1))
+    assert not weekdays.matches(datetime(2026, 10, 18, 20, 0))  # Sunday
+
+    quarters = parse_cron("*/15 8-18/2 1,15 jan-mar *")
+    assert quarters.matches(datetime(2026, 1, 15, 10, 45))
+    assert not quarters.matches(datetime(2026, 1, 15, 9, 45))
+    assert not quarters.matches(datetime(2026, 4, 15, 10, 45))
+
+
+def test_sunday_is_zero_or_seven_and_day_fields_are_ored():
+    """7 is Sunday; with both day fields restricted either may match."""
+    assert parse_cron("0 0 * * 7").matches(datetime(2026, 10, 18))
+    either = parse_cron("0 0 1 * 1")
+    assert either.matches(datetime(2026, 10, 1))  # a Thursday, the 1st
+    assert either.matches(datetime(2026, 10, 19))  # a Monday
+
+
+@pytest.mark.parametrize("expression", ["0 20 * *", "60 * * * *", "0 0 0 * *", "x * * * *"])
+def test_invalid_expressions_are_rejected(expression):
+    """Wrong field counts, out-of-range values and junk raise ValueError."""
+    with pytest.raises(ValueError):
+        parse_cron(expression)
+
+
+def test_last_before_and_next_after():
+    """The latest time in (since, now] and the first in (now, until]."""
+    nightly = parse_cron("0 20 * * *")
+    now = datetime(2026, 10, 20, 7, 30)
+    assert nightly.last_before(now, datetime(2026, 10, 19, 12)) == MONDAY_2000
+    assert nightly.last_before(now, MONDAY_2000) is None
+    assert nightly.next_after(now, datetime(2026, 10, 21)) == datetime(2026, 10, 20, 20, 0)
+    assert nightly.next_after(now, datetime(2026, 10, 20, 12)) is None
@@ -1,5 +1,6 @@
 """Tests for the deploy module (admin install / uninstall handlers)."""
 
+import os
 from unittest.mock import patch, MagicMock
 import pytest
 from python_on_whales.exceptions import DockerException
@@ -77,7 +78,7 @@ def test_uninstall_removes_user_files(tmp_path):
     """uninstall with remove_user_files deletes per-user directories."""
     (tmp_path / "docker-compose.yml").write_text("services: {}")
     (tmp_path / "files" / "bob").mkdir(parents=True)
-    with patch("src.pkg.deploy._client"):
+    with patch("src.pkg.deploy._client"), patch("src.pkg.user_files.utils.run_detached"):
         message = deploy.uninstall(str(tmp_path), remove_user_files=True)
         assert message is not None
         assert "Removed user files" in message
@@ -99,6 +100,91 @@ def test_delete_user_files_removes_registry_and_state(tmp_path):
     assert ".dtaas.state.json" in message
 
 
+def test_delete_user_files_moves_dirs_to_trash_and_purges_in_background(tmp_path):
+    """User dirs leave files/ at once; a detached purge deletes the trash."""
+    (tmp_path / "files" / "template").mkdir(parents=True)
+    (tmp_path / "files" / "bob" / "work").mkdir(parents=True)
+    with patch("src.pkg.user_files.utils.run_detached") as mock_detached:
+        message = user_files.delete_user_files(str(tmp_path))
+
+    files_dir = (tmp_path / "files").resolve()
+    assert "deleting in the background" in message
+    assert sorted(p.name for p in files_dir.iterdir()) == [".trash", "template"]
+    mock_detached.assert_called_once_with("src.pkg.user_files", files_dir)
+    (batch,) = (files_dir / ".trash").iterdir()
+    assert (batch / "bob" / "work").is_dir()
+
+
+def test_purge_trash_deletes_interrupted_batches_without_following_links(tmp_path):
+    """purge_trash empties every batch (including ones an interrupted purge
+    left) and unlinks symlinks rather than deleting their targets."""
+    outside = tmp_path / "keep.txt"
+    outside.write_text("precious")
+    bob = tmp_path / "files" / ".trash" / "old-batch" / "bob"
+    (bob / "a" / "b").mkdir(parents=True)
+    (bob / "a" / "b" / "f.txt").write_text("x")
+    try:
+        (bob / "link").symlink_to(tmp_path)
+    except (OSError, NotImplementedError):
+        pytest.skip("symlink creation is not permitted on this platform")
+
+    assert user_files.purge_trash(tmp_path / "files") == 1
+
+    assert not any((tmp_path / "files" / ".trash").iterdir())
+    assert outside.read_text() == "precious"
+
+
+def test_purge_trash_unlinks_stray_files(tmp_path):
+    """A file directly in files/.trash is unlinked, not treated as a batch."""
+    trash = tmp_path / "files" / ".trash"
+    (trash / "batch" / "bob").mkdir(parents=True)
+    (trash / "stray.txt").write_text("x")
+
+    assert user_files.purge_trash(tmp_path / "files") == 1
+    assert not any(trash.iterdir())
+
+
+def test_purge_trash_keeps_going_past_undeletable_entries(tmp_path):
+    """An entry that cannot be deleted is logged and left; the rest goes,
+    and the next --remove-user-files reports the leftovers."""
+    files_dir = tmp_path / "files"
+    stuck = files_dir / ".trash" / "batch" / "bob" / "stuck"
+    stuck.mkdir(parents=True)
+    (files_dir / ".trash" / "batch" / "carol").mkdir()
+    real_rmdir = os.rmdir
+
+    def rmdir(path, *args, **kwargs):
+        if str(path) == str(stuck):
+            raise PermissionError(13, "Permission denied")
+        return real_rmdir(path, *args, **kwargs)
+
+    with patch("src.pkg.user_files.os.rmdir", side_effect=rmdir):
+        assert user_files.purge_trash(files_dir) == 2
+
+    assert not (files_dir / ".trash" / "batch" / "carol").exists()
+    assert stuck.is_dir()
+    log = (files_dir / ".trash-errors.log").read_text(encoding="utf-8")
+    assert f"{stuck}: Permission denied" in log
+    with patch("src.pkg.user_files.utils.run_detached"):
+        message = user_files.delete_user_files(str(tmp_path))
+    assert "an earlier purge could not delete everything" in message
+
+    user_files.purge_trash(files_dir)
+    assert not (files_dir / ".trash-errors.log").exists()
+
+
+def test_purge_trash_rejects_symlinked_trash(tmp_path):
+    """A files/.trash symlink is refused instead of purged."""
+    (tmp_path / "files").mkdir()
+    (tmp_path / "elsewhere").mkdir()
+    try:
+        (tmp_path / "files" / ".trash").symlink_to(tmp_path / "elsewhere")
+    except (OSError, NotImplementedError):
+        pytest.skip("symlink creation is not permitted on this platform")
+    with pytest.raises(OSError, match="symlink"):
+        user_files.purge_trash(tmp_path / "files")
+
+
 def test_delete_user_files_keeps_registry_files_untouched_when_absent(tmp_path):
     """With no registry/state or user dirs present, nothing is removed."""
     assert "nothing to remove" in user_files.delete_user_files(str(tmp_path))
@@ -208,3 +294,32 @@ def test_compose_services_requires_compose_file(tmp_path):
     """compose_services refuses to act without a generated deployment."""
     with pytest.raises(OSError, match="docker-compose.yml"):
         deploy.compose_services(str(tmp_path))
+
+
+def test_users_clients_only_returns_shards_holding_targets(tmp_path):
+    """users_clients pairs each targeted shard's client with its users."""
+    (tmp_path / "compose.users.yml").write_text("services: {}")
+    (tmp_path / "compose.users.0001.yml").write_text("services: {}")
+    (tmp_path / "compose.users.0002.yml").write_text("services: {}")
+    (tmp_path / ".dtaas.shards.json").write_text(
+        '{"users": {"bob": "0001", "carol": "0002"}}'
+    )
+    with patch("src.pkg.deploy.DockerClient") as mock_docker:
+        pairs = deploy.users_clients(str(tmp_path), ["bob"])
+        everything = deploy.users_clients(str(tmp_path))
+    assert [names for _, names in pairs] == [["bob"]]
+    assert mock_docker.call_args_list[0].kwargs["compose_project_name"] == (
+        "dtaas-users-0001"
+    )
+    assert len(everything) == 3
+
+
+def test_users_clients_route_remote_shard_to_its_host(tmp_path):
+    """A shard on another Docker host gets a client for that host."""
+    (tmp_path / "compose.users.0001.yml").write_text("services: {}")
+    (tmp_path / ".dtaas.shards.json").write_text(
+        '{"users": {"bob": "0001"}, "endpoints": {"0001": "ssh://node2"}}'
+    )
+    with patch("src.pkg.deploy.DockerClient") as mock_docker:
+        deploy.users_clients(str(tmp_path), ["bob"])
+    assert mock_docker.call_args.kwargs["host"] == "ssh://node2"
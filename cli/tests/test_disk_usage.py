@@ -0,0 +1,72 @@
+"""Tests for the cached workspace disk usage accounting (disk_usage.py)."""
+
+import os
+from unittest.mock import patch
+import pytest
+from src.pkg import disk_usage
+# pylint: disable=redefined-outer-name,protected-access
+
+
+@pytest.fixture
+def files_dir(tmp_path):
+    """files/ with two workspaces and the template scaffolding."""
+    files = tmp_path / "files"
+    (files / "template").mkdir(parents=True)
+    (files / "alice" / "notebooks").mkdir(parents=True)
+    (files / "alice" / "README.md").write_text("x" * 5000)
+    (files / "alice" / "notebooks" / "a.ipynb").write_text("y" * 9000)
+    (files / "bob").mkdir()
+    return files
+
+
+def _du(path):
+    """What a full walk counts for *path*: every entry's allocated bytes."""
+    total = disk_usage._allocated(os.stat(path))
+    for root, dirs, files in os.walk(path):
+        for name in dirs + files:
+            total += disk_usage._allocated(os.lstat(os.path.join(root, name)))
+    return total
+
+
+def test_measure_matches_a_full_walk(files_dir, tmp_path):
+    """Totals equal a full walk; users without a workspace are left out."""
+    usage = disk_usage.measure(files_dir, ["alice", "bob", "ghost"], tmp_path / "cache.json")
+
+    assert usage == {"alice": _du(files_dir / "alice"), "bob": _du(files_dir / "bob")}
+    assert set(disk_usage.load_cache(tmp_path / "cache.json")) == {"alice", "bob"}
+
+
+def test_unchanged_directories_are_not_listed_again(files_dir, tmp_path):
+    """A second run only lists the directories whose mtime changed."""
+    cache = tmp_path / "cache.json"
+    disk_usage.measure(files_dir, ["alice"], cache)
+    (files_dir / "alice" / "notebooks" / "b.ipynb").write_text("z" * 20000)
+
+    with patch("src.pkg.disk_usage._scan", wraps=disk_usage._scan) as mock_scan:
+        usage = disk_usage.measure(files_dir, ["alice"], cache)
+
+    assert [call.args[0] for call in mock_scan.call_args_list] == [
+        os.path.join(files_dir, "alice", "notebooks")
+    ]
+    assert usage["alice"] == _du(files_dir / "alice")
+
+
+def test_removed_workspace_is_dropped_from_the_cache(files_dir, tmp_path):
+    """Cache entries of deleted workspaces do not linger."""
+    cache = tmp_path / "cache.json"
+    disk_usage.measure(files_dir, ["alice", "bob"], cache)
+    (files_dir / "bob").rmdir()
+
+    disk_usage.measure(files_dir, ["alice"], cache)
+
+    assert set(disk_usage.load_cache(cache)) == {"alice"}
+
+
+def test_unwritable_cache_still_returns_the_sizes(files_dir, tmp_path):
+    """'status' in a read-only directory reports sizes without a cache."""
+    cache = tmp_path / "missing-dir" / "cache.json"
+
+    usage = disk_usage.measure(files_dir, ["alice"], cache)
+
+    assert usage == {"alice": _du(files_dir / "alice")}
+    assert not cache.exists()
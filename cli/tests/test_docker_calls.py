@@ -0,0 +1,135 @@
+"""Tests for the recorder of spawned docker processes."""
+
+import subprocess
+from unittest.mock import MagicMock, patch
+import pytest
+from click.testing import CliRunner
+from python_on_whales import DockerClient
+from python_on_whales.exceptions import DockerException
+import python_on_whales.components.compose.cli_wrapper as compose_wrapper
+from src.cmd import dtaas
+from src.pkg import docker_calls, users_compose
+# pylint: disable=protected-access
+
+
+def _client():
+    """A python-on-whales client whose 'docker' binary resolves on any PATH."""
+    return DockerClient(client_call=["true"], compose_files=["compose.users.yml"])
+
+
+def _completed(returncode=0, stdout=b"", stderr=b""):
+    """A finished docker process as subprocess.run returns it."""
+    return subprocess.CompletedProcess(["docker"], returncode, stdout, stderr)
+
+
+@pytest.mark.parametrize(
+    "argv,expected",
+    [
+        (["docker", "ps", "--all"], "ps"),
+        (
+            ["docker", "--context", "edge", "compose", "-f", "a.yml", "up", "-d", "alice"],
+            "compose up",
+        ),
+        (["docker", "compose", "--file=a.yml", "rm", "--stop", "alice"], "compose rm"),
+        (["docker", "image", "inspect", "nginx"], "image inspect"),
+        (["docker", "--version"], "docker"),
+    ],
+)
+def test_command_name_skips_options_and_their_values(argv, expected):
+    """The command (and a management command's subcommand) names the call."""
+    assert docker_calls.command_name(argv) == expected
+
+
+def test_recording_counts_python_on_whales_calls():
+    """Each docker process run by python-on-whales is one recorded Call."""
+    with docker_calls.recording() as recorder, patch(
+        "python_on_whales.utils.subprocess.run", return_value=_completed(stdout=b"done\n")
+    ):
+        _client().compose.stop()
+        _client().compose.pause(services=["alice"])
+
+    assert recorder.count() == 2
+    assert recorder.count("compose pause") == 1
+    call = recorder.calls[1]
+    assert call.argv[-2:] == ["pause", "alice"]
+    assert (call.exit_code, call.output_bytes) == (0, 4)
+
+
+def test_recording_keeps_failed_calls():
+    """A failing docker process is recorded with its exit code, then re-raised."""
+    with docker_calls.recording() as recorder, patch(
+        "python_on_whales.utils.subprocess.run",
+        return_value=_completed(1, b"", b"no such service\n"),
+    ):
+        with pytest.raises(DockerException):
+            _client().compose.stop()
+
+    assert recorder.summary()["compose stop"]["failed"] == 1
+    assert recorder.calls[0].exit_code == 1
+
+
+def test_recording_restores_python_on_whales():
+    """Outside recording() python-on-whales is left untouched."""
+    original = compose_wrapper.run
+    with docker_calls.recording():
+        with docker_calls.recording():
+            assert compose_wrapper.run is not original
+        assert compose_wrapper.run is not original
+    assert compose_wrapper.run is original
+    assert not docker_calls._ORIGINALS
+
+
+def test_record_without_recorder_is_a_no_op():
+    """Nothing is kept when nothing records."""
+    docker_calls.record(["docker", "ps"], 0.1, 0)
+    assert not docker_calls._ACTIVE
+
+
+@patch("src.pkg.users_compose.subprocess.run", return_value=MagicMock(returncode=0))
+@patch(
+    "src.pkg.users_compose.shards.group_by_shard",
+    return_value={"": ["alice"], "2": ["bob", "carol"]},
+)
+def test_start_user_containers_runs_one_compose_up_per_shard(_mock_group, _mock_run):
+    """Starting users spawns one 'compose up' per shard holding them."""
+    with docker_calls.recording() as recorder:
+        users_compose.start_user_containers(["alice", "bob", "carol"])
+
+    assert recorder.count() == 2
+    assert recorder.count("compose up") == 2
+
+
+def test_summary_lines_report_calls_and_time_per_command():
+    """The header totals the processes; each command gets a row."""
+    recorder = docker_calls.Recorder()
+    recorder.add(docker_calls.Call(["docker", "compose", "up"], 1.5, 0, 10))
+    recorder.add(docker_calls.Call(["docker", "compose", "up"], 0.5, 1))
+    recorder.add(docker_calls.Call(["docker", "ps"], 0.25, 0, 2048))
+
+    lines = docker_calls.summary_lines(recorder)
+
+    assert lines[0] == "docker processes: 3 in 2.25s"
+    assert lines[1].split() == ["COMMAND", "CALLS", "TIME", "FAILED", "OUTPUT"]
+    assert lines[2].split() == ["compose", "up", "2", "2.00s", "1", "10B"]
+    assert lines[3].split() == ["ps", "1", "0.25s", "0", "2048B"]
+
+
+@pytest.mark.parametrize(
+    "flag,value,expected",
+    [(False, None, False), (True, None, True), (False, "1", True), (False, "0", False)],
+)
+def test_enabled_from_flag_and_environment(flag, value, expected):
+    """--docker-calls or DTAAS_DOCKER_CALLS=1 switches recording on."""
+    environ = {} if value is None else {docker_calls.DOCKER_CALLS_ENV: value}
+    assert docker_calls.enabled(flag, environ) is expected
+
+
+def test_dtaas_docker_calls_prints_summary(monkeypatch, tmp_path):
+    """'dtaas --docker-calls <command>' ends with the summary on stderr."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv(docker_calls.DOCKER_CALLS_ENV, raising=False)
+    with patch("src.cmd.projectPkg.generate_project", return_value=None):
+        result = CliRunner().invoke(dtaas, ["--docker-calls", "generate-project"])
+
+    assert result.exit_code == 0, result.output
+    assert "docker processes: 0 in 0.00s" in result.stderr
@@ -0,0 +1,95 @@
+"""Tests for fleet mode across several installations (fleet.py)."""
+
+import json
+import threading
+import time
+from unittest.mock import patch
+from src.pkg import fleet
+
+
+def _manifest(tmp_path, body):
+    """Write a fleet manifest into *tmp_path* and return its path."""
+    path = tmp_path / "dtaas.fleet.toml"
+    path.write_text(body)
+    return str(path)
+
+
+def test_load_manifest_resolves_relative_paths(tmp_path):
+    """Relative installation paths are taken from the manifest's directory."""
+    (tmp_path / "lab-a").mkdir()
+    path = _manifest(
+        tmp_path,
+        '[[installations]]\nname = "a"\npath = "lab-a"\ncontext = "ctx-a"\n',
+    )
+
+    installations, err = fleet.load_manifest(path)
+
+    assert err is None
+    assert installations == [fleet.Installation("a", str(tmp_path / "lab-a"), "ctx-a")]
+
+
+def test_load_manifest_reports_every_problem(tmp_path):
+    """Duplicate names and missing directories are all reported at once."""
+    (tmp_path / "lab-a").mkdir()
+    path = _manifest(
+        tmp_path,
+        '[[installations]]\nname = "a"\npath = "lab-a"\n'
+        '[[installations]]\nname = "a"\npath = "missing"\n',
+    )
+
+    installations, err = fleet.load_manifest(path)
+
+    assert installations == []
+    assert "duplicate name 'a'" in str(err)
+    assert "installations[1].path must be an existing directory" in str(err)
+
+
+def test_run_one_uses_the_installation_directory_and_context(tmp_path):
+    """Each installation runs in its own directory with its docker context."""
+    installation = fleet.Installation("a", str(tmp_path), "ctx-a")
+    with patch("src.pkg.fleet.subprocess.run") as mock_run:
+        mock_run.return_value.returncode = 0
+        mock_run.return_value.stdout = "ok"
+        mock_run.return_value.stderr = ""
+        outcome = fleet.run_one(installation, ["admin", "status", "--json"])
+
+    assert outcome.ok and outcome.stdout == "ok"
+    argv = mock_run.call_args.args[0]
+    assert argv[1:] == ["-m", "src", "admin", "status", "--json"]
+    assert mock_run.call_args.kwargs["cwd"] == str(tmp_path)
+    assert mock_run.call_args.kwargs["env"]["DOCKER_CONTEXT"] == "ctx-a"
+
+
+def test_run_bounds_parallelism_and_keeps_manifest_order():
+    """No more than *jobs* installations run at once; results stay in order."""
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def run_one(installation, _args):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return fleet.Outcome(installation, 0, installation.name, "")
+
+    installations = [fleet.Installation(str(n), ".") for n in range(6)]
+    with patch("src.pkg.fleet.run_one", side_effect=run_one):
+        outcomes = fleet.run(installations, ["admin", "status"], jobs=2)
+
+    assert [o.stdout for o in outcomes] == [str(n) for n in range(6)]
+    assert peak[0] <= 2
+
+
+def test_merge_status_tags_rows_and_collects_errors():
+    """Rows are tagged with their installation; failures become errors."""
+    record = {"project": "users", "service": "alice", "state": "running"}
+    outcomes = [
+        fleet.Outcome(fleet.Installation("a", "."), 0, json.dumps([record]), ""),
+        fleet.Outcome(fleet.Installation("b", "."), 1, "", "Error: no compose\n"),
+    ]
+
+    rows, errors = fleet.merge_status(outcomes)
+
+    assert rows == [{"installation": "a", **record}]
+    assert errors == {"b": "Error: no compose"}
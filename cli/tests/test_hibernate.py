@@ -0,0 +1,89 @@
+"""Tests for idle auto-hibernation (hibernate.py)."""
+
+from unittest.mock import patch
+import pytest
+from src.pkg import hibernate
+# pylint: disable=redefined-outer-name
+
+POLICY = {"minutes": 10, "cpu_percent": 1.0}
+
+
+@pytest.fixture
+def idle_env(tmp_path, monkeypatch):
+    """A registry of running users plus patched sampler and lifecycle calls."""
+    monkeypatch.chdir(tmp_path)
+    registry = {"alice": {}, "bob": {}}
+    with patch("src.pkg.hibernate.load_registry", return_value=registry), patch(
+        "src.pkg.hibernate.usage.sample"
+    ) as mock_sample, patch(
+        "src.pkg.hibernate.users_lifecycle.pause_users",
+        side_effect=lambda names: (names, [], []),
+    ) as mock_pause, patch(
+        "src.pkg.hibernate.users_lifecycle.resume_users"
+    ) as mock_resume:
+        yield {
+            "registry": registry,
+            "sample": mock_sample,
+            "pause": mock_pause,
+            "resume": mock_resume,
+        }
+
+
+def _quiet(net=100):
+    """A sample with no CPU use and a fixed traffic counter."""
+    return {"cpu": 0.2, "mem": 0, "net": net}
+
+
+def test_hibernate_needs_two_quiet_samples_spanning_the_threshold(idle_env):
+    """A workspace is paused only once it stayed quiet for the idle minutes."""
+    idle_env["sample"].return_value = {"alice": _quiet(), "bob": _quiet()}
+    assert hibernate.hibernate(POLICY, now=0) == []
+    assert hibernate.hibernate(POLICY, now=300) == []
+
+    idle_env["sample"].return_value = {"alice": _quiet(), "bob": _quiet(net=900)}
+    assert hibernate.hibernate(POLICY, now=900) == ["alice"]
+
+    idle_env["pause"].assert_called_once_with(["alice"])
+    assert hibernate.load_idle_state()["hibernated"] == ["alice"]
+
+
+def test_zero_cpu_percent_still_counts_an_unused_workspace_idle(idle_env):
+    """With idle_cpu_percent = 0 only workspaces using no CPU at all are idle."""
+    policy = {"minutes": 10, "cpu_percent": 0}
+    idle_env["sample"].return_value = {
+        "alice": {"cpu": 0.0, "mem": 0, "net": 100},
+        "bob": _quiet(),
+    }
+    hibernate.hibernate(policy, now=0)
+    hibernate.hibernate(policy, now=300)
+    assert hibernate.hibernate(policy, now=900) == ["alice"]
+
+
+def test_hibernate_dry_run_reports_without_pausing(idle_env):
+    """--dry-run lists idle users but pauses nobody."""
+    idle_env["sample"].return_value = {"alice": _quiet()}
+    hibernate.hibernate(POLICY, now=0)
+    hibernate.hibernate(POLICY, now=60)
+
+    assert hibernate.hibernate(POLICY, dry_run=True, now=700) == ["alice"]
+    idle_env["pause"].assert_not_called()
+
+
+def test_hibernate_only_samples_running_users(idle_env):
+    """Users paused or stopped on purpose are not sampled."""
+    idle_env["registry"]["bob"] = {"desired_status": "stopped"}
+    idle_env["sample"].return_value = {}
+
+    hibernate.hibernate(POLICY, now=0)
+
+    idle_env["sample"].assert_called_once_with(["alice"])
+
+
+def test_wake_resumes_only_hibernated_users(idle_env, tmp_path):
+    """wake resumes users hibernate paused and forgets them."""
+    (tmp_path / ".dtaas.idle.json").write_text('{"users": {}, "hibernated": ["alice"]}')
+
+    assert hibernate.wake(["alice", "bob"]) == ["alice"]
+    idle_env["resume"].assert_called_once_with(["alice"])
+    assert hibernate.load_idle_state()["hibernated"] == []
+    assert hibernate.wake() == []
@@ -0,0 +1,125 @@
+"""Tests for the operation history (pkg/history.py)."""
+
+import json
+from datetime import datetime, timezone
+import click
+import pytest
+from src.pkg import history
+
+
+def _entry(command, started="2026-10-01T10:00:00+00:00", **fields):
+    """A recorded entry with sensible defaults."""
+    return {
+        "command": command,
+        "started": started,
+        "args": [],
+        "outcome": "ok",
+        "seconds": 1.0,
+        "users": [],
+        **fields,
+    }
+
+
+def test_recording_appends_outcome_users_and_time(tmp_path):
+    """A finished command is appended with its users and outcome."""
+    path = tmp_path / "history.jsonl"
+    with history.recording("admin user add", ["alice"], path):
+        history.affect(["alice", "bob"])
+        history.affect(["alice"])
+    history.affect(["carol"])  # outside a recorded command: ignored
+
+    (entry,) = history.load_history(path)
+    assert entry["command"] == "admin user add"
+    assert entry["args"] == ["alice"]
+    assert entry["users"] == ["alice", "bob"]
+    assert (entry["outcome"], entry["exit_code"], entry["error"]) == ("ok", 0, None)
+    assert entry["docker_calls"] == 0 and entry["seconds"] >= 0
+
+
+@pytest.mark.parametrize(
+    "exc, outcome, exit_code, error",
+    [
+        (click.ClickException("no dtaas.toml"), "failed", 1, "no dtaas.toml"),
+        (click.exceptions.Exit(0), "ok", 0, None),
+        (click.exceptions.Exit(2), "failed", 2, None),
+        (KeyboardInterrupt(), "aborted", 1, None),
+        (RuntimeError("boom"), "failed", 1, "boom"),
+    ],
+)
+def test_recording_records_how_a_command_ended(tmp_path, exc, outcome, exit_code, error):
+    """Errors are recorded, then re-raised unchanged."""
+    path = tmp_path / "history.jsonl"
+    with pytest.raises(type(exc)):
+        with history.recording("admin install", [], path):
+            raise exc
+    (entry,) = history.load_history(path)
+    assert (entry["outcome"], entry["exit_code"], entry["error"]) == (outcome, exit_code, error)
+
+
+def test_recording_warns_when_history_cannot_be_written(tmp_path, capsys):
+    """An unwritable history file never fails the command."""
+    with history.recording("admin status", [], tmp_path / "missing" / "history.jsonl"):
+        pass
+    assert "command not added" in capsys.readouterr().err
+
+
+def test_load_history_skips_unreadable_lines(tmp_path):
+    """A line cut short by a crash is skipped, the rest are read."""
+    path = tmp_path / "history.jsonl"
+    path.write_text(
+        json.dumps(_entry("admin install")) + "\n" + '{"command": "admin st\n', encoding="utf-8"
+    )
+    assert [e["command"] for e in history.load_history(path)] == ["admin install"]
+    assert not history.load_history(tmp_path / "absent.jsonl")
+
+
+def test_history_path_follows_environment():
+    """DTAAS_HISTORY redirects or turns off recording."""
+    assert history.history_path({}) == ".dtaas.history.jsonl"
+    assert history.history_path({"DTAAS_HISTORY": "/tmp/h.jsonl"}) == "/tmp/h.jsonl"
+    assert history.history_path({"DTAAS_HISTORY": "0"}) is None
+
+
+def test_parse_since_accepts_durations_and_dates():
+    """'7d' counts back from now; an ISO date is taken as UTC."""
+    now = datetime(2026, 10, 19, 12, tzinfo=timezone.utc)
+    assert history.parse_since("12h", now) == datetime(2026, 10, 19, tzinfo=timezone.utc)
+    assert history.parse_since("1w", now) == datetime(2026, 10, 12, 12, tzinfo=timezone.utc)
+    assert history.parse_since("2026-10-01") == datetime(2026, 10, 1, tzinfo=timezone.utc)
+    with pytest.raises(ValueError):
+        history.parse_since("yesterday")
+
+
+def test_select_filters_by_command_time_outcome_and_user():
+    """Filters combine; 'user' matches 'admin user ...' but not 'admin user-x'."""
+    entries = [
+        _entry("admin user add", users=["alice"]),
+        _entry("admin user delete", started="2026-10-10T00:00:00+00:00", users=["alice"]),
+        _entry("admin user pause", outcome="failed", users=["bob"]),
+        _entry("admin install"),
+    ]
+    assert len(history.select(entries, command="user")) == 3
+    assert len(history.select(entries, command="admin user add")) == 1
+    since = datetime(2026, 10, 5, tzinfo=timezone.utc)
+    assert history.select(entries, since=since) == [entries[1]]
+    assert history.select(entries, outcome="failed") == [entries[2]]
+    assert history.select(entries, user="alice") == entries[:2]
+
+
+def test_slowest_and_summary():
+    """slowest() sorts by duration; summary() gives per-command percentiles."""
+    entries = [_entry("admin user add", seconds=float(s)) for s in range(1, 11)]
+    entries.append(_entry("admin install", seconds=30.0, outcome="failed"))
+    assert [e["seconds"] for e in history.slowest(entries, 2)] == [30.0, 10.0]
+
+    rows = history.summary(entries)
+    assert list(rows) == ["admin user add", "admin install"]
+    assert rows["admin user add"] == {
+        "runs": 10,
+        "failed": 0,
+        "p50": 5.0,
+        "p90": 9.0,
+        "p99": 10.0,
+        "max": 10.0,
+    }
+    assert rows["admin install"]["failed"] == 1
@@ -0,0 +1,61 @@
+"""Tests for the workspace image pre-pull and digest cache (images.py)."""
+
+from unittest.mock import MagicMock, patch
+import pytest
+from python_on_whales.exceptions import DockerException
+from src.pkg import images
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def docker(tmp_path, monkeypatch):
+    """Run in an empty directory with DockerClient mocked out."""
+    monkeypatch.chdir(tmp_path)
+    with patch("src.pkg.images.DockerClient") as mock_client:
+        yield mock_client.return_value
+
+
+def test_image_targets_groups_new_users_images_by_endpoint(docker):
+    """Unsharded users all run on the local daemon ("")."""
+    services = {
+        "alice": {"image": "workspace:1"},
+        "bob": {"image": "workspace:1"},
+        "carol": {},
+    }
+    targets = images.image_targets(services, ["alice", "bob", "carol"])
+    assert targets == {"": ["workspace:1"]}
+    assert not docker.image.pull.called
+
+
+def test_prepull_pulls_and_caches_the_digest(docker, capsys):
+    """A first pull records the image's repo digest for the endpoint."""
+    docker.image.pull.return_value = MagicMock(repo_digests=["workspace@sha256:aa"])
+
+    images.Prepull({"": ["workspace:1"]}).start().finish()
+
+    docker.image.pull.assert_called_once_with("workspace:1", quiet=True)
+    assert images.load_cache()[""]["workspace:1"]["digest"] == "workspace@sha256:aa"
+    assert "workspace:1 on local: pulled in" in capsys.readouterr().out
+
+
+def test_prepull_skips_registry_when_cached_digest_present(docker, capsys):
+    """A later add only checks the host still has the cached digest."""
+    docker.image.pull.return_value = MagicMock(repo_digests=["workspace@sha256:aa"])
+    images.Prepull({"": ["workspace:1"]}).start().finish()
+    docker.image.exists.return_value = True
+
+    images.Prepull({"": ["workspace:1"]}).start().finish()
+
+    docker.image.exists.assert_called_once_with("workspace@sha256:aa")
+    assert docker.image.pull.call_count == 1
+    assert "pull skipped" in capsys.readouterr().out
+
+
+def test_prepull_failure_is_reported_not_raised(docker, capsys):
+    """compose pulls (and fails properly) itself if the image is still missing."""
+    docker.image.pull.side_effect = DockerException(["docker", "pull"], 1)
+
+    images.Prepull({"ssh://node2": ["workspace:1"]}).start().finish()
+
+    assert "Pre-pull of workspace:1 on ssh://node2 failed" in capsys.readouterr().out
+    assert images.load_cache() == {}
@@ -88,6 +88,24 @@ def test_collect_status_merges_running_absent_and_users(tmp_path):
     assert by_service["user-alice"]["state"] == "paused"
 
 
+def test_collect_status_reports_workspace_disk_usage(tmp_path):
+    """User rows carry the size of files/<user>; deployment rows carry None."""
+    (tmp_path / "docker-compose.yml").write_text("services: {}")
+    (tmp_path / "files" / "alice").mkdir(parents=True)
+    (tmp_path / "files" / "alice" / "data.csv").write_text("x" * 10000)
+    deployment = _client_with([_fake_container(service="traefik")])
+    users = _client_with([_fake_container(service="alice")])
+    with patch("src.pkg.lifecycle.deploy._client", return_value=deployment), patch(
+        "src.pkg.lifecycle.deploy.compose_services", return_value={"traefik"}
+    ), patch("src.pkg.lifecycle.deploy._users_client", return_value=users):
+        rows = lifecycle.collect_status(str(tmp_path))
+
+    by_service = {row["service"]: row for row in rows}
+    assert by_service["traefik"]["disk_bytes"] is None
+    assert by_service["alice"]["disk_bytes"] >= 10000
+    assert (tmp_path / ".dtaas.disk_usage.json").is_file()
+
+
 def test_collect_status_without_user_compose(tmp_path):
     """collect_status omits the user project when compose.users.yml is absent."""
     (tmp_path / "docker-compose.yml").write_text("services: {}")
@@ -0,0 +1,139 @@
+"""Tests for the per-user and shared-file locks of concurrent commands (locks.py)."""
+
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+import pytest
+from src.pkg import locks
+from src.pkg.registry import load_registry, register_new_users
+
+_FORK = multiprocessing.get_context("fork")
+
+
+def _hold(usernames, held, release):
+    """In a child process: hold *usernames*' locks until *release* is set."""
+    with locks.user_locks(usernames):
+        held.set()
+        release.wait(10)
+
+
+@pytest.fixture
+def holder():
+    """Start a child process holding some users' locks; release it afterwards."""
+    children = []
+
+    def start(usernames):
+        held, release = _FORK.Event(), _FORK.Event()
+        child = _FORK.Process(target=_hold, args=(usernames, held, release))
+        child.start()
+        assert held.wait(10)
+        children.append((child, release))
+        return child
+
+    yield start
+    for child, release in children:
+        release.set()
+        child.join(10)
+
+
+def test_disjoint_users_lock_at_once_and_shared_ones_wait(holder):
+    """Another command's users block only those users, naming its pid."""
+    child = holder(["alice"])
+
+    with locks.user_locks(["bob"], timeout=0.2):
+        pass
+    with pytest.raises(locks.LockTimeout, match=f"'alice' is locked .*pid {child.pid}"):
+        with locks.user_locks(["bob", "alice"], timeout=0.2):
+            pass
+
+
+def test_many_users_lock_every_user(holder, monkeypatch):
+    """Past LOCK_MAX_USERS one exclusive lock covers everyone, so it waits
+    for any other command on users."""
+    holder(["carol"])
+    monkeypatch.setattr(locks, "LOCK_MAX_USERS", 1)
+
+    with pytest.raises(locks.LockTimeout, match="Every user"):
+        with locks.user_locks(["alice", "bob"], timeout=0.2):
+            pass
+
+
+def test_no_usernames_locks_every_user(holder):
+    """None stands for the whole registry: it waits for any command on users."""
+    holder(["carol"])
+
+    with pytest.raises(locks.LockTimeout, match="Every user"):
+        with locks.user_locks(None, timeout=0.2):
+            pass
+
+
+def test_locks_are_reentrant_but_exclude_other_threads():
+    """A nested section does not wait for itself; another thread waits."""
+    errors = []
+
+    def other_thread():
+        try:
+            with locks.files_lock(timeout=0.2):
+                pass
+        except locks.LockTimeout as exc:
+            errors.append(exc)
+
+    with locks.files_lock(), locks.files_lock():
+        worker = threading.Thread(target=other_thread)
+        worker.start()
+        worker.join()
+    assert len(errors) == 1
+    with locks.files_lock(timeout=0.2):
+        pass
+
+
+def test_invalid_usernames_are_not_locked():
+    """A name that cannot be a user never becomes a lock file path."""
+    with locks.user_locks(["../escape", "alice"]):
+        lock_dir = locks.LOCK_DIR
+    assert sorted(os.listdir(lock_dir)) == ["user.alice.lock", "users.lock"]
+
+
+def _register(path, prefix, count):
+    """In a child process: register *count* users one at a time."""
+    for number in range(count):
+        register_new_users({f"{prefix}{number}": {"email": ""}}, [], path)
+
+
+def test_concurrent_registrations_keep_every_user(tmp_path):
+    """Commands registering different users at once lose none of them."""
+    path = str(tmp_path / "dtaas.users.registry.json")
+    children = [
+        _FORK.Process(target=_register, args=(path, prefix, 25)) for prefix in "abcd"
+    ]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join(30)
+
+    assert len(load_registry(path)) == 100
+
+
+def test_cli_imports_and_locks_without_fcntl(tmp_path):
+    """Without fcntl (as on Windows) the CLI still imports and locks work."""
+    script = (
+        "import sys\n"
+        "sys.modules['fcntl'] = None\n"
+        "import src.cmd\n"
+        "from src.pkg import locks\n"
+        "assert locks.fcntl is None\n"
+        f"with locks.user_locks(['alice'], {str(tmp_path)!r}):\n"
+        f"    with locks.files_lock({str(tmp_path)!r}):\n"
+        "        pass\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).parent.parent,
+        check=False,
+    )
+    assert result.returncode == 0, result.stderr
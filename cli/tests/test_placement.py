@@ -0,0 +1,88 @@
+"""Tests for multi-host placement of user workspaces (placement.py)."""
+
+import pytest
+from src.pkg import placement
+
+HOSTS = [
+    {"name": "local", "endpoint": "", "cpus": 8, "mem": "16G"},
+    {"name": "node2", "endpoint": "ssh://node2", "cpus": 4, "mem": "8G"},
+]
+DEMAND = (2.0, 4 << 30)
+
+
+def _users(*names, load_balance=True):
+    """Registry entries for *names* with the given load_balance flag."""
+    return {name: {"load_balance": load_balance} for name in names}
+
+
+def test_parse_size_uses_binary_units():
+    """Docker sizes are parsed to bytes with 1024-based units."""
+    assert placement.parse_size("4G") == 4 << 30
+    assert placement.parse_size("512m") == 512 << 20
+    assert placement.parse_size("1.5gib") == 3 << 29
+    with pytest.raises(ValueError):
+        placement.parse_size("4")
+
+
+def test_user_demand_is_zero_without_limits():
+    """With set_limits false a workspace reserves nothing."""
+    resources = {"cpus": 2, "mem_limit": "4G"}
+    assert placement.user_demand(resources, True) == DEMAND
+    assert placement.user_demand(resources, False) == (0.0, 0)
+
+
+def test_place_users_best_fit_fills_one_host_before_the_next():
+    """Load-balanced users go to the fullest host that still fits them."""
+    users = _users("a", "b", "c")
+
+    placed = placement.place_users(["a", "b", "c"], users, HOSTS, DEMAND)
+
+    assert placed == {"a": "node2", "b": "node2", "c": "local"}
+
+
+def test_place_users_pins_non_load_balanced_users_to_first_host():
+    """load_balance false keeps a user on the first listed host."""
+    users = _users("a", load_balance=False)
+
+    assert placement.place_users(["a"], users, HOSTS, DEMAND) == {"a": "local"}
+
+
+def test_place_users_keeps_recorded_host_and_counts_it():
+    """Users already placed keep their host and use up its capacity."""
+    users = {**_users("new"), "old1": {"host": "node2"}, "old2": {"host": "node2"}}
+
+    placed = placement.place_users(["old1", "new"], users, HOSTS, DEMAND)
+
+    assert placed == {"old1": "node2", "new": "local"}
+
+
+def test_place_users_spreads_by_count_without_limits():
+    """With no demand, hosts tie on capacity and users are spread by count."""
+    placed = placement.place_users(["a", "b"], _users("a", "b"), HOSTS, (0.0, 0))
+
+    assert sorted(placed.values()) == ["local", "node2"]
+
+
+def test_place_users_charges_each_user_its_own_demand():
+    """A user's own demand decides where it fits and what it uses up."""
+    users = {**_users("big", "new"), "old": {"host": "node2"}}
+    demands = {"big": (6.0, 12 << 30), "old": (4.0, 8 << 30)}
+
+    placed = placement.place_users(["big", "new"], users, HOSTS, DEMAND, demands)
+
+    assert placed == {"big": "local", "new": "local"}
+
+
+def test_place_users_rejects_when_no_host_fits():
+    """A load-balanced user that fits nowhere is an error, not an overcommit."""
+    hosts = [{"name": "tiny", "cpus": 1}]
+
+    with pytest.raises(ValueError, match="capacity"):
+        placement.place_users(["a"], _users("a"), hosts, DEMAND)
+
+
+def test_endpoints_maps_users_to_host_endpoints():
+    """endpoints resolves each placement to its host's Docker endpoint."""
+    placed = {"a": "local", "b": "node2"}
+
+    assert placement.endpoints(placed, HOSTS) == {"a": "", "b": "ssh://node2"}
@@ -274,6 +274,21 @@ def test_set_files_permissions_chowns_and_chmods_files_dir(tmp_path):
     ]
 
 
+def test_set_files_permissions_reseals_shared_template_files(tmp_path):
+    """The sealed template copies hardlink workspaces share are chowned back
+    to root and made read-only after the recursive chown/chmod."""
+    store = tmp_path / "files" / ".template-links"
+    store.mkdir(parents=True)
+
+    with patch("src.pkg.project.subprocess.run") as mock_run:
+        set_files_permissions(str(tmp_path))
+
+    assert mock_run.call_args.args[0] == [
+        "sudo", "find", str(store), "-type", "f",
+        "-exec", "chown", "0:0", "{}", "+", "-exec", "chmod", "a-w", "{}", "+",
+    ]
+
+
 def test_set_files_permissions_ignores_missing_sudo(tmp_path):
     """set_files_permissions swallows FileNotFoundError when sudo is unavailable."""
     (tmp_path / "files").mkdir()
@@ -0,0 +1,145 @@
+"""Tests for the event-driven 'config reconcile --watch' (reconcile_watch.py)."""
+
+import json
+import os
+import queue
+from unittest.mock import MagicMock, patch
+import pytest
+from src.pkg import reconcile_watch
+from src.pkg.state import config_hash
+# pylint: disable=redefined-outer-name
+
+
+def _write_registry(directory, users):
+    """Write dtaas.users.registry.json, bumping its mtime past the last write."""
+    path = directory / "dtaas.users.registry.json"
+    before = path.stat().st_mtime_ns if path.is_file() else 0
+    path.write_text(json.dumps({"users": users}), encoding="utf-8")
+    os.utime(path, ns=(before + 10**9, before + 10**9))
+
+
+@pytest.fixture
+def install(tmp_path):
+    """alice registered, provisioned and recorded in the state cache."""
+    _write_registry(tmp_path, {"alice": {"email": "a@x.io"}})
+    (tmp_path / "compose.users.yml").write_text(
+        "services:\n  alice:\n    image: v1\n", encoding="utf-8"
+    )
+    (tmp_path / ".dtaas.state.json").write_text(
+        json.dumps({"alice": {"config_hash": config_hash({"image": "v1"})}}),
+        encoding="utf-8",
+    )
+    with patch(
+        "src.pkg.reconcile_watch.users_lifecycle.live_states",
+        return_value={"alice": "running"},
+    ) as mock_live:
+        yield tmp_path, mock_live
+
+
+def _watcher(directory, fixer=None):
+    """A Watcher over *directory* recording every report."""
+    reports = []
+    model = reconcile_watch.Model(directory)
+    watcher = reconcile_watch.Watcher(model, lambda n, i: reports.append((n, i)), fixer)
+    return watcher, reports
+
+
+def test_events_update_only_the_affected_user(install):
+    """A pause event is drift; the unpause that follows brings it back in sync,
+    without re-reading any container state."""
+    directory, mock_live = install
+    watcher, reports = _watcher(directory)
+    assert not reports
+    events = queue.Queue()
+
+    events.put(("alice", "pause"))
+    watcher.step(events)
+    events.put(("alice", "exec_start: sh"))
+    events.put(("alice", "unpause"))
+    watcher.step(events)
+
+    assert reports == [("alice", ["status"]), ("alice", [])]
+    mock_live.assert_called_once()
+
+
+def test_events_of_other_containers_are_not_drift(install):
+    """A container that is neither a registry user nor a users compose
+    service (traefik, say) is never reported or fixed."""
+    directory, _ = install
+    fix = MagicMock()
+    fixer = reconcile_watch.Fixer(fix, debounce=0, min_interval=0)
+    watcher, reports = _watcher(directory, fixer)
+    events = queue.Queue()
+
+    events.put(("traefik", "die"))
+    watcher.step(events)
+
+    assert not reports
+    assert watcher.model.drift("traefik") == []
+    fix.assert_not_called()
+
+
+def test_registry_change_recomputes_only_changed_users(install):
+    """A user added to the registry but not provisioned is reported missing."""
+    directory, _ = install
+    watcher, reports = _watcher(directory)
+
+    _write_registry(directory, {"alice": {"email": "a@x.io"}, "bob": {"email": "b@x.io"}})
+    with patch.object(watcher.model, "drift", wraps=watcher.model.drift) as spy:
+        watcher.step(queue.Queue())
+
+    assert reports == [("bob", ["missing"])]
+    spy.assert_called_once_with("bob")
+
+
+def test_fixer_debounces_and_rate_limits():
+    """Fixes wait for quiet, then run at most once per min_interval."""
+    fix = MagicMock()
+    model = MagicMock(registry={"alice": {}})
+    model.drift.return_value = ["unexpected", "status"]
+    fixer = reconcile_watch.Fixer(fix, debounce=5, min_interval=30)
+
+    fixer.note(["alice"], now=0)
+    fixer.run(model, now=1)
+    fix.assert_not_called()
+    fixer.run(model, now=6)
+    fix.assert_called_once_with({"alice": ["status"]})
+
+    fixer.run(model, now=20)
+    assert fix.call_count == 1
+    fixer.run(model, now=40)
+    assert fix.call_count == 2
+
+
+def test_fixer_leaves_the_status_of_unexpected_services_alone(install):
+    """A paused service missing from the registry is reported but never
+    queued for a fix, so it is not retried forever."""
+    directory, _ = install
+    (directory / "compose.users.yml").write_text(
+        "services:\n  alice:\n    image: v1\n  mallory:\n    image: v1\n", encoding="utf-8"
+    )
+    fix = MagicMock()
+    fixer = reconcile_watch.Fixer(fix, debounce=0, min_interval=0)
+    watcher, reports = _watcher(directory, fixer)
+    events = queue.Queue()
+
+    events.put(("mallory", "pause"))
+    watcher.step(events)
+
+    assert reports[-1] == ("mallory", ["unexpected", "status"])
+    fix.assert_not_called()
+    assert not fixer.pending
+
+
+def test_fixer_drops_users_back_in_sync():
+    """Users fixed by other means are not fixed again."""
+    fix = MagicMock()
+    model = MagicMock()
+    model.drift.return_value = []
+    fixer = reconcile_watch.Fixer(fix, debounce=0, min_interval=0)
+
+    fixer.note(["alice"], now=0)
+    fixer.run(model, now=1)
+
+    fix.assert_not_called()
+    assert not fixer.pending
@@ -8,7 +8,13 @@ from src.pkg.registry import (
     register_new_users,
     remove_from_registry,
     read_csv_users,
+    iter_csv_users,
     set_desired_status,
+    set_hosts,
+    set_workspaces,
+    set_user_resources,
+    set_group_resources,
+    load_groups,
     _parse_csv_row,
     _partition_new,
 )
@@ -143,7 +149,7 @@ def test_parse_csv_row_rejects_invalid_load_balance():
 def test_write_registry_fsyncs_before_replace(tmp_path):
     """The registry temp file is fsync'd before the atomic rename."""
     path = str(tmp_path / "dtaas.users.registry.json")
-    with patch("src.pkg.registry.os.fsync") as mock_fsync:
+    with patch("src.pkg.utils.os.fsync") as mock_fsync:
         register_new_users({"alice": {}}, [], path)
 
     mock_fsync.assert_called_once()
@@ -221,3 +227,58 @@ def test_csv_import_round_trips_through_registry(tmp_path):
     register_new_users(read_csv_users(str(csv_path)), [], registry_path)
 
     assert set(load_registry(registry_path)) == {"alice", "bob"}
+
+
+def test_iter_csv_users_streams_rows_in_order(tmp_path):
+    """iter_csv_users yields one (username, details) pair per row, in file order."""
+    csv_path = tmp_path / "users.csv"
+    csv_path.write_text(USERS_CSV, encoding="utf-8")
+
+    rows = iter_csv_users(str(csv_path))
+
+    assert [name for name, _ in rows] == ["alice", "bob"]
+
+
+def test_set_hosts_records_placement_for_known_users(tmp_path):
+    """set_hosts stores each registry user's Docker host, skipping unknown names."""
+    path = str(tmp_path / "dtaas.users.registry.json")
+    register_new_users({"alice": {"email": "a@x.io"}}, [], path)
+
+    updated = set_hosts({"alice": "node2", "ghost": "node2"}, path)
+
+    assert updated == ["alice"]
+    assert load_registry(path)["alice"] == {"email": "a@x.io", "host": "node2"}
+
+
+def test_set_workspaces_records_template_layer(tmp_path):
+    """set_workspaces stores a user's template layer beside their other fields."""
+    path = str(tmp_path / "dtaas.users.registry.json")
+    register_new_users({"alice": {"email": "a@x.io"}}, [], path)
+
+    assert set_workspaces({"alice": "overlay", "ghost": "hardlink"}, path) == ["alice"]
+    assert load_registry(path)["alice"] == {"email": "a@x.io", "workspace": "overlay"}
+
+
+def test_set_user_resources_merges_and_unsets(tmp_path):
+    """Per-user overrides merge field by field; None removes a field."""
+    path = str(tmp_path / "dtaas.users.registry.json")
+    register_new_users({"alice": {"email": "a@x.io"}}, [], path)
+
+    set_user_resources(["alice"], {"cpus": 4, "mem_limit": "8G"}, path)
+    set_user_resources(["alice"], {"cpus": None}, path)
+    assert load_registry(path)["alice"]["resources"] == {"mem_limit": "8G"}
+
+    set_user_resources(["alice"], {"mem_limit": None}, path)
+    assert "resources" not in load_registry(path)["alice"]
+
+
+def test_set_group_resources_survives_user_writes(tmp_path):
+    """Group overrides live beside the users and are kept by other writers."""
+    path = str(tmp_path / "dtaas.users.registry.json")
+    register_new_users({"alice": {"groups": ["gpu"]}, "bob": {"groups": []}}, [], path)
+
+    members = set_group_resources("gpu", {"cpus": 8}, path)
+    remove_from_registry(["bob"], path)
+
+    assert members == ["alice"]
+    assert load_groups(path) == {"gpu": {"resources": {"cpus": 8}}}
@@ -0,0 +1,79 @@
+"""Tests for per-user/per-group resource limits and right-sizing (resources.py)."""
+
+import json
+from unittest.mock import MagicMock, patch
+import pytest
+from src.pkg import resources
+from src.pkg.project import generate_project
+# pylint: disable=redefined-outer-name
+
+DEFAULTS = {"cpus": 2, "mem_limit": "4G", "pids_limit": 4960, "shm_size": "512m"}
+
+
+def test_user_overrides_apply_groups_then_user():
+    """Group overrides apply in group order; the user's own override wins."""
+    groups = {
+        "gpu": {"resources": {"cpus": 8, "mem_limit": "32G"}},
+        "big": {"resources": {"mem_limit": "64G", "shm_size": "2G"}},
+    }
+    details = {"groups": ["gpu", "big"], "resources": {"cpus": 4}}
+
+    limits = resources.user_overrides(details, groups)
+
+    assert limits == {"cpus": 4, "mem_limit": "64G"}
+
+
+@pytest.fixture
+def provisioned(tmp_path, monkeypatch):
+    """A project dir with alice provisioned and a 'gpu' group override."""
+    generate_project(str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "compose.users.yml").write_text(
+        "services:\n  alice:\n    image: ws\n    cpus: '2'\n"
+    )
+    (tmp_path / "dtaas.users.registry.json").write_text(
+        json.dumps(
+            {
+                "users": {"alice": {"groups": ["gpu"]}},
+                "groups": {"gpu": {"resources": {"cpus": 6, "mem_limit": "12G"}}},
+            }
+        )
+    )
+    return tmp_path
+
+
+def test_resize_users_rewrites_compose_and_updates_live_container(provisioned):
+    """resize_users persists the new limits and 'docker update's the container."""
+    client, container = MagicMock(), MagicMock()
+    container.config.labels = {"com.docker.compose.service": "alice"}
+    client.compose.ps.return_value = [container]
+    with patch(
+        "src.pkg.resources.deploy.users_clients", return_value=[(client, ["alice"])]
+    ), patch("src.pkg.resources.write_state"):
+        resized, missing = resources.resize_users(["alice", "ghost"], DEFAULTS)
+
+    assert (resized, missing) == (["alice"], ["ghost"])
+    assert "cpus: '6'" in (provisioned / "compose.users.yml").read_text()
+    client.container.update.assert_called_once_with(
+        container, cpus=6.0, memory=12 << 30, memory_swap=24 << 30, pids_limit=4960
+    )
+
+
+def test_percentile_is_nearest_rank():
+    """percentile uses the nearest-rank method."""
+    values = list(range(1, 101))
+    assert resources.percentile(values, 95) == 95
+    assert resources.percentile([7], 50) == 7
+
+
+def test_suggest_limits_uses_history_percentiles(tmp_path, monkeypatch):
+    """Suggestions come from recorded samples plus headroom."""
+    monkeypatch.chdir(tmp_path)
+    history = {"alice": [[0, 80.0, 1 << 30], [1, 160.0, 2 << 30]]}
+    (tmp_path / ".dtaas.usage.json").write_text(json.dumps(history))
+    with patch("src.pkg.resources.usage.sample", return_value={}):
+        suggestions = resources.suggest_limits(["alice", "bob"], 95)
+
+    assert list(suggestions) == ["alice"]
+    assert suggestions["alice"]["cpus"] == 2.0
+    assert suggestions["alice"]["mem_limit"] == "2560m"
@@ -0,0 +1,114 @@
+"""Tests for the Traefik file-provider routes of user workspaces."""
+
+import os
+from unittest.mock import patch
+import pytest
+import yaml
+from src.pkg import routes
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def installation(tmp_path, monkeypatch):
+    """An installation directory the CLI runs from."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _config(path, tls=True):
+    """A deploy config routing through example.org."""
+    return {"server": "example.org", "path": str(path), "tls": tls}
+
+
+def _load(path=routes.ROUTES_FILE):
+    """The routes file as a mapping."""
+    with open(path, encoding="utf-8") as handle:
+        return yaml.safe_load(handle)
+
+
+def test_strip_labels_keeps_non_traefik_labels():
+    """Only traefik.* labels are dropped; an empty list goes entirely."""
+    service = {"labels": ["traefik.enable=true", "team=a"]}
+    assert routes.strip_labels(service) == {"labels": ["team=a"]}
+    assert routes.strip_labels({"labels": ["traefik.enable=true"]}) == {}
+
+
+@pytest.mark.parametrize("tls,entry_point", [(True, "web-secure"), (False, "web")])
+def test_user_route_matches_the_label_router(tls, entry_point):
+    """The file router has the rule, entry point, middleware and TLS of the labels."""
+    router, service = routes.user_route("alice", "example.org", tls)
+
+    assert router["rule"] == "Host(`example.org`) && PathPrefix(`/alice`)"
+    assert router["entryPoints"] == [entry_point]
+    assert router["middlewares"] == ["traefik-forward-auth@docker"]
+    assert ("tls" in router) is tls
+    assert service["loadBalancer"]["servers"] == [{"url": "http://dtaas-cli-alice:8080"}]
+
+
+def test_write_routes_routes_every_user_and_carries_tls(installation):
+    """One file holds every user's router plus config/tls.yml's tls section."""
+    (installation / "config").mkdir()
+    (installation / "config" / "tls.yml").write_text(
+        "tls:\n  certificates:\n    - certFile: /c.pem\n", encoding="utf-8"
+    )
+
+    assert routes.write_routes(["bob", "alice"], _config(installation)) is True
+
+    data = _load()
+    assert list(data["http"]["routers"]) == ["alice", "bob"]
+    assert data["tls"] == {"certificates": [{"certFile": "/c.pem"}]}
+    assert not os.path.exists(routes.ROUTES_FILE + ".tmp")
+
+
+def test_write_routes_leaves_an_unchanged_file_alone(installation):
+    """Rewriting the same routes does not touch the file (no Traefik reload)."""
+    routes.write_routes(["alice"], _config(installation))
+    with patch("src.pkg.routes.os.replace") as mock_replace:
+        assert routes.write_routes(["alice"], _config(installation)) is False
+    mock_replace.assert_not_called()
+
+
+def test_remove_routes_drops_users(installation):
+    """Removing the last user leaves a file without an http section."""
+    routes.write_routes(["alice", "bob"], _config(installation, tls=False))
+
+    routes.remove_routes(["alice"])
+    assert list(_load()["http"]["services"]) == ["bob"]
+    routes.remove_routes(["bob"])
+    assert "http" not in (_load() or {})
+
+
+def test_remove_routes_without_file_is_a_no_op(installation):
+    """Nothing to remove when routing was never "file"."""
+    assert routes.remove_routes(["alice"]) is False
+    assert not (installation / routes.ROUTES_FILE).exists()
+
+
+def test_check_traefik_requires_the_routes_mount(installation):
+    """The traefik service must bind-mount config/dynamic."""
+    compose = installation / "docker-compose.yml"
+    compose.write_text(
+        "services:\n  traefik:\n    volumes:\n      - ./config/tls.yml:/etc/traefik/tls.yml\n",
+        encoding="utf-8",
+    )
+    with pytest.raises(ValueError, match="config/dynamic"):
+        routes.check_traefik(compose)
+
+    compose.write_text(
+        "services:\n  traefik:\n    volumes:\n      - ./config/dynamic:/etc/traefik/dynamic\n",
+        encoding="utf-8",
+    )
+    routes.check_traefik(compose)
+    routes.check_traefik(installation / "missing.yml")
+
+
+def test_add_routes_keeps_routed_and_provisioned_users(installation):
+    """add_routes adds to the users already routed and those in the users
+    compose files, rather than replacing them."""
+    (installation / "compose.users.yml").write_text(
+        "services:\n  carol: {image: ws}\n", encoding="utf-8"
+    )
+    routes.write_routes(["alice"], _config(installation, tls=False))
+
+    assert routes.add_routes(["bob"], _config(installation, tls=False)) is True
+    assert list(_load()["http"]["routers"]) == ["alice", "bob", "carol"]
@@ -0,0 +1,160 @@
+"""Tests for the time-based lifecycle scheduler (scheduler.py)."""
+
+import json
+from datetime import datetime
+from unittest.mock import patch
+import pytest
+from python_on_whales.exceptions import DockerException
+from src.pkg import scheduler
+from src.pkg.registry import load_registry, set_desired_status
+# pylint: disable=redefined-outer-name
+
+NIGHTS = {"name": "nights", "groups": ["students"], "pause": "0 20 * * *", "resume": "0 7 * * *"}
+
+
+def _at(day, hour, minute=0):
+    """The timestamp of 2026-10-<day> <hour>:<minute>, local time."""
+    return datetime(2026, 10, day, hour, minute).timestamp()
+
+
+def _lifecycle(status):
+    """A users_lifecycle stand-in recording *status* for the users it gets."""
+
+    def act(names):
+        set_desired_status(names, status)
+        return list(names), [], []
+
+    return act
+
+
+@pytest.fixture
+def lifecycle(tmp_path, monkeypatch):
+    """A registry of students and staff, with patched lifecycle calls."""
+    monkeypatch.chdir(tmp_path)
+    users = {
+        "alice": {"groups": ["students"]},
+        "bob": {"groups": ["students"]},
+        "carol": {"groups": ["students"], "desired_status": "paused"},
+        "dave": {"groups": ["staff"]},
+    }
+    (tmp_path / "dtaas.users.registry.json").write_text(json.dumps({"users": users}))
+    with patch(
+        "src.pkg.scheduler.users_lifecycle.pause_users", side_effect=_lifecycle("paused")
+    ) as pause, patch(
+        "src.pkg.scheduler.users_lifecycle.stop_users", side_effect=_lifecycle("stopped")
+    ) as stop, patch(
+        "src.pkg.scheduler.users_lifecycle.resume_users", side_effect=_lifecycle("running")
+    ) as resume:
+        yield {"pause": pause, "stop": stop, "resume": resume}
+
+
+def _schedules(*tables):
+    """Parsed schedules, failing the test on any problem."""
+    schedules, errors = scheduler.parse_schedules(list(tables))
+    assert not errors
+    return schedules
+
+
+def test_pause_then_resume_only_what_the_scheduler_suspended(lifecycle):
+    """carol was paused by hand, so the night's resume leaves her paused."""
+    schedules = _schedules(NIGHTS)
+
+    applied = scheduler.tick(schedules, now=_at(19, 20, 1))
+    assert applied == [("nights", "pause", datetime(2026, 10, 19, 20), ["alice", "bob"])]
+    assert scheduler.load_scheduler_state()["suspended"] == {"alice": "nights", "bob": "nights"}
+
+    assert not scheduler.tick(schedules, now=_at(19, 23))  # nothing due since 20:01
+
+    scheduler.tick(schedules, now=_at(20, 7, 1))
+    lifecycle["resume"].assert_called_once_with(["alice", "bob"])
+    assert {n: d.get("desired_status") for n, d in load_registry().items()} == {
+        "alice": "running",
+        "bob": "running",
+        "carol": "paused",
+        "dave": None,
+    }
+    assert scheduler.load_scheduler_state()["suspended"] == {}
+
+
+def test_acts_in_bounded_batches(lifecycle):
+    """--batch-size splits the users over several lifecycle calls."""
+    scheduler.tick(_schedules(NIGHTS), now=_at(19, 20, 1), batch_size=1)
+    assert [call.args[0] for call in lifecycle["pause"].call_args_list] == [["alice"], ["bob"]]
+
+
+def test_failed_batch_keeps_the_batches_done_before_it(lifecycle):
+    """Users paused before a batch fails are recorded as suspended, and the
+    next tick pauses the rest and can resume them all."""
+    pause = _lifecycle("paused")
+
+    def pause_one_then_fail(names):
+        if lifecycle["pause"].call_count > 1:
+            raise DockerException(["docker"], 1)
+        return pause(names)
+
+    lifecycle["pause"].side_effect = pause_one_then_fail
+    schedules = _schedules(NIGHTS)
+
+    with pytest.raises(DockerException):
+        scheduler.tick(schedules, now=_at(19, 20, 1), batch_size=1)
+    state = scheduler.load_scheduler_state()
+    assert state == {"last_run": None, "suspended": {"alice": "nights"}}
+
+    lifecycle["pause"].side_effect = pause
+    scheduler.tick(schedules, now=_at(19, 20, 2), batch_size=1)
+    lifecycle["pause"].assert_called_with(["bob"])
+    scheduler.tick(schedules, now=_at(20, 7, 1))
+    lifecycle["resume"].assert_called_once_with(["alice", "bob"])
+
+
+def test_catches_up_on_the_latest_missed_time(lifecycle):
+    """A first run after 20:00 pauses; the earlier 07:00 resume is superseded."""
+    scheduler.tick(_schedules(NIGHTS), now=_at(19, 23))
+    lifecycle["pause"].assert_called_once_with(["alice", "bob"])
+    lifecycle["resume"].assert_not_called()
+
+
+def test_stop_covers_running_and_scheduler_paused_users(lifecycle):
+    """A later stop also stops users the scheduler paused, but not carol."""
+    schedules = _schedules({**NIGHTS, "stop": "0 22 * * *"})
+    scheduler.tick(schedules, now=_at(19, 20, 1))
+    set_desired_status(["bob"], "running")  # resumed by hand: no longer ours
+
+    scheduler.tick(schedules, now=_at(19, 22, 1))
+    lifecycle["stop"].assert_called_once_with(["alice", "bob"])
+    assert scheduler.load_scheduler_state()["suspended"] == {"alice": "nights", "bob": "nights"}
+
+
+def test_dry_run_changes_nothing(lifecycle):
+    """A dry run reports the users and leaves the state unwritten."""
+    applied = scheduler.tick(_schedules(NIGHTS), now=_at(19, 20, 1), dry_run=True)
+    assert applied[0][3] == ["alice", "bob"]
+    lifecycle["pause"].assert_not_called()
+    assert scheduler.load_scheduler_state()["last_run"] is None
+
+
+def test_parse_schedules_reports_every_problem():
+    """Missing names, bad groups, bad cron times, duplicates, no actions."""
+    _, errors = scheduler.parse_schedules(
+        [
+            {"pause": "0 20 * * *"},
+            {"name": "a", "groups": "students", "pause": "0 25 * * *"},
+            {"name": "b"},
+            {"name": "c", "resume": "0 7 * * *"},
+            {"name": "c", "resume": "0 7 * * *"},
+        ]
+    )
+    assert errors[0] == "common.users.schedules[0] requires a 'name'"
+    assert errors[1] == "common.users.schedules.a.groups must be a list of strings"
+    assert errors[2].startswith("common.users.schedules.a.pause: invalid cron expression")
+    assert errors[3] == "common.users.schedules.b needs at least one of pause, stop, resume"
+    assert errors[4] == "common.users.schedules: duplicate name 'c'"
+
+
+def test_upcoming_lists_next_times_soonest_first():
+    """Each action's next time, soonest first."""
+    (schedule,) = _schedules(NIGHTS)
+    assert scheduler.upcoming(schedule, datetime(2026, 10, 19, 12)) == [
+        ("pause", datetime(2026, 10, 19, 20)),
+        ("resume", datetime(2026, 10, 20, 7)),
+    ]
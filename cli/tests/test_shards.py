@@ -0,0 +1,138 @@
+"""Tests for the sharded users compose layout (shards.py)."""
+
+import yaml
+from src.pkg import shards
+
+BASE = {"version": "3", "networks": {"users": {"external": True}}}
+
+
+def _compose(*names):
+    """A logical users compose dict with one stub service per name."""
+    return {**BASE, "services": {name: {"image": "ws"} for name in names}}
+
+
+def test_assign_shards_disabled_keeps_users_unsharded(tmp_path):
+    """shard_size 0 places nobody, so everyone stays in compose.users.yml."""
+    assert shards.assign_shards(["alice"], 0, str(tmp_path)) == {}
+    assert shards.group_by_shard(["alice"], str(tmp_path)) == {shards.LEGACY: ["alice"]}
+
+
+def test_assign_shards_fills_shards_up_to_size(tmp_path):
+    """New users fill the newest shard with room before opening another."""
+    directory = str(tmp_path)
+    placed = shards.assign_shards(["a", "b", "c"], 2, directory)
+
+    assert placed == {"a": "0001", "b": "0001", "c": "0002"}
+    assert shards.assign_shards(["d", "a"], 2, directory) == {"d": "0002"}
+
+
+def test_assign_shards_size_one_is_one_project_per_user(tmp_path):
+    """shard_size 1 gives every user its own shard."""
+    placed = shards.assign_shards(["a", "b"], 1, str(tmp_path))
+
+    assert placed == {"a": "0001", "b": "0002"}
+
+
+def test_write_and_load_round_trip_across_shards(tmp_path):
+    """Writing splits services into shard files; loading merges them back."""
+    directory = str(tmp_path)
+    shards.assign_shards(["b", "c"], 1, directory)
+
+    shards.write_users_compose(_compose("a", "b", "c"), directory)
+
+    legacy = yaml.safe_load((tmp_path / "compose.users.yml").read_text())
+    assert set(legacy["services"]) == {"a"}
+    shard = yaml.safe_load((tmp_path / "compose.users.0001.yml").read_text())
+    assert set(shard["services"]) == {"b"} and shard["networks"] == BASE["networks"]
+    assert set(shards.load_users_compose(directory)["services"]) == {"a", "b", "c"}
+
+
+def test_overlay_volumes_follow_their_users_shard(tmp_path):
+    """Per-user top-level volumes are split like services and merged back."""
+    directory = str(tmp_path)
+    shards.assign_shards(["b"], 1, directory)
+    compose = {**_compose("a", "b"), "volumes": {"b": {"driver": "local"}}}
+
+    shards.write_users_compose(compose, directory)
+
+    legacy = yaml.safe_load((tmp_path / "compose.users.yml").read_text())
+    assert "volumes" not in legacy
+    shard = yaml.safe_load((tmp_path / "compose.users.0001.yml").read_text())
+    assert shard["volumes"] == {"b": {"driver": "local"}}
+    assert shards.load_users_compose(directory)["volumes"] == compose["volumes"]
+
+
+def test_write_only_touches_shards_of_named_users(tmp_path):
+    """only= rewrites just the shards holding those users."""
+    directory = str(tmp_path)
+    shards.assign_shards(["b", "c"], 1, directory)
+    shards.write_users_compose(_compose("b", "c"), directory)
+    untouched = tmp_path / "compose.users.0002.yml"
+    untouched.write_text("sentinel: true\n")
+
+    shards.write_users_compose(_compose("b", "c"), directory, only=["b"])
+
+    assert untouched.read_text() == "sentinel: true\n"
+
+
+def test_write_removes_emptied_shard_and_unassign(tmp_path):
+    """Deleting a shard's last user removes its file and index entry."""
+    directory = str(tmp_path)
+    shards.assign_shards(["b"], 1, directory)
+    shards.write_users_compose(_compose("b"), directory)
+
+    shards.write_users_compose(_compose(), directory, only=["b"])
+    shards.unassign(["b"], directory)
+
+    assert not (tmp_path / "compose.users.0001.yml").exists()
+    assert shards.load_index(directory) == {}
+
+
+def test_project_name_is_explicit_for_numbered_shards():
+    """Numbered shards are their own compose projects; LEGACY keeps the default."""
+    assert shards.project_name(shards.LEGACY) is None
+    assert shards.project_name("0003") == "dtaas-users-0003"
+
+
+def test_assign_shards_keeps_remote_users_in_their_own_shards(tmp_path):
+    """Users on another Docker host always get a numbered shard on that host."""
+    directory = str(tmp_path)
+    endpoints = {"b": "ssh://node2", "c": "ssh://node2", "d": "node3"}
+
+    placed = shards.assign_shards(["a", "b", "c", "d"], 0, directory, endpoints)
+
+    assert placed == {"b": "0001", "c": "0001", "d": "0002"}
+    assert shards.shard_endpoint("0001", directory) == "ssh://node2"
+    assert shards.shard_endpoint("0002", directory) == "node3"
+    assert shards.shard_endpoint(shards.LEGACY, directory) == ""
+
+
+def test_unassign_forgets_endpoint_of_emptied_shard(tmp_path):
+    """A shard whose last user is gone no longer records an endpoint."""
+    directory = str(tmp_path)
+    shards.assign_shards(["b"], 0, directory, {"b": "ssh://node2"})
+
+    shards.unassign(["b"], directory)
+
+    assert shards.shard_endpoint("0001", directory) == ""
+
+
+def test_docker_options_distinguish_hosts_and_contexts():
+    """URLs become DOCKER_HOST, other names a docker context, "" the local daemon."""
+    assert shards.docker_options("") == {}
+    assert shards.docker_options("ssh://node2") == {"host": "ssh://node2"}
+    assert shards.docker_options("node3") == {"context": "node3"}
+
+
+def test_update_users_compose_keeps_other_commands_users(tmp_path):
+    """Only the named users are merged in or dropped; users written by
+    another command since this one loaded the files stay."""
+    directory = str(tmp_path)
+    shards.write_users_compose(_compose("alice", "carol"), directory)
+    stale = _compose("bob", "carol")
+    del stale["services"]["carol"]
+
+    merged = shards.update_users_compose(stale, ["bob", "carol"], directory)
+
+    assert sorted(merged["services"]) == ["alice", "bob"]
+    assert sorted(shards.load_users_compose(directory)["services"]) == ["alice", "bob"]
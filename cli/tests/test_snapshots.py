@@ -0,0 +1,103 @@
+"""Tests for incremental hardlink snapshots of user workspaces (snapshots.py)."""
+
+import os
+from unittest.mock import patch
+import pytest
+from src.pkg import snapshots
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def files_dir(tmp_path):
+    """files/ with scaffolding and two user workspaces."""
+    files = tmp_path / "files"
+    (files / "template").mkdir(parents=True)
+    (files / "alice" / "work").mkdir(parents=True)
+    (files / "alice" / "work" / "model.txt").write_text("v1")
+    (files / "alice" / "notes.md").write_text("notes")
+    (files / "bob").mkdir()
+    (files / "bob" / "data.csv").write_text("1,2")
+    return files
+
+
+def _tree(snapshot_dir):
+    """{relative path: inode} of the regular files below *snapshot_dir*."""
+    return {
+        str(p.relative_to(snapshot_dir)): p.stat().st_ino
+        for p in snapshot_dir.rglob("*")
+        if p.is_file()
+    }
+
+
+def test_first_snapshot_copies_every_workspace(files_dir):
+    """A first snapshot is a full copy, never linked to the live files."""
+    manifest = snapshots.create(files_dir)
+
+    assert sorted(manifest["users"]) == ["alice", "bob"]
+    assert manifest["users"]["alice"] == {"files": 2, "bytes": 7, "copied": 2, "linked": 0}
+    copy = files_dir / ".snapshots" / manifest["id"] / "alice" / "work" / "model.txt"
+    assert copy.read_text() == "v1"
+    assert copy.stat().st_ino != (files_dir / "alice" / "work" / "model.txt").stat().st_ino
+    assert snapshots.list_snapshots(files_dir) == [manifest]
+
+
+def test_next_snapshot_links_unchanged_and_copies_delta(files_dir):
+    """Unchanged files are hardlinked to the previous snapshot."""
+    first = snapshots.create(files_dir)
+    (files_dir / "alice" / "notes.md").write_text("changed notes")
+    with patch("src.pkg.snapshots._new_id", return_value="z-second"):
+        second = snapshots.create(files_dir)
+
+    assert second["users"]["alice"]["linked"] == 1
+    assert second["users"]["alice"]["copied"] == 1
+    root = files_dir / ".snapshots"
+    old, new = _tree(root / first["id"]), _tree(root / "z-second")
+    assert new["alice/work/model.txt"] == old["alice/work/model.txt"]
+    assert new["alice/notes.md"] != old["alice/notes.md"]
+    assert (root / first["id"] / "alice" / "notes.md").read_text() == "notes"
+
+
+def test_snapshot_unknown_user_is_rejected(files_dir):
+    """Only users with a workspace can be snapshotted."""
+    with pytest.raises(ValueError, match="zed"):
+        snapshots.create(files_dir, ["zed"])
+
+
+def test_restore_swaps_workspace_back(files_dir):
+    """restore brings back the snapshot's files and discards the current ones."""
+    manifest = snapshots.create(files_dir, ["alice"])
+    (files_dir / "alice" / "work" / "model.txt").write_text("broken")
+    (files_dir / "alice" / "new.txt").write_text("new")
+
+    with patch("src.pkg.user_files.utils.run_detached") as mock_purge:
+        restored = snapshots.restore(files_dir, manifest["id"])
+
+    assert restored == ["alice"]
+    assert (files_dir / "alice" / "work" / "model.txt").read_text() == "v1"
+    assert not (files_dir / "alice" / "new.txt").exists()
+    (batch,) = (files_dir / ".trash").iterdir()
+    assert (batch / "alice" / "new.txt").exists()
+    mock_purge.assert_called_once()
+
+
+def test_restore_unknown_snapshot_or_user(files_dir):
+    """An unknown id or a user the snapshot lacks is a ValueError."""
+    manifest = snapshots.create(files_dir, ["bob"])
+    with pytest.raises(ValueError, match="No snapshot"):
+        snapshots.restore(files_dir, "nope")
+    with pytest.raises(ValueError, match="alice"):
+        snapshots.restore(files_dir, manifest["id"], ["alice"])
+
+
+def test_prune_keeps_newest(files_dir):
+    """prune discards the oldest snapshots beyond *keep*."""
+    ids = []
+    for name in ("a-1", "b-2", "c-3"):
+        with patch("src.pkg.snapshots._new_id", return_value=name):
+            ids.append(snapshots.create(files_dir)["id"])
+
+    with patch("src.pkg.snapshots.user_files.discard") as mock_discard:
+        assert snapshots.prune(files_dir, 1) == ["a-1", "b-2"]
+    root = files_dir / ".snapshots"
+    assert mock_discard.call_args.args[1] == [root / "a-1", root / "b-2"]
+    assert os.path.isdir(root / "c-3")
@@ -0,0 +1,133 @@
+"""Tests for the per-phase startup timings of new workspaces."""
+
+import urllib.error
+from unittest.mock import MagicMock, patch
+from python_on_whales.exceptions import DockerException
+from src.pkg import startup_timing
+# pylint: disable=protected-access
+
+
+def _container(service, status, health=None):
+    """A compose container of *service* in *status* with a health status."""
+    container = MagicMock()
+    container.config.labels = {"com.docker.compose.service": service}
+    container.state.status = status
+    container.state.health = None if health is None else MagicMock(status=health)
+    return container
+
+
+def test_timings_phase_records_seconds_per_user():
+    """A timed block is recorded for every user of the batch."""
+    timings = startup_timing.Timings()
+    with patch("src.pkg.startup_timing.time.monotonic", side_effect=[10.0, 12.5]):
+        with timings.phase("render", ["alice", "bob"]):
+            pass
+
+    assert timings.phases == {"alice": {"render": 2.5}, "bob": {"render": 2.5}}
+
+
+def test_timings_phase_skips_failed_block():
+    """A phase that raises is not recorded."""
+    timings = startup_timing.Timings()
+    try:
+        with timings.phase("render", ["alice"]):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+
+    assert not timings.phases
+
+
+def test_observe_maps_services_to_status_and_health():
+    """Containers are keyed by compose service; no healthcheck is None."""
+    client = MagicMock()
+    client.compose.ps.return_value = [
+        _container("alice", "running", "starting"),
+        _container("bob", "created"),
+    ]
+    with patch(
+        "src.pkg.startup_timing.deploy.users_clients", return_value=[(client, ["alice", "bob"])]
+    ):
+        observed = startup_timing._observe(["alice", "bob"])
+
+    assert observed == {"alice": ("running", "starting"), "bob": ("created", None)}
+    client.compose.ps.assert_called_once_with(services=["alice", "bob"])
+
+
+def test_observe_is_empty_when_docker_unreachable():
+    """A Docker error means nothing observed this round."""
+    with patch(
+        "src.pkg.startup_timing.deploy.users_clients", side_effect=DockerException(["docker"], 1)
+    ):
+        assert startup_timing._observe(["alice"]) == {}
+
+
+def test_wait_until_ready_records_running_then_healthy():
+    """Each phase is timed from the end of the one before."""
+    timings = startup_timing.Timings(wait=True)
+    rounds = [
+        {"alice": ("created", None)},
+        {"alice": ("running", "starting")},
+        {"alice": ("running", "healthy")},
+    ]
+    clock = iter([0.0, 0.0, 0.0, 3.0, 4.0, 8.0, 9.0])
+    with patch("src.pkg.startup_timing._observe", side_effect=rounds), patch(
+        "src.pkg.startup_timing.time.monotonic", side_effect=lambda: next(clock)
+    ), patch("src.pkg.startup_timing.time.sleep"):
+        startup_timing.wait_until_ready(timings, ["alice"])
+
+    assert timings.phases == {"alice": {"running": 3.0, "healthy": 5.0}}
+
+
+def test_wait_until_ready_probes_route_when_asked():
+    """With a probe URL, reachability follows running (no healthcheck)."""
+    timings = startup_timing.Timings(wait=True, probe="https://localhost")
+    with patch(
+        "src.pkg.startup_timing._observe", return_value={"alice": ("running", None)}
+    ), patch("src.pkg.startup_timing.reachable", return_value=True) as mock_reach, patch(
+        "src.pkg.startup_timing.time.sleep"
+    ):
+        startup_timing.wait_until_ready(timings, ["alice"])
+
+    assert set(timings.phases["alice"]) == {"running", "reachable"}
+    mock_reach.assert_called_once_with("https://localhost", "alice")
+
+
+def test_wait_until_ready_reports_users_not_ready(capsys):
+    """Users still pending at the timeout are named with their phase."""
+    timings = startup_timing.Timings(wait=True)
+    with patch("src.pkg.startup_timing._observe", return_value={}), patch(
+        "src.pkg.startup_timing.time.sleep"
+    ):
+        startup_timing.wait_until_ready(timings, ["alice"], timeout=0)
+
+    assert "'alice' not running after 0s" in capsys.readouterr().out
+    assert not timings.phases
+
+
+def test_reachable_treats_traefik_errors_as_unrouted():
+    """404/502/503/504 mean not routed yet; a redirect or 401 is an answer."""
+    opener = MagicMock()
+    with patch("src.pkg.startup_timing._no_redirect", return_value=opener):
+        for code, expected in ((404, False), (503, False), (302, True), (401, True)):
+            opener.open.side_effect = urllib.error.HTTPError("u", code, "", {}, None)
+            assert startup_timing.reachable("http://localhost/", "alice") is expected
+        opener.open.side_effect = urllib.error.URLError("refused")
+        assert startup_timing.reachable("http://localhost", "alice") is False
+
+    assert opener.open.call_args.args[0] == "http://localhost/alice"
+
+
+def test_summary_reports_percentiles_and_total():
+    """Each phase and the per-user total get nearest-rank percentiles."""
+    phases = {
+        "alice": {"render": 1.0, "running": 2.0},
+        "bob": {"render": 3.0},
+        "carol": {},
+    }
+
+    rows = startup_timing.summary(phases)
+
+    assert list(rows) == ["render", "running", "total"]
+    assert rows["render"] == {"users": 2, "p50": 1.0, "p90": 3.0, "p99": 3.0, "max": 3.0}
+    assert rows["total"]["max"] == 3.0
@@ -7,6 +7,7 @@ from src.pkg.state import (
     config_hash,
     build_state,
     write_state,
+    record_startup,
     load_state,
     find_drift,
     _service_facts,
@@ -51,6 +52,50 @@ def test_write_state_writes_file(tmp_path):
     assert data["alice"]["config_hash"].startswith("sha256:")
 
 
+def test_write_state_keeps_startup_timings_of_remaining_users(tmp_path):
+    """A new snapshot carries each remaining user's startup timings over."""
+    path = tmp_path / ".dtaas.state.json"
+    path.write_text(
+        json.dumps({"alice": {"startup": {"running": 1.5}}, "bob": {"startup": {}}}),
+        encoding="utf-8",
+    )
+    with patch("src.pkg.state._service_facts", return_value={}):
+        state = write_state({"alice": {"image": "x"}}, str(path))
+
+    assert state["alice"]["startup"] == {"running": 1.5}
+    assert "bob" not in state
+
+
+def test_record_startup_stores_timings_of_known_users(tmp_path):
+    """record_startup sets 'startup' on present entries, skipping others."""
+    path = tmp_path / ".dtaas.state.json"
+    path.write_text(json.dumps({"alice": {"status": "running"}}), encoding="utf-8")
+
+    record_startup({"alice": {"render": 0.2}, "ghost": {"render": 0.1}}, str(path))
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data == {"alice": {"status": "running", "startup": {"render": 0.2}}}
+
+
+def test_record_startup_without_timings_leaves_file_alone(tmp_path):
+    """Nothing to store: no state file is created."""
+    path = tmp_path / ".dtaas.state.json"
+
+    record_startup({"alice": {}}, str(path))
+
+    assert not path.exists()
+
+
+def test_record_startup_leaves_corrupt_cache_alone(tmp_path):
+    """A corrupt cache does not fail the add that records timings."""
+    path = tmp_path / ".dtaas.state.json"
+    path.write_text("{not json", encoding="utf-8")
+
+    assert record_startup({"alice": {"render": 0.2}}, str(path)) == {}
+
+    assert path.read_text(encoding="utf-8") == "{not json"
+
+
 def test_service_facts_maps_service_label_to_container(tmp_path):
     """_service_facts keys facts by the compose service label."""
     container = MagicMock()
@@ -60,7 +105,7 @@ def test_service_facts_maps_service_label_to_container(tmp_path):
     client = MagicMock()
     client.compose.ps.return_value = [container]
 
-    with patch("src.pkg.state.DockerClient", return_value=client):
+    with patch("src.pkg.state.deploy._users_client", return_value=client):
         facts = _service_facts()
 
     assert facts == {"alice": ("cid1", "running")}
@@ -68,10 +113,9 @@ def test_service_facts_maps_service_label_to_container(tmp_path):
 
 def test_service_facts_returns_empty_on_docker_error():
     """A Docker failure degrades to an empty fact mapping (best-effort)."""
-    with patch(
-        "src.pkg.state.DockerClient",
-        side_effect=DockerException(["docker", "compose", "ps"], 1),
-    ):
+    client = MagicMock()
+    client.compose.ps.side_effect = DockerException(["docker", "compose", "ps"], 1)
+    with patch("src.pkg.state.deploy._users_client", return_value=client):
         assert _service_facts() == {}
 
 
@@ -0,0 +1,141 @@
+"""Tests for the shared template layer of user workspaces (template_layer.py)."""
+
+import os
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+from python_on_whales.exceptions import DockerException
+from src.pkg import template_layer
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def files_dir(tmp_path):
+    """A files/ directory with a small template: a file, a subdir, a symlink."""
+    template = tmp_path / "template"
+    (template / "notebooks").mkdir(parents=True)
+    (template / "README.md").write_text("hello")
+    (template / "notebooks" / "intro.ipynb").write_text("{}")
+    (template / "docs").symlink_to("notebooks")
+    return tmp_path
+
+
+def test_link_template_shares_the_template_files(files_dir):
+    """hardlink workspaces link every file to its sealed copy and recreate
+    dirs and symlinks."""
+    template_layer.prepare_workspace(files_dir, "alice", "hardlink")
+    template_layer.prepare_workspace(files_dir, "bob", "hardlink")
+
+    workspace = files_dir / "alice"
+    readme = workspace / "README.md"
+    store = files_dir / template_layer.LINK_STORE_DIR
+    assert readme.read_text() == "hello"
+    assert os.path.samefile(readme, files_dir / "bob" / "README.md")
+    assert os.path.samefile(readme, store / "README.md")
+    assert not readme.stat().st_mode & 0o222
+    intro = Path("notebooks") / "intro.ipynb"
+    assert os.path.samefile(workspace / intro, store / intro)
+    assert (workspace / "notebooks").is_dir()
+    assert not (workspace / "notebooks").is_symlink()
+    assert os.readlink(workspace / "docs") == "notebooks"
+
+
+def test_template_edits_do_not_reach_linked_workspaces(files_dir):
+    """The template itself is never linked: editing it in place leaves
+    existing workspaces alone, and the next workspace gets the new version."""
+    template_layer.prepare_workspace(files_dir, "alice", "hardlink")
+    readme = files_dir / "template" / "README.md"
+    stat = readme.stat()
+    readme.write_text("edited")
+    os.utime(readme, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    template_layer.prepare_workspace(files_dir, "bob", "hardlink")
+
+    assert (files_dir / "alice" / "README.md").read_text() == "hello"
+    assert (files_dir / "bob" / "README.md").read_text() == "edited"
+
+
+def test_files_that_cannot_be_sealed_are_copied(files_dir):
+    """Without a verified seal a file is copied, never shared."""
+    with patch("src.pkg.template_layer._sealed", return_value=False):
+        template_layer.prepare_workspace(files_dir, "alice", "hardlink")
+
+    readme = files_dir / "alice" / "README.md"
+    assert readme.read_text() == "hello"
+    assert readme.stat().st_nlink == 1
+
+
+def test_hardlink_leaves_an_existing_workspace_alone(files_dir):
+    """A user who already has files/<user> keeps it untouched."""
+    (files_dir / "alice").mkdir()
+    (files_dir / "alice" / "mine.txt").write_text("mine")
+
+    template_layer.prepare_workspace(files_dir, "alice", "hardlink")
+
+    assert [p.name for p in (files_dir / "alice").iterdir()] == ["mine.txt"]
+
+
+def test_overlay_creates_upper_and_work_dirs(files_dir):
+    """overlay workspaces start empty: the template is the lower layer."""
+    template_layer.prepare_workspace(files_dir, "alice", "overlay")
+
+    assert not list((files_dir / "alice").iterdir())
+    assert (files_dir / template_layer.OVERLAY_WORK_DIR / "alice").is_dir()
+
+
+def test_choose_layers_falls_back_to_hardlink_without_overlay():
+    """Endpoints whose daemon is not on overlay2 get hardlink workspaces."""
+    drivers = {"": "overlay2", "ssh://node2": "btrfs"}
+    shard_of = {"alice": "", "bob": "0001"}
+
+    def client(host=None, **_):
+        info = SimpleNamespace(driver=drivers[host or ""])
+        return SimpleNamespace(system=SimpleNamespace(info=lambda: info))
+
+    with patch("src.pkg.template_layer.DockerClient", side_effect=client), patch(
+        "src.pkg.template_layer.shards.group_by_shard",
+        return_value={"": ["alice"], "0001": ["bob"]},
+    ), patch(
+        "src.pkg.template_layer.shards.shard_endpoint",
+        side_effect=lambda s: {"": "", "0001": "ssh://node2"}[s],
+    ):
+        layers = template_layer.choose_layers(list(shard_of), "overlay")
+
+    assert layers == {"alice": "overlay", "bob": "hardlink"}
+
+
+def test_overlay_unsupported_when_daemon_unreachable():
+    """A daemon that cannot be asked is not assumed to support overlay."""
+    with patch("src.pkg.template_layer.DockerClient") as mock_client:
+        mock_client.return_value.system.info.side_effect = DockerException(["docker"], 1)
+        assert template_layer.overlay_supported("") is False
+
+
+def test_recorded_layers_default_to_copy():
+    """Users provisioned without a recorded layer hold full copies."""
+    section = {"alice": {"workspace": "overlay"}, "bob": {"email": "b@x.io"}}
+    assert template_layer.recorded_layers(section) == {"alice": "overlay", "bob": "copy"}
+
+
+def _volume(name, username, upper):
+    """A Docker volume as 'docker volume ls' would list it."""
+    return SimpleNamespace(
+        name=name,
+        labels={template_layer.COMPOSE_VOLUME_LABEL: username},
+        options={"type": "overlay", "o": f"lowerdir=/x/files/template,upperdir={upper},workdir=/w"},
+    )
+
+
+def test_remove_overlay_volumes_removes_only_the_users_overlays():
+    """Only the deleted users' overlay volumes are removed, per endpoint."""
+    alice = _volume("dtaas-users-0001_alice", "alice", "/x/files/alice")
+    other = _volume("dtaas_alice", "alice", "/x/data")
+    bob = _volume("dtaas-users-0001_bob", "bob", "/x/files/bob")
+    with patch("src.pkg.template_layer.DockerClient") as mock_client, patch(
+        "src.pkg.template_layer.shards.group_by_shard", return_value={"0001": ["alice"]}
+    ), patch("src.pkg.template_layer.shards.shard_endpoint", return_value=""):
+        mock_client.return_value.volume.list.return_value = [alice, other, bob]
+        template_layer.remove_overlay_volumes(["alice"])
+
+    mock_client.return_value.volume.remove.assert_called_once_with([alice])
@@ -0,0 +1,136 @@
+"""Tests for the per-invocation phase tracing ('dtaas --trace')."""
+
+import json
+from unittest.mock import patch
+import pytest
+from click.testing import CliRunner
+from src.cmd import dtaas
+from src.pkg import trace
+# pylint: disable=protected-access
+
+
+@pytest.fixture(autouse=True)
+def fresh_tracer(monkeypatch):
+    """Each test starts with an empty tracer and no DTAAS_TRACE."""
+    monkeypatch.setattr(trace, "_TRACER", trace._Tracer())
+    monkeypatch.delenv(trace.TRACE_ENV, raising=False)
+
+
+def test_span_adds_to_category_totals_without_recording_events():
+    """Untraced spans only count: no events are kept."""
+    with trace.span("load a.yml", "yaml"):
+        pass
+    with trace.span("load b.yml", "yaml"):
+        pass
+
+    count, total = trace._TRACER.totals["yaml"]
+    assert count == 2 and total >= 0
+    assert trace._TRACER.events is None
+
+
+def test_span_is_recorded_when_block_raises():
+    """A failing phase still shows up, with its time."""
+    with pytest.raises(ValueError):
+        with trace.span("compose up", "docker"):
+            raise ValueError("boom")
+
+    assert trace._TRACER.totals["docker"][0] == 1
+
+
+@pytest.mark.parametrize(
+    "flag,value,expected",
+    [
+        (False, None, None),
+        (True, None, trace.TRACE_FILE),
+        (False, "1", trace.TRACE_FILE),
+        (False, "yes", trace.TRACE_FILE),
+        (True, "0", trace.TRACE_FILE),
+        (False, "false", None),
+        (False, "out/add.json", "out/add.json"),
+    ],
+)
+def test_trace_path_from_flag_and_environment(flag, value, expected):
+    """DTAAS_TRACE names the file or switches tracing on; --trace always does."""
+    environ = {} if value is None else {trace.TRACE_ENV: value}
+    assert trace.trace_path(flag, environ) == expected
+
+
+def test_summary_line_lists_slowest_category_first():
+    """Total time, then each category with its time and span count."""
+    totals = {"yaml": (3, 200_000_000), "docker": (1, 1_500_000_000)}
+
+    line = trace.summary_line("dtaas user add", 2_000_000_000, totals)
+
+    assert line == "dtaas user add: 2.00s | docker 1.50s (1) | yaml 0.20s (3)"
+
+
+def test_session_writes_chrome_trace_and_prints_summary(tmp_path, capsys):
+    """Spans become complete ("X") events under the command's root span."""
+    path = tmp_path / "trace.json"
+    with trace.session("dtaas admin install", str(path)):
+        with trace.span("compose up", "docker", services=2):
+            pass
+
+    data = json.loads(path.read_text(encoding="utf-8"))
+    events = {event["name"]: event for event in data["traceEvents"]}
+    assert set(events) == {"dtaas admin install", "compose up"}
+    assert events["compose up"]["ph"] == "X"
+    assert events["compose up"]["cat"] == "docker"
+    assert events["compose up"]["args"] == {"services": "2"}
+    assert events["dtaas admin install"]["cat"] == "command"
+    assert data["otherData"]["summary"].startswith("dtaas admin install: ")
+    assert "docker" in capsys.readouterr().err
+    assert not (tmp_path / "trace.json.tmp").exists()
+    assert trace._TRACER.events is None
+
+
+def test_spanned_names_the_span_after_the_call_arguments(tmp_path):
+    """A decorated function is one span per call, named from its arguments,
+    and still returns or raises as before."""
+
+    @trace.spanned("compose up {service}", "docker")
+    def restart(directory, service, force=False):
+        if force:
+            raise OSError(directory)
+        return service
+
+    path = tmp_path / "trace.json"
+    with trace.session("dtaas admin restart", str(path)):
+        assert restart(".", service="traefik") == "traefik"
+        with pytest.raises(OSError):
+            restart(".", "client", force=True)
+
+    names = [event["name"] for event in json.loads(path.read_text())["traceEvents"]]
+    assert names.count("compose up traefik") == names.count("compose up client") == 1
+
+
+def test_session_reports_unwritable_trace_file(capsys):
+    """A trace file that cannot be written does not fail the command."""
+    with patch("src.pkg.trace._write", side_effect=OSError("read-only")):
+        with trace.session("dtaas user list", "trace.json"):
+            pass
+
+    assert "trace not written: read-only" in capsys.readouterr().err
+
+
+def test_dtaas_trace_flag_writes_trace_file(tmp_path, monkeypatch):
+    """'dtaas --trace <command>' names the command in the trace."""
+    monkeypatch.chdir(tmp_path)
+    with patch("src.cmd.sys.argv", ["dtaas", "--trace", "generate-project"]), patch(
+        "src.cmd.projectPkg.generate_project", return_value=None
+    ):
+        result = CliRunner().invoke(dtaas, ["--trace", "generate-project"])
+
+    assert result.exit_code == 0, result.output
+    data = json.loads((tmp_path / trace.TRACE_FILE).read_text(encoding="utf-8"))
+    assert data["traceEvents"][-1]["name"] == "dtaas generate-project"
+
+
+def test_dtaas_without_trace_writes_nothing(tmp_path, monkeypatch):
+    """No flag and no DTAAS_TRACE: no trace file."""
+    monkeypatch.chdir(tmp_path)
+    with patch("src.cmd.projectPkg.generate_project", return_value=None):
+        result = CliRunner().invoke(dtaas, ["generate-project"])
+
+    assert result.exit_code == 0, result.output
+    assert not (tmp_path / trace.TRACE_FILE).exists()
@@ -0,0 +1,49 @@
+"""Tests for the batched container usage sampler (usage.py)."""
+
+from unittest.mock import MagicMock, patch
+from src.pkg import usage
+
+
+def _container(name, service, running=True, paused=False):
+    """A stand-in for a python-on-whales Container."""
+    container = MagicMock()
+    container.name = name
+    container.config.labels = {"com.docker.compose.service": service}
+    container.state.running = running
+    container.state.paused = paused
+    return container
+
+
+def _stats(name, cpu, net_up, net_down):
+    """A stand-in for a python-on-whales ContainerStats."""
+    return MagicMock(
+        container_name=name,
+        cpu_percentage=cpu,
+        memory_used=1 << 20,
+        net_upload=net_up,
+        net_download=net_down,
+    )
+
+
+def test_sample_makes_one_stats_call_for_all_running_containers():
+    """Running containers share one 'docker stats' call; paused ones are skipped."""
+    client = MagicMock()
+    client.compose.ps.return_value = [
+        _container("c-alice", "alice"),
+        _container("c-bob", "bob", paused=True),
+    ]
+    client.container.stats.return_value = [_stats("c-alice", 3.5, 10, 5)]
+    with patch("src.pkg.usage.deploy.users_clients", return_value=[(client, None)]):
+        samples = usage.sample()
+
+    client.container.stats.assert_called_once_with(["c-alice"])
+    assert samples == {"alice": {"cpu": 3.5, "mem": 1 << 20, "net": 15}}
+
+
+def test_sample_skips_stats_call_when_nothing_runs():
+    """No running containers means no 'docker stats' invocation at all."""
+    client = MagicMock()
+    client.compose.ps.return_value = [_container("c-bob", "bob", running=False)]
+    with patch("src.pkg.usage.deploy.users_clients", return_value=[(client, ["bob"])]):
+        assert usage.sample(["bob"]) == {}
+    client.container.stats.assert_not_called()
@@ -0,0 +1,112 @@
+"""Tests for the streaming, chunked and resumable users.csv import."""
+
+import json
+import pytest
+from src.pkg.user_import import (
+    ChunkError,
+    import_users,
+    iter_chunks,
+    load_journal,
+    start_journal,
+)
+
+USERS_CSV = (
+    "username,email,groups,load_balance\n"
+    "alice,a@x.io,g,true\n"
+    "bob,b@x.io,g,true\n"
+    "carol,c@x.io,g,true\n"
+)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    """A three-user CSV on disk."""
+    path = tmp_path / "users.csv"
+    path.write_text(USERS_CSV, encoding="utf-8")
+    return str(path)
+
+
+def test_iter_chunks_splits_rows_into_fixed_size_dicts():
+    """Rows are grouped into dicts of at most chunk_size entries."""
+    rows = [("a", 1), ("b", 2), ("c", 3)]
+
+    assert list(iter_chunks(rows, 2)) == [{"a": 1, "b": 2}, {"c": 3}]
+
+
+def test_import_users_hands_over_each_chunk_and_clears_journal(csv_path, tmp_path):
+    """Every chunk reaches the handler in order; a finished import leaves no journal."""
+    journal = str(tmp_path / "journal.json")
+    seen = []
+
+    resumed = import_users(csv_path, lambda c, r: seen.append(list(c)), 2, journal)
+
+    assert resumed == 0
+    assert seen == [["alice", "bob"], ["carol"]]
+    assert load_journal(csv_path, journal) == {}
+
+
+def test_import_users_failure_checkpoints_the_failed_chunk(csv_path, tmp_path):
+    """A failing chunk aborts the import, leaving it recorded as pending."""
+    journal = str(tmp_path / "journal.json")
+
+    def _handler(chunk, _retry):
+        if "carol" in chunk:
+            raise ChunkError("boom")
+
+    with pytest.raises(ChunkError):
+        import_users(csv_path, _handler, 2, journal)
+
+    state = load_journal(csv_path, journal)
+    assert state["completed"] == 1
+    assert state["pending"] == ["carol"]
+
+
+def test_import_users_resumes_after_completed_chunks(csv_path, tmp_path):
+    """A re-run skips completed chunks and retries the pending one's users."""
+    journal = str(tmp_path / "journal.json")
+    state = start_journal(csv_path, 2, journal)
+    state.update(completed=1, pending=["carol"])
+    (tmp_path / "journal.json").write_text(json.dumps(state), encoding="utf-8")
+    calls = []
+
+    resumed = import_users(csv_path, lambda c, r: calls.append((list(c), r)), 2, journal)
+
+    assert resumed == 1
+    assert calls == [(["carol"], ["carol"])]
+
+
+def test_import_users_restarts_when_file_changed(csv_path, tmp_path):
+    """A journal for different file contents is ignored (fresh import)."""
+    journal = str(tmp_path / "journal.json")
+    state = start_journal(csv_path, 2, journal)
+    state.update(completed=1, fingerprint="sha256:other")
+    (tmp_path / "journal.json").write_text(json.dumps(state), encoding="utf-8")
+    seen = []
+
+    resumed = import_users(csv_path, lambda c, r: seen.append(list(c)), 2, journal)
+
+    assert resumed == 0
+    assert seen == [["alice", "bob"], ["carol"]]
+
+
+def test_import_users_rejects_non_positive_chunk_size(csv_path, tmp_path):
+    """A chunk size below one is rejected before anything is read."""
+    with pytest.raises(ValueError, match="chunk size"):
+        import_users(csv_path, lambda c, r: None, 0, str(tmp_path / "j.json"))
+
+
+def test_imports_of_different_files_keep_their_own_checkpoints(csv_path, tmp_path):
+    """Finishing one import leaves another file's checkpoint in the journal."""
+    journal = str(tmp_path / "journal.json")
+    other = tmp_path / "other.csv"
+    other.write_text("username,email,groups,load_balance\ndave,d@x.io,g,true\n")
+
+    def _fail(_chunk, _retry):
+        raise ChunkError("boom")
+
+    with pytest.raises(ChunkError):
+        import_users(str(other), _fail, 2, journal)
+    import_users(csv_path, lambda c, r: None, 2, journal)
+
+    assert load_journal(csv_path, journal) == {}
+    assert load_journal(str(other), journal)["pending"] == ["dave"]
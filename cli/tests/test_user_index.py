@@ -0,0 +1,62 @@
+"""Tests for the registry query layer (pkg/user_index.py)."""
+
+import json
+from src.pkg.user_index import UserIndex
+
+USERS = {
+    "alice": {"email": "a@x.io", "groups": ["gpu", "staff"], "desired_status": "paused"},
+    "bob": {"email": "b@x.io", "groups": ["gpu"], "host": "node2"},
+    "carol": {"email": "c@x.io", "groups": ["staff"], "desired_status": "stopped"},
+    "dave": {"email": "d@x.io", "groups": ["trial"]},
+}
+
+
+def test_select_combines_group_status_and_provisioning():
+    """Groups are a union; status and provisioning narrow it down."""
+    index = UserIndex(USERS, provisioned=["alice", "bob", "carol", "ghost"])
+
+    assert index.select() == ["alice", "bob", "carol", "dave"]
+    assert index.select(groups=["gpu"]) == ["alice", "bob"]
+    assert index.select(groups=["gpu", "trial"]) == ["alice", "bob", "dave"]
+    assert index.select(groups=["gpu"], status="running") == ["bob"]
+    assert index.select(status="stopped") == ["carol"]
+    assert index.select(provisioned=False) == ["dave"]
+    assert index.select(groups=["staff"], provisioned=True) == ["alice", "carol"]
+    assert not index.select(groups=["nobody"])
+
+
+def test_row_fills_defaults():
+    """desired_status defaults to running; host to ''."""
+    row = UserIndex(USERS, provisioned=["bob"]).row("dave")
+    assert row == {
+        "username": "dave",
+        "email": "d@x.io",
+        "groups": ["trial"],
+        "desired_status": "running",
+        "provisioned": False,
+        "host": "",
+    }
+
+
+def test_load_reads_registry_and_compose(tmp_path, monkeypatch):
+    """load() marks users with a compose.users.yml service as provisioned."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "dtaas.users.registry.json").write_text(
+        json.dumps({"users": USERS}), encoding="utf-8"
+    )
+    (tmp_path / "compose.users.yml").write_text(
+        "services:\n  alice: {}\n  dave: {}\n", encoding="utf-8"
+    )
+    assert UserIndex.load().select(provisioned=True) == ["alice", "dave"]
+
+
+def test_load_reads_both_files_from_directory(tmp_path, monkeypatch):
+    """load(directory) takes the registry from *directory* too, not the CWD."""
+    monkeypatch.chdir(tmp_path)
+    deployment = tmp_path / "deployment"
+    deployment.mkdir()
+    (deployment / "dtaas.users.registry.json").write_text(
+        json.dumps({"users": USERS}), encoding="utf-8"
+    )
+    (deployment / "compose.users.yml").write_text("services:\n  alice: {}\n", encoding="utf-8")
+    assert UserIndex.load(deployment).select(provisioned=True) == ["alice"]
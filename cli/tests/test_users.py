@@ -2,7 +2,7 @@
 
 from unittest.mock import patch, MagicMock
 import pytest
-from src.pkg import users
+from src.pkg import startup_timing, users
 # pylint: disable=redefined-outer-name,unused-argument,protected-access
 
 
@@ -18,6 +18,12 @@ def mock_config():
     )
     mock.get_tls.return_value = (False, None)
     mock.get_set_limits.return_value = (True, None)
+    mock.get_shard_size.return_value = (0, None)
+    mock.get_hosts.return_value = ([], None)
+    mock.get_warm_pool.return_value = (0, None)
+    mock.get_template_layer.return_value = ("copy", None)
+    mock.get_capacity_policy.return_value = ("off", None)
+    mock.get_routing.return_value = ("labels", None)
     return mock
 
 
@@ -36,7 +42,7 @@ def mock_utils():
     """Mock the utils functions add_users/delete_users call directly."""
     with patch("src.pkg.users.utils.import_yaml") as mi, patch(
         "src.pkg.users.utils.export_yaml"
-    ) as me:
+    ) as me, patch("src.pkg.users.shards.shards", return_value=[""]):
         mi.return_value = ({"version": "3", "services": {}}, None)
         me.return_value = None
         yield {"import": mi, "export": me}
@@ -49,11 +55,20 @@ def mock_user_operations():
         "src.pkg.users.add_users_to_compose"
     ) as ma, patch("src.pkg.users.finalize_compose") as mf, patch(
         "src.pkg.users.stop_user_containers"
-    ) as mst, patch("src.pkg.users.write_state") as mw:
+    ) as mst, patch("src.pkg.users.write_state") as mw, patch(
+        "src.pkg.users.record_startup"
+    ) as mr:
         mc.return_value = ma.return_value = mf.return_value = None
         mst.return_value = None
         mw.return_value = {}
-        yield {"create": mc, "add": ma, "finalize": mf, "stop": mst, "state": mw}
+        yield {
+            "create": mc,
+            "add": ma,
+            "finalize": mf,
+            "stop": mst,
+            "state": mw,
+            "startup": mr,
+        }
 
 
 # addUsers tests
@@ -65,7 +80,8 @@ def test_add_users_missing_fields(
 ):
     """Test add_users adds missing fields to compose"""
     mock_utils["import"].return_value = (compose, None)
-    assert users.add_users(mock_config) is None and field in compose
+    assert users.add_users(mock_config) is None
+    assert field in mock_user_operations["finalize"].call_args.args[0]
 
 
 def test_add_users_returns_registry_error(mock_config, mock_registry, mock_utils):
@@ -181,6 +197,30 @@ def test_add_users_empty_registry_is_noop(
     mock_user_operations["finalize"].assert_not_called()
 
 
+def test_add_every_user_reads_the_registry_under_the_all_users_lock(
+    mock_config, mock_registry, mock_utils, mock_user_operations
+):
+    """With no usernames, every user is locked before the registry is read,
+    so a user added meanwhile cannot be missed or left unlocked."""
+    calls = []
+    mock_registry["load"].side_effect = lambda *a: calls.append("load") or {}
+
+    class _Locks:
+        def __init__(self, names):
+            calls.append(("lock", names))
+
+        def __enter__(self):
+            calls.append("held")
+
+        def __exit__(self, *exc):
+            return False
+
+    with patch("src.pkg.users.locks.user_locks", _Locks):
+        assert users.add_users(mock_config) is None
+
+    assert calls[:3] == [("lock", None), "held", "load"]
+
+
 @pytest.mark.parametrize("export_error", [False, True])
 def test_delete_users(mock_registry, mock_utils, mock_user_operations, export_error):
     """delete_users removes users from compose and, on success, the registry."""
@@ -195,13 +235,16 @@ def test_delete_users(mock_registry, mock_utils, mock_user_operations, export_er
         mock_registry["remove"].assert_called_once_with(["user1"])
 
 
-def test_delete_users_handles_none_compose(mock_registry, mock_utils):
-    """delete_users returns an error when the compose file loads as None."""
+def test_delete_users_handles_none_compose(
+    mock_registry, mock_utils, mock_user_operations
+):
+    """A compose file that loads as None reads as having no services."""
     mock_utils["import"].return_value = (None, None)
 
     err = users.delete_users(["user1"])
 
-    assert err is not None and "Failed to load compose" in str(err)
+    assert err is None
+    mock_user_operations["stop"].assert_not_called()
 
 
 def test_delete_users_removes_conf_for_every_requested_name(
@@ -257,3 +300,237 @@ def test_delete_users_dry_run_makes_no_changes(
     out = capsys.readouterr().out
     assert "Would deprovision and stop: user1" in out
     assert "Would remove from registry: user1, ghost" in out
+
+
+def test_add_users_places_new_users_on_configured_hosts(
+    mock_config, mock_registry, mock_utils, mock_user_operations
+):
+    """With [[common.users.hosts]], new users get a host recorded in the
+    registry and a shard on that host's endpoint."""
+    mock_config.get_hosts.return_value = (
+        [{"name": "node2", "endpoint": "ssh://node2"}],
+        None,
+    )
+    mock_registry["load"].return_value = {"alice": {"load_balance": True}}
+    with patch("src.pkg.users.set_hosts") as mock_set_hosts, patch(
+        "src.pkg.users.shards.assign_shards"
+    ) as mock_assign, patch("src.pkg.users.add_conf_server_entry"):
+        err = users.add_users(mock_config)
+
+    assert err is None
+    mock_set_hosts.assert_called_once_with({"alice": "node2"})
+    assert mock_assign.call_args.kwargs["endpoints"] == {"alice": "ssh://node2"}
+
+
+def test_add_users_places_new_users_with_their_override_limits(
+    mock_config, mock_registry, mock_utils, mock_user_operations
+):
+    """A user whose resize overrides no longer fit the best-fit host is
+    placed where its own limits fit."""
+    mock_config.get_hosts.return_value = (
+        [{"name": "local", "cpus": 8}, {"name": "node2", "endpoint": "ssh://node2", "cpus": 4}],
+        None,
+    )
+    mock_registry["load"].return_value = {
+        "alice": {"load_balance": True, "resources": {"cpus": 6}}
+    }
+    with patch("src.pkg.users.set_hosts") as mock_set_hosts, patch(
+        "src.pkg.users.shards.assign_shards"
+    ), patch("src.pkg.users.add_conf_server_entry"), patch(
+        "src.pkg.users.resources.load_groups", return_value={}
+    ):
+        err = users.add_users(mock_config)
+
+    assert err is None
+    mock_set_hosts.assert_called_once_with({"alice": "local"})
+
+
+def test_add_users_records_shared_template_layer_of_new_users(
+    mock_config, mock_registry, mock_utils, mock_user_operations
+):
+    """New users get [common.users] template_layer, recorded in the registry;
+    existing users keep the layer they were created with."""
+    mock_config.get_template_layer.return_value = ("hardlink", None)
+    mock_utils["import"].return_value = (
+        {"version": "3", "services": {"bob": {"image": "ws"}}},
+        None,
+    )
+    mock_registry["load"].return_value = {"alice": {}, "bob": {"workspace": "overlay"}}
+    with patch("src.pkg.users.set_workspaces") as mock_set, patch(
+        "src.pkg.users.add_conf_server_entry"
+    ):
+        assert users.add_users(mock_config) is None
+
+    mock_set.assert_called_once_with({"alice": "hardlink"})
+    layers = mock_user_operations["create"].call_args.args[3]
+    assert layers == {"alice": "hardlink", "bob": "overlay"}
+
+
+def test_add_users_checks_capacity_of_starting_users(
+    mock_config, mock_registry, mock_utils, mock_user_operations
+):
+    """Only new users about to start are checked, with their own overrides;
+    a refusal stops provisioning before anything is created."""
+    mock_config.get_capacity_policy.return_value = ("refuse", None)
+    mock_registry["load"].return_value = {
+        "alice": {"resources": {"cpus": 8}},
+        "bob": {"desired_status": "stopped"},
+    }
+    with patch(
+        "src.pkg.users.capacity.check", side_effect=ValueError("Not enough host capacity")
+    ) as mock_check:
+        err = users.add_users(mock_config)
+
+    assert isinstance(err, ValueError)
+    requests, policy = mock_check.call_args.args
+    assert policy == "refuse"
+    assert requests == {"": [(8.0, 4 << 30, 4960)]}
+    mock_user_operations["create"].assert_not_called()
+
+
+def test_add_users_prepulls_images_of_new_users(
+    mock_config, mock_registry, mock_utils, mock_user_operations
+):
+    """Images of users about to start are pulled around workspace file creation."""
+    mock_registry["load"].return_value = {
+        "alice": {"email": "a@x.io"},
+        "bob": {"email": "b@x.io", "desired_status": "stopped"},
+    }
+
+    def render(users_list, compose, _config):
+        for name in users_list:
+            compose["services"][name] = {"image": "workspace:1"}
+
+    mock_user_operations["add"].side_effect = render
+    with patch("src.pkg.users.images.Prepull") as mock_prepull, patch(
+        "src.pkg.users.add_conf_server_entry"
+    ), patch("src.pkg.images.shards.shard_endpoint", return_value=""):
+        err = users.add_users(mock_config)
+
+    assert err is None
+    mock_prepull.assert_called_once_with({"": ["workspace:1"]})
+    mock_prepull.return_value.finish.assert_called_once()
+
+
+def test_reprovision_users_touches_only_the_named_users(
+    mock_config, mock_registry, mock_utils, mock_user_operations
+):
+    """reprovision_users renders, authorises and starts only its targets."""
+    mock_registry["load"].return_value = {
+        "alice": {"email": "a@x.io"},
+        "bob": {"email": "b@x.io"},
+    }
+    with patch("src.pkg.users.add_conf_server_entry") as mock_auth:
+        err = users.reprovision_users(mock_config, ["bob", "zed"])
+
+    assert err is None
+    assert mock_user_operations["create"].call_args.args[0] == ["bob"]
+    assert mock_user_operations["add"].call_args.args[0] == ["bob"]
+    mock_auth.assert_called_once_with("bob", "b@x.io")
+    assert mock_user_operations["finalize"].call_args.args[2] == ["bob", "zed"]
+
+
+def test_reprovision_users_writes_a_drifted_paused_user(
+    mock_config, mock_registry, mock_utils, mock_user_operations
+):
+    """A paused user's re-rendered service is written, but not started."""
+    mock_registry["load"].return_value = {
+        "alice": {"email": "a@x.io", "desired_status": "paused"},
+    }
+    with patch("src.pkg.users.add_conf_server_entry"):
+        err = users.reprovision_users(mock_config, ["alice"])
+
+    assert err is None
+    finalize = mock_user_operations["finalize"].call_args
+    assert finalize.args[2] == []
+    assert finalize.kwargs["written"] == ["alice"]
+
+
+def test_add_users_records_startup_timings_of_started_users(
+    mock_config, mock_registry, mock_utils, mock_user_operations
+):
+    """Only the users started get render/workspace/compose_up timings, which
+    are stored in the state cache; without --timings nothing is waited on."""
+    mock_registry["load"].return_value = {"alice": {}, "bob": {}}
+    timings = startup_timing.Timings()
+    timings.record("registry", ["alice"], 0.5)
+    with patch("src.pkg.users.add_conf_server_entry"), patch(
+        "src.pkg.users.startup_timing.wait_until_ready"
+    ) as mock_wait:
+        err = users.add_users(mock_config, start_only=["alice"], timings=timings)
+
+    assert err is None
+    mock_wait.assert_not_called()
+    (recorded,) = mock_user_operations["startup"].call_args.args
+    assert list(recorded) == ["alice"]
+    assert set(recorded["alice"]) == {"registry", "render", "workspace", "compose_up"}
+
+
+def test_add_users_waits_for_started_users_with_timings(
+    mock_config, mock_registry, mock_utils, mock_user_operations
+):
+    """With Timings(wait=True) the started users are polled until ready."""
+    timings = startup_timing.Timings(wait=True)
+    with patch("src.pkg.users.add_conf_server_entry"), patch(
+        "src.pkg.users.startup_timing.wait_until_ready"
+    ) as mock_wait:
+        assert users.add_users(mock_config, start_only=["user1"], timings=timings) is None
+
+    mock_wait.assert_called_once_with(timings, ["user1"])
+
+
+def test_add_users_writes_routes_under_file_routing(
+    mock_config, mock_registry, mock_utils, mock_user_operations
+):
+    """routing = "file" checks Traefik's mount, then routes every provisioned
+    user, and the ones being added, before anything is started."""
+    mock_config.get_routing.return_value = ("file", None)
+    mock_utils["import"].return_value = (
+        {"version": "3", "services": {"bob": {"image": "ws"}}},
+        None,
+    )
+    with patch("src.pkg.users.add_conf_server_entry"), patch(
+        "src.pkg.users.routes.check_traefik"
+    ) as mock_check, patch("src.pkg.users.routes.write_routes") as mock_write:
+        assert users.add_users(mock_config, start_only=["user1"]) is None
+
+    assert str(mock_check.call_args.args[0]) == "/test/path/docker-compose.yml"
+    usernames, config, _ = mock_write.call_args.args
+    assert usernames == {"bob", "user1"} and config["routing"] == "file"
+
+
+def test_add_users_refuses_file_routing_without_traefik_mount(
+    mock_config, mock_registry, mock_utils, mock_user_operations
+):
+    """A Traefik that does not read the routes directory stops provisioning."""
+    mock_config.get_routing.return_value = ("file", None)
+    with patch(
+        "src.pkg.users.routes.check_traefik", side_effect=ValueError("needs Traefik")
+    ):
+        err = users.add_users(mock_config)
+
+    assert isinstance(err, ValueError)
+    mock_user_operations["create"].assert_not_called()
+
+
+def test_delete_users_removes_overlay_volumes(mock_registry, mock_utils, mock_user_operations):
+    """Deleted overlay users lose their named volume, which 'compose rm' keeps."""
+    mock_utils["import"].return_value = (
+        {"services": {"user1": {}, "user2": {}}, "volumes": {"user1": {"driver": "local"}}},
+        None,
+    )
+
+    with patch("src.pkg.users.template_layer.remove_overlay_volumes") as mock_remove:
+        assert users.delete_users(["user1", "user2"]) is None
+
+    mock_remove.assert_called_once_with(["user1"])
+
+
+def test_delete_users_drops_their_routes(mock_registry, mock_utils, mock_user_operations):
+    """Deleted users lose their routers in the routes file."""
+    mock_utils["import"].return_value = ({"services": {"user1": {}}}, None)
+
+    with patch("src.pkg.users.routes.remove_routes") as mock_remove:
+        assert users.delete_users(["user1", "ghost"]) is None
+
+    mock_remove.assert_called_once_with(["user1"])
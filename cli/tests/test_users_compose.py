@@ -39,7 +39,7 @@ def test_create_user_files(temp_dir_with_template, usernames):
 
 def test_create_user_files_chowns_nested_items(temp_dir_with_template):
     """When chown succeeds, ownership is applied to the dir and every nested item."""
-    with patch("src.pkg.users_compose.shutil.chown") as mock_chown:
+    with patch("src.pkg.warm_pool.shutil.chown") as mock_chown:
         assert (
             users_compose.create_user_files(["alice"], temp_dir_with_template) is None
         )
@@ -148,6 +148,18 @@ def test_get_compose_config_includes_limits_when_enabled(project_templates):
     assert result["shm_size"] == "512m"
 
 
+def test_get_compose_config_applies_user_overrides(project_templates):
+    """Registry limit overrides (config['overrides']) win over the defaults."""
+    config = _limits_config(True)
+    config["overrides"] = {"alice": {"cpus": 8, "mem_limit": "16G"}}
+
+    result, err = users_compose.get_compose_config("alice", config)
+
+    assert err is None
+    assert (result["cpus"], result["mem_limit"]) == ("8", "16G")
+    assert (result["pids_limit"], result["shm_size"]) == ("4960", "512m")
+
+
 def test_get_compose_config_missing_template(tmp_path, monkeypatch):
     """A missing user-workspace template yields a clear, actionable error."""
     monkeypatch.chdir(tmp_path)  # no users.server.yml in this directory
@@ -221,3 +233,91 @@ def test_finalize_compose_skips_paused_or_stopped_users(mock_utils):
         users_compose.finalize_compose(compose, skip_start={"bob"})
 
     assert mock_start.call_args.args[0] == ["alice"]
+
+
+def test_finalize_compose_writes_users_it_does_not_start(tmp_path, monkeypatch):
+    """A paused user being reprovisioned has its service written, though
+    it is not started."""
+    monkeypatch.chdir(tmp_path)
+    compose = {"services": {"alice": {"image": "v2"}}}
+    with patch(
+        "src.pkg.users_compose.start_user_containers", return_value=None
+    ) as mock_start, patch("src.pkg.users_compose.write_state"):
+        users_compose.finalize_compose(
+            compose, skip_start={"alice"}, start_only=[], written=["alice"]
+        )
+
+    mock_start.assert_not_called()
+    assert "image: v2" in (tmp_path / "compose.users.yml").read_text(encoding="utf-8")
+
+
+@patch("src.pkg.users_compose.subprocess.run", return_value=MagicMock(returncode=0))
+def test_start_user_containers_runs_once_per_shard(mock_run, tmp_path, monkeypatch):
+    """Users in a numbered shard are started through that shard's own project."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".dtaas.shards.json").write_text('{"users": {"bob": "0001"}}')
+
+    users_compose.start_user_containers(["alice", "bob"])
+
+    argvs = [call.args[0] for call in mock_run.call_args_list]
+    assert argvs[0][:4] == ["docker", "compose", "-f", "compose.users.yml"]
+    assert argvs[0][-1] == "alice"
+    assert argvs[1][2:6] == ["-f", "compose.users.0001.yml", "-p", "dtaas-users-0001"]
+    assert argvs[1][-1] == "bob"
+
+
+@patch("src.pkg.users_compose.subprocess.run", return_value=MagicMock(returncode=0))
+def test_compose_argv_targets_remote_shard_host(mock_run, tmp_path, monkeypatch):
+    """A shard placed on another host is driven with docker's --host flag."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".dtaas.shards.json").write_text(
+        '{"users": {"bob": "0001"}, "endpoints": {"0001": "ssh://node2"}}'
+    )
+
+    users_compose.stop_user_containers(["bob"])
+
+    argv = mock_run.call_args.args[0]
+    assert argv[:4] == ["docker", "--host", "ssh://node2", "compose"]
+
+
+def test_overlay_user_mounts_a_volume_in_compose(project_templates):
+    """An overlay user's /workspace is the named volume declared in compose."""
+    config = {
+        "server": "foo.com",
+        "path": "/opt/dtaas",
+        "resources": {},
+        "set_limits": False,
+        "layers": {"alice": "overlay", "bob": "copy"},
+    }
+    compose = {"services": {}}
+
+    assert users_compose.add_users_to_compose(["alice", "bob"], compose, config) is None
+
+    assert "alice:/workspace" in compose["services"]["alice"]["volumes"]
+    assert "/opt/dtaas/files/bob:/workspace" in compose["services"]["bob"]["volumes"]
+    options = compose["volumes"]["alice"]["driver_opts"]["o"]
+    assert options == (
+        "lowerdir=/opt/dtaas/files/template,upperdir=/opt/dtaas/files/alice,"
+        "workdir=/opt/dtaas/files/.overlay-work/alice"
+    )
+    assert list(compose["volumes"]) == ["alice"]
+
+
+def test_file_routing_leaves_traefik_labels_out(project_templates):
+    """Under routing = "file" a user's service carries no Traefik labels."""
+    config = {
+        "server": "foo.com",
+        "path": "/opt/dtaas",
+        "resources": {},
+        "tls": True,
+        "set_limits": False,
+        "routing": "file",
+    }
+
+    service, err = users_compose.get_compose_config("alice", config)
+
+    assert err is None
+    assert not any(label.startswith("traefik.") for label in service.get("labels", []))
+    config["routing"] = "labels"
+    service, _ = users_compose.get_compose_config("alice", config)
+    assert "traefik.enable=true" in service["labels"]
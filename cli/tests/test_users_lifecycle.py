@@ -46,10 +46,10 @@ def mock_state():
         yield mock_write
 
 
-def test_load_services_empty_when_compose_absent():
+def test_load_services_empty_when_compose_absent(tmp_path, monkeypatch):
     """_load_services returns {} when compose.users.yml has never been written."""
-    with patch("src.pkg.users_lifecycle.utils.import_yaml", return_value=({}, None)):
-        assert users_lifecycle._load_services() == {}
+    monkeypatch.chdir(tmp_path)
+    assert users_lifecycle._load_services() == {}
 
 
 def test_split_targets_categorizes_names(mock_registry):
@@ -276,3 +276,18 @@ def test_resume_users_end_to_end(mock_registry, mock_services, mock_state):
 
     mock_resume.assert_called_once_with(["alice"])
     mock_registry["set_status"].assert_called_once_with(["alice"], "running")
+
+
+def test_restart_running_skips_paused_and_stopped():
+    """restart_running only restarts running containers (to remount files)."""
+    client = MagicMock()
+    client.compose.ps.return_value = [
+        _fake_container("alice", paused=False, status="running"),
+        _fake_container("bob", paused=True),
+        _fake_container("carol", status="exited"),
+    ]
+    with patch("src.pkg.users_lifecycle.deploy._users_client", return_value=client):
+        restarted = users_lifecycle.restart_running(["alice", "bob", "carol"])
+
+    assert restarted == ["alice"]
+    client.compose.restart.assert_called_once_with(services=["alice"])
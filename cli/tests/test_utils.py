@@ -1,5 +1,7 @@
 """Tests for utils module."""
 
+from unittest.mock import patch
+import yaml
 from src.pkg import utils
 
 
@@ -281,3 +283,54 @@ def get_test_compose_object():
     }
 
     return test_compose
+
+
+def test_read_yaml_caches_until_the_file_changes(tmp_path):
+    """A file is parsed once while its mtime and size stay the same, and
+    callers get copies they may modify."""
+    path = tmp_path / "compose.yml"
+    path.write_text("services:\n  alice: {}\n", encoding="utf-8")
+    with patch("src.pkg.utils.load_yaml_text", wraps=utils.load_yaml_text) as parse:
+        first = utils.read_yaml(path)
+        first["services"]["bob"] = {}
+        assert utils.read_yaml(path) == {"services": {"alice": {}}}
+        assert parse.call_count == 1
+
+        path.write_text("services:\n  carolyn: {}\n", encoding="utf-8")
+        assert utils.read_yaml(path) == {"services": {"carolyn": {}}}
+        assert parse.call_count == 2
+
+
+def test_export_yaml_replaces_atomically_and_invalidates(tmp_path):
+    """export_yaml keeps the file mode, leaves no temp file, and the next
+    import sees the new content."""
+    path = tmp_path / "compose.yml"
+    path.write_text("services: {}\n", encoding="utf-8")
+    path.chmod(0o640)
+    assert utils.import_yaml(str(path)) == ({"services": {}}, None)
+
+    assert utils.export_yaml({"services": {"alice": {}}}, str(path)) is None
+    assert utils.import_yaml(str(path)) == ({"services": {"alice": {}}}, None)
+    assert oct(path.stat().st_mode & 0o777) == oct(0o640)
+    assert [p.name for p in tmp_path.iterdir()] == ["compose.yml"]
+
+
+def test_write_json_replaces_atomically(tmp_path):
+    """write_json fsyncs a temp file, renames it over the target and leaves
+    nothing else behind; indent=None writes a single line."""
+    path = tmp_path / "state.json"
+    with patch("src.pkg.utils.os.fsync") as mock_fsync:
+        utils.write_json({"b": 1, "a": [1, 2]}, path)
+    mock_fsync.assert_called_once()
+    assert path.read_text(encoding="utf-8").startswith('{\n  "a": [')
+
+    utils.write_json({"b": 1, "a": 2}, path, indent=None, sort_keys=False)
+    assert path.read_text(encoding="utf-8") == '{"b": 1, "a": 2}\n'
+    assert [p.name for p in tmp_path.iterdir()] == ["state.json"]
+
+
+def test_yaml_uses_libyaml_when_available():
+    """The C loader/dumper are used when PyYAML was built with libyaml."""
+    if yaml.__with_libyaml__:
+        assert utils._YamlLoader is yaml.CSafeLoader  # pylint: disable=protected-access
+    assert utils.load_yaml_text(utils.dump_yaml_text({"a": [1, "b"]})) == {"a": [1, "b"]}
@@ -0,0 +1,74 @@
+"""Tests for the warm pool of pre-copied workspace directories (warm_pool.py)."""
+
+from unittest.mock import patch
+import pytest
+from src.pkg import users_compose, warm_pool
+# pylint: disable=redefined-outer-name
+
+
+@pytest.fixture
+def files_dir(tmp_path):
+    """A files/ directory with a one-file template."""
+    (tmp_path / "template").mkdir()
+    (tmp_path / "template" / "README.md").write_text("hello")
+    return tmp_path
+
+
+def test_fill_tops_up_to_size(files_dir):
+    """fill creates only the missing slots, each a full template copy."""
+    assert warm_pool.fill(files_dir, 2) == 2
+    assert warm_pool.fill(files_dir, 3) == 1
+
+    slots = warm_pool.slots(files_dir)
+    assert len(slots) == 3
+    assert (slots[0] / "README.md").read_text() == "hello"
+
+
+def test_claim_moves_a_slot_to_the_user(files_dir):
+    """claim renames a ready slot to files/<username>."""
+    warm_pool.fill(files_dir, 1)
+
+    assert warm_pool.claim("alice", files_dir) is True
+    assert (files_dir / "alice" / "README.md").read_text() == "hello"
+    assert warm_pool.claim("bob", files_dir) is False
+
+
+def test_changed_template_discards_stale_slots(files_dir):
+    """Slots copied from an older template are never handed out."""
+    warm_pool.fill(files_dir, 1)
+    (files_dir / "template" / "NEW.md").write_text("new")
+
+    assert warm_pool.refresh(files_dir) is True
+    assert warm_pool.claim("alice", files_dir) is False
+    assert warm_pool.slots(files_dir) == []
+
+
+def test_create_user_files_claims_then_refills_in_background(files_dir):
+    """New users take pooled dirs; existing ones are copied as before."""
+    warm_pool.fill(files_dir, 1)
+    (files_dir / "bob").mkdir()
+    with patch("src.pkg.users_compose.warm_pool.refill_in_background") as mock_refill:
+        users_compose.create_user_files(["alice", "bob"], str(files_dir), 1)
+
+    assert warm_pool.slots(files_dir) == []
+    assert (files_dir / "bob" / "README.md").exists()
+    mock_refill.assert_called_once_with(str(files_dir), 1)
+
+
+def test_create_user_files_starts_a_pool_that_does_not_exist_yet(files_dir):
+    """A missing files/.pool is filled in the background, not only after a claim."""
+    with patch("src.pkg.users_compose.warm_pool.refill_in_background") as mock_refill:
+        users_compose.create_user_files(["alice"], str(files_dir), 2)
+
+    assert (files_dir / "alice" / "README.md").exists()
+    mock_refill.assert_called_once_with(str(files_dir), 2)
+
+
+def test_create_user_files_leaves_a_full_pool_alone(files_dir):
+    """Existing users claim nothing, so a full pool is not refilled."""
+    warm_pool.fill(files_dir, 1)
+    (files_dir / "bob").mkdir()
+    with patch("src.pkg.users_compose.warm_pool.refill_in_background") as mock_refill:
+        users_compose.create_user_files(["bob"], str(files_dir), 1)
+
+    mock_refill.assert_not_called()
@@ -2,11 +2,22 @@
 
 import click
 from .commands import service_ops, setup_ops, user_ops
+from .pkg import docker_calls
 
 
 @click.group()
-def services():
+@click.option(
+    "--docker-calls",
+    "record_calls",
+    is_flag=True,
+    help="Print how many docker processes the command spawned and their time "
+    "per docker command (or set DTAAS_DOCKER_CALLS=1).",
+)
+@click.pass_context
+def services(ctx: click.Context, record_calls: bool) -> None:
     """Manage DTaaS platform services."""
+    if docker_calls.enabled(record_calls):
+        ctx.with_resource(docker_calls.session())
 
 
 # Register setup and installation commands
@@ -34,4 +45,4 @@ user.add_command(user_ops.reset_password)
 
 
 if __name__ == "__main__":
-    services()
+    services()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,255 @@
+"""Recorder of the docker CLI processes a command spawns.
+
+Every python-on-whales call (``docker exec`` in docker_utils, ``docker
+compose`` in the service manager) forks a docker process through
+python_on_whales.utils.run or stream_stdout_and_stderr. Inside
+``recording()`` both are wrapped and each process is kept as a Call with
+its argv, wall time, exit code and captured output size.
+``dtaas-services --docker-calls`` (or DTAAS_DOCKER_CALLS=1) prints the
+per-command summary when the command ends; tests use the recorder to pin
+the number of docker round trips of an operation.
+"""
+
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, Mapping
+import click
+from python_on_whales import utils as whales_utils
+from python_on_whales.exceptions import DockerException
+
+DOCKER_CALLS_ENV = "DTAAS_DOCKER_CALLS"
+
+# docker management commands whose subcommand names the call ("compose up").
+_GROUPS = frozenset(
+    {"buildx", "compose", "container", "context", "image", "network", "system", "volume"}
+)
+
+
+def command_name(argv: list[str]) -> str:
+    """Name the docker command of an argv, skipping options and their values.
+
+    Args:
+        argv: Full docker argv, binary first
+
+    Returns:
+        The command, e.g. "exec" or "compose up"
+    """
+    words: list[str] = []
+    skip = False
+    for arg in (str(arg) for arg in argv[1:]):
+        if arg.startswith("-"):
+            skip = "=" not in arg
+            continue
+        if skip:
+            skip = False
+            continue
+        words.append(arg)
+        if words[0] not in _GROUPS or len(words) == 2:
+            break
+    return " ".join(words) or "docker"
+
+
+@dataclass
+class Call:
+    """One docker process."""
+
+    argv: list[str]
+    seconds: float
+    exit_code: int
+    output_bytes: int = 0
+
+    @property
+    def command(self) -> str:
+        """The docker command run, e.g. "compose up"."""
+        return command_name(self.argv)
+
+
+@dataclass
+class Recorder:
+    """The docker processes spawned while recording."""
+
+    calls: list[Call] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, call: Call) -> None:
+        """Keep one finished call."""
+        with self.lock:
+            self.calls.append(call)
+
+    def count(self, command: str | None = None) -> int:
+        """Count processes, in total or for one command.
+
+        Args:
+            command: Docker command such as "compose up", or None for all
+
+        Returns:
+            Number of docker processes spawned
+        """
+        return sum(1 for call in self.calls if command in (None, call.command))
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Aggregate calls per command, slowest first.
+
+        Returns:
+            {command: {"calls", "seconds", "failed", "output_bytes"}}
+        """
+        rows: dict[str, dict[str, float]] = {}
+        for call in self.calls:
+            row = rows.setdefault(
+                call.command,
+                {"calls": 0, "seconds": 0.0, "failed": 0, "output_bytes": 0},
+            )
+            row["calls"] += 1
+            row["seconds"] += call.seconds
+            row["failed"] += call.exit_code != 0
+            row["output_bytes"] += call.output_bytes
+        return dict(sorted(rows.items(), key=lambda item: -item[1]["seconds"]))
+
+
+_ACTIVE: list[Recorder] = []
+_ORIGINALS: dict[tuple[Any, str], Callable] = {}
+
+
+def record(argv: list, seconds: float, exit_code: int, output_bytes: int = 0) -> None:
+    """Add a docker process to every active recorder (no-op when none is)."""
+    if not _ACTIVE:
+        return
+    call = Call([str(arg) for arg in argv], seconds, exit_code, output_bytes)
+    for recorder in list(_ACTIVE):
+        recorder.add(call)
+
+
+def _size(output: Any) -> int:
+    """Bytes of python-on-whales output: a str or a (stdout, stderr) tuple."""
+    if isinstance(output, tuple):
+        return sum(_size(part) for part in output)
+    return len(output.encode()) if isinstance(output, str) else 0
+
+
+def _recorded_run(run: Callable) -> Callable:
+    """Wrap python_on_whales.utils.run so each process is recorded."""
+
+    def wrapper(args: list, *rest: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            output = run(args, *rest, **kwargs)
+        except DockerException as exc:
+            size = _size((exc.stdout or "", exc.stderr or ""))
+            record(args, time.perf_counter() - start, exc.return_code, size)
+            raise
+        record(args, time.perf_counter() - start, 0, _size(output))
+        return output
+
+    return wrapper
+
+
+def _recorded_stream(stream: Callable) -> Callable:
+    """Wrap python_on_whales.utils.stream_stdout_and_stderr likewise."""
+
+    def wrapper(full_cmd: list, *rest: Any, **kwargs: Any) -> Iterator:
+        start, size = time.perf_counter(), 0
+        try:
+            for source, line in stream(full_cmd, *rest, **kwargs):
+                size += len(line)
+                yield source, line
+        except DockerException as exc:
+            record(full_cmd, time.perf_counter() - start, exc.return_code, size)
+            raise
+        record(full_cmd, time.perf_counter() - start, 0, size)
+
+    return wrapper
+
+
+def _install() -> None:
+    """Point every python-on-whales reference to run/stream at a wrapper.
+
+    Components import these functions by name, so each loaded
+    python_on_whales module is patched, not just python_on_whales.utils.
+    """
+    wrappers = {
+        "run": (whales_utils.run, _recorded_run(whales_utils.run)),
+        "stream_stdout_and_stderr": (
+            whales_utils.stream_stdout_and_stderr,
+            _recorded_stream(whales_utils.stream_stdout_and_stderr),
+        ),
+    }
+    for name, module in list(sys.modules.items()):
+        if module is None or name.split(".")[0] != "python_on_whales":
+            continue
+        for attr, (original, wrapper) in wrappers.items():
+            if getattr(module, attr, None) is original:
+                _ORIGINALS[(module, attr)] = original
+                setattr(module, attr, wrapper)
+
+
+def _uninstall() -> None:
+    """Restore the python-on-whales functions replaced by _install()."""
+    for (module, attr), original in _ORIGINALS.items():
+        setattr(module, attr, original)
+    _ORIGINALS.clear()
+
+
+@contextmanager
+def recording() -> Iterator[Recorder]:
+    """Record the docker processes spawned in the enclosed block.
+
+    Yields:
+        The Recorder collecting the calls
+    """
+    recorder = Recorder()
+    if not _ACTIVE:
+        _install()
+    _ACTIVE.append(recorder)
+    try:
+        yield recorder
+    finally:
+        _ACTIVE.remove(recorder)
+        if not _ACTIVE:
+            _uninstall()
+
+
+def enabled(flag: bool = False, environ: Mapping[str, str] | None = None) -> bool:
+    """Whether --docker-calls or DTAAS_DOCKER_CALLS=1/true/yes asks to record."""
+    value = (os.environ if environ is None else environ).get(DOCKER_CALLS_ENV, "")
+    return flag or value.lower() in ("1", "true", "yes")
+
+
+def summary_lines(recorder: Recorder) -> list[str]:
+    """Format the per-command summary of a recorder as table lines."""
+    rows = recorder.summary()
+    seconds = sum(row["seconds"] for row in rows.values())
+    lines = [f"docker processes: {recorder.count()} in {seconds:.2f}s"]
+    if not rows:
+        return lines
+    table = [("COMMAND", "CALLS", "TIME", "FAILED", "OUTPUT")]
+    table += [
+        (
+            command,
+            str(int(row["calls"])),
+            f"{row['seconds']:.2f}s",
+            str(int(row["failed"])),
+            f"{int(row['output_bytes'])}B",
+        )
+        for command, row in rows.items()
+    ]
+    widths = [max(len(row[i]) for row in table) for i in range(len(table[0]))]
+    for row in table:
+        lines.append(
+            "  ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)).rstrip()
+        )
+    return lines
+
+
+@contextmanager
+def session() -> Iterator[Recorder]:
+    """Record the enclosed command, then print its summary to stderr."""
+    with recording() as recorder:
+        try:
+            yield recorder
+        finally:
+            for line in summary_lines(recorder):
+                click.echo(line, err=True)
@@ -0,0 +1,85 @@
+"""Tests for the recorder of spawned docker processes."""
+
+import subprocess
+import pytest
+from python_on_whales import DockerClient
+from python_on_whales.exceptions import DockerException
+import python_on_whales.components.container.cli_wrapper as container_wrapper
+from dtaas_services.pkg import docker_calls
+from dtaas_services.pkg.docker_utils import execute_docker_command, DockerRunOptions
+
+
+def _completed(returncode=0, stdout=b"", stderr=b""):
+    """A finished docker process as subprocess.run returns it"""
+    return subprocess.CompletedProcess(["docker"], returncode, stdout, stderr)
+
+
+@pytest.mark.parametrize(
+    "argv,expected",
+    [
+        (["docker", "exec", "--env", "A=1", "mongodb", "mongosh"], "exec"),
+        (["docker", "compose", "--file", "compose.yml", "up", "-d"], "compose up"),
+        (["docker", "--version"], "docker"),
+    ],
+)
+def test_command_name(argv, expected):
+    """Test options and their values are skipped when naming a call"""
+    assert docker_calls.command_name(argv) == expected
+
+
+def test_recording_counts_docker_exec_calls(mocker):
+    """Test every retry of execute_docker_command is one docker process"""
+    mocker.patch(
+        "dtaas_services.pkg.docker_utils.DockerClient",
+        return_value=DockerClient(client_call=["true"]),
+    )
+    mocker.patch(
+        "python_on_whales.utils.subprocess.run",
+        side_effect=[_completed(1, b"", b"not ready\n"), _completed(stdout=b"ok\n")],
+    )
+    with docker_calls.recording() as recorder:
+        success, _ = execute_docker_command(
+            "mongodb", ["mongosh"], DockerRunOptions(max_attempts=2, delay=0)
+        )
+    assert success is True
+    assert recorder.count("exec") == 2
+    assert [call.exit_code for call in recorder.calls] == [1, 0]
+    assert recorder.summary()["exec"]["failed"] == 1
+
+
+def test_recording_reraises_docker_errors(mocker):
+    """Test a failing process is recorded and its error re-raised"""
+    mocker.patch(
+        "python_on_whales.utils.subprocess.run",
+        return_value=_completed(1, b"", b"boom\n"),
+    )
+    with docker_calls.recording() as recorder:
+        with pytest.raises(DockerException):
+            DockerClient(client_call=["true"]).execute("mongodb", ["true"])
+    assert recorder.calls[0].output_bytes == len("boom\n")
+
+
+def test_recording_restores_python_on_whales():
+    """Test python-on-whales is untouched outside recording()"""
+    original = container_wrapper.run
+    with docker_calls.recording():
+        assert container_wrapper.run is not original
+    assert container_wrapper.run is original
+
+
+def test_summary_lines():
+    """Test the summary totals processes and lists each command"""
+    recorder = docker_calls.Recorder()
+    recorder.add(docker_calls.Call(["docker", "exec", "db"], 0.5, 0, 3))
+    recorder.add(docker_calls.Call(["docker", "compose", "up"], 1.0, 0))
+    lines = docker_calls.summary_lines(recorder)
+    assert lines[0] == "docker processes: 2 in 1.50s"
+    assert lines[2].split() == ["compose", "up", "1", "1.00s", "0", "0B"]
+    assert lines[3].split() == ["exec", "1", "0.50s", "0", "3B"]
+
+
+def test_enabled():
+    """Test the flag or DTAAS_DOCKER_CALLS switches recording on"""
+    assert docker_calls.enabled(True, {}) is True
+    assert docker_calls.enabled(False, {docker_calls.DOCKER_CALLS_ENV: "1"}) is True
+    assert docker_calls.enabled(False, {}) is False